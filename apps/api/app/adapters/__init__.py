@@ -2,10 +2,28 @@ from .shixiseng_adapter import ShixiSengAdapter
 from .zhaopin_adapter import ZhaopinAdapter
 from .job51_adapter import Job51Adapter
 from .boss_adapter import BossAdapter
+from .transport import AdapterTransport, FetchResult, TransportConfig
+from .browser_pool import BrowserPool, BrowserPoolConfig
+from .politeness import PolitenessConfig, PolitenessScheduler, SourcePacer, SourceUnavailable
+from .replay import FaultConfig, Fixture, FixtureStore, RecordingTransport, ReplayServer
 
 __all__ = [
     "ShixiSengAdapter",
     "ZhaopinAdapter", 
     "Job51Adapter",
-    "BossAdapter"
+    "BossAdapter",
+    "AdapterTransport",
+    "TransportConfig",
+    "FetchResult",
+    "BrowserPool",
+    "BrowserPoolConfig",
+    "PolitenessConfig",
+    "PolitenessScheduler",
+    "SourcePacer",
+    "SourceUnavailable",
+    "FaultConfig",
+    "Fixture",
+    "FixtureStore",
+    "RecordingTransport",
+    "ReplayServer"
 ]
\ No newline at end of file
@@ -1,18 +1,79 @@
 from __future__ import annotations
 
-import asyncio
 import logging
+import time
 from typing import Optional, List, Dict, Any
+from urllib.parse import urlencode
+
+from .browser_pool import BrowserPool
+from .politeness import SourcePacer, SourceUnavailable, block_page_signal, throttle_signal
+from .replay import FixtureStore
+from .transport import FetchResult, stable_job_key
 
 logger = logging.getLogger(__name__)
 
+_EXTRACT_JOB_LIST = """
+    (limit) => {
+        const jobItems = document.querySelectorAll('.job-card-wrapper');
+        const results = [];
+        
+        for (let i = 0; i < Math.min(jobItems.length, limit); i++) {
+            const item = jobItems[i];
+            const titleEl = item.querySelector('.job-name');
+            const companyEl = item.querySelector('.company-name');
+            const locationEl = item.querySelector('.job-area');
+            const linkEl = item.querySelector('a');
+            
+            if (titleEl && companyEl) {
+                results.push({
+                    title: titleEl.textContent.trim(),
+                    company: companyEl.textContent.trim(),
+                    location: locationEl ? locationEl.textContent.trim() : '',
+                    url: linkEl ? linkEl.href : ''
+                });
+            }
+        }
+        
+        return results;
+    }
+"""
+
+_EXTRACT_JOB_DETAIL = """
+    () => {
+        const titleEl = document.querySelector('.name');
+        const companyEl = document.querySelector('.company-name');
+        const locationEl = document.querySelector('.location-address');
+        const descEl = document.querySelector('.job-sec .text');
+        
+        return {
+            title: titleEl ? titleEl.textContent.trim() : '',
+            company: companyEl ? companyEl.textContent.trim() : '',
+            location: locationEl ? locationEl.textContent.trim() : '',
+            description: descEl ? descEl.textContent.trim() : ''
+        };
+    }
+"""
+
 
 class BossAdapter:
-    """BOSS直聘适配器（使用Playwright）"""
-    
-    def __init__(self):
-        self.playwright = None
-        self.browser = None
+    """BOSS直聘适配器（使用Playwright，页面操作通过浏览器上下文池执行）"""
+
+    BASE_URL = "https://www.zhipin.com"
+
+    def __init__(
+        self,
+        pool: Optional[BrowserPool] = None,
+        base_url: Optional[str] = None,
+        pacer: Optional[SourcePacer] = None,
+        recorder: Optional[FixtureStore] = None
+    ):
+        self.pool = pool or BrowserPool()
+        # 可指向本地 HTML fixture 服务做基准测试
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
+        # 按源节流；导航被限流或跳转到验证页时回报
+        self.pacer = pacer
+        # 录制 fixture 时保存每个页面渲染后的 HTML，供离线回放
+        self.recorder = recorder
 
     def is_available(self) -> bool:
         """检查Playwright是否可用"""
@@ -22,20 +83,35 @@ class BossAdapter:
         except ImportError:
             return False
 
-    async def _init_browser(self):
-        """初始化浏览器"""
-        if self.browser is None:
-            try:
-                from playwright.async_api import async_playwright
-                
-                self.playwright = await async_playwright().start()
-                self.browser = await self.playwright.chromium.launch(
-                    headless=True,
-                    args=['--no-sandbox', '--disable-dev-shm-usage']
-                )
-            except Exception as e:
-                logger.error(f"初始化浏览器失败: {e}")
-                raise
+    async def _goto(self, page: Any, url: str, selector: str) -> None:
+        """DOM 就绪即开始等待目标元素，不等待图片、统计脚本等网络空闲"""
+        if self.pacer is not None:
+            await self.pacer.acquire()
+        started = time.perf_counter()
+        response = await page.goto(url, wait_until=self.pool.config.wait_until)
+        if self.pacer is not None:
+            signal = throttle_signal(response.status if response else None, page.url)
+            if signal is not None:
+                self.pacer.record_throttle(signal)
+                raise SourceUnavailable(f"BOSS responded with {signal}")
+        try:
+            await page.wait_for_selector(selector, timeout=self.pool.config.selector_timeout * 1000)
+        except Exception:
+            if self.pacer is not None:
+                # 目标元素没出现：页面是拦截页时按限流处理，否则只计为错误
+                try:
+                    signal = block_page_signal(await page.content())
+                except Exception:
+                    signal = None
+                if signal is not None:
+                    self.pacer.record_throttle(signal)
+                    raise SourceUnavailable(f"BOSS responded with {signal}")
+                self.pacer.record_error()
+            raise
+        if self.pacer is not None:
+            self.pacer.record_success()
+        if self.recorder is not None:
+            self.recorder.add_page(url, await page.content(), (time.perf_counter() - started) * 1000)
 
     async def search_jd(
         self,
@@ -45,88 +121,35 @@ class BossAdapter:
         limit: int = 20
     ) -> List[Dict[str, Any]]:
         """搜索职位（通过页面自动化）"""
+        params = {}
+        if title:
+            params["query"] = title
+        if city:
+            params["city"] = self._get_city_code(city)
+        search_url = f"{self.base_url}/web/geek/job"
+        if params:
+            search_url += f"?{urlencode(params)}"
+
+        async def extract(page: Any) -> List[Dict[str, Any]]:
+            await self._goto(page, search_url, '.job-list-box')
+            return await page.evaluate(_EXTRACT_JOB_LIST, limit)
+
         try:
-            await self._init_browser()
-            
-            page = await self.browser.new_page()
-            
-            # 构建搜索URL
-            search_url = "https://www.zhipin.com/web/geek/job"
-            if title:
-                search_url += f"?query={title}"
-            if city:
-                search_url += f"&city={self._get_city_code(city)}"
-            
-            await page.goto(search_url, wait_until="networkidle")
-            
-            # 等待页面加载
-            await page.wait_for_selector('.job-list-box', timeout=10000)
-            
-            # 提取职位信息
-            jobs = await page.evaluate("""
-                () => {
-                    const jobItems = document.querySelectorAll('.job-card-wrapper');
-                    const results = [];
-                    
-                    for (let i = 0; i < Math.min(jobItems.length, 20); i++) {
-                        const item = jobItems[i];
-                        const titleEl = item.querySelector('.job-name');
-                        const companyEl = item.querySelector('.company-name');
-                        const locationEl = item.querySelector('.job-area');
-                        const linkEl = item.querySelector('a');
-                        
-                        if (titleEl && companyEl) {
-                            results.push({
-                                title: titleEl.textContent.trim(),
-                                company: companyEl.textContent.trim(),
-                                location: locationEl ? locationEl.textContent.trim() : '',
-                                url: linkEl ? linkEl.href : ''
-                            });
-                        }
-                    }
-                    
-                    return results;
-                }
-            """)
-            
-            await page.close()
-            
+            jobs = await self.pool.run(extract)
             return [self._normalize_job(job) for job in jobs]
-            
         except Exception as e:
             logger.error(f"BOSS搜索失败: {e}")
             return []
 
     async def fetch_jd_by_url(self, url: str) -> Optional[Dict[str, Any]]:
         """通过URL获取职位详情"""
+
+        async def extract(page: Any) -> Dict[str, Any]:
+            await self._goto(page, url, '.job-sec')
+            return await page.evaluate(_EXTRACT_JOB_DETAIL)
+
         try:
-            await self._init_browser()
-            
-            page = await self.browser.new_page()
-            await page.goto(url, wait_until="networkidle")
-            
-            # 等待页面加载
-            await page.wait_for_selector('.job-sec', timeout=10000)
-            
-            # 提取职位详情
-            job_detail = await page.evaluate("""
-                () => {
-                    const titleEl = document.querySelector('.name');
-                    const companyEl = document.querySelector('.company-name');
-                    const locationEl = document.querySelector('.location-address');
-                    const descEl = document.querySelector('.job-sec .text');
-                    
-                    return {
-                        title: titleEl ? titleEl.textContent.trim() : '',
-                        company: companyEl ? companyEl.textContent.trim() : '',
-                        location: locationEl ? locationEl.textContent.trim() : '',
-                        description: descEl ? descEl.textContent.trim() : ''
-                    };
-                }
-            """)
-            
-            await page.close()
-            
+            job_detail = await self.pool.run(extract)
             if job_detail['title']:
                 return self._normalize_job({
                     **job_detail,
@@ -139,10 +162,19 @@ class BossAdapter:
             logger.error(f"BOSS获取详情失败: {e}")
             return None
 
+    async def fetch_jd_conditional(
+        self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None
+    ) -> FetchResult:
+        """页面自动化拿不到可用的校验器，总是完整抓取"""
+        return FetchResult(jd=await self.fetch_jd_by_url(url))
+
+    def metrics(self) -> Dict[str, Any]:
+        return self.pool.metrics()
+
     def _normalize_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
         """标准化职位数据"""
         return {
-            "id": f"boss_{hash(job.get('url', job.get('title', '')))}",
+            "id": f"boss_{stable_job_key(job.get('url') or job.get('title', ''))}",
             "company": job.get("company", ""),
             "title": job.get("title", ""),
             "location": job.get("location", ""),
@@ -181,8 +213,5 @@ class BossAdapter:
         return city_map.get(city_name, "101010100")
 
     async def close(self):
-        """关闭浏览器"""
-        if self.browser:
-            await self.browser.close()
-        if self.playwright:
-            await self.playwright.stop()
\ No newline at end of file
+        """关闭浏览器上下文池"""
+        await self.pool.aclose()
@@ -0,0 +1,260 @@
+"""BOSS直聘适配器使用的 Playwright 浏览器上下文池
+
+一个 Chromium 进程 + 固定数量的常驻上下文（BrowserContext），每个上下文保留一个页面重复使用：
+- 并发上限：同时进行的页面操作不超过上下文数，多余的请求排队等待空闲上下文
+- 资源拦截：图片、字体、媒体、样式等请求在浏览器内直接中止，只加载 HTML 与脚本
+- 复用与回收：上下文使用 max_uses 次后重建，避免 Cookie、缓存与内存无限增长
+- 崩溃恢复：浏览器断开或页面崩溃时标记失效，下次取用时重新启动浏览器 / 重建上下文；
+  run() 在操作因崩溃失败时换一个新上下文重试一次
+
+Playwright 在首次取用时才启动，未安装 playwright 时不影响其他适配器。
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, FrozenSet, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 抓取职位信息用不到的资源类型
+DEFAULT_BLOCKED_RESOURCES: FrozenSet[str] = frozenset({"image", "font", "media", "stylesheet"})
+
+_LAUNCH_ARGS = ["--no-sandbox", "--disable-dev-shm-usage"]
+
+
+@dataclass(slots=True)
+class BrowserPoolConfig:
+    contexts: int = 2
+    max_uses: int = 50
+    block_resources: FrozenSet[str] = DEFAULT_BLOCKED_RESOURCES
+    wait_until: str = "domcontentloaded"
+    navigation_timeout: float = 15.0
+    selector_timeout: float = 10.0
+    reuse_pages: bool = True
+    headless: bool = True
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "BrowserPoolConfig":
+        return cls(
+            contexts=settings.boss_browser_contexts,
+            max_uses=settings.boss_context_max_uses,
+            block_resources=DEFAULT_BLOCKED_RESOURCES if settings.boss_block_resources else frozenset(),
+            navigation_timeout=settings.boss_navigation_timeout,
+            selector_timeout=settings.boss_selector_timeout,
+        )
+
+
+class _Slot:
+    """池中的一个位置：上下文与页面按需创建，失效后在下次取用时重建"""
+
+    __slots__ = ("index", "context", "page", "uses", "generation", "broken")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.context: Any = None
+        self.page: Any = None
+        self.uses = 0
+        self.generation = -1
+        self.broken = False
+
+
+class BrowserCrashed(RuntimeError):
+    """操作期间浏览器断开或页面崩溃"""
+
+
+class BrowserPool:
+    def __init__(self, config: Optional[BrowserPoolConfig] = None):
+        self.config = config or BrowserPoolConfig()
+        self._playwright: Any = None
+        self._browser: Any = None
+        # 浏览器每次（重新）启动加一，旧浏览器上创建的上下文据此识别为失效
+        self._generation = 0
+        self._launch_lock: Optional[asyncio.Lock] = None
+        self._slots: List[_Slot] = [_Slot(i) for i in range(max(1, self.config.contexts))]
+        self._idle: Optional[asyncio.Queue] = None
+        self._counters = {
+            "launches": 0,
+            "contexts_created": 0,
+            "pages": 0,
+            "blocked_requests": 0,
+            "crashes": 0,
+            "retries": 0,
+        }
+        self._waiting = 0
+
+    # ---- 生命周期 ----
+
+    def _ensure_queue(self) -> asyncio.Queue:
+        if self._idle is None:
+            self._launch_lock = asyncio.Lock()
+            self._idle = asyncio.Queue()
+            for slot in self._slots:
+                self._idle.put_nowait(slot)
+        return self._idle
+
+    def _browser_alive(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def _ensure_browser(self) -> Any:
+        if self._browser_alive():
+            return self._browser
+        async with self._launch_lock:
+            if self._browser_alive():
+                return self._browser
+            await self._stop_browser()
+            from playwright.async_api import async_playwright
+
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=self.config.headless,
+                args=_LAUNCH_ARGS,
+            )
+            self._browser.on("disconnected", self._on_disconnected)
+            self._generation += 1
+            self._counters["launches"] += 1
+            logger.info(f"Chromium launched for BOSS adapter (generation {self._generation})")
+            return self._browser
+
+    def _on_disconnected(self, browser: Any) -> None:
+        if browser is self._browser:
+            self._counters["crashes"] += 1
+            logger.warning("Chromium disconnected, it will be relaunched on next use")
+
+    async def _stop_browser(self) -> None:
+        browser, playwright = self._browser, self._playwright
+        self._browser = self._playwright = None
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception:
+                pass
+        if playwright is not None:
+            try:
+                await playwright.stop()
+            except Exception:
+                pass
+
+    async def aclose(self) -> None:
+        """关闭全部上下文与浏览器；之后再次取用会重新启动"""
+        for slot in self._slots:
+            await self._discard(slot)
+        await self._stop_browser()
+        # 队列与锁绑定在当前事件循环上，关闭后一并丢弃
+        self._idle = None
+        self._launch_lock = None
+
+    # ---- 上下文 ----
+
+    async def _block(self, route: Any) -> None:
+        if route.request.resource_type in self.config.block_resources:
+            self._counters["blocked_requests"] += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _discard(self, slot: _Slot) -> None:
+        context, slot.context, slot.page = slot.context, None, None
+        slot.uses = 0
+        slot.broken = False
+        if context is not None:
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+    def _mark_broken(self, slot: _Slot) -> Callable[[Any], None]:
+        def on_crash(_: Any) -> None:
+            slot.broken = True
+            self._counters["crashes"] += 1
+            logger.warning(f"BOSS browser page crashed in context {slot.index}")
+        return on_crash
+
+    async def _new_page(self, slot: _Slot) -> Any:
+        page = await slot.context.new_page()
+        page.set_default_timeout(self.config.navigation_timeout * 1000)
+        page.on("crash", self._mark_broken(slot))
+        self._counters["pages"] += 1
+        return page
+
+    async def _prepare(self, slot: _Slot) -> Any:
+        """保证 slot 持有可用的页面：浏览器重启、崩溃或达到复用上限时重建上下文"""
+        browser = await self._ensure_browser()
+        if (
+            slot.context is None
+            or slot.broken
+            or slot.generation != self._generation
+            or slot.uses >= self.config.max_uses
+        ):
+            await self._discard(slot)
+            slot.context = await browser.new_context()
+            if self.config.block_resources:
+                await slot.context.route("**/*", self._block)
+            slot.generation = self._generation
+            self._counters["contexts_created"] += 1
+        if slot.page is None or slot.page.is_closed() or not self.config.reuse_pages:
+            if slot.page is not None and not slot.page.is_closed():
+                await slot.page.close()
+            slot.page = await self._new_page(slot)
+        return slot.page
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Any]:
+        """取用一个空闲页面；池满时等待。浏览器断开或页面崩溃时抛出 BrowserCrashed，该上下文在下次取用前重建"""
+        idle = self._ensure_queue()
+        self._waiting += 1
+        try:
+            slot: _Slot = await idle.get()
+        finally:
+            self._waiting -= 1
+        try:
+            try:
+                page = await self._prepare(slot)
+            except Exception as e:
+                slot.broken = True
+                if self._browser is not None and not self._browser_alive():
+                    raise BrowserCrashed("browser disconnected while preparing context") from e
+                raise
+            slot.uses += 1
+            try:
+                yield page
+            except Exception as e:
+                # 普通失败（选择器超时等）保留上下文，页面下次直接导航到新地址
+                if not self._browser_alive():
+                    raise BrowserCrashed("browser disconnected during operation") from e
+                if slot.broken:
+                    raise BrowserCrashed("page crashed during operation") from e
+                raise
+            if slot.broken:
+                raise BrowserCrashed("page crashed during operation")
+        finally:
+            idle.put_nowait(slot)
+
+    async def run(self, operation: Callable[[Any], Awaitable[T]], retries: int = 1) -> T:
+        """在池中的页面上执行 operation(page)；因浏览器/页面崩溃失败时换新上下文重试"""
+        attempt = 0
+        while True:
+            try:
+                async with self.page() as page:
+                    return await operation(page)
+            except BrowserCrashed:
+                if attempt >= retries:
+                    raise
+                attempt += 1
+                self._counters["retries"] += 1
+
+    # ---- 指标 ----
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "running": self._browser_alive(),
+            "contexts": len(self._slots),
+            "warm_contexts": sum(1 for slot in self._slots if slot.context is not None),
+            "idle": self._idle.qsize() if self._idle is not None else len(self._slots),
+            "waiting": self._waiting,
+            **self._counters,
+        }
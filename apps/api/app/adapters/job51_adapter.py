@@ -1,24 +1,26 @@
 from __future__ import annotations
 
-import httpx
 import logging
 from typing import Optional, List, Dict, Any
 
+from .transport import AdapterTransport, FetchResult, conditional_headers, fetch_result, stable_job_key
+
 logger = logging.getLogger(__name__)
 
 
 class Job51Adapter:
     """前程无忧适配器"""
     
-    def __init__(self):
+    def __init__(self, transport: Optional[AdapterTransport] = None):
         self.base_url = "https://search.51job.com"
-        self.client = httpx.AsyncClient(
-            timeout=30.0,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "Referer": "https://www.51job.com/",
-            }
-        )
+        # 未传入共享传输层时自建一个，由 close() 关闭
+        self._own_transport = transport is None
+        self.transport = transport or AdapterTransport()
+        self.client = self.transport.session(headers={
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            "Referer": "https://www.51job.com/",
+        })
+        self.transport.bind_source("job51", self.base_url, "jobs.51job.com", "we.51job.com")
 
     def is_available(self) -> bool:
         return True
@@ -64,18 +66,26 @@ class Job51Adapter:
 
     async def fetch_jd_by_url(self, url: str) -> Optional[Dict[str, Any]]:
         """通过URL获取职位详情"""
+        return (await self.fetch_jd_conditional(url)).jd
+
+    async def fetch_jd_conditional(
+        self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None
+    ) -> FetchResult:
+        """条件请求获取职位详情；页面未变化时返回 not_modified"""
         # 51job的详情页面需要解析HTML
         try:
-            response = await self.client.get(url)
+            response = await self.client.get(url, headers=conditional_headers(etag, last_modified))
+            if response.status_code == 304:
+                return fetch_result(response)
             response.raise_for_status()
             
             # 简单的HTML解析（实际应该用BeautifulSoup）
             html = response.text
-            return self._parse_job_detail_html(html, url)
+            return fetch_result(response, self._parse_job_detail_html(html, url))
                 
         except Exception as e:
             logger.error(f"51job获取详情失败: {e}")
-            return None
+            return FetchResult()
 
     def _normalize_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
         """标准化职位数据"""
@@ -138,7 +148,7 @@ class Job51Adapter:
             description = desc_match.group(1) if desc_match else ""
             
             return {
-                "id": f"job51_{hash(url)}",
+                "id": f"job51_{stable_job_key(url)}",
                 "company": company,
                 "title": title,
                 "location": "",
@@ -153,4 +163,6 @@ class Job51Adapter:
             return None
 
     async def close(self):
-        await self.client.aclose()
\ No newline at end of file
+        """共享传输层由应用 lifespan 关闭，这里只关闭自建的"""
+        if self._own_transport:
+            await self.transport.aclose()
\ No newline at end of file
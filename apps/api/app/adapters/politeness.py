@@ -0,0 +1,268 @@
+"""JD 源的请求节流与健康状态
+
+每个源（实习僧、智联、前程无忧、BOSS）一个 SourcePacer：
+- 令牌桶：按 rate 次/秒匀速放行，允许 burst 次突发；请求在桶里排队，而不是同时打到源站
+- AIMD：每次成功把速率加回 increase，收到限流信号（429、403、跳转到验证码页、状态码正常但内容是
+  反爬拦截页）时速率乘以 decrease，
+  并进入冷却期（有 Retry-After 时按其秒数，否则随连续限流次数指数增长，最长 max_cooldown）；
+  冷却期内的请求直接失败（SourceUnavailable），多源搜索跳过该源；
+  其他 4xx（参数错误、职位已下线等）与网络错误、5xx 一样只计数，不调整速率
+- 合并：同一源上参数完全相同的搜索同时只执行一次，其余调用共享结果
+- 健康：状态（ok / throttled / cooling_down）、当前速率、最近成功时间与各类计数，供 /health 报告真实可用性
+
+HTTP 适配器的信号由 AdapterTransport 按主机上报，BOSS 由页面导航结果上报。
+计数只在本进程内，多 worker 部署时每个 worker 各自节流。
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RATE_LIMITED = "rate_limited"
+FORBIDDEN = "forbidden"
+CAPTCHA = "captcha"
+BLOCKED = "blocked"
+
+# 跳转到这些地址视为被要求人机验证
+_CAPTCHA_MARKERS = ("captcha", "verify", "security-check", "antispider")
+# 拦截页正文中的提示；拦截页很短，只检查不超过 _BLOCK_PAGE_MAX_CHARS 的 HTML 开头部分
+_BLOCK_PAGE_MARKERS = ("安全验证", "人机验证", "滑动验证", "请完成验证", "访问异常", "异常访问", "访问过于频繁", "访问频繁")
+_BLOCK_PAGE_MAX_CHARS = 32 * 1024
+
+
+def throttle_signal(status: Optional[int], url: str = "") -> Optional[str]:
+    """根据响应状态码与最终地址判断是否被限流/封禁，返回信号名或 None"""
+    if status == 429:
+        return RATE_LIMITED
+    if status == 403:
+        return FORBIDDEN
+    lowered = url.lower()
+    if any(marker in lowered for marker in _CAPTCHA_MARKERS):
+        return CAPTCHA
+    return None
+
+
+def block_page_signal(html: str) -> Optional[str]:
+    """状态码正常、正文却是反爬拦截页（验证/封禁提示）时返回 BLOCKED"""
+    if len(html) > _BLOCK_PAGE_MAX_CHARS:
+        return None
+    head = html[:4096]
+    if any(marker in head for marker in _BLOCK_PAGE_MARKERS):
+        return BLOCKED
+    return None
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None  # HTTP 日期格式不处理，退化为指数冷却
+
+
+class SourceUnavailable(RuntimeError):
+    """源处于冷却期，本次请求未发出"""
+
+
+@dataclass(slots=True)
+class PolitenessConfig:
+    rate: float = 2.0
+    burst: int = 4
+    min_rate: float = 0.1
+    increase: float = 0.1
+    decrease: float = 0.5
+    cooldown: float = 30.0
+    max_cooldown: float = 600.0
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "PolitenessConfig":
+        return cls(
+            rate=settings.source_rate_per_second,
+            burst=settings.source_burst,
+            min_rate=settings.source_min_rate,
+            cooldown=settings.source_cooldown_seconds,
+            max_cooldown=settings.source_max_cooldown_seconds,
+        )
+
+
+class TokenBucket:
+    """令牌桶；acquire() 预占令牌后按需等待，并发的调用按到达顺序依次放行"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = float(max(1, burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """取一个令牌，返回需要等待的秒数（令牌可以透支，透支部分即排队时间）"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    async def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class SourcePacer:
+    def __init__(self, name: str, config: PolitenessConfig):
+        self.name = name
+        self.config = config
+        self.bucket = TokenBucket(config.rate, config.burst)
+        self.cooldown_until = 0.0
+        self.consecutive_throttles = 0
+        self.last_success: Optional[datetime] = None
+        self.last_signal: Optional[str] = None
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._counters = {
+            "requests": 0,
+            "successes": 0,
+            "throttled": 0,
+            "errors": 0,
+            "client_errors": 0,
+            "rejected": 0,
+            "coalesced": 0,
+        }
+
+    # ---- 节流 ----
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    def available(self) -> bool:
+        return time.monotonic() >= self.cooldown_until
+
+    async def acquire(self) -> None:
+        """请求发出前调用：冷却期内抛出 SourceUnavailable，否则等待令牌"""
+        if not self.available():
+            self._counters["rejected"] += 1
+            raise SourceUnavailable(f"{self.name} is cooling down after {self.last_signal}")
+        await self.bucket.acquire()
+        self._counters["requests"] += 1
+
+    def record_success(self) -> None:
+        self._counters["successes"] += 1
+        self.consecutive_throttles = 0
+        self.last_success = datetime.utcnow()
+        self.bucket.rate = min(self.config.rate, self.bucket.rate + self.config.increase)
+
+    def record_throttle(self, signal: str, retry_after: Optional[float] = None) -> None:
+        self._counters["throttled"] += 1
+        self.consecutive_throttles += 1
+        self.last_signal = signal
+        self.bucket.rate = max(self.config.min_rate, self.bucket.rate * self.config.decrease)
+        if retry_after is None:
+            retry_after = self.config.cooldown * 2 ** (self.consecutive_throttles - 1)
+        cooldown = min(self.config.max_cooldown, retry_after)
+        self.cooldown_until = max(self.cooldown_until, time.monotonic() + cooldown)
+        logger.warning(
+            f"{self.name} signalled {signal}, rate lowered to {self.bucket.rate:.2f}/s, cooling down {cooldown:.0f}s"
+        )
+
+    def record_error(self) -> None:
+        """网络错误、5xx：只计数，不调整速率"""
+        self._counters["errors"] += 1
+
+    def record_client_error(self) -> None:
+        """403/429 以外的 4xx：请求本身的问题，不说明源站在限流，也不算成功，只计数"""
+        self._counters["client_errors"] += 1
+
+    def observe(self, response: httpx.Response) -> None:
+        status = response.status_code
+        signal = throttle_signal(status, str(response.url))
+        if signal is None and status < 300 and "html" in response.headers.get("content-type", ""):
+            signal = block_page_signal(response.text)
+        if signal is not None:
+            self.record_throttle(signal, retry_after_seconds(response))
+        elif status >= 500:
+            self.record_error()
+        elif status >= 400:
+            self.record_client_error()
+        else:
+            self.record_success()
+
+    # ---- 合并 ----
+
+    async def coalesce(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        """同一 key 的并发调用共享一次执行；调用方被取消不影响其他等待者"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self._counters["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # 等待者都已离开时也标记为已读取
+
+    # ---- 指标 ----
+
+    @property
+    def state(self) -> str:
+        if not self.available():
+            return "cooling_down"
+        if self.bucket.rate < self.config.rate:
+            return "throttled"
+        return "ok"
+
+    def metrics(self) -> Dict[str, Any]:
+        remaining = self.cooldown_until - time.monotonic()
+        return {
+            "state": self.state,
+            "rate": round(self.bucket.rate, 3),
+            "cooldown_remaining": round(remaining, 1) if remaining > 0 else 0,
+            "last_signal": self.last_signal,
+            "last_success": self.last_success.isoformat() if self.last_success else None,
+            "inflight_searches": len(self._inflight),
+            **self._counters,
+        }
+
+
+class PolitenessScheduler:
+    """按源管理 SourcePacer，并把源站主机映射到源"""
+
+    def __init__(self, config: Optional[PolitenessConfig] = None):
+        self.config = config or PolitenessConfig()
+        self.sources: Dict[str, SourcePacer] = {}
+        self._hosts: Dict[str, SourcePacer] = {}
+
+    def source(self, name: str) -> SourcePacer:
+        pacer = self.sources.get(name)
+        if pacer is None:
+            pacer = self.sources[name] = SourcePacer(name, self.config)
+        return pacer
+
+    def bind(self, name: str, *urls: str) -> SourcePacer:
+        """登记源使用的主机（传完整 URL 或主机名），该主机上的请求按此源节流"""
+        pacer = self.source(name)
+        for url in urls:
+            host = httpx.URL(url).host if "://" in url else url
+            self._hosts[host.lower()] = pacer
+        return pacer
+
+    def for_host(self, host: str) -> Optional[SourcePacer]:
+        return self._hosts.get(host.lower())
+
+    def metrics(self) -> Dict[str, Any]:
+        return {name: pacer.metrics() for name, pacer in self.sources.items()}
@@ -0,0 +1,367 @@
+"""JD 适配器的录制与回放
+
+离线基准测试与回归验证用：录制一次真实的源站响应，之后在本地替身服务上确定性地重放。
+
+- 录制：RecordingTransport 包在 httpx 传输外层，把 HTTP 适配器收到的每个响应（状态码、必要的响应头、
+  解码后的正文与耗时）写入 FixtureStore；BossAdapter 传入 recorder 时，把页面渲染后的 HTML（去掉脚本）录为 page 类型
+- 存储：fixture 目录下每个主机一个 JSON 文件（<host>.json），键为 方法 + 主机 + 路径 + 排序后的查询参数，
+  签名、时间戳等每次请求都不同的参数（VOLATILE_PARAMS）不参与匹配
+- 回放：ReplayServer 在本机线程中提供 HTTP 服务；HTTP 适配器的 AdapterTransport 使用 server.router()，
+  请求被改写到替身服务并在 X-Replay-Host 中带上原主机，因此按主机的节流与统计不受影响；
+  BossAdapter 把 base_url 指向 server.url，按路径与查询参数匹配
+- 故障注入：FaultConfig 设置固定延迟与抖动（或按录制时的耗时）、5xx、429（带 Retry-After）与直接断开连接的比例；
+  随机数由 (seed, 请求键, 该键的第几次请求) 决定，与线程调度顺序无关，同样的参数每次得到同样的结果
+"""
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import random
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlencode
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# 每次请求都会变化、不影响响应内容的参数
+VOLATILE_PARAMS = frozenset({"sign", "_", "t", "ts", "timestamp", "nonce"})
+# 录制时保留的响应头；正文保存的是解码后的内容，不保留 Content-Encoding / Content-Length
+_KEPT_HEADERS = ("content-type", "etag", "last-modified", "retry-after", "cache-control")
+_SCRIPT_RE = re.compile(r"<script\b[^>]*>.*?</script>", re.IGNORECASE | re.DOTALL)
+REPLAY_HOST_HEADER = "X-Replay-Host"
+
+
+def fixture_key(method: str, host: str, path: str, query: str) -> str:
+    params = sorted((k, v) for k, v in parse_qsl(query, keep_blank_values=True) if k not in VOLATILE_PARAMS)
+    return f"{method.upper()} {host.lower()}{path or '/'}?{urlencode(params)}"
+
+
+def url_key(method: str, url: str) -> str:
+    parsed = httpx.URL(url)
+    return fixture_key(method, parsed.host, parsed.path, parsed.query.decode("ascii"))
+
+
+@dataclass(slots=True)
+class Fixture:
+    method: str
+    url: str
+    status: int
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: str = ""
+    encoding: str = "utf-8"  # utf-8 / base64
+    kind: str = "http"  # http / page（浏览器渲染后的 HTML）
+    elapsed_ms: float = 0.0
+
+    @property
+    def key(self) -> str:
+        return url_key(self.method, self.url)
+
+    @property
+    def host(self) -> str:
+        return httpx.URL(self.url).host
+
+    def content(self) -> bytes:
+        if self.encoding == "base64":
+            return base64.b64decode(self.body)
+        return self.body.encode("utf-8")
+
+    @classmethod
+    def from_http(cls, request: httpx.Request, response: httpx.Response, body: bytes, elapsed: float) -> "Fixture":
+        try:
+            text, encoding = body.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            text, encoding = base64.b64encode(body).decode("ascii"), "base64"
+        return cls(
+            method=request.method,
+            url=str(request.url),
+            status=response.status_code,
+            headers={name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers},
+            body=text,
+            encoding=encoding,
+            elapsed_ms=round(elapsed * 1000, 1),
+        )
+
+
+class FixtureStore:
+    """fixture 目录；lookup 先按主机精确匹配，找不到时按路径与查询参数匹配（页面回放时主机是替身服务）"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory) if directory else None
+        self._fixtures: Dict[str, Fixture] = {}
+        self._by_path: Dict[str, Fixture] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._fixtures)
+
+    def __iter__(self):
+        return iter(list(self._fixtures.values()))
+
+    @staticmethod
+    def _path_key(key: str) -> str:
+        method, rest = key.split(" ", 1)
+        return f"{method} {rest[rest.index('/'):]}"
+
+    def add(self, fixture: Fixture) -> None:
+        key = fixture.key
+        with self._lock:
+            self._fixtures[key] = fixture
+            self._by_path[self._path_key(key)] = fixture
+
+    def add_page(self, url: str, html: str, elapsed_ms: float = 0.0) -> None:
+        """录制浏览器渲染后的页面；脚本已执行完毕，回放时去掉以免再次请求源站"""
+        self.add(Fixture(
+            method="GET",
+            url=url,
+            status=200,
+            headers={"content-type": "text/html; charset=utf-8"},
+            body=_SCRIPT_RE.sub("", html),
+            kind="page",
+            elapsed_ms=elapsed_ms,
+        ))
+
+    def lookup(self, method: str, host: str, path: str, query: str) -> Optional[Fixture]:
+        key = fixture_key(method, host, path, query)
+        fixture = self._fixtures.get(key)
+        if fixture is None:
+            fixture = self._by_path.get(self._path_key(key))
+        return fixture
+
+    def load(self) -> "FixtureStore":
+        if self.directory is None or not self.directory.exists():
+            return self
+        for path in sorted(self.directory.glob("*.json")):
+            for item in json.loads(path.read_text(encoding="utf-8")):
+                self.add(Fixture(**item))
+        logger.info(f"Loaded {len(self)} fixtures from {self.directory}")
+        return self
+
+    def save(self) -> None:
+        if self.directory is None:
+            raise ValueError("FixtureStore has no directory")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        by_host: Dict[str, List[dict]] = {}
+        for fixture in self:
+            by_host.setdefault(fixture.host, []).append(asdict(fixture))
+        for host, items in by_host.items():
+            items.sort(key=lambda item: (item["method"], item["url"]))
+            (self.directory / f"{host}.json").write_text(
+                json.dumps(items, ensure_ascii=False, indent=1), encoding="utf-8"
+            )
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """转发到 inner（默认真实网络）并把响应写入 FixtureStore"""
+
+    def __init__(self, store: FixtureStore, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self.store = store
+        self.inner = inner or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        try:
+            body = await response.aread()
+        finally:
+            await response.aclose()
+        self.store.add(Fixture.from_http(request, response, body, time.perf_counter() - start))
+        headers = [
+            (name, value) for name, value in response.headers.multi_items()
+            if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+        ]
+        return httpx.Response(response.status_code, headers=headers, content=body, request=request)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class ReplayRouter(httpx.AsyncBaseTransport):
+    """把所有请求改写到替身服务，原主机放在 X-Replay-Host 中"""
+
+    def __init__(self, server_url: str):
+        self._target = httpx.URL(server_url)
+        self.inner = httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        url = request.url.copy_with(scheme=self._target.scheme, host=self._target.host, port=self._target.port)
+        headers = request.headers.copy()
+        headers[REPLAY_HOST_HEADER] = request.url.host
+        headers["Host"] = self._target.netloc.decode("ascii")
+        routed = httpx.Request(request.method, url, headers=headers, stream=request.stream, extensions=request.extensions)
+        return await self.inner.handle_async_request(routed)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+@dataclass(slots=True)
+class FaultConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    recorded_latency: bool = False  # 按录制时的耗时延迟（再叠加 latency_ms 与抖动）
+    error_rate: float = 0.0  # 返回 error_status 的比例
+    error_status: int = 503
+    throttle_rate: float = 0.0  # 返回 429 的比例
+    retry_after: int = 1
+    drop_rate: float = 0.0  # 不返回响应直接断开连接的比例
+    seed: int = 0
+
+
+class ReplayServer:
+    """本地替身服务；可用作上下文管理器"""
+
+    def __init__(self, store: FixtureStore, faults: Optional[FaultConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.store = store
+        self.faults = faults or FaultConfig()
+        self._address = (host, port)
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._occurrences: Dict[str, int] = {}
+        self._counters = {
+            "served": 0,
+            "missing": 0,
+            "errors": 0,
+            "throttled": 0,
+            "dropped": 0,
+        }
+
+    # ---- 生命周期 ----
+
+    @property
+    def url(self) -> str:
+        if self._server is None:
+            raise RuntimeError("ReplayServer is not started")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        if self._server is None:
+            self._server = ThreadingHTTPServer(self._address, self._handler_class())
+            self._server.daemon_threads = True
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+        return self.url
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
+
+    def __enter__(self) -> "ReplayServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def router(self) -> ReplayRouter:
+        """HTTP 适配器使用的 httpx 传输（传给 AdapterTransport(http_transport=...)）"""
+        return ReplayRouter(self.start())
+
+    def reset(self) -> None:
+        """清空计数与请求序号，之后的故障注入序列从头开始"""
+        with self._lock:
+            self._occurrences.clear()
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    # ---- 处理请求 ----
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _rng(self, key: str) -> random.Random:
+        with self._lock:
+            occurrence = self._occurrences.get(key, 0)
+            self._occurrences[key] = occurrence + 1
+        return random.Random(f"{self.faults.seed}:{key}:{occurrence}")
+
+    def _decide(self, key: str, fixture: Optional[Fixture]) -> Tuple[float, Optional[str]]:
+        """返回 (延迟秒数, 注入的故障：drop / throttle / error / None)"""
+        faults = self.faults
+        rng = self._rng(key)
+        delay = faults.latency_ms + (rng.uniform(-faults.jitter_ms, faults.jitter_ms) if faults.jitter_ms else 0.0)
+        if faults.recorded_latency and fixture is not None:
+            delay += fixture.elapsed_ms
+        roll = rng.random()
+        fault = None
+        for name, rate in (("drop", faults.drop_rate), ("throttle", faults.throttle_rate), ("error", faults.error_rate)):
+            if roll < rate:
+                fault = name
+                break
+            roll -= rate
+        return max(0.0, delay) / 1000, fault
+
+    def _serve(self, handler: BaseHTTPRequestHandler) -> None:
+        path, _, query = handler.path.partition("?")
+        path = unquote(path)
+        host = handler.headers.get(REPLAY_HOST_HEADER) or handler.headers.get("Host", "")
+        key = fixture_key(handler.command, host, path, query)
+        fixture = self.store.lookup(handler.command, host, path, query)
+        delay, fault = self._decide(key, fixture)
+        if delay:
+            time.sleep(delay)
+
+        if fault == "drop":
+            self._count("dropped")
+            handler.close_connection = True
+            return
+        headers: Dict[str, str] = {}
+        if fault == "throttle":
+            self._count("throttled")
+            status, body = 429, b'{"error": "too many requests"}'
+            headers["Retry-After"] = str(self.faults.retry_after)
+        elif fault == "error":
+            self._count("errors")
+            status, body = self.faults.error_status, b'{"error": "injected"}'
+        elif fixture is None:
+            self._count("missing")
+            status, body = 404, json.dumps({"error": "fixture not found", "key": key}).encode("utf-8")
+        else:
+            self._count("served")
+            status, body = fixture.status, fixture.content()
+            headers.update(fixture.headers)
+        headers.setdefault("content-type", "application/json; charset=utf-8")
+
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        if handler.command != "HEAD":
+            handler.wfile.write(body)
+
+    def _handler_class(self) -> type:
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive，与真实源站一样复用连接
+
+            def _handle(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                replay._serve(self)
+
+            do_GET = do_POST = do_HEAD = _handle
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        return Handler
@@ -3,21 +3,32 @@ from __future__ import annotations
 import time
 import base64
 import hashlib
-import httpx
 import logging
 from typing import Optional, List, Dict, Any
 
+from .transport import AdapterTransport, FetchResult, conditional_headers, fetch_result
+
 logger = logging.getLogger(__name__)
 
 
 class ShixiSengAdapter:
     """实习僧开放平台适配器"""
     
-    def __init__(self, app_id: str, app_secret: str, base_url: str = "https://hr-open.shixiseng.com"):
+    def __init__(
+        self,
+        app_id: str,
+        app_secret: str,
+        base_url: str = "https://hr-open.shixiseng.com",
+        transport: Optional[AdapterTransport] = None,
+    ):
         self.app_id = app_id
         self.app_secret = app_secret
         self.base_url = base_url
-        self.client = httpx.AsyncClient(timeout=30.0)
+        # 未传入共享传输层时自建一个，由 close() 关闭
+        self._own_transport = transport is None
+        self.transport = transport or AdapterTransport()
+        self.client = self.transport.session()
+        self.transport.bind_source("shixiseng", self.base_url)
 
     def is_available(self) -> bool:
         """检查适配器是否可用"""
@@ -84,13 +95,20 @@ class ShixiSengAdapter:
 
     async def fetch_jd_by_url(self, url: str) -> Optional[Dict[str, Any]]:
         """通过URL获取职位详情"""
+        return (await self.fetch_jd_conditional(url)).jd
+
+    async def fetch_jd_conditional(
+        self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None
+    ) -> FetchResult:
+        """条件请求获取职位详情；接口返回 304 时为 not_modified"""
         # 从URL中提取job_id
         job_id = self._extract_job_id_from_url(url)
         if not job_id:
-            return None
+            return FetchResult()
             
         try:
             headers, sign = self._make_auth_headers()
+            headers.update(conditional_headers(etag, last_modified))
             
             params = {
                 "job_id": job_id,
@@ -102,20 +120,22 @@ class ShixiSengAdapter:
                 params=params,
                 headers=headers
             )
+            if response.status_code == 304:
+                return fetch_result(response)
             response.raise_for_status()
             
             data = response.json()
             
             if data.get("code") == 200 and "data" in data:
                 job = data["data"]
-                return self._normalize_job(job)
+                return fetch_result(response, self._normalize_job(job))
             else:
                 logger.error(f"实习僧获取职位详情失败: {data}")
-                return None
+                return FetchResult()
                 
         except Exception as e:
             logger.error(f"实习僧获取职位详情异常: {e}")
-            return None
+            return FetchResult()
 
     def _normalize_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
         """标准化职位数据"""
@@ -155,5 +175,6 @@ class ShixiSengAdapter:
         return match.group(1) if match else None
 
     async def close(self):
-        """关闭HTTP客户端"""
-        await self.client.aclose()
\ No newline at end of file
+        """关闭自建的传输层；共享传输层由应用 lifespan 关闭"""
+        if self._own_transport:
+            await self.transport.aclose()
\ No newline at end of file
@@ -0,0 +1,238 @@
+"""JD 源适配器共用的 HTTP 传输层
+
+所有适配器共用一个 httpx.AsyncClient（连接池、keep-alive、可选 HTTP/2），在应用 lifespan 中创建与关闭：
+- 全局连接数上限 + 每个主机的并发上限（httpx 只有全局上限，按主机的限制由信号量实现），
+  多源搜索的突发请求复用已有连接，不会每次新建
+- 连接复用同时省去了重复的 DNS 解析与 TLS 握手
+- 超时与连接池参数由 Settings 配置
+- 配置了 PolitenessScheduler 时，发往已登记主机的请求先按源节流，响应的限流信号回报给该源（见 politeness）
+- 可传入自定义的 httpx 传输（如 replay 模块的录制/回放），此时连接池参数由该传输决定
+
+适配器通过 session(headers) 取得带各自默认请求头的会话，接口与 httpx.AsyncClient.get 一致。
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+
+from .politeness import PolitenessScheduler, SourcePacer
+
+try:
+    import h2  # noqa: F401  HTTP/2 依赖
+except ImportError:  # 可选依赖
+    h2 = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class TransportConfig:
+    max_connections: int = 100
+    max_connections_per_host: int = 8
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 5.0
+    read_timeout: float = 20.0
+    pool_timeout: float = 10.0
+    http2: bool = True
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "TransportConfig":
+        return cls(
+            max_connections=settings.adapter_http_max_connections,
+            max_connections_per_host=settings.adapter_http_max_connections_per_host,
+            max_keepalive_connections=settings.adapter_http_max_keepalive,
+            keepalive_expiry=settings.adapter_http_keepalive_expiry,
+            connect_timeout=settings.adapter_http_connect_timeout,
+            read_timeout=settings.adapter_http_read_timeout,
+            pool_timeout=settings.adapter_http_pool_timeout,
+            http2=settings.adapter_http2,
+        )
+
+
+@dataclass(slots=True)
+class FetchResult:
+    """详情抓取结果；带校验器的条件请求命中 304 时 not_modified=True 且 jd 为 None"""
+    jd: Optional[Dict[str, Any]] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    not_modified: bool = False
+
+
+def stable_job_key(value: str) -> str:
+    """没有源站职位 ID 时由 URL 等生成的稳定 ID 后缀；内置 hash() 每个进程不同，不能用于持久化的 ID"""
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()[:16]
+
+
+def conditional_headers(etag: Optional[str], last_modified: Optional[str]) -> Dict[str, str]:
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+
+def fetch_result(response: httpx.Response, jd: Optional[Dict[str, Any]] = None) -> FetchResult:
+    """从响应中取出校验器；304 时沿用请求中的校验器由调用方保留"""
+    return FetchResult(
+        jd=jd,
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+        not_modified=response.status_code == 304,
+    )
+
+
+class _HostStats:
+    __slots__ = ("requests", "errors", "in_flight", "waiting")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.waiting = 0
+
+
+class AdapterTransport:
+    """共享 HTTP 客户端；start() 之前首次请求时也会自动创建客户端"""
+
+    def __init__(
+        self,
+        config: Optional[TransportConfig] = None,
+        politeness: Optional[PolitenessScheduler] = None,
+        http_transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.config = config or TransportConfig()
+        # 按源节流；为 None 时不节流
+        self.politeness = politeness
+        # 录制/回放等场景替换底层传输；为 None 时使用 httpx 默认的网络传输
+        self.http_transport = http_transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, _HostStats] = {}
+
+    # ---- 生命周期 ----
+
+    def _create_client(self) -> httpx.AsyncClient:
+        config = self.config
+        http2 = config.http2 and h2 is not None
+        if config.http2 and h2 is None:
+            logger.info("h2 not installed, adapter transport uses HTTP/1.1")
+        return httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                connect=config.connect_timeout,
+                read=config.read_timeout,
+                write=config.read_timeout,
+                pool=config.pool_timeout,
+            ),
+            follow_redirects=True,
+            transport=self.http_transport,
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+
+    async def start(self) -> None:
+        _ = self.client
+
+    async def aclose(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        # 信号量绑定在创建时的事件循环上，关闭后一并丢弃
+        self._host_limits.clear()
+
+    # ---- 请求 ----
+
+    def session(self, headers: Optional[Dict[str, str]] = None) -> "AdapterSession":
+        return AdapterSession(self, headers or {})
+
+    def bind_source(self, name: str, *urls: str) -> Optional[SourcePacer]:
+        """登记适配器的源站地址，之后发往这些主机的请求按该源节流并上报限流信号"""
+        if self.politeness is None:
+            return None
+        return self.politeness.bind(name, *urls)
+
+    def _host_limit(self, host: str) -> asyncio.Semaphore:
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.config.max_connections_per_host)
+        return limit
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        host = httpx.URL(url).host
+        stats = self._stats.get(host)
+        if stats is None:
+            stats = self._stats[host] = _HostStats()
+        pacer = self.politeness.for_host(host) if self.politeness is not None else None
+        if pacer is not None:
+            await pacer.acquire()
+        limit = self._host_limit(host)
+        stats.waiting += 1
+        try:
+            await limit.acquire()
+        finally:
+            stats.waiting -= 1
+        stats.in_flight += 1
+        stats.requests += 1
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            stats.errors += 1
+            if pacer is not None:
+                pacer.record_error()
+            raise
+        finally:
+            stats.in_flight -= 1
+            limit.release()
+        if pacer is not None:
+            pacer.observe(response)
+        return response
+
+    # ---- 指标 ----
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "http2": bool(self._client is not None and self.config.http2 and h2 is not None),
+            "open": self._client is not None and not self._client.is_closed,
+            "hosts": {
+                host: {
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "in_flight": stats.in_flight,
+                    "waiting": stats.waiting,
+                }
+                for host, stats in self._stats.items()
+            },
+        }
+
+
+class AdapterSession:
+    """带默认请求头的轻量会话，不持有连接"""
+
+    __slots__ = ("transport", "headers")
+
+    def __init__(self, transport: AdapterTransport, headers: Dict[str, str]):
+        self.transport = transport
+        self.headers = headers
+
+    async def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None, **kwargs: Any) -> httpx.Response:
+        merged = {**self.headers, **headers} if headers else self.headers
+        return await self.transport.request(method, url, headers=merged, **kwargs)
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
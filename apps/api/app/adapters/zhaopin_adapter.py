@@ -1,26 +1,28 @@
 from __future__ import annotations
 
-import httpx
 import logging
 from typing import Optional, List, Dict, Any
 from urllib.parse import urlencode
 
+from .transport import AdapterTransport, FetchResult, conditional_headers, fetch_result
+
 logger = logging.getLogger(__name__)
 
 
 class ZhaopinAdapter:
     """智联招聘适配器（前端JSON接口）"""
     
-    def __init__(self):
+    def __init__(self, transport: Optional[AdapterTransport] = None):
         self.base_url = "https://fe-api.zhaopin.com"
-        self.client = httpx.AsyncClient(
-            timeout=30.0,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-                "Referer": "https://www.zhaopin.com/",
-                "Accept": "application/json, text/plain, */*"
-            }
-        )
+        # 未传入共享传输层时自建一个，由 close() 关闭
+        self._own_transport = transport is None
+        self.transport = transport or AdapterTransport()
+        self.client = self.transport.session(headers={
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            "Referer": "https://www.zhaopin.com/",
+            "Accept": "application/json, text/plain, */*"
+        })
+        self.transport.bind_source("zhaopin", self.base_url)
 
     def is_available(self) -> bool:
         """检查适配器是否可用"""
@@ -71,30 +73,39 @@ class ZhaopinAdapter:
 
     async def fetch_jd_by_url(self, url: str) -> Optional[Dict[str, Any]]:
         """通过URL获取职位详情"""
+        return (await self.fetch_jd_conditional(url)).jd
+
+    async def fetch_jd_conditional(
+        self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None
+    ) -> FetchResult:
+        """条件请求获取职位详情；接口返回 304 时为 not_modified"""
         # 从URL中提取职位ID
         job_id = self._extract_job_id_from_url(url)
         if not job_id:
-            return None
+            return FetchResult()
             
         try:
             # 智联职位详情接口
             response = await self.client.get(
-                f"{self.base_url}/c/i/jobs/{job_id}"
+                f"{self.base_url}/c/i/jobs/{job_id}",
+                headers=conditional_headers(etag, last_modified)
             )
+            if response.status_code == 304:
+                return fetch_result(response)
             response.raise_for_status()
             
             data = response.json()
             
             if data.get("code") == 200 and "data" in data:
                 job = data["data"]
-                return self._normalize_job(job)
+                return fetch_result(response, self._normalize_job(job))
             else:
                 logger.error(f"智联获取职位详情失败: {data}")
-                return None
+                return FetchResult()
                 
         except Exception as e:
             logger.error(f"智联获取职位详情异常: {e}")
-            return None
+            return FetchResult()
 
     def _normalize_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
         """标准化职位数据"""
@@ -159,5 +170,6 @@ class ZhaopinAdapter:
         return match.group(1) if match else None
 
     async def close(self):
-        """关闭HTTP客户端"""
-        await self.client.aclose()
\ No newline at end of file
+        """关闭自建的传输层；共享传输层由应用 lifespan 关闭"""
+        if self._own_transport:
+            await self.transport.aclose()
\ No newline at end of file
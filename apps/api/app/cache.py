@@ -0,0 +1,469 @@
+"""共享缓存层
+
+配置了 REDIS_URL 且 Redis 可连接时，缓存在所有 worker 之间共享；
+否则退化为进程内的 LRU（LocalRedis，接口与 redis-py 的子集一致，也可在测试中直接使用）。
+
+redis-py 的同步客户端会阻塞事件循环，异步代码应使用 a 前缀的方法（aget/aset/aadd 等）：
+连接 Redis 时它们在线程池中执行，LocalRedis 只做内存操作则直接调用。
+
+值使用 msgpack 序列化，只支持 dict/list/str/数字/bool/None 等基础类型，
+datetime 和 dataclass 需要调用方自行转换。
+"""
+from __future__ import annotations
+
+import asyncio
+import fnmatch
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
+
+import msgpack
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def dumps(value: Any) -> bytes:
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def loads(data: Optional[bytes]) -> Any:
+    if data is None:
+        return None
+    return msgpack.unpackb(data, raw=False)
+
+
+class _Partition:
+    """LocalRedis 中按键前缀划分的一块 LRU；max_entries 为 0 时不按条数淘汰，只定期清理过期键"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.data: OrderedDict[str, bytes] = OrderedDict()
+        self.last_sweep = time.monotonic()
+
+
+class LocalRedis:
+    """进程内的 Redis 替身：LRU 淘汰 + 毫秒级 TTL，实现 get/set/mget/delete/pipeline/scan_iter
+    以及有序集合（zadd/zrange/zrem）与列表（rpush/ltrim/lrange）的子集
+
+    默认所有键共用一个 LRU；partition() 可为某个键前缀单独设上限，
+    避免会话这类需要保留到 TTL 的数据被高频缓存挤出。
+    """
+
+    SWEEP_INTERVAL = 60.0  # 不限条数的分区清理过期键的间隔（秒）
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._default = _Partition(max_entries)
+        self._partitions: Dict[str, _Partition] = {}  # 键前缀（含结尾冒号） -> 分区
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def partition(self, prefix: str, max_entries: int) -> None:
+        """为以 prefix 开头的键单独设置 LRU 上限（0 表示不按条数淘汰）；已有的键随之迁移"""
+        with self._lock:
+            prefix = prefix + ":"
+            target = self._partitions.get(prefix)
+            if target is not None:
+                target.max_entries = max_entries
+                return
+            target = _Partition(max_entries)
+            for partition in [self._default, *self._partitions.values()]:
+                for key in [key for key in partition.data if key.startswith(prefix)]:
+                    target.data[key] = partition.data.pop(key)
+            self._partitions[prefix] = target
+
+    def _partition_of(self, key: str) -> _Partition:
+        best = ""
+        for prefix in self._partitions:
+            if len(prefix) > len(best) and key.startswith(prefix):
+                best = prefix
+        return self._partitions[best] if best else self._default
+
+    def _alive(self, key: str, now: float) -> bool:
+        expires = self._expires.get(key)
+        if expires is not None and expires <= now:
+            self._partition_of(key).data.pop(key, None)
+            del self._expires[key]
+            return False
+        return key in self._partition_of(key).data
+
+    def _evict(self, partition: _Partition, now: float) -> None:
+        if partition.max_entries:
+            while len(partition.data) > partition.max_entries:
+                evicted, _ = partition.data.popitem(last=False)
+                self._expires.pop(evicted, None)
+        elif now - partition.last_sweep >= self.SWEEP_INTERVAL:
+            partition.last_sweep = now
+            for key in [key for key in partition.data if self._expires.get(key, now + 1) <= now]:
+                del partition.data[key]
+                del self._expires[key]
+
+    def ping(self) -> bool:
+        return True
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if not self._alive(key, time.monotonic()):
+                return None
+            data = self._partition_of(key).data
+            data.move_to_end(key)
+            return data[key]
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        with self._lock:
+            now = time.monotonic()
+            values = []
+            for key in keys:
+                if self._alive(key, now):
+                    data = self._partition_of(key).data
+                    data.move_to_end(key)
+                    values.append(data[key])
+                else:
+                    values.append(None)
+            return values
+
+    def set(self, key: str, value: bytes, px: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        with self._lock:
+            now = time.monotonic()
+            if nx and self._alive(key, now):
+                return None  # 与 redis-py 一致：NX 未写入时返回 None
+            partition = self._partition_of(key)
+            partition.data[key] = value
+            partition.data.move_to_end(key)
+            if px:
+                self._expires[key] = now + px / 1000
+            else:
+                self._expires.pop(key, None)
+            self._evict(partition, now)
+            return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._partition_of(key).data.pop(key, None) is not None:
+                    removed += 1
+                self._expires.pop(key, None)
+            return removed
+
+    def zadd(self, key: str, mapping: Mapping[str, float]) -> int:
+        """有序集合：写入成员及分数，返回新增的成员数"""
+        with self._lock:
+            now = time.monotonic()
+            partition = self._partition_of(key)
+            members = partition.data[key] if self._alive(key, now) else {}
+            added = sum(1 for member in mapping if member not in members)
+            partition.data[key] = {**members, **mapping}
+            partition.data.move_to_end(key)
+            self._evict(partition, now)
+            return added
+
+    def zrange(self, key: str, start: int, end: int) -> List[str]:
+        with self._lock:
+            if not self._alive(key, time.monotonic()):
+                return []
+            members = self._partition_of(key).data[key]
+            ordered = sorted(members, key=lambda member: (members[member], member))
+            return ordered[start:(end + 1) or None]
+
+    def zrem(self, key: str, *members: str) -> int:
+        with self._lock:
+            if not self._alive(key, time.monotonic()):
+                return 0
+            partition = self._partition_of(key)
+            remaining = dict(partition.data[key])
+            removed = sum(1 for member in members if remaining.pop(member, None) is not None)
+            if remaining:
+                partition.data[key] = remaining
+            else:
+                del partition.data[key]
+                self._expires.pop(key, None)
+            return removed
+
+    def rpush(self, key: str, *values: bytes) -> int:
+        """列表：追加到末尾，返回追加后的长度"""
+        with self._lock:
+            now = time.monotonic()
+            partition = self._partition_of(key)
+            items = partition.data[key] if self._alive(key, now) else []
+            partition.data[key] = items = [*items, *values]
+            partition.data.move_to_end(key)
+            self._evict(partition, now)
+            return len(items)
+
+    def ltrim(self, key: str, start: int, end: int) -> bool:
+        with self._lock:
+            if not self._alive(key, time.monotonic()):
+                return True
+            partition = self._partition_of(key)
+            remaining = partition.data[key][start:(end + 1) or None]
+            if remaining:
+                partition.data[key] = remaining
+            else:
+                del partition.data[key]
+                self._expires.pop(key, None)
+            return True
+
+    def lrange(self, key: str, start: int, end: int) -> List[bytes]:
+        with self._lock:
+            if not self._alive(key, time.monotonic()):
+                return []
+            return self._partition_of(key).data[key][start:(end + 1) or None]
+
+    def pexpire(self, key: str, px: int) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if not self._alive(key, now):
+                return False
+            self._expires[key] = now + px / 1000
+            return True
+
+    def scan_iter(self, match: Optional[str] = None) -> Iterator[str]:
+        with self._lock:
+            now = time.monotonic()
+            keys = [
+                key
+                for partition in [self._default, *self._partitions.values()]
+                for key in list(partition.data)
+                if self._alive(key, now)
+            ]
+        for key in keys:
+            if match is None or fnmatch.fnmatchcase(key, match):
+                yield key
+
+    def pipeline(self, transaction: bool = False) -> "_LocalPipeline":
+        return _LocalPipeline(self)
+
+
+class _LocalPipeline:
+    """LocalRedis 的 pipeline：缓存命令，execute 时依次执行"""
+
+    def __init__(self, client: LocalRedis):
+        self._client = client
+        self._commands: List[tuple] = []
+
+    def __getattr__(self, name: str):
+        getattr(self._client, name)  # 不支持的命令立即报错
+
+        def command(*args: Any, **kwargs: Any) -> "_LocalPipeline":
+            self._commands.append((name, args, kwargs))
+            return self
+
+        return command
+
+    def execute(self) -> List[Any]:
+        results = []
+        for name, args, kwargs in self._commands:
+            results.append(getattr(self._client, name)(*args, **kwargs))
+        self._commands = []
+        return results
+
+
+class Cache:
+    """带命名空间和默认 TTL 的缓存视图"""
+
+    def __init__(self, client: Any, namespace: str = "jianli", default_ttl: Optional[int] = None):
+        self.client = client
+        self.prefix = namespace
+        self.default_ttl = default_ttl
+
+    def namespace(self, name: str, ttl: Optional[int] = None, max_entries: Optional[int] = None) -> "Cache":
+        """派生子命名空间，ttl 单位为秒
+
+        max_entries 仅对进程内 LocalRedis 生效：给该命名空间单独的 LRU 上限，
+        0 表示只按 TTL 过期、不会被其他命名空间的写入挤出；Redis 的淘汰由服务端 maxmemory 策略决定。
+        """
+        prefix = f"{self.prefix}:{name}"
+        if max_entries is not None and isinstance(self.client, LocalRedis):
+            self.client.partition(prefix, max_entries)
+        return Cache(self.client, prefix, ttl if ttl is not None else self.default_ttl)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def _px(self, ttl: Optional[int]) -> Optional[int]:
+        ttl = self.default_ttl if ttl is None else ttl
+        return int(ttl * 1000) if ttl else None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = loads(self.client.get(self._key(key)))
+        return default if value is None else value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        self.client.set(self._key(key), dumps(value), px=self._px(ttl))
+
+    def add(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """键不存在时写入（SET NX），返回是否写入；可用作跨 worker 的占位锁"""
+        return bool(self.client.set(self._key(key), dumps(value), px=self._px(ttl), nx=True))
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.client.delete(*(self._key(key) for key in keys))
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """一次往返批量读取，只返回命中的键"""
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self.client.mget([self._key(key) for key in keys])
+        return {key: loads(raw) for key, raw in zip(keys, values) if raw is not None}
+
+    def set_many(self, items: Mapping[str, Any], ttl: Optional[int] = None) -> None:
+        """通过 pipeline 批量写入"""
+        if not items:
+            return
+        px = self._px(ttl)
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(self._key(key), dumps(value), px=px)
+        pipe.execute()
+
+    def add_members(self, key: str, members: Mapping[str, float], ttl: Optional[int] = None) -> None:
+        """向有序集合原子地加入成员（ZADD），并刷新整个集合的 TTL；多个 worker 并发加入不会互相覆盖"""
+        if not members:
+            return
+        pipe = self.client.pipeline(transaction=True)
+        pipe.zadd(self._key(key), dict(members))
+        px = self._px(ttl)
+        if px:
+            pipe.pexpire(self._key(key), px)
+        pipe.execute()
+
+    def members(self, key: str) -> List[str]:
+        """有序集合的全部成员，按分数升序"""
+        return [
+            member.decode() if isinstance(member, bytes) else member
+            for member in self.client.zrange(self._key(key), 0, -1)
+        ]
+
+    def remove_members(self, key: str, *members: str) -> None:
+        if members:
+            self.client.zrem(self._key(key), *members)
+
+    def push(self, key: str, *values: Any, max_len: Optional[int] = None, ttl: Optional[int] = None) -> int:
+        """原子地向列表末尾追加（RPUSH），可只保留最后 max_len 项（LTRIM），并刷新 TTL；返回列表长度
+
+        多个 worker 并发追加时各自的元素都会保留，不会像读-改-写那样互相覆盖。
+        """
+        if not values:
+            return len(self.items(key))
+        pipe = self.client.pipeline(transaction=True)
+        pipe.rpush(self._key(key), *(dumps(value) for value in values))
+        if max_len:
+            pipe.ltrim(self._key(key), -max_len, -1)
+        px = self._px(ttl)
+        if px:
+            pipe.pexpire(self._key(key), px)
+        length = pipe.execute()[0]
+        return min(length, max_len) if max_len else length
+
+    def items(self, key: str) -> List[Any]:
+        """列表的全部元素"""
+        return [loads(raw) for raw in self.client.lrange(self._key(key), 0, -1)]
+
+    def items_many(self, keys: Iterable[str]) -> Dict[str, List[Any]]:
+        """通过 pipeline 批量读取多个列表，只返回非空的"""
+        keys = list(keys)
+        if not keys:
+            return {}
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.lrange(self._key(key), 0, -1)
+        return {
+            key: [loads(raw) for raw in values]
+            for key, values in zip(keys, pipe.execute())
+            if values
+        }
+
+    def touch(self, key: str, ttl: Optional[int] = None) -> None:
+        """刷新键的 TTL"""
+        px = self._px(ttl)
+        if px:
+            self.client.pexpire(self._key(key), px)
+
+    # ---- 异步版本：供事件循环中的调用方使用 ----
+
+    async def _run(self, method: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if isinstance(self.client, LocalRedis):
+            return method(*args, **kwargs)
+        return await asyncio.to_thread(method, *args, **kwargs)
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        return await self._run(self.get, key, default)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        await self._run(self.set, key, value, ttl)
+
+    async def aadd(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        return await self._run(self.add, key, value, ttl)
+
+    async def adelete(self, *keys: str) -> None:
+        await self._run(self.delete, *keys)
+
+    async def aget_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        return await self._run(self.get_many, list(keys))
+
+    async def aset_many(self, items: Mapping[str, Any], ttl: Optional[int] = None) -> None:
+        await self._run(self.set_many, items, ttl)
+
+    async def aadd_members(self, key: str, members: Mapping[str, float], ttl: Optional[int] = None) -> None:
+        await self._run(self.add_members, key, members, ttl)
+
+    async def amembers(self, key: str) -> List[str]:
+        return await self._run(self.members, key)
+
+    async def aremove_members(self, key: str, *members: str) -> None:
+        await self._run(self.remove_members, key, *members)
+
+    async def apush(self, key: str, *values: Any, max_len: Optional[int] = None, ttl: Optional[int] = None) -> int:
+        return await self._run(self.push, key, *values, max_len=max_len, ttl=ttl)
+
+    async def aitems(self, key: str) -> List[Any]:
+        return await self._run(self.items, key)
+
+    async def aitems_many(self, keys: Iterable[str]) -> Dict[str, List[Any]]:
+        return await self._run(self.items_many, list(keys))
+
+    async def atouch(self, key: str, ttl: Optional[int] = None) -> None:
+        await self._run(self.touch, key, ttl)
+
+    def keys(self, pattern: str = "*") -> List[str]:
+        """列出命名空间下匹配的键（去掉前缀）；仅用于管理类接口"""
+        offset = len(self.prefix) + 1
+        return [
+            (key.decode() if isinstance(key, bytes) else key)[offset:]
+            for key in self.client.scan_iter(match=self._key(pattern))
+        ]
+
+
+def create_cache_client(redis_url: Optional[str], local_max_entries: int = 10000) -> Any:
+    """连接 Redis；未配置、未安装 redis 包或连接失败时返回进程内 LocalRedis"""
+    if redis_url:
+        try:
+            import redis
+
+            client = redis.Redis.from_url(
+                redis_url,
+                socket_connect_timeout=0.5,
+                socket_timeout=1.0,
+            )
+            client.ping()
+            logger.info("Using Redis cache backend")
+            return client
+        except ImportError:
+            logger.info("redis package not installed, using in-process cache")
+        except Exception as e:
+            logger.warning(f"Redis unavailable, using in-process cache: {e}")
+    return LocalRedis(local_max_entries)
+
+
+@lru_cache()
+def get_cache() -> Cache:
+    """获取全局缓存根命名空间"""
+    settings = get_settings()
+    return Cache(create_cache_client(settings.redis_url, settings.cache_local_max_entries))
@@ -72,12 +72,212 @@ class Settings(BaseSettings):
         validation_alias="DATABASE_URL"
     )
     
+    # 任务存储配置
+    task_ttl_seconds: int = Field(
+        default=86400,  # 已结束任务保留时长
+        validation_alias="TASK_TTL_SECONDS"
+    )
+    task_max_entries: int = Field(
+        default=10000,  # 内存中最多保留的任务数
+        validation_alias="TASK_MAX_ENTRIES"
+    )
+    task_result_offload_bytes: int = Field(
+        default=64 * 1024,  # 超过该大小的任务结果只保存在数据库中，0 表示不转存
+        validation_alias="TASK_RESULT_OFFLOAD_BYTES"
+    )
+    
+    # 任务调度配置
+    job_workers: int = Field(
+        default=4,  # 并发执行任务的 worker 数
+        validation_alias="JOB_WORKERS"
+    )
+    job_process_workers: int = Field(
+        default=0,  # CPU 密集步骤使用的进程池大小，0 表示使用线程池
+        validation_alias="JOB_PROCESS_WORKERS"
+    )
+    job_timeout_seconds: int = Field(
+        default=600,  # 单个任务的默认超时，0 表示不限
+        validation_alias="JOB_TIMEOUT_SECONDS"
+    )
+    job_bulk_concurrency: int = Field(
+        default=0,  # 批量任务（如JD抓取）最多占用的 worker 数，0 表示 worker 数的一半
+        validation_alias="JOB_BULK_CONCURRENCY"
+    )
+    job_lease_seconds: int = Field(
+        default=30,  # 持久化队列的租约时长，执行者失联超过该时长后任务被其他进程接管
+        validation_alias="JOB_LEASE_SECONDS"
+    )
+    job_max_attempts: int = Field(
+        default=3,  # 任务因进程崩溃被中断的最多执行次数，超过后标记为失败
+        validation_alias="JOB_MAX_ATTEMPTS"
+    )
+    task_dedupe_window_seconds: int = Field(
+        default=60,  # 相同用户、相同请求体的重复提交在该时间内返回已有任务，0 表示关闭
+        validation_alias="TASK_DEDUPE_WINDOW_SECONDS"
+    )
+    idempotency_key_ttl_seconds: int = Field(
+        default=86400,  # Idempotency-Key 的保留时长
+        validation_alias="IDEMPOTENCY_KEY_TTL_SECONDS"
+    )
+    
+    # JD源适配器HTTP配置
+    adapter_http_max_connections: int = Field(
+        default=100,  # 所有适配器共用连接池的连接上限
+        validation_alias="ADAPTER_HTTP_MAX_CONNECTIONS"
+    )
+    adapter_http_max_connections_per_host: int = Field(
+        default=8,  # 单个主机的并发请求上限
+        validation_alias="ADAPTER_HTTP_MAX_CONNECTIONS_PER_HOST"
+    )
+    adapter_http_max_keepalive: int = Field(
+        default=20,  # 保持的空闲连接数
+        validation_alias="ADAPTER_HTTP_MAX_KEEPALIVE"
+    )
+    adapter_http_keepalive_expiry: float = Field(
+        default=30.0,  # 空闲连接保留秒数
+        validation_alias="ADAPTER_HTTP_KEEPALIVE_EXPIRY"
+    )
+    adapter_http_connect_timeout: float = Field(
+        default=5.0,
+        validation_alias="ADAPTER_HTTP_CONNECT_TIMEOUT"
+    )
+    adapter_http_read_timeout: float = Field(
+        default=20.0,
+        validation_alias="ADAPTER_HTTP_READ_TIMEOUT"
+    )
+    adapter_http_pool_timeout: float = Field(
+        default=10.0,  # 连接池满时等待空闲连接的秒数
+        validation_alias="ADAPTER_HTTP_POOL_TIMEOUT"
+    )
+    adapter_http2: bool = Field(
+        default=True,  # 安装了 h2 时启用 HTTP/2
+        validation_alias="ADAPTER_HTTP2"
+    )
+    
+    # 多源JD搜索
+    jd_search_budget_seconds: float = Field(
+        default=8.0,  # 在线搜索的时间预算，超时的源被取消，返回已到达的结果
+        validation_alias="JD_SEARCH_BUDGET_SECONDS"
+    )
+    
+    jd_fetch_cache_ttl_seconds: int = Field(
+        default=3600,  # 按 URL 抓取的JD详情的新鲜期，0 表示不缓存
+        validation_alias="JD_FETCH_CACHE_TTL_SECONDS"
+    )
+    jd_fetch_cache_stale_seconds: int = Field(
+        default=604800,  # 过期后仍可先返回旧值、后台重新验证的时长
+        validation_alias="JD_FETCH_CACHE_STALE_SECONDS"
+    )
+    
+    # 共享JD语料库与后台增量爬取
+    jd_corpus_fresh_seconds: int = Field(
+        default=21600,  # 查询爬取后由语料库直接回答的时长，0 表示总是在线搜索
+        validation_alias="JD_CORPUS_FRESH_SECONDS"
+    )
+    jd_corpus_flush_seconds: int = Field(
+        default=30,  # 搜索的访问计数在内存中累积，按该间隔合并写入数据库
+        validation_alias="JD_CORPUS_FLUSH_SECONDS"
+    )
+    jd_corpus_retention_seconds: int = Field(
+        default=1209600,  # JD超过该时长未被再次爬到时视为下线，从语料库移除
+        validation_alias="JD_CORPUS_RETENTION_SECONDS"
+    )
+    jd_crawler_interval_seconds: int = Field(
+        default=300,  # 后台刷新热门查询的间隔，0 表示关闭后台爬取
+        validation_alias="JD_CRAWLER_INTERVAL_SECONDS"
+    )
+    jd_crawler_batch: int = Field(
+        default=5,  # 每轮最多刷新的查询数
+        validation_alias="JD_CRAWLER_BATCH"
+    )
+    jd_crawler_min_score: float = Field(
+        default=2.0,  # 热度（按天衰减的访问次数）不低于该值的查询才会被后台刷新
+        validation_alias="JD_CRAWLER_MIN_SCORE"
+    )
+    jd_crawler_limit: int = Field(
+        default=40,  # 后台爬取每个查询的JD数量上限
+        validation_alias="JD_CRAWLER_LIMIT"
+    )
+    
+    # JD批量导入
+    jd_batch_max_items: int = Field(
+        default=100,  # POST /jd/batch 单批最多条数
+        validation_alias="JD_BATCH_MAX_ITEMS"
+    )
+    jd_batch_fetch_concurrency: int = Field(
+        default=8,  # 批量导入时同时抓取的URL数（仍受各源节流约束）
+        validation_alias="JD_BATCH_FETCH_CONCURRENCY"
+    )
+    
+    # JD源节流（每个源独立的令牌桶 + AIMD 退避）
+    source_rate_per_second: float = Field(
+        default=2.0,  # 每个源的请求速率上限
+        validation_alias="SOURCE_RATE_PER_SECOND"
+    )
+    source_burst: int = Field(
+        default=4,  # 允许的突发请求数
+        validation_alias="SOURCE_BURST"
+    )
+    source_min_rate: float = Field(
+        default=0.1,  # 连续被限流后速率的下限
+        validation_alias="SOURCE_MIN_RATE"
+    )
+    source_cooldown_seconds: float = Field(
+        default=30.0,  # 首次被限流后的冷却时长，连续限流时翻倍
+        validation_alias="SOURCE_COOLDOWN_SECONDS"
+    )
+    source_max_cooldown_seconds: float = Field(
+        default=600.0,  # 冷却时长上限
+        validation_alias="SOURCE_MAX_COOLDOWN_SECONDS"
+    )
+    
+    # BOSS直聘浏览器池配置
+    boss_browser_contexts: int = Field(
+        default=2,  # 常驻浏览器上下文数，即同时进行的页面抓取上限
+        validation_alias="BOSS_BROWSER_CONTEXTS"
+    )
+    boss_context_max_uses: int = Field(
+        default=50,  # 单个上下文复用次数上限，达到后重建
+        validation_alias="BOSS_CONTEXT_MAX_USES"
+    )
+    boss_block_resources: bool = Field(
+        default=True,  # 拦截图片、字体、媒体与样式请求
+        validation_alias="BOSS_BLOCK_RESOURCES"
+    )
+    boss_navigation_timeout: float = Field(
+        default=15.0,  # 页面导航超时秒数
+        validation_alias="BOSS_NAVIGATION_TIMEOUT"
+    )
+    boss_selector_timeout: float = Field(
+        default=10.0,  # 页面加载后等待目标元素出现的超时秒数
+        validation_alias="BOSS_SELECTOR_TIMEOUT"
+    )
+    
+    # WebSocket 推送配置
+    ws_send_queue_size: int = Field(
+        default=256,  # 每个连接待发送消息的上限，超出后丢弃过期进度，仍放不下则断开
+        validation_alias="WS_SEND_QUEUE_SIZE"
+    )
+    ws_heartbeat_seconds: int = Field(
+        default=30,  # 共享心跳间隔
+        validation_alias="WS_HEARTBEAT_SECONDS"
+    )
+    ws_send_timeout_seconds: int = Field(
+        default=10,  # 单条消息的发送超时，超时视为慢连接并断开
+        validation_alias="WS_SEND_TIMEOUT_SECONDS"
+    )
+    
     # Redis配置（用于缓存）
     redis_url: Optional[str] = Field(
         default="redis://localhost:6379/0",
         validation_alias="REDIS_URL"
     )
     
+    cache_local_max_entries: int = Field(
+        default=10000,  # Redis不可用时进程内LRU缓存的最大条目数
+        validation_alias="CACHE_LOCAL_MAX_ENTRIES"
+    )
+    
     # 对象存储配置（用于照片等）
     storage_type: str = Field(
         default="local",  # local, s3, minio
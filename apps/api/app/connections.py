@@ -0,0 +1,277 @@
+"""WebSocket 连接管理
+
+每个连接有一个有界发件队列和一个发送协程，广播方只做入队（O(1)，不 await），
+慢客户端只会拖慢自己的发送协程，不影响事件中心和其他连接：
+
+- 合并：同一任务尚未发出的状态事件只保留最新的一条（进度 10% → 20% → 30% 只发 30%）
+- 丢弃：队列满时优先丢弃最旧的未结束状态事件与心跳；全是不可丢弃的消息时断开该连接（1013）
+- 发送超时：单条消息超过 send_timeout 仍未写出，视为慢连接并断开
+- 心跳：所有连接共用一个定时器，按间隔向每个连接入队一条 ping（同样参与合并）
+
+帧的编码在发送协程中按连接协商的协议完成（见 ws_protocol）；增量协议在合并之后、按实际发出的内容计算差异。
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Union
+
+from .events import TaskEvent
+from .schemas import WSMessage
+from .ws_protocol import DEFAULT_CODEC, Codec, Frame, task_delta
+
+logger = logging.getLogger(__name__)
+
+Outgoing = Union[WSMessage, TaskEvent]
+
+# WebSocket 关闭码：服务端过载，客户端稍后重连
+CLOSE_TRY_AGAIN_LATER = 1013
+
+_PING_KEY = "ping"
+
+
+def _droppable(item: Outgoing) -> bool:
+    """未结束任务的状态事件可以丢弃（之后还会有更新），最终状态和控制消息不能丢"""
+    return isinstance(item, TaskEvent) and not item.final
+
+
+class Connection:
+    """单个 WebSocket 连接及其发件队列"""
+
+    __slots__ = (
+        "id", "websocket", "user_id", "codec", "task_ids", "last_sent", "connected_at",
+        "_pending", "_ready", "_seq", "sender", "closed", "sent", "sent_size", "dropped", "coalesced",
+    )
+
+    def __init__(self, connection_id: str, websocket: Any, user_id: Optional[str], codec: Codec = DEFAULT_CODEC):
+        self.id = connection_id
+        self.websocket = websocket
+        self.user_id = user_id
+        self.codec = codec
+        self.task_ids: Set[str] = set()
+        # 增量协议：每个订阅最近一次发出的任务状态
+        self.last_sent: Dict[str, Dict[str, Any]] = {}
+        self.connected_at = time.monotonic()
+        self._pending: OrderedDict[Hashable, Outgoing] = OrderedDict()
+        self._ready = asyncio.Event()
+        self._seq = itertools.count()
+        self.sender: Optional[asyncio.Task] = None
+        self.closed = False
+        self.sent = 0
+        self.sent_size = 0  # 文本帧按字符、二进制帧按字节计
+        self.dropped = 0
+        self.coalesced = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._pending)
+
+    def offer(self, item: Outgoing, key: Optional[Hashable], max_queue: int) -> bool:
+        """入队；返回 False 表示队列已满且无可丢弃的消息，调用方应断开连接"""
+        if self.closed:
+            return True
+        if key is not None and key in self._pending:
+            # 合并：保留原位置，替换为最新内容
+            self._pending[key] = item
+            self.coalesced += 1
+            return True
+        if len(self._pending) >= max_queue:
+            victim = next((k for k, v in self._pending.items() if k == _PING_KEY or _droppable(v)), None)
+            if victim is None:
+                return False
+            del self._pending[victim]
+            self.dropped += 1
+        self._pending[key if key is not None else next(self._seq)] = item
+        self._ready.set()
+        return True
+
+    async def next_batch(self) -> list[Outgoing]:
+        await self._ready.wait()
+        batch = list(self._pending.values())
+        self._pending.clear()
+        self._ready.clear()
+        return batch
+
+    def forget(self, task_id: str) -> None:
+        """取消订阅后清除增量基线，重新订阅时先收到完整状态"""
+        self.last_sent.pop(task_id, None)
+
+    def render(self, item: Outgoing) -> Optional[Frame]:
+        """按协商的协议编码；增量为空（状态没有可见变化）时返回 None"""
+        codec = self.codec
+        if isinstance(item, WSMessage):
+            return codec.encode(item.model_dump(mode="json")) if codec.binary else item.model_dump_json()
+        if not codec.delta:
+            return item.to_json()  # 所有 json 连接共用同一份序列化结果
+        current = item.to_dict()
+        previous = self.last_sent.get(item.task_id)
+        changes = task_delta(previous, current)
+        if item.final:
+            self.last_sent.pop(item.task_id, None)
+        else:
+            self.last_sent[item.task_id] = current
+        if previous is not None and not changes:
+            return None
+        return codec.encode({
+            "type": "task_status" if previous is None else "task_delta",
+            "task_id": item.task_id,
+            "data": changes,
+        })
+
+
+class ConnectionManager:
+    """管理全部 WebSocket 连接：入队、发送协程、共享心跳与指标"""
+
+    def __init__(
+        self,
+        max_queue: int = 256,
+        heartbeat_seconds: float = 30.0,
+        send_timeout: float = 10.0,
+    ):
+        self.max_queue = max(1, max_queue)
+        self.heartbeat_seconds = heartbeat_seconds
+        self.send_timeout = send_timeout
+        self.connections: Dict[str, Connection] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._counters = {
+            "opened": 0,
+            "closed": 0,
+            "slow_disconnects": 0,
+            "heartbeats": 0,
+        }
+        # 已关闭连接的发送统计累加到这里，指标不随断开而丢失
+        self._closed_totals = {"sent": 0, "sent_size": 0, "dropped": 0, "coalesced": 0}
+
+    # ---- 生命周期 ----
+
+    def _ensure_heartbeat(self) -> None:
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.get_running_loop().create_task(self._heartbeat_loop())
+
+    async def stop(self) -> None:
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+        for connection in list(self.connections.values()):
+            await self.close(connection, code=1001, reason="server shutdown")
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            self._counters["heartbeats"] += 1
+            ping = WSMessage(type="ping")
+            for connection in list(self.connections.values()):
+                self.send(connection, ping, key=_PING_KEY)
+
+    # ---- 连接 ----
+
+    def register(
+        self,
+        connection_id: str,
+        websocket: Any,
+        user_id: Optional[str],
+        codec: Codec = DEFAULT_CODEC,
+    ) -> Connection:
+        connection = Connection(connection_id, websocket, user_id, codec)
+        self.connections[connection_id] = connection
+        self._counters["opened"] += 1
+        connection.sender = asyncio.get_running_loop().create_task(self._send_loop(connection))
+        self._ensure_heartbeat()
+        return connection
+
+    def unregister(self, connection_id: str) -> Optional[Connection]:
+        connection = self.connections.pop(connection_id, None)
+        if connection is None:
+            return None
+        connection.closed = True
+        if connection.sender is not None:
+            connection.sender.cancel()
+        self._counters["closed"] += 1
+        self._closed_totals["sent"] += connection.sent
+        self._closed_totals["sent_size"] += connection.sent_size
+        self._closed_totals["dropped"] += connection.dropped
+        self._closed_totals["coalesced"] += connection.coalesced
+        return connection
+
+    async def close(self, connection: Connection, code: int, reason: str = "") -> None:
+        """主动关闭连接；路由的接收循环随后收到断开并调用 unregister"""
+        if connection.closed:
+            return
+        connection.closed = True
+        await self._shutdown(connection, code, reason)
+
+    async def _shutdown(self, connection: Connection, code: int, reason: str) -> None:
+        if connection.sender is not None and connection.sender is not asyncio.current_task():
+            connection.sender.cancel()
+        try:
+            await connection.websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+
+    def _close_slow(self, connection: Connection, reason: str) -> None:
+        if connection.closed:
+            return
+        # 立即标记，之后的入队直接忽略，不会重复触发关闭
+        connection.closed = True
+        self._counters["slow_disconnects"] += 1
+        logger.warning(f"Closing slow WebSocket consumer {connection.id}: {reason}")
+        asyncio.get_running_loop().create_task(self._shutdown(connection, CLOSE_TRY_AGAIN_LATER, reason))
+
+    # ---- 发送 ----
+
+    def send(self, connection: Connection, item: Outgoing, key: Optional[Hashable] = None) -> None:
+        """入队，不等待发送；任务事件默认按 task_id 合并"""
+        if key is None and isinstance(item, TaskEvent):
+            key = ("task", item.task_id)
+        if not connection.offer(item, key, self.max_queue):
+            self._close_slow(connection, "send queue full")
+
+    async def _send_loop(self, connection: Connection) -> None:
+        websocket = connection.websocket
+        try:
+            while not connection.closed:
+                for item in await connection.next_batch():
+                    if isinstance(item, TaskEvent) and item.final:
+                        connection.task_ids.discard(item.task_id)
+                    frame = connection.render(item)
+                    if frame is None:
+                        continue
+                    if isinstance(frame, bytes):
+                        await asyncio.wait_for(websocket.send_bytes(frame), self.send_timeout)
+                    else:
+                        await asyncio.wait_for(websocket.send_text(frame), self.send_timeout)
+                    connection.sent += 1
+                    connection.sent_size += len(frame)
+        except asyncio.TimeoutError:
+            self._close_slow(connection, f"send timed out after {self.send_timeout:g}s")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 对端已断开，接收循环会完成清理
+            logger.debug(f"WebSocket send failed for {connection.id}: {e}")
+
+    # ---- 指标 ----
+
+    def metrics(self) -> Dict[str, Any]:
+        connections = list(self.connections.values())
+        depths = [connection.queued for connection in connections]
+        protocols: Dict[str, int] = {}
+        for connection in connections:
+            protocols[connection.codec.name] = protocols.get(connection.codec.name, 0) + 1
+        return {
+            "connections": len(connections),
+            "protocols": protocols,
+            "subscriptions": sum(len(connection.task_ids) for connection in connections),
+            "queued": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "queue_limit": self.max_queue,
+            "sent": self._closed_totals["sent"] + sum(c.sent for c in connections),
+            "sent_size": self._closed_totals["sent_size"] + sum(c.sent_size for c in connections),
+            "dropped": self._closed_totals["dropped"] + sum(c.dropped for c in connections),
+            "coalesced": self._closed_totals["coalesced"] + sum(c.coalesced for c in connections),
+            **self._counters,
+        }
@@ -0,0 +1,102 @@
+"""进程内任务事件中心
+
+TaskStore 在任务状态或结果变化时发布事件，订阅了该任务的连接立即收到推送，前端无需轮询 /tasks/{id}。
+订阅者是同步回调（如 asyncio.Queue.put_nowait），在发布方所在的事件循环中调用；
+TaskStore 的写入都发生在事件循环中（路由与调度器），因此不需要跨线程投递。
+
+事件只在本进程内分发：多 worker 部署时，连接只能收到与其处于同一进程的任务的推送。
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from .schemas import TaskResponse, WSMessage
+
+logger = logging.getLogger(__name__)
+
+
+class TaskEvent:
+    """一次任务变化；推送文本只在第一次需要时序列化，所有订阅者共用"""
+
+    __slots__ = ("task", "final", "_data", "_json")
+
+    def __init__(self, task: TaskResponse, final: bool = False):
+        self.task = task
+        self.final = final
+        self._data: Optional[Dict[str, Any]] = None
+        self._json: Optional[str] = None
+
+    @property
+    def task_id(self) -> str:
+        return self.task.id
+
+    def to_dict(self) -> Dict[str, Any]:
+        """任务的 JSON 兼容字典；增量协议按连接与上次发出的字典比较"""
+        if self._data is None:
+            self._data = self.task.model_dump(mode="json")
+        return self._data
+
+    def to_json(self) -> str:
+        if self._json is None:
+            self._json = WSMessage(
+                type="task_status",
+                task_id=self.task.id,
+                data=self.to_dict(),
+            ).model_dump_json()
+        return self._json
+
+
+Subscriber = Callable[[TaskEvent], None]
+
+
+class TaskEventHub:
+    """按 task_id 分发事件；没有订阅者的任务发布时几乎零开销"""
+
+    def __init__(self) -> None:
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, task_id: str, subscriber: Subscriber) -> None:
+        self._subscribers.setdefault(task_id, set()).add(subscriber)
+
+    def unsubscribe(self, task_id: str, subscriber: Subscriber) -> None:
+        subscribers = self._subscribers.get(task_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self._subscribers[task_id]
+
+    def unsubscribe_all(self, task_ids: Iterable[str], subscriber: Subscriber) -> None:
+        for task_id in list(task_ids):
+            self.unsubscribe(task_id, subscriber)
+
+    def wants(self, task_id: str) -> bool:
+        """是否有连接订阅了该任务；发布方据此跳过事件构造"""
+        return task_id in self._subscribers
+
+    def publish(self, event: TaskEvent) -> None:
+        """向订阅者分发事件；任务已结束（event.final）时分发后移除该任务的全部订阅"""
+        if event.final:
+            subscribers = self._subscribers.pop(event.task_id, None)
+        else:
+            subscribers = self._subscribers.get(event.task_id)
+        if not subscribers:
+            return
+        self.published += 1
+        for subscriber in list(subscribers):
+            try:
+                subscriber(event)
+                self.delivered += 1
+            except Exception as e:
+                logger.warning(f"Task event subscriber failed for {event.task_id}: {e}")
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "tasks": len(self._subscribers),
+            "subscriptions": sum(len(s) for s in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+        }
@@ -0,0 +1,121 @@
+"""创建任务接口的幂等与去重
+
+- 带 Idempotency-Key 请求头：同一用户、同一接口、同一个 key 在 key_ttl 内只创建一次任务，
+  重复请求返回原任务；同一个 key 搭配不同的请求体返回 422
+- 不带请求头：同一用户、同一接口、相同请求体在 window 秒内视为重复提交（双击、客户端重试），
+  返回尚未失败的原任务；原任务已失败或已取消时重新创建
+
+占位与记录保存在共享缓存中（SET NX），多个 worker 之间同样生效；重放的响应带 Idempotent-Replayed: true。
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException, Response
+
+from .cache import Cache
+from .schemas import TaskResponse, TaskStatus
+from .store import TaskStore
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+MAX_KEY_LENGTH = 255
+
+# 内容去重时，原任务处于这些状态则重新创建
+_RETRYABLE = frozenset({TaskStatus.ERROR, TaskStatus.CANCELLED})
+
+
+def fingerprint(body: Any) -> str:
+    """请求体的规范化摘要（键排序），字段顺序不同的同一请求得到相同结果"""
+    raw = json.dumps(body, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class TaskDeduplicator:
+    """包装创建任务的调用：命中已有任务时直接返回，否则创建并记录"""
+
+    def __init__(
+        self,
+        cache: Cache,
+        task_store: TaskStore,
+        window_seconds: int = 60,
+        key_ttl_seconds: int = 86400,
+        pending_seconds: float = 5.0,
+    ):
+        self.cache = cache
+        self.task_store = task_store
+        self.window_seconds = window_seconds
+        self.key_ttl_seconds = key_ttl_seconds
+        # 占位的存活时间：创建方崩溃时占位到期自动释放；并发的重复请求最多等待这么久
+        self.pending_seconds = pending_seconds
+        self._counters = {"created": 0, "replayed": 0, "conflicts": 0}
+
+    async def run(
+        self,
+        scope: str,
+        user_id: Optional[str],
+        body: Any,
+        idempotency_key: Optional[str],
+        create: Callable[[], Awaitable[TaskResponse]],
+        response: Optional[Response] = None,
+    ) -> TaskResponse:
+        """scope 区分接口；body 为决定任务内容的全部参数（含路径参数）"""
+        digest = fingerprint(body)
+        if idempotency_key is not None:
+            idempotency_key = idempotency_key.strip()
+            if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+                raise HTTPException(status_code=400, detail=f"{IDEMPOTENCY_HEADER} 长度须为 1-{MAX_KEY_LENGTH}")
+            key, ttl = f"key:{user_id or ''}:{scope}:{idempotency_key}", self.key_ttl_seconds
+        elif self.window_seconds > 0:
+            key, ttl = f"body:{user_id or ''}:{scope}:{digest}", self.window_seconds
+        else:
+            self._counters["created"] += 1
+            return await create()
+
+        deadline = time.monotonic() + self.pending_seconds
+        while True:
+            if await self.cache.aadd(key, {"fingerprint": digest, "task_id": None}, ttl=self.pending_seconds):
+                try:
+                    task = await create()
+                except BaseException:
+                    await self.cache.adelete(key)
+                    raise
+                await self.cache.aset(key, {"fingerprint": digest, "task_id": task.id}, ttl=ttl)
+                self._counters["created"] += 1
+                return task
+
+            entry: Optional[Dict[str, Any]] = await self.cache.aget(key)
+            if entry is None:
+                continue  # 占位恰好过期，重新抢占
+            if entry.get("fingerprint") != digest:
+                self._counters["conflicts"] += 1
+                raise HTTPException(status_code=422, detail=f"{IDEMPOTENCY_HEADER} 已用于不同的请求内容")
+            task_id = entry.get("task_id")
+            if task_id is None:
+                # 相同请求正在创建任务（并发的双击）
+                if time.monotonic() >= deadline:
+                    self._counters["conflicts"] += 1
+                    raise HTTPException(status_code=409, detail="相同的请求正在处理中，请稍后重试")
+                await asyncio.sleep(0.05)
+                continue
+
+            task = self.task_store.get_task(task_id)
+            if task is None or (idempotency_key is None and task.status in _RETRYABLE):
+                await self.cache.adelete(key)
+                continue
+            self._counters["replayed"] += 1
+            logger.info(f"Replaying task {task_id} for duplicate {scope} request")
+            if response is not None:
+                response.headers[REPLAYED_HEADER] = "true"
+            return task
+
+    def metrics(self) -> Dict[str, int]:
+        return dict(self._counters)
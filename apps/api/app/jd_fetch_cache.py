@@ -0,0 +1,199 @@
+"""按 URL 缓存的 JD 详情抓取结果
+
+同一个职位链接被不同用户反复粘贴时，不再每次重新抓取与解析（BOSS 走浏览器，一次要数秒）：
+- 键为规范化后的 URL：协议与主机小写、去掉默认端口、片段与跟踪参数，查询参数排序
+- 记录保存标准化后的 JD、ETag / Last-Modified 与抓取时间，存放在共享缓存中，所有 worker 共用
+- 新鲜（fresh_seconds 内）直接返回；过期但仍在 stale_seconds 内先返回旧值，后台带校验器做条件请求重新验证，
+  源站返回 304 时只刷新抓取时间
+- 同一 URL 的并发抓取合并为一次：进程内共享同一个抓取任务（调用方被取消不影响其他等待者），跨 worker 通过 SET NX 占位，
+  未抢到占位的 worker 等待对方写入结果（最多 lock_seconds）后再自行抓取
+
+抓取失败（返回 None）不缓存。
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .adapters import FetchResult
+from .cache import Cache
+
+logger = logging.getLogger(__name__)
+
+# fetch(etag, last_modified) -> FetchResult
+Fetcher = Callable[[Optional[str], Optional[str]], Awaitable[FetchResult]]
+
+# 不影响页面内容的跟踪/来源参数
+_TRACKING_PARAMS = frozenset({
+    "ka", "lid", "sid", "spm", "from", "source", "ref", "refer", "share", "share_id", "track_id",
+    "securityId", "sessionId", "timestamp", "ts", "_", "fbclid", "gclid",
+})
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """规范化职位链接，同一职位的不同写法得到同一个键"""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in _TRACKING_PARAMS and not key.startswith("utm_")
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+class JDFetchCache:
+    def __init__(
+        self,
+        cache: Cache,
+        fresh_seconds: int = 3600,
+        stale_seconds: int = 7 * 86400,
+        lock_seconds: float = 15.0,
+    ):
+        self.cache = cache
+        self.fresh_seconds = fresh_seconds
+        self.stale_seconds = stale_seconds
+        self.lock_seconds = lock_seconds
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "not_modified": 0,
+            "refreshed": 0,
+            "errors": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.fresh_seconds > 0
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha1(canonicalize_url(url).encode("utf-8")).hexdigest()
+
+    async def get_or_fetch(self, url: str, fetch: Fetcher) -> Optional[Dict[str, Any]]:
+        """返回 URL 对应的标准化 JD；未命中时调用 fetch 抓取"""
+        if not self.enabled:
+            return (await fetch(None, None)).jd
+        key = self._key(url)
+        entry = await self.cache.aget(key)
+        if entry is not None:
+            age = time.time() - entry["fetched_at"]
+            if age < self.fresh_seconds:
+                self._counters["hits"] += 1
+                return entry["jd"]
+            self._counters["stale_hits"] += 1
+            self._revalidate_in_background(key, entry, fetch)
+            return entry["jd"]
+
+        self._counters["misses"] += 1
+        entry = await self._single_flight(key, lambda: self._fetch_locked(key, fetch))
+        return entry["jd"] if entry else None
+
+    async def _single_flight(self, key: str, run: Callable[[], Awaitable[Optional[dict]]]) -> Optional[dict]:
+        """同一键的并发调用共享一次执行结果；调用方被取消不影响其他等待者"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._start(key, run)
+        else:
+            self._counters["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _start(self, key: str, run: Callable[[], Awaitable[Optional[dict]]]) -> asyncio.Task:
+        """在独立任务中执行 run，完成前登记在 _inflight 中"""
+        task = asyncio.get_running_loop().create_task(run())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return task
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            self._inflight.pop(key)
+        if not task.cancelled():
+            task.exception()  # 等待者都已离开时也标记为已读取
+
+    async def _fetch_locked(self, key: str, fetch: Fetcher) -> Optional[dict]:
+        """跨 worker 占位后抓取；其他 worker 正在抓取时等待其结果"""
+        lock = f"lock:{key}"
+        owned = await self.cache.aadd(lock, 1, ttl=self.lock_seconds)
+        if not owned:
+            deadline = time.monotonic() + self.lock_seconds
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+                entry = await self.cache.aget(key)
+                if entry is not None:
+                    self._counters["coalesced"] += 1
+                    return entry
+                if await self.cache.aget(lock) is None:
+                    break  # 对方抓取失败或已放弃
+        try:
+            return await self._fetch(key, fetch, None)
+        finally:
+            if owned:
+                await self.cache.adelete(lock)
+
+    async def _fetch(self, key: str, fetch: Fetcher, entry: Optional[dict]) -> Optional[dict]:
+        """抓取或条件请求重新验证，写入缓存并返回新记录；失败时返回原记录"""
+        etag = entry.get("etag") if entry else None
+        last_modified = entry.get("last_modified") if entry else None
+        try:
+            result = await fetch(etag, last_modified)
+        except Exception as e:
+            self._counters["errors"] += 1
+            logger.warning(f"JD fetch failed for cache key {key}: {e}")
+            return entry
+        if result.not_modified and entry is not None:
+            self._counters["not_modified"] += 1
+            entry = {
+                **entry,
+                "etag": result.etag or etag,
+                "last_modified": result.last_modified or last_modified,
+                "fetched_at": time.time(),
+            }
+        elif result.jd is not None:
+            if entry is not None:
+                self._counters["refreshed"] += 1
+            entry = {
+                "jd": result.jd,
+                "etag": result.etag,
+                "last_modified": result.last_modified,
+                "fetched_at": time.time(),
+            }
+        else:
+            if entry is not None:
+                self._counters["errors"] += 1
+            return entry
+        await self.cache.aset(key, entry, ttl=self.fresh_seconds + self.stale_seconds)
+        return entry
+
+    def _revalidate_in_background(self, key: str, entry: dict, fetch: Fetcher) -> None:
+        if key in self._inflight:
+            return
+
+        async def revalidate() -> Optional[dict]:
+            # 其他 worker 正在重新验证同一条记录时跳过
+            if not await self.cache.aadd(f"lock:{key}", 1, ttl=self.lock_seconds):
+                return entry
+            try:
+                return await self._fetch(key, fetch, entry)
+            finally:
+                await self.cache.adelete(f"lock:{key}")
+
+        self._start(key, revalidate)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "inflight": len(self._inflight),
+            **self._counters,
+        }
@@ -0,0 +1,11 @@
+from .journal import JobJournal, create_job_journal
+from .scheduler import Job, JobContext, JobScheduler, Lane
+
+__all__ = [
+    "Job",
+    "JobContext",
+    "JobJournal",
+    "JobScheduler",
+    "Lane",
+    "create_job_journal",
+]
@@ -0,0 +1,295 @@
+"""持久化任务队列（SQLite）
+
+调度器在提交时把任务（处理器名 + JSON 载荷）写入 jobs 表，执行前以租约认领，
+执行期间周期性续约，结束时只有仍持有租约的执行者才能写入最终状态：
+
+- queued   已提交，等待认领
+- running  已被某个执行者认领；lease_expires 之前其他进程不会再认领
+- done / failed / cancelled  已结束，保留到 TTL 后清理
+
+取消可以由任意进程发起：排队中的任务直接标记为 cancelled；运行中的任务置 cancel_requested，
+持有租约的执行者在下次续约时发现并中止执行。
+
+进程崩溃或重启后，租约到期的 running 任务与无人处理的 queued 任务会被重新认领执行，
+因此任务至少执行一次；处理器可通过 checkpoint 保存中间状态，重新执行时从断点继续。
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import uuid4
+
+from ..store.backends import SQLiteBackend, StorageBackend
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+@dataclass(slots=True)
+class JournalEntry:
+    task_id: str
+    name: str
+    user_id: str
+    lane: int
+    timeout: Optional[float]
+    payload: Dict[str, Any]
+    status: str
+    attempts: int
+    checkpoint: Optional[Dict[str, Any]]
+    cancel_requested: bool = False
+
+
+def make_owner_id() -> str:
+    """执行者标识：主机名 + 进程号 + 随机后缀，同一进程重启后也不会复用"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:6]}"
+
+
+class JobJournal:
+    """jobs 表的读写；所有方法线程安全，语句都是短事务"""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            task_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            lane INTEGER NOT NULL,
+            timeout REAL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            lease_owner TEXT,
+            lease_expires REAL,
+            checkpoint TEXT,
+            cancel_requested INTEGER NOT NULL DEFAULT 0,
+            enqueued_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_status_lease ON jobs (status, lease_expires);
+        CREATE INDEX IF NOT EXISTS idx_jobs_status_updated ON jobs (status, updated_at);
+    """
+
+    _COLUMNS = "task_id, name, user_id, lane, timeout, payload, status, attempts, checkpoint, cancel_requested"
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=64,
+        )
+        self._conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        with self._lock:
+            self._conn.executescript(self._SCHEMA)
+
+    def _execute(self, sql: str, params: Iterable[Any] = ()) -> int:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).rowcount
+
+    @staticmethod
+    def _entry(row: tuple) -> JournalEntry:
+        task_id, name, user_id, lane, timeout, payload, status, attempts, checkpoint, cancel_requested = row
+        return JournalEntry(
+            task_id=task_id,
+            name=name,
+            user_id=user_id,
+            lane=lane,
+            timeout=timeout,
+            payload=json.loads(payload),
+            status=status,
+            attempts=attempts,
+            checkpoint=json.loads(checkpoint) if checkpoint else None,
+            cancel_requested=bool(cancel_requested),
+        )
+
+    # ---- 提交 ----
+
+    def enqueue(
+        self,
+        task_id: str,
+        name: str,
+        user_id: str,
+        lane: int,
+        timeout: Optional[float],
+        payload: Dict[str, Any],
+    ) -> bool:
+        """写入排队中的任务；task_id 已存在时不覆盖并返回 False"""
+        now = time.time()
+        return self._execute(
+            "INSERT OR IGNORE INTO jobs "
+            "(task_id, name, user_id, lane, timeout, payload, status, enqueued_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (task_id, name, user_id, lane, timeout,
+             json.dumps(payload, ensure_ascii=False, separators=(",", ":")), QUEUED, now, now),
+        ) == 1
+
+    def get(self, task_id: str) -> Optional[JournalEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM jobs WHERE task_id = ?", (task_id,)
+            ).fetchone()
+        return self._entry(row) if row else None
+
+    # ---- 租约 ----
+
+    def claim(self, task_id: str, owner: str, lease_seconds: float) -> Optional[JournalEntry]:
+        """认领排队中或租约已过期的任务；其他执行者持有有效租约、或任务已结束时返回 None"""
+        now = time.time()
+        claimed = self._execute(
+            "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?, "
+            "attempts = attempts + 1, updated_at = ? "
+            "WHERE task_id = ? AND (status = ? OR (status = ? AND lease_expires < ?))",
+            (RUNNING, owner, now + lease_seconds, now, task_id, QUEUED, RUNNING, now),
+        )
+        return self.get(task_id) if claimed else None
+
+    def holds(self, task_id: str, owner: str) -> bool:
+        """owner 是否仍持有该任务的租约"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM jobs WHERE task_id = ? AND lease_owner = ? AND status = ?",
+                (task_id, owner, RUNNING),
+            ).fetchone()
+        return row is not None
+
+    def renew(self, owner: str, task_ids: List[str], lease_seconds: float) -> None:
+        """为本执行者仍在运行的任务续约"""
+        if not task_ids:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE jobs SET lease_expires = ? WHERE task_id = ? AND lease_owner = ? AND status = ?",
+                [(now + lease_seconds, task_id, owner, RUNNING) for task_id in task_ids],
+            )
+
+    def release(self, owner: str, task_ids: List[str]) -> None:
+        """正常停机时交还租约，任务回到队列，本次执行不计入重试次数"""
+        if not task_ids:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires = NULL, "
+                "attempts = MAX(attempts - 1, 0), updated_at = ? "
+                "WHERE task_id = ? AND lease_owner = ? AND status = ?",
+                [(QUEUED, now, task_id, owner, RUNNING) for task_id in task_ids],
+            )
+
+    def checkpoint(self, task_id: str, owner: str, state: Dict[str, Any]) -> bool:
+        """保存断点；租约已被其他执行者接管时返回 False"""
+        return self._execute(
+            "UPDATE jobs SET checkpoint = ?, updated_at = ? WHERE task_id = ? AND lease_owner = ? AND status = ?",
+            (json.dumps(state, ensure_ascii=False, separators=(",", ":")), time.time(), task_id, owner, RUNNING),
+        ) == 1
+
+    def finish(self, task_id: str, owner: Optional[str], status: str) -> bool:
+        """写入最终状态
+
+        owner 不为 None 时只有仍持有租约的执行者能成功；返回 False 说明任务已被其他执行者接管或已结束，
+        调用方不应再写入任务结果（幂等完成）。owner 为 None 用于取消排队中的任务。
+        """
+        now = time.time()
+        if owner is None:
+            return self._execute(
+                "UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE task_id = ? AND status = ?",
+                (status, now, task_id, QUEUED),
+            ) == 1
+        return self._execute(
+            "UPDATE jobs SET status = ?, lease_expires = NULL, checkpoint = NULL, updated_at = ? "
+            "WHERE task_id = ? AND lease_owner = ? AND status = ?",
+            (status, now, task_id, owner, RUNNING),
+        ) == 1
+
+    # ---- 取消 ----
+
+    def request_cancel(self, task_id: str) -> Optional[str]:
+        """跨进程取消：排队中的任务直接结束并返回 queued；运行中的任务标记待取消并返回 running；
+        任务不存在或已结束时返回 None"""
+        if self.finish(task_id, None, CANCELLED):
+            return QUEUED
+        marked = self._execute(
+            "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE task_id = ? AND status = ?",
+            (time.time(), task_id, RUNNING),
+        )
+        return RUNNING if marked else None
+
+    def cancel_requested(self, owner: str) -> List[str]:
+        """本执行者持有租约、且已被请求取消的任务"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT task_id FROM jobs WHERE lease_owner = ? AND status = ? AND cancel_requested = 1",
+                (owner, RUNNING),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    # ---- 恢复与清理 ----
+
+    def orphaned(self, queued_before: float, limit: int = 500) -> List[JournalEntry]:
+        """需要重新认领的任务：租约已过期的 running，以及 queued_before 之前提交仍未被认领的 queued"""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM jobs "
+                "WHERE (status = ? AND lease_expires < ?) OR (status = ? AND enqueued_at <= ?) "
+                "ORDER BY enqueued_at LIMIT ?",
+                (RUNNING, now, QUEUED, queued_before, limit),
+            ).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def purge(self, older_than_seconds: float) -> int:
+        """删除结束超过指定时长的任务"""
+        cutoff = time.time() - older_than_seconds
+        return self._execute(
+            "DELETE FROM jobs WHERE status IN (?, ?, ?) AND updated_at < ?",
+            (*FINISHED_STATES, cutoff),
+        )
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def journal_path(store_path: str) -> str:
+    """队列数据库路径：存储数据库旁的 <名称>.jobs<后缀>
+
+    不与存储共用一个文件：入队、认领、续约、断点都是写入，共用文件时每次写入都会改变
+    存储连接的 PRAGMA data_version，使各 worker 的存储层每次访问都做一轮增量同步查询。
+    """
+    path = Path(store_path)
+    return str(path.with_name(f"{path.stem}.jobs{path.suffix or '.db'}"))
+
+
+def create_job_journal(backend: Optional[StorageBackend]) -> Optional[JobJournal]:
+    """存储后端为 SQLite 文件时，在其旁边创建独立的队列数据库；纯内存模式下不持久化队列"""
+    if not isinstance(backend, SQLiteBackend) or backend.path == ":memory:":
+        return None
+    path = journal_path(backend.path)
+    logger.info(f"Using durable job queue: {path}")
+    return JobJournal(path)
@@ -0,0 +1,566 @@
+"""进程内任务调度器
+
+取代 FastAPI BackgroundTasks：
+- N 个 asyncio worker 并发执行，CPU 密集的步骤可通过 JobContext.run_cpu 交给进程池
+- 三条优先级通道（interactive > default > bulk），bulk 通道最多占用一半 worker，
+  批量 JD 抓取不会饿死交互类任务
+- 同一通道内按用户分队列轮转出队，单个用户的大批量提交不会阻塞其他用户
+- 支持取消与超时，任务状态同步写入 TaskStore；持久化模式下取消经 jobs 表传递，任意 worker 都能取消
+
+任务以“处理器名 + JSON 载荷”提交，处理器在启动时注册。配置了 JobJournal 时队列持久化到 SQLite：
+执行前以租约认领、执行中定期续约，进程重启或崩溃后由 start() 与后台巡检重新认领，
+保证至少执行一次；写入结果前确认仍持有租约，被接管的旧执行者不会覆盖结果。
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from enum import IntEnum
+from functools import partial
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from ..schemas import TaskStatus
+from ..store import TaskStore
+from ..store.task_store import TERMINAL_STATUSES
+from . import journal as jr
+from .journal import JobJournal, JournalEntry, make_owner_id
+
+logger = logging.getLogger(__name__)
+
+
+class Lane(IntEnum):
+    """优先级通道，数值越小越优先"""
+    INTERACTIVE = 0
+    DEFAULT = 1
+    BULK = 2
+
+
+JobHandler = Callable[["JobContext", Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+
+@dataclass(slots=True)
+class JobSpec:
+    name: str
+    handler: JobHandler
+    lane: Lane
+    timeout: Optional[float]
+
+
+@dataclass(slots=True)
+class Job:
+    task_id: str
+    name: str
+    user_id: str
+    payload: Dict[str, Any]
+    lane: Lane
+    timeout: Optional[float]
+    enqueued_at: float = field(default_factory=time.monotonic)
+    cancel_requested: bool = False
+    attempt: int = 1
+    checkpoint: Optional[Dict[str, Any]] = None
+
+
+# TaskStore 最终状态 -> jobs 表状态
+_JOURNAL_STATUS = {
+    TaskStatus.DONE: jr.DONE,
+    TaskStatus.ERROR: jr.FAILED,
+    TaskStatus.CANCELLED: jr.CANCELLED,
+}
+
+
+class JobContext:
+    """传给处理器的上下文：任务信息、进度上报、断点保存与 CPU 任务执行"""
+
+    def __init__(self, scheduler: "JobScheduler", job: Job):
+        self._scheduler = scheduler
+        self.job = job
+        self.task_id = job.task_id
+        self.user_id = job.user_id
+
+    @property
+    def attempt(self) -> int:
+        """第几次执行；大于 1 说明上次执行被中断"""
+        return self.job.attempt
+
+    @property
+    def resume_state(self) -> Dict[str, Any]:
+        """上次执行保存的断点，没有时为空 dict"""
+        return self.job.checkpoint or {}
+
+    def progress(self, value: int) -> None:
+        self._scheduler.task_store.update_task_status(self.task_id, TaskStatus.RUNNING, progress=value)
+
+    def partial_result(self, result: Dict[str, Any], progress: Optional[int] = None) -> None:
+        """写入阶段性结果（任务仍为 running），订阅者随状态推送立即收到；最终结果会覆盖它"""
+        self._scheduler.task_store.update_task_result(self.task_id, TaskStatus.RUNNING, result, progress=progress)
+
+    def checkpoint(self, state: Dict[str, Any]) -> None:
+        """保存断点（须可 JSON 序列化）；任务重新执行时通过 resume_state 读取"""
+        self.job.checkpoint = state
+        journal = self._scheduler.journal
+        if journal is not None and not journal.checkpoint(self.task_id, self._scheduler.owner, state):
+            logger.warning(f"Checkpoint dropped for task {self.task_id}: lease lost")
+
+    async def run_cpu(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """在进程池中执行 CPU 密集函数（fn 与参数须可 pickle）；未配置进程池时使用线程池"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._scheduler.cpu_executor, partial(fn, *args))
+
+
+class _LaneQueue:
+    """单个通道：每个用户一条 FIFO 队列，用户之间轮转出队"""
+
+    def __init__(self) -> None:
+        self._queues: Dict[str, Deque[Job]] = {}
+        self._users: Deque[str] = deque()
+        self.size = 0
+
+    def push(self, job: Job) -> None:
+        queue = self._queues.get(job.user_id)
+        if queue is None:
+            queue = self._queues[job.user_id] = deque()
+            self._users.append(job.user_id)
+        queue.append(job)
+        self.size += 1
+
+    def pop(self) -> Optional[Job]:
+        if not self._users:
+            return None
+        user_id = self._users.popleft()
+        queue = self._queues[user_id]
+        job = queue.popleft()
+        if queue:
+            self._users.append(user_id)
+        else:
+            del self._queues[user_id]
+        self.size -= 1
+        return job
+
+    def remove(self, task_id: str) -> Optional[Job]:
+        for user_id, queue in self._queues.items():
+            for job in queue:
+                if job.task_id == task_id:
+                    queue.remove(job)
+                    if not queue:
+                        del self._queues[user_id]
+                        self._users.remove(user_id)
+                    self.size -= 1
+                    return job
+        return None
+
+    @property
+    def users(self) -> int:
+        return len(self._queues)
+
+
+class JobScheduler:
+    """任务调度器；在应用 lifespan 中 start/stop，首次提交时也会自动启动"""
+
+    def __init__(
+        self,
+        task_store: TaskStore,
+        workers: int = 4,
+        process_workers: int = 0,
+        default_timeout: Optional[float] = 600,
+        bulk_concurrency: Optional[int] = None,
+        journal: Optional[JobJournal] = None,
+        lease_seconds: float = 30,
+        max_attempts: int = 3,
+        retention_seconds: float = 86400,
+    ):
+        self.task_store = task_store
+        self.journal = journal
+        self.owner = make_owner_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.retention_seconds = retention_seconds
+        self.workers = max(1, workers)
+        self.default_timeout = default_timeout or None
+        self.process_workers = process_workers
+        self.cpu_executor: Optional[Executor] = None
+
+        self._specs: Dict[str, JobSpec] = {}
+        self._lanes: Dict[Lane, _LaneQueue] = {lane: _LaneQueue() for lane in Lane}
+        self._lane_running: Dict[Lane, int] = {lane: 0 for lane in Lane}
+        # bulk 通道并发上限，保证始终有 worker 留给交互类任务
+        self._lane_limits: Dict[Lane, int] = {
+            Lane.BULK: bulk_concurrency or max(1, self.workers // 2),
+        }
+        self._running: Dict[str, tuple[Job, asyncio.Task]] = {}
+        self._tracked: Set[str] = set()  # 本进程队列中或运行中的 task_id
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._lease_task: Optional[asyncio.Task] = None
+
+        self._counters = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "timed_out": 0,
+            "recovered": 0,
+            "lease_lost": 0,
+        }
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._started_jobs = 0
+
+    # ---- 注册与生命周期 ----
+
+    def register(
+        self,
+        name: str,
+        handler: JobHandler,
+        lane: Lane = Lane.DEFAULT,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """注册处理器；处理器返回的 dict 作为任务结果写入 TaskStore"""
+        self._specs[name] = JobSpec(name=name, handler=handler, lane=lane, timeout=timeout)
+
+    async def start(self) -> None:
+        if self.process_workers > 0 and self.cpu_executor is None:
+            self.cpu_executor = ProcessPoolExecutor(max_workers=self.process_workers)
+        self._ensure_started()
+        if self.journal is not None:
+            # 上一个进程遗留的任务：排队中的全部接管，运行中的等租约过期后接管
+            self._recover(queued_before=time.time())
+
+    async def stop(self) -> None:
+        running_ids = list(self._running)
+        for _, runner in list(self._running.values()):
+            runner.cancel()
+        tasks = self._worker_tasks + ([self._lease_task] if self._lease_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._lease_task = None
+        self._loop = None
+        self._tracked.clear()
+        for queue in self._lanes.values():
+            while queue.pop() is not None:
+                pass
+        if self.journal is not None:
+            # 正常停机交还租约，重启后的进程立即接管，不必等租约过期
+            self.journal.release(self.owner, running_ids)
+        if self.cpu_executor is not None:
+            self.cpu_executor.shutdown(wait=False, cancel_futures=True)
+            self.cpu_executor = None
+
+    def _ensure_started(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # 不在事件循环中（如同步脚本），等 start() 时再启动
+        if self._loop is loop:
+            return
+        # 首次启动，或事件循环已更换（测试客户端每次请求可能使用新的循环）
+        if self._loop is not None:
+            self._abandon_loop(self._loop)
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._worker_tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        if self.journal is not None:
+            self._lease_task = loop.create_task(self._maintain_leases())
+
+    def _abandon_loop(self, old_loop: asyncio.AbstractEventLoop) -> None:
+        """事件循环更换前停掉旧循环上的 worker 与续约任务，避免它们与新循环上的 worker 争抢队列"""
+        tasks = self._worker_tasks + ([self._lease_task] if self._lease_task else [])
+        self._worker_tasks = []
+        self._lease_task = None
+        if not old_loop.is_closed():
+            # 旧循环仍在运行（如另一个线程）：在其线程中取消，运行中的任务随 worker 一起收尾
+            for task in tasks:
+                old_loop.call_soon_threadsafe(task.cancel)
+            return
+        # 旧循环已关闭，其上运行中的任务不会再结束：交还租约并重新排队
+        interrupted = [job for job, _ in self._running.values()]
+        self._running.clear()
+        self._lane_running = {lane: 0 for lane in Lane}
+        if self.journal is not None:
+            self.journal.release(self.owner, [job.task_id for job in interrupted])
+        for job in interrupted:
+            logger.warning(f"Requeueing job {job.name} for task {job.task_id}: its event loop was closed")
+            self._lanes[job.lane].push(job)
+
+    # ---- 提交与取消 ----
+
+    def submit(
+        self,
+        name: str,
+        task_id: str,
+        user_id: str,
+        payload: Optional[Dict[str, Any]] = None,
+        lane: Optional[Lane] = None,
+        timeout: Optional[float] = None,
+    ) -> Job:
+        """把任务放入队列；task_id 对应的任务须已在 TaskStore 中创建
+
+        持久化模式下同一 task_id 重复提交不会重复入队。
+        """
+        spec = self._specs.get(name)
+        if spec is None:
+            raise ValueError(f"Unknown job handler: {name}")
+        job = Job(
+            task_id=task_id,
+            name=name,
+            user_id=user_id,
+            payload=payload or {},
+            lane=spec.lane if lane is None else lane,
+            timeout=timeout or spec.timeout or self.default_timeout,
+        )
+        if self.journal is not None and not self.journal.enqueue(
+            task_id, name, user_id, int(job.lane), job.timeout, job.payload
+        ):
+            logger.info(f"Job for task {task_id} already journaled, skipping enqueue")
+            return job
+        self._counters["submitted"] += 1
+        self._enqueue(job)
+        return job
+
+    def _enqueue(self, job: Job) -> None:
+        if job.task_id in self._tracked:
+            return
+        self._tracked.add(job.task_id)
+        self._lanes[job.lane].push(job)
+        self._ensure_started()
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def cancel(self, task_id: str) -> bool:
+        """取消排队中或运行中的任务；任务不存在或已结束时返回 False
+
+        持久化模式下任务可能在其他 worker 上：排队中的直接在 jobs 表中结束，
+        运行中的标记待取消，由持有租约的 worker 在下次续约（约 lease_seconds / 3）时中止。
+        未配置 JobJournal 时只能取消本进程中的任务。
+        """
+        for queue in self._lanes.values():
+            job = queue.remove(task_id)
+            if job is not None:
+                self._tracked.discard(task_id)
+                if self.journal is not None:
+                    self.journal.finish(task_id, None, jr.CANCELLED)
+                self._finish_cancelled(job, leased=False)
+                return True
+        if self._cancel_running(task_id):
+            return True
+        if self.journal is None:
+            return False
+        outcome = self.journal.request_cancel(task_id)
+        if outcome == jr.QUEUED:
+            self._counters["cancelled"] += 1
+            self.task_store.update_task_result(task_id, TaskStatus.CANCELLED, error="任务已取消")
+        return outcome is not None
+
+    def _cancel_running(self, task_id: str) -> bool:
+        running = self._running.get(task_id)
+        if running is None:
+            return False
+        job, runner = running
+        job.cancel_requested = True
+        runner.cancel()
+        return True
+
+    def _finish_cancelled(self, job: Job, leased: bool = True) -> None:
+        self._counters["cancelled"] += 1
+        if leased:
+            self._complete(job, TaskStatus.CANCELLED, error="任务已取消")
+        else:
+            self.task_store.update_task_result(job.task_id, TaskStatus.CANCELLED, error="任务已取消")
+
+    def _complete(self, job: Job, status: TaskStatus, result: Optional[Dict[str, Any]] = None, **fields: Any) -> bool:
+        """写入最终状态；持久化模式下先确认仍持有租约，租约已被接管时丢弃本次结果
+
+        先写 TaskStore 再标记 jobs 表：两步之间崩溃时任务会被重新认领，认领时发现结果已写入便直接收尾。
+        """
+        if self.journal is not None and not self.journal.holds(job.task_id, self.owner):
+            self._counters["lease_lost"] += 1
+            logger.warning(f"Dropping result of task {job.task_id}: lease lost to another worker")
+            return False
+        self.task_store.update_task_result(job.task_id, status, result, **fields)
+        if self.journal is not None:
+            self.journal.finish(job.task_id, self.owner, _JOURNAL_STATUS[status])
+        return True
+
+    # ---- 恢复 ----
+
+    def _recover(self, queued_before: float) -> int:
+        """把需要重新认领的任务放回本进程队列；真正的认领在执行前完成"""
+        recovered = 0
+        for entry in self.journal.orphaned(queued_before):
+            if entry.task_id in self._tracked:
+                continue
+            if entry.name not in self._specs:
+                logger.warning(f"No handler registered for journaled job {entry.name} ({entry.task_id})")
+                continue
+            self._enqueue(self._job_from_entry(entry))
+            task = self.task_store.get_task(entry.task_id)
+            if task is not None and task.status not in TERMINAL_STATUSES:
+                self.task_store.update_task_status(entry.task_id, TaskStatus.QUEUED)
+            recovered += 1
+        if recovered:
+            self._counters["recovered"] += recovered
+            logger.info(f"Recovered {recovered} orphaned job(s) from the journal")
+        return recovered
+
+    @staticmethod
+    def _job_from_entry(entry: JournalEntry) -> Job:
+        return Job(
+            task_id=entry.task_id,
+            name=entry.name,
+            user_id=entry.user_id,
+            payload=entry.payload,
+            lane=Lane(entry.lane),
+            timeout=entry.timeout,
+            checkpoint=entry.checkpoint,
+        )
+
+    async def _maintain_leases(self) -> None:
+        """续约本进程运行中的任务；每个租约周期巡检一次其他进程遗留的任务并清理过期记录"""
+        interval = max(self.lease_seconds / 3, 0.05)
+        last_scan = time.monotonic()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.journal.renew(self.owner, list(self._running), self.lease_seconds)
+                # 其他 worker 通过 jobs 表请求取消的任务
+                for task_id in self.journal.cancel_requested(self.owner):
+                    self._cancel_running(task_id)
+                if time.monotonic() - last_scan >= self.lease_seconds:
+                    last_scan = time.monotonic()
+                    # 排队超过一个租约周期仍未被认领的任务也接管（提交它的进程可能已退出）
+                    self._recover(queued_before=time.time() - self.lease_seconds)
+                    self.journal.purge(self.retention_seconds)
+            except Exception as e:
+                logger.error(f"Job lease maintenance failed: {e}")
+
+    # ---- 执行 ----
+
+    def _next_job(self) -> Optional[Job]:
+        for lane in Lane:
+            limit = self._lane_limits.get(lane)
+            if limit is not None and self._lane_running[lane] >= limit:
+                continue
+            job = self._lanes[lane].pop()
+            if job is not None:
+                self._lane_running[lane] += 1
+                return job
+        return None
+
+    async def _worker(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            try:
+                await self._run(job)
+            finally:
+                self._tracked.discard(job.task_id)
+                self._lane_running[job.lane] -= 1
+                # 释放的可能是受限通道的名额，唤醒其他 worker 重新挑选
+                self._wakeup.set()
+
+    async def _run(self, job: Job) -> None:
+        spec = self._specs[job.name]
+        if self.journal is not None and not self._claim(job):
+            return
+        waited = time.monotonic() - job.enqueued_at
+        self._started_jobs += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+
+        self.task_store.update_task_status(job.task_id, TaskStatus.RUNNING)
+        ctx = JobContext(self, job)
+        runner = asyncio.ensure_future(asyncio.wait_for(spec.handler(ctx, job.payload), job.timeout))
+        self._running[job.task_id] = (job, runner)
+        started = time.monotonic()
+        try:
+            result = await runner
+        except asyncio.CancelledError:
+            if not job.cancel_requested:
+                raise  # 调度器关闭
+            self._finish_cancelled(job)
+            return
+        except asyncio.TimeoutError:
+            self._counters["timed_out"] += 1
+            logger.warning(f"Job {job.name} timed out for task {job.task_id}")
+            self._complete(job, TaskStatus.ERROR, error=f"任务超时（{job.timeout:g}s）")
+            return
+        except Exception as e:
+            self._counters["failed"] += 1
+            logger.error(f"Job {job.name} failed for task {job.task_id}: {e}")
+            self._complete(job, TaskStatus.ERROR, error=str(e))
+            return
+        finally:
+            self._running.pop(job.task_id, None)
+
+        self._counters["completed"] += 1
+        task = self.task_store.get_task(job.task_id)
+        if task is not None and task.status in TERMINAL_STATUSES:
+            # 处理器自行写入了最终状态
+            if self.journal is not None:
+                self.journal.finish(job.task_id, self.owner, _JOURNAL_STATUS[task.status])
+            return
+        self._complete(
+            job,
+            TaskStatus.DONE,
+            result,
+            latency_ms=int((time.monotonic() - started) * 1000),
+        )
+
+    def _claim(self, job: Job) -> bool:
+        """以租约认领任务；返回 False 表示无需执行（已被其他执行者认领、已结束或重试次数用尽）"""
+        entry = self.journal.claim(job.task_id, self.owner, self.lease_seconds)
+        if entry is None:
+            return False
+        job.attempt = entry.attempts
+        job.checkpoint = entry.checkpoint
+        if entry.cancel_requested:
+            # 被请求取消时执行者已退出（崩溃或停机），接管后直接收尾
+            self._finish_cancelled(job)
+            return False
+        task = self.task_store.get_task(job.task_id)
+        if task is not None and task.status in TERMINAL_STATUSES:
+            # 上次执行已写入结果，只是没来得及标记完成
+            self.journal.finish(job.task_id, self.owner, _JOURNAL_STATUS[task.status])
+            return False
+        if entry.attempts > self.max_attempts:
+            self._counters["failed"] += 1
+            logger.error(f"Job {job.name} for task {job.task_id} abandoned after {entry.attempts - 1} interrupted attempts")
+            self._complete(job, TaskStatus.ERROR, error=f"任务执行多次中断（{entry.attempts - 1}次），已放弃")
+            return False
+        if entry.attempts > 1:
+            logger.info(f"Resuming job {job.name} for task {job.task_id} (attempt {entry.attempts})")
+        return True
+
+    # ---- 指标 ----
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "process_workers": self.process_workers,
+            "durable": self.journal is not None,
+            "journal": self.journal.counts() if self.journal is not None else None,
+            "lanes": {
+                lane.name.lower(): {
+                    "queued": self._lanes[lane].size,
+                    "running": self._lane_running[lane],
+                    "users": self._lanes[lane].users,
+                    "limit": self._lane_limits.get(lane, self.workers),
+                }
+                for lane in Lane
+            },
+            "queued": sum(queue.size for queue in self._lanes.values()),
+            "running": len(self._running),
+            **self._counters,
+            "avg_wait_ms": round(self._wait_total / self._started_jobs * 1000, 1) if self._started_jobs else 0.0,
+            "max_wait_ms": round(self._wait_max * 1000, 1),
+        }
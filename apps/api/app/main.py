@@ -2,6 +2,8 @@ from __future__ import annotations
 
 import logging
 import os
+from contextlib import asynccontextmanager
+
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -20,6 +22,7 @@ from .routes.chat import create_chat_router
 
 from .services.resume_service import ResumeService
 from .services.jd_service import JDService
+from .services.corpus_crawler import CorpusCrawler
 from .services.target_service import TargetService
 from .services.commonality_service import CommonalityService
 from .services.simple_services import (
@@ -27,34 +30,96 @@ from .services.simple_services import (
     TaskService, WebSocketService
 )
 
-from .store import ResumeStore, JDStore, TaskStore
+from .cache import get_cache
+from .connections import ConnectionManager
+from .events import TaskEventHub
+from .idempotency import TaskDeduplicator
+from .jd_fetch_cache import JDFetchCache
+from .jobs import JobScheduler, create_job_journal
+from .store import ResumeStore, JDStore, JDCorpus, TaskStore, create_backend
 from .templates import load_templates
-from .adapters import ShixiSengAdapter, ZhaopinAdapter, Job51Adapter, BossAdapter
+from .adapters import (
+    ShixiSengAdapter, ZhaopinAdapter, Job51Adapter, BossAdapter, AdapterTransport, TransportConfig,
+    BrowserPool, BrowserPoolConfig, PolitenessConfig, PolitenessScheduler,
+)
 
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
 
 settings = get_settings()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await adapter_transport.start()
+    await job_scheduler.start()
+    await corpus_crawler.start()
+    try:
+        yield
+    finally:
+        await corpus_crawler.stop()
+        await ws_manager.stop()
+        await job_scheduler.stop()
+        await adapter_transport.aclose()
+        await boss_adapter.close()
+
+
 app = FastAPI(
     title="Resume Copilot API", 
     version="0.1.0",
-    description="AI-powered resume optimization platform"
+    description="AI-powered resume optimization platform",
+    lifespan=lifespan
+)
+
+# 初始化存储层（配置 DATABASE_URL 时持久化到 SQLite，内存字典作为读穿缓存）
+storage_backend = create_backend(settings.database_url)
+resume_store = ResumeStore(storage_backend)
+jd_store = JDStore(storage_backend)
+# 跨用户共享的去重JD语料库：热门 (职位, 城市) 查询直接由语料库回答，冷查询才访问招聘网站
+jd_corpus = JDCorpus(
+    storage_backend,
+    fresh_seconds=settings.jd_corpus_fresh_seconds,
+    flush_seconds=settings.jd_corpus_flush_seconds,
+)
+# 任务事件中心：任务状态变化实时推送给 /ws/tasks 的订阅者
+task_events = TaskEventHub()
+task_store = TaskStore(
+    storage_backend,
+    ttl_seconds=settings.task_ttl_seconds,
+    max_entries=settings.task_max_entries,
+    offload_bytes=settings.task_result_offload_bytes,
+    events=task_events,
 )
 
-# 初始化存储层
-resume_store = ResumeStore()
-jd_store = JDStore()
-task_store = TaskStore()
+# 任务调度器（取代 BackgroundTasks）；配置 DATABASE_URL 时队列持久化，重启后自动接管未完成的任务
+job_scheduler = JobScheduler(
+    task_store,
+    workers=settings.job_workers,
+    process_workers=settings.job_process_workers,
+    default_timeout=settings.job_timeout_seconds,
+    bulk_concurrency=settings.job_bulk_concurrency or None,
+    journal=create_job_journal(storage_backend),
+    lease_seconds=settings.job_lease_seconds,
+    max_attempts=settings.job_max_attempts,
+    retention_seconds=settings.task_ttl_seconds,
+)
 
-# 初始化适配器
+# 初始化适配器（HTTP 适配器共用一个连接池，BOSS 使用浏览器上下文池，均随应用 lifespan 关闭）
+# 按源节流：令牌桶 + 遇到 429/403/验证码时 AIMD 退避与冷却，/health 的 sources 字段报告各源真实状态
+source_politeness = PolitenessScheduler(PolitenessConfig.from_settings(settings))
+adapter_transport = AdapterTransport(TransportConfig.from_settings(settings), source_politeness)
 shixiseng_adapter = ShixiSengAdapter(
     app_id=os.getenv("SHIXISENG_APP_ID", ""),
-    app_secret=os.getenv("SHIXISENG_APP_SECRET", "")
+    app_secret=os.getenv("SHIXISENG_APP_SECRET", ""),
+    transport=adapter_transport
+)
+zhaopin_adapter = ZhaopinAdapter(adapter_transport)
+job51_adapter = Job51Adapter(adapter_transport)
+boss_adapter = BossAdapter(
+    BrowserPool(BrowserPoolConfig.from_settings(settings)),
+    pacer=source_politeness.source("boss")
 )
-zhaopin_adapter = ZhaopinAdapter()
-job51_adapter = Job51Adapter()
-boss_adapter = BossAdapter()
 
 # 初始化服务层
 resume_templates = load_templates()
@@ -62,24 +127,59 @@ resume_service = ResumeService(resume_store, resume_templates)
 
 jd_service = JDService(
     jd_store, task_store,
-    shixiseng_adapter, zhaopin_adapter, job51_adapter, boss_adapter
+    shixiseng_adapter, zhaopin_adapter, job51_adapter, boss_adapter,
+    job_scheduler,
+    search_budget=settings.jd_search_budget_seconds,
+    # 同一职位链接的详情抓取结果在所有用户、所有 worker 之间共享
+    fetch_cache=JDFetchCache(
+        get_cache().namespace("jd_fetch"),
+        fresh_seconds=settings.jd_fetch_cache_ttl_seconds,
+        stale_seconds=settings.jd_fetch_cache_stale_seconds,
+    ),
+    politeness=source_politeness,
+    corpus=jd_corpus,
+    batch_max_items=settings.jd_batch_max_items,
+    batch_fetch_concurrency=settings.jd_batch_fetch_concurrency
+)
+# 后台按热度刷新语料库中的查询，多个 worker 通过共享缓存占位，同一查询只由一个 worker 爬取
+corpus_crawler = CorpusCrawler(
+    jd_service,
+    jd_corpus,
+    get_cache().namespace("jd_corpus"),
+    interval_seconds=settings.jd_crawler_interval_seconds,
+    batch=settings.jd_crawler_batch,
+    min_score=settings.jd_crawler_min_score,
+    crawl_limit=settings.jd_crawler_limit,
+    retention_seconds=settings.jd_corpus_retention_seconds,
 )
 
 target_service = TargetService(task_store)
-commonality_service = CommonalityService(jd_store, task_store)
-optimize_service = OptimizeService(resume_store, task_store)
-export_service = ExportService(resume_store, task_store)
+commonality_service = CommonalityService(jd_store, task_store, job_scheduler, corpus=jd_corpus)
+optimize_service = OptimizeService(resume_service, task_store, job_scheduler)
+export_service = ExportService(resume_store, task_store, job_scheduler)
 upload_service = UploadService(resume_service, task_store)
-task_service = TaskService(task_store)
-websocket_service = WebSocketService(task_store)
+task_service = TaskService(task_store, job_scheduler, task_events)
+# 创建任务接口的幂等键与重复提交去重（记录保存在共享缓存中）
+task_dedupe = TaskDeduplicator(
+    get_cache().namespace("dedupe"),
+    task_store,
+    window_seconds=settings.task_dedupe_window_seconds,
+    key_ttl_seconds=settings.idempotency_key_ttl_seconds,
+)
+ws_manager = ConnectionManager(
+    max_queue=settings.ws_send_queue_size,
+    heartbeat_seconds=settings.ws_heartbeat_seconds,
+    send_timeout=settings.ws_send_timeout_seconds,
+)
+websocket_service = WebSocketService(task_store, task_events, ws_manager)
 
 # 注册路由
 app.include_router(create_resume_router(resume_service))
 app.include_router(create_render_router(resume_service))  # 新增：渲染路由
 app.include_router(create_suggestions_router(resume_service))  # 新增：智能建议路由
-app.include_router(create_jd_router(jd_service, target_service, commonality_service))
-app.include_router(create_optimize_router(optimize_service))
-app.include_router(create_export_router(export_service))
+app.include_router(create_jd_router(jd_service, target_service, commonality_service, task_dedupe))
+app.include_router(create_optimize_router(optimize_service, task_dedupe))
+app.include_router(create_export_router(export_service, task_dedupe))
 app.include_router(create_upload_router(upload_service))
 app.include_router(create_task_router(task_service))
 app.include_router(create_ws_router(websocket_service))
@@ -104,15 +204,21 @@ app.add_middleware(
 
 @app.get("/health")
 def health_check():
+    sources = jd_service.source_health()
     return {
         "status": "ok", 
         "ocrGateway": bool(settings.ocr_service_url),
-        "adapters": {
-            "shixiseng": shixiseng_adapter.is_available(),
-            "zhaopin": zhaopin_adapter.is_available(),
-            "job51": job51_adapter.is_available(),
-            "boss": boss_adapter.is_available()
-        }
+        # 已配置且未处于限流冷却期
+        "adapters": {name: health["available"] for name, health in sources.items()},
+        "sources": sources,
+        "tasks": task_store.stats(),
+        "jobs": job_scheduler.metrics(),
+        "websocket": websocket_service.metrics(),
+        "dedupe": task_dedupe.metrics(),
+        "http": adapter_transport.metrics(),
+        "browser": boss_adapter.metrics(),
+        "jd_fetch_cache": jd_service.fetch_cache.metrics(),
+        "jd_corpus": {**jd_corpus.metrics(), "crawler": corpus_crawler.metrics()}
     }
 
 
@@ -0,0 +1,140 @@
+"""列表接口的游标分页与字段裁剪
+
+游标是对排序键 (时间, id) 的不透明编码：客户端只需把上一页返回的 next_cursor 原样传回。
+键集分页不依赖偏移量，翻页期间有新增/删除时不会重复或漏掉未变化的记录。
+各存储为每个用户维护按排序键有序的索引，翻页时在索引上二分定位游标。
+
+未传 limit 时返回全部记录（与分页前的行为一致）；传了 limit 或 cursor 才分页，limit 默认 DEFAULT_PAGE_SIZE。
+
+fields= 为逗号分隔的字段名，只序列化指定字段（模型有 id 字段时始终返回 id），用于跳过 raw_text、jd_text 等大字段。
+"""
+from __future__ import annotations
+
+import base64
+import json
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Set, Tuple, Type, TypeVar
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+# (时间, id)
+CursorKey = Tuple[datetime, str]
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(key: CursorKey) -> str:
+    ts, item_id = key
+    raw = json.dumps([ts.isoformat(timespec="microseconds"), item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[CursorKey]:
+    """解析游标；格式错误时返回 400"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, item_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(ts), str(item_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="无效的分页游标") from None
+
+
+def page_limit(limit: Optional[int], cursor: Optional[str]) -> Optional[int]:
+    """列表接口的实际页大小：limit 与 cursor 都未传时为 None（不分页）"""
+    if limit is None and cursor:
+        return DEFAULT_PAGE_SIZE
+    return limit
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[Set[str]]:
+    """解析 fields 参数；未知字段返回 400"""
+    if not fields:
+        return None
+    selected = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = selected - set(model.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"未知字段: {', '.join(sorted(unknown))}；可选字段: {', '.join(model.model_fields)}",
+        )
+    if "id" in model.model_fields:
+        selected.add("id")
+    return selected
+
+
+def page_from_sorted(
+    items: Sequence[T],
+    key: Callable[[T], CursorKey],
+    after: Optional[CursorKey],
+    limit: Optional[int],
+    descending: bool = False,
+) -> Tuple[List[T], Optional[str]]:
+    """从按 key 升序的序列中取一页，游标位置用二分定位
+
+    descending=True 时从新到旧返回游标之前的记录；limit 为 None 时返回游标之后的全部记录。
+    """
+    if descending:
+        end = bisect_left(items, after, key=key) if after is not None else len(items)
+        start = 0 if limit is None else max(0, end - limit)
+        page = list(items[start:end])
+        page.reverse()
+        has_more = start > 0
+    else:
+        start = bisect_right(items, after, key=key) if after is not None else 0
+        end = len(items) if limit is None else start + limit
+        page = list(items[start:end])
+        has_more = end < len(items)
+    if not has_more or not page:
+        return page, None
+    return page, encode_cursor(key(page[-1]))
+
+
+def dump_item(item: BaseModel, fields: Optional[Set[str]]) -> bytes:
+    return item.model_dump_json(include=fields).encode("utf-8")
+
+
+def json_list(items: Iterable[bytes]) -> bytes:
+    return b"[" + b",".join(items) + b"]"
+
+
+def list_response(
+    items: Sequence[BaseModel],
+    fields: Optional[Set[str]],
+    next_cursor: Optional[str],
+    dump: Optional[Callable[[Any], bytes]] = None,
+) -> Response:
+    """直接返回数组的接口：下一页游标放在 X-Next-Cursor 响应头"""
+    dump = dump or (lambda item: dump_item(item, fields))
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return Response(content=json_list(dump(item) for item in items), media_type="application/json", headers=headers)
+
+
+def wrapped_response(
+    key: str,
+    items: Sequence[BaseModel],
+    fields: Optional[Set[str]],
+    next_cursor: Optional[str],
+    dump: Optional[Callable[[Any], bytes]] = None,
+) -> Response:
+    """{key: [...], "next_cursor": ...} 形式的接口"""
+    dump = dump or (lambda item: dump_item(item, fields))
+    body = (
+        b'{"' + key.encode("ascii") + b'":' + json_list(dump(item) for item in items)
+        + b',"next_cursor":' + json.dumps(next_cursor).encode("ascii") + b"}"
+    )
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return Response(content=body, media_type="application/json", headers=headers)
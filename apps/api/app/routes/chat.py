@@ -8,12 +8,16 @@ from fastapi import APIRouter, HTTPException, Header
 from pydantic import BaseModel
 
 from ..agents.llm_service import get_llm_service
+from ..cache import Cache, get_cache
 
 logger = logging.getLogger(__name__)
 
+# 会话历史保存在共享缓存中（Redis可用时多worker共享），闲置7天后过期
+SESSION_TTL_SECONDS = 7 * 24 * 3600
+# 每个会话保留的最近消息条数（不含 system），避免token过多
+MAX_HISTORY_MESSAGES = 20
 
-# 内存存储会话历史（生产环境应该用Redis或数据库）
-_conversation_sessions: Dict[str, List[Dict[str, str]]] = {}
+DEFAULT_SYSTEM_MESSAGE = "你是一个专业的简历优化助手。你善于帮助用户优化简历内容，提供针对性的建议，并用清晰、友好的语言与用户交流。"
 
 
 class ChatMessage(BaseModel):
@@ -42,9 +46,17 @@ class ResetSessionRequest(BaseModel):
     session_id: str
 
 
-def create_chat_router() -> APIRouter:
+def create_chat_router(cache: Optional[Cache] = None) -> APIRouter:
     """创建对话路由"""
     router = APIRouter()
+    root = cache or get_cache()
+    # 会话只按 TTL 过期，不参与进程内缓存的 LRU 淘汰
+    # session_id -> 消息列表（不含 system），每轮对话原子追加，并发请求的消息不会互相覆盖
+    sessions = root.namespace("chat:session", ttl=SESSION_TTL_SECONDS, max_entries=0)
+    # session_id -> system 提示词；创建会话时 SET NX 写入，存在即表示会话存在
+    system_prompts = root.namespace("chat:system", ttl=SESSION_TTL_SECONDS, max_entries=0)
+    # user -> 会话ID有序集合（按创建时间）
+    user_sessions = root.namespace("chat:sessions_of", ttl=SESSION_TTL_SECONDS, max_entries=0)
     
     @router.post("/message")
     async def send_message(
@@ -60,57 +72,44 @@ def create_chat_router() -> APIRouter:
             user = user_id or "demo-user"
             session_id = request.session_id or f"session_{user}_{datetime.utcnow().timestamp()}"
             
-            # 获取或创建会话历史
-            if session_id not in _conversation_sessions:
-                _conversation_sessions[session_id] = []
-                
-                # 如果有系统消息，添加到历史开头
-                if request.system_message:
-                    _conversation_sessions[session_id].append({
-                        "role": "system",
-                        "content": request.system_message
-                    })
-                else:
-                    # 默认系统消息
-                    _conversation_sessions[session_id].append({
-                        "role": "system",
-                        "content": "你是一个专业的简历优化助手。你善于帮助用户优化简历内容，提供针对性的建议，并用清晰、友好的语言与用户交流。"
-                    })
+            # 获取或创建会话：新会话使用请求中的系统消息，否则使用默认系统消息
+            system = request.system_message or DEFAULT_SYSTEM_MESSAGE
+            if await system_prompts.aadd(session_id, system):
+                await user_sessions.aadd_members(user, {session_id: datetime.utcnow().timestamp()})
+            else:
+                system = await system_prompts.aget(session_id, system)
             
-            # 添加用户消息到历史
-            _conversation_sessions[session_id].append({
-                "role": "user",
-                "content": request.message
-            })
+            user_message = {"role": "user", "content": request.message}
+            history: List[Dict[str, str]] = [
+                {"role": "system", "content": system},
+                *await sessions.aitems(session_id),
+                user_message,
+            ]
             
             # 调用LLM服务
             llm_service = get_llm_service()
             
-            logger.info(f"Calling LLM for session {session_id}, history length: {len(_conversation_sessions[session_id])}")
+            logger.info(f"Calling LLM for session {session_id}, history length: {len(history)}")
             
             response = await llm_service.chat(
-                messages=_conversation_sessions[session_id],
+                messages=history,
                 temperature=request.temperature,
                 max_tokens=request.max_tokens,
                 provider=request.provider
             )
             
-            # 添加助手回复到历史
-            _conversation_sessions[session_id].append({
-                "role": "assistant",
-                "content": response
-            })
-            
-            # 限制历史长度（保留最近20条消息，避免token过多）
-            if len(_conversation_sessions[session_id]) > 21:  # system + 20条
-                system_msg = _conversation_sessions[session_id][0]
-                _conversation_sessions[session_id] = [system_msg] + _conversation_sessions[session_id][-20:]
+            # 本轮的提问与回复一次追加，只保留最近的消息
+            history_length = await sessions.apush(
+                session_id, user_message, {"role": "assistant", "content": response},
+                max_len=MAX_HISTORY_MESSAGES,
+            )
+            await system_prompts.atouch(session_id)
             
             return {
                 "success": True,
                 "session_id": session_id,
                 "message": response,
-                "history_length": len(_conversation_sessions[session_id]) - 1,  # 不计算system message
+                "history_length": history_length,  # 不计算system message
                 "provider": request.provider or "default"
             }
             
@@ -127,15 +126,8 @@ def create_chat_router() -> APIRouter:
         user_id: Optional[str] = Header(default=None, alias="x-user-id")
     ):
         """获取对话历史"""
-        if request.session_id not in _conversation_sessions:
-            return {
-                "success": True,
-                "session_id": request.session_id,
-                "messages": []
-            }
-        
         # 返回历史（不包括system message）
-        messages = _conversation_sessions[request.session_id][1:]
+        messages = await sessions.aitems(request.session_id)
         
         return {
             "success": True,
@@ -149,8 +141,8 @@ def create_chat_router() -> APIRouter:
         user_id: Optional[str] = Header(default=None, alias="x-user-id")
     ):
         """重置会话，清空对话历史"""
-        if request.session_id in _conversation_sessions:
-            del _conversation_sessions[request.session_id]
+        await sessions.adelete(request.session_id)
+        await system_prompts.adelete(request.session_id)
         
         return {
             "success": True,
@@ -164,20 +156,26 @@ def create_chat_router() -> APIRouter:
         """列出所有活跃会话"""
         user = user_id or "demo-user"
         
-        # 筛选该用户的会话
-        user_sessions = [
+        # 批量读取该用户的会话，顺便清理已过期的会话ID
+        session_ids = await user_sessions.amembers(user)
+        alive = await system_prompts.aget_many(session_ids)
+        expired = [sid for sid in session_ids if sid not in alive]
+        if expired:
+            await user_sessions.aremove_members(user, *expired)
+        histories = await sessions.aitems_many(alive)
+        
+        active_sessions = [
             {
                 "session_id": sid,
-                "message_count": len(messages) - 1,  # 不计算system message
-                "last_message": messages[-1]["content"][:50] if len(messages) > 1 else ""
+                "message_count": len(histories.get(sid, ())),  # 不计算system message
+                "last_message": histories[sid][-1]["content"][:50] if sid in histories else ""
             }
-            for sid, messages in _conversation_sessions.items()
-            if user in sid
+            for sid in alive
         ]
         
         return {
             "success": True,
-            "sessions": user_sessions
+            "sessions": active_sessions
         }
     
     return router
@@ -1,18 +1,21 @@
 from __future__ import annotations
 
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Header, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response
 from fastapi import status
 
 from ..schemas import (
+    ExportFormat,
     ExportRequest,
     ExportResponse,
     TaskResponse
 )
+from ..idempotency import IDEMPOTENCY_HEADER, TaskDeduplicator
+from ..pagination import MAX_PAGE_SIZE, decode_cursor, page_limit, list_response, parse_fields
 from ..services import ExportService
 
 
-def create_export_router(export_service: ExportService) -> APIRouter:
+def create_export_router(export_service: ExportService, dedupe: TaskDeduplicator) -> APIRouter:
     router = APIRouter()
 
     def get_service() -> ExportService:
@@ -21,24 +24,32 @@ def create_export_router(export_service: ExportService) -> APIRouter:
     @router.post("/exports/pdf", response_model=TaskResponse)
     async def export_pdf(
         request: ExportRequest,
-        background_tasks: BackgroundTasks,
+        response: Response,
         user_id: Optional[str] = Header(default=None, alias="x-user-id"),
+        idempotency_key: Optional[str] = Header(default=None, alias=IDEMPOTENCY_HEADER),
         svc: ExportService = Depends(get_service),
     ) -> TaskResponse:
-        """导出PDF - 异步任务"""
-        request.format = "pdf"
-        return await svc.export_async(request, user_id, background_tasks)
+        """导出PDF - 异步任务；重复提交返回已有任务"""
+        request.format = ExportFormat.PDF
+        return await dedupe.run(
+            "export", user_id, request.model_dump(mode="json"), idempotency_key,
+            lambda: svc.export_async(request, user_id), response
+        )
 
     @router.post("/exports/docx", response_model=TaskResponse)
     async def export_docx(
         request: ExportRequest,
-        background_tasks: BackgroundTasks,
+        response: Response,
         user_id: Optional[str] = Header(default=None, alias="x-user-id"),
+        idempotency_key: Optional[str] = Header(default=None, alias=IDEMPOTENCY_HEADER),
         svc: ExportService = Depends(get_service),
     ) -> TaskResponse:
-        """导出DOCX - 异步任务"""
-        request.format = "docx"
-        return await svc.export_async(request, user_id, background_tasks)
+        """导出DOCX - 异步任务；重复提交返回已有任务"""
+        request.format = ExportFormat.DOCX
+        return await dedupe.run(
+            "export", user_id, request.model_dump(mode="json"), idempotency_key,
+            lambda: svc.export_async(request, user_id), response
+        )
 
     @router.get("/exports/{export_id}", response_model=ExportResponse)
     def get_export(
@@ -52,10 +63,15 @@ def create_export_router(export_service: ExportService) -> APIRouter:
     @router.get("/exports", response_model=list[ExportResponse])
     def list_exports(
         resume_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+        fields: Optional[str] = None,
         user_id: Optional[str] = Header(default=None, alias="x-user-id"),
         svc: ExportService = Depends(get_service),
-    ) -> list[ExportResponse]:
-        """获取导出历史"""
-        return svc.list_exports(user_id, resume_id)
+    ) -> Response:
+        """获取导出历史；下一页游标在 X-Next-Cursor 响应头"""
+        selected = parse_fields(fields, ExportResponse)
+        exports, next_cursor = svc.page_exports(user_id, resume_id, decode_cursor(cursor), page_limit(limit, cursor))
+        return list_response(exports, selected, next_cursor)
 
     return router
\ No newline at end of file
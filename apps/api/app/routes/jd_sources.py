@@ -1,10 +1,13 @@
 from __future__ import annotations
 
-from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, Header, BackgroundTasks
+import json
+from typing import Any, AsyncIterator, Optional, List, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response
 from fastapi import status
+from fastapi.responses import StreamingResponse
 
 from ..schemas import (
+    JDBatchRequest,
     JDRequest, 
     JDResponse, 
     JDListResponse,
@@ -14,13 +17,24 @@ from ..schemas import (
     CommonalityResponse,
     TaskResponse
 )
+from ..idempotency import IDEMPOTENCY_HEADER, TaskDeduplicator
+from ..pagination import MAX_PAGE_SIZE, decode_cursor, page_limit, list_response, parse_fields, wrapped_response
 from ..services import JDService, TargetService, CommonalityService
 
 
+def _sse(events: AsyncIterator[Tuple[str, Any]]) -> AsyncIterator[str]:
+    """把 (事件名, 数据) 编码为 text/event-stream 帧"""
+    async def encode() -> AsyncIterator[str]:
+        async for event, data in events:
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n"
+    return encode()
+
+
 def create_jd_router(
     jd_service: JDService,
     target_service: TargetService, 
-    commonality_service: CommonalityService
+    commonality_service: CommonalityService,
+    dedupe: TaskDeduplicator
 ) -> APIRouter:
     router = APIRouter()
 
@@ -36,39 +50,86 @@ def create_jd_router(
     @router.post("/jd/fetch", response_model=TaskResponse)
     async def fetch_jd(
         request: JDRequest,
-        background_tasks: BackgroundTasks,
+        response: Response,
         user_id: Optional[str] = Header(default=None, alias="x-user-id"),
+        idempotency_key: Optional[str] = Header(default=None, alias=IDEMPOTENCY_HEADER),
         svc: JDService = Depends(get_jd_service),
     ) -> TaskResponse:
-        """抓取JD - 支持URL或文本输入"""
-        return await svc.fetch_jd_async(request, user_id, background_tasks)
+        """抓取JD - 支持URL或文本输入；重复提交返回已有任务"""
+        return await dedupe.run(
+            "jd.fetch", user_id, request.model_dump(mode="json"), idempotency_key,
+            lambda: svc.fetch_jd_async(request, user_id), response
+        )
+
+    @router.post("/jd/batch", response_model=TaskResponse)
+    async def fetch_jd_batch(
+        request: JDBatchRequest,
+        response: Response,
+        user_id: Optional[str] = Header(default=None, alias="x-user-id"),
+        idempotency_key: Optional[str] = Header(default=None, alias=IDEMPOTENCY_HEADER),
+        svc: JDService = Depends(get_jd_service),
+    ) -> TaskResponse:
+        """批量导入JD - 多条文本/URL 一个任务，逐项结果通过任务进度事件推送；重复提交返回已有任务"""
+        return await dedupe.run(
+            "jd.batch", user_id, request.model_dump(mode="json"), idempotency_key,
+            lambda: svc.ingest_batch_async(request, user_id), response
+        )
 
     @router.post("/jd/search", response_model=JDListResponse)
     async def search_jd(
         company: Optional[str] = None,
         title: Optional[str] = None,
         city: Optional[str] = None,
+        q: Optional[str] = None,
         limit: int = 20,
+        budget: Optional[float] = Query(default=None, gt=0, description="在线搜索时间预算（秒），不超过服务端配置"),
         user_id: Optional[str] = Header(default=None, alias="x-user-id"),
         svc: JDService = Depends(get_jd_service),
     ) -> JDListResponse:
-        """搜索JD - 多源聚合"""
+        """搜索JD - 多源聚合；q 为本地已保存JD的全文检索关键词"""
         return await svc.search_jd(
             company=company,
             title=title, 
             city=city,
             limit=limit,
-            user_id=user_id
+            user_id=user_id,
+            query=q,
+            budget=budget
+        )
+
+    @router.get("/jd/search/stream")
+    async def stream_search_jd(
+        company: Optional[str] = None,
+        title: Optional[str] = None,
+        city: Optional[str] = None,
+        q: Optional[str] = None,
+        limit: int = Query(default=20, ge=1, le=MAX_PAGE_SIZE),
+        budget: Optional[float] = Query(default=None, gt=0, description="在线搜索时间预算（秒），不超过服务端配置"),
+        user_id: Optional[str] = Header(default=None, alias="x-user-id"),
+        svc: JDService = Depends(get_jd_service),
+    ) -> StreamingResponse:
+        """流式搜索JD（Server-Sent Events）：local → 每个源完成时一条 source / source_error → done"""
+        events = svc.stream_search_jd(
+            company=company, title=title, city=city, limit=limit, user_id=user_id, query=q, budget=budget
+        )
+        return StreamingResponse(
+            _sse(events),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
         )
 
     @router.get("/jd", response_model=JDListResponse)
     def list_jd(
+        cursor: Optional[str] = None,
+        limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+        fields: Optional[str] = Query(default=None, description="逗号分隔的字段名，如 id,company,title"),
         user_id: Optional[str] = Header(default=None, alias="x-user-id"),
         svc: JDService = Depends(get_jd_service),
-    ) -> JDListResponse:
-        """获取用户的JD列表"""
-        items = svc.list_jd(user_id)
-        return JDListResponse(items=items)
+    ) -> Response:
+        """获取用户的JD列表（按创建时间升序分页）"""
+        selected = parse_fields(fields, JDResponse)
+        items, next_cursor = svc.page_jd(user_id, decode_cursor(cursor), page_limit(limit, cursor))
+        return wrapped_response("items", items, selected, next_cursor)
 
     @router.get("/jd/{jd_id}", response_model=JDResponse)
     def get_jd(
@@ -90,21 +151,30 @@ def create_jd_router(
 
     @router.get("/targets", response_model=List[TargetResponse])
     def list_targets(
+        cursor: Optional[str] = None,
+        limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+        fields: Optional[str] = None,
         user_id: Optional[str] = Header(default=None, alias="x-user-id"),
         svc: TargetService = Depends(get_target_service),
-    ) -> List[TargetResponse]:
-        """获取目标岗位列表"""
-        return svc.list_targets(user_id)
+    ) -> Response:
+        """获取目标岗位列表；下一页游标在 X-Next-Cursor 响应头"""
+        selected = parse_fields(fields, TargetResponse)
+        targets, next_cursor = svc.page_targets(user_id, decode_cursor(cursor), page_limit(limit, cursor))
+        return list_response(targets, selected, next_cursor)
 
     @router.post("/jd/commonalities", response_model=TaskResponse)
     async def extract_commonalities(
         request: CommonalityRequest,
-        background_tasks: BackgroundTasks,
+        response: Response,
         user_id: Optional[str] = Header(default=None, alias="x-user-id"),
+        idempotency_key: Optional[str] = Header(default=None, alias=IDEMPOTENCY_HEADER),
         svc: CommonalityService = Depends(get_commonality_service),
     ) -> TaskResponse:
-        """提炼JD共性 - 异步任务"""
-        return await svc.extract_commonalities_async(request, user_id, background_tasks)
+        """提炼JD共性 - 异步任务；重复提交返回已有任务"""
+        return await dedupe.run(
+            "jd.commonalities", user_id, request.model_dump(mode="json"), idempotency_key,
+            lambda: svc.extract_commonalities_async(request, user_id), response
+        )
 
     @router.get("/jd/commonalities/{commonality_id}", response_model=CommonalityResponse)
     def get_commonality(
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Header, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
 from fastapi import status
 
 from ..schemas import (
@@ -13,10 +13,11 @@ from ..schemas import (
     TaskResponse,
     ResumeResponse
 )
+from ..idempotency import IDEMPOTENCY_HEADER, TaskDeduplicator
 from ..services import OptimizeService
 
 
-def create_optimize_router(optimize_service: OptimizeService) -> APIRouter:
+def create_optimize_router(optimize_service: OptimizeService, dedupe: TaskDeduplicator) -> APIRouter:
     router = APIRouter()
 
     def get_service() -> OptimizeService:
@@ -26,24 +27,27 @@ def create_optimize_router(optimize_service: OptimizeService) -> APIRouter:
     async def optimize_preview(
         resume_id: str,
         request: OptimizePreviewRequest,
-        background_tasks: BackgroundTasks,
+        response: Response,
         user_id: Optional[str] = Header(default=None, alias="x-user-id"),
+        idempotency_key: Optional[str] = Header(default=None, alias=IDEMPOTENCY_HEADER),
         svc: OptimizeService = Depends(get_service),
     ) -> TaskResponse:
-        """生成简历优化预览 - 异步任务"""
-        return await svc.optimize_preview_async(
-            resume_id, request, user_id, background_tasks
+        """生成简历优化预览 - 异步任务；重复提交返回已有任务"""
+        return await dedupe.run(
+            "optimize.preview", user_id,
+            {"resume_id": resume_id, "request": request.model_dump(mode="json")}, idempotency_key,
+            lambda: svc.optimize_preview_async(resume_id, request, user_id), response
         )
 
     @router.get("/resumes/{resume_id}/optimize/preview/{preview_id}", response_model=OptimizePreviewResponse)
-    def get_optimize_preview(
+    async def get_optimize_preview(
         resume_id: str,
         preview_id: str,
         user_id: Optional[str] = Header(default=None, alias="x-user-id"),
         svc: OptimizeService = Depends(get_service),
     ) -> OptimizePreviewResponse:
         """获取优化预览结果"""
-        return svc.get_optimize_preview(preview_id, user_id)
+        return await svc.get_optimize_preview(preview_id, user_id, resume_id)
 
     @router.post("/resumes/{resume_id}/optimize/apply", response_model=ResumeResponse)
     async def optimize_apply(
@@ -52,20 +56,23 @@ def create_optimize_router(optimize_service: OptimizeService) -> APIRouter:
         user_id: Optional[str] = Header(default=None, alias="x-user-id"),
         svc: OptimizeService = Depends(get_service),
     ) -> ResumeResponse:
-        """应用优化建议，生成新版本简历"""
+        """应用优化建议（预览为占位内容期间不修改简历）"""
         return await svc.optimize_apply(resume_id, request, user_id)
 
     @router.post("/resumes/{resume_id}/study-plan", response_model=TaskResponse)
     async def generate_study_plan(
         resume_id: str,
-        background_tasks: BackgroundTasks,
+        response: Response,
         commonality_id: Optional[str] = None,
         user_id: Optional[str] = Header(default=None, alias="x-user-id"),
+        idempotency_key: Optional[str] = Header(default=None, alias=IDEMPOTENCY_HEADER),
         svc: OptimizeService = Depends(get_service),
     ) -> TaskResponse:
-        """生成学习计划 - 异步任务"""
-        return await svc.generate_study_plan_async(
-            resume_id, commonality_id, user_id, background_tasks
+        """生成学习计划 - 异步任务；重复提交返回已有任务"""
+        return await dedupe.run(
+            "optimize.study_plan", user_id,
+            {"resume_id": resume_id, "commonality_id": commonality_id}, idempotency_key,
+            lambda: svc.generate_study_plan_async(resume_id, commonality_id, user_id), response
         )
 
     @router.get("/resumes/{resume_id}/study-plan/{plan_id}", response_model=StudyPlanResponse)
@@ -81,14 +88,17 @@ def create_optimize_router(optimize_service: OptimizeService) -> APIRouter:
     @router.post("/resumes/{resume_id}/qa", response_model=TaskResponse)
     async def generate_interview_qa(
         resume_id: str,
-        background_tasks: BackgroundTasks,
+        response: Response,
         commonality_id: Optional[str] = None,
         user_id: Optional[str] = Header(default=None, alias="x-user-id"),
+        idempotency_key: Optional[str] = Header(default=None, alias=IDEMPOTENCY_HEADER),
         svc: OptimizeService = Depends(get_service),
     ) -> TaskResponse:
-        """生成面试问答 - 异步任务"""
-        return await svc.generate_interview_qa_async(
-            resume_id, commonality_id, user_id, background_tasks
+        """生成面试问答 - 异步任务；重复提交返回已有任务"""
+        return await dedupe.run(
+            "optimize.interview_qa", user_id,
+            {"resume_id": resume_id, "commonality_id": commonality_id}, idempotency_key,
+            lambda: svc.generate_interview_qa_async(resume_id, commonality_id, user_id), response
         )
 
     @router.get("/resumes/{resume_id}/qa/{qa_id}", response_model=InterviewQAResponse)
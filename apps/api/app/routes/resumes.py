@@ -9,7 +9,9 @@ from fastapi import (
   File,
   Form,
   Header,
+  Query,
   Request,
+  Response,
   UploadFile,
 )
 
@@ -17,11 +19,17 @@ from ..schemas import (
   DraftListResponse,
   DraftSummary,
   InstantiateTemplateResponse,
+  ResumeDiffResponse,
   ResumeListResponse,
   ResumeResponse,
+  ResumeUpdateRequest,
+  ResumeVersionListResponse,
+  ResumeVersionResponse,
   TemplateListResponse,
 )
+from ..pagination import MAX_PAGE_SIZE, decode_cursor, page_limit, parse_fields, wrapped_response
 from ..services import ResumeService
+from ..store import record_to_json, record_to_response
 
 
 def create_router(service: ResumeService) -> APIRouter:
@@ -71,27 +79,31 @@ def create_router(service: ResumeService) -> APIRouter:
 
   @router.get("/resumes", response_model=ResumeListResponse)
   def list_resumes(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(default=None, description="逗号分隔的字段名，如 id,metadata,updated_at"),
     user_id: Optional[str] = Header(default=None, alias="x-user-id"),
     svc: ResumeService = Depends(get_service),
-  ) -> ResumeListResponse:
-    items = svc.list_resumes(user_id)
-    return ResumeListResponse(items=items)
-
-  @router.get("/resumes/{resume_id}", response_model=ResumeResponse)
-  def get_resume(
-    resume_id: str,
-    user_id: Optional[str] = Header(default=None, alias="x-user-id"),
-    svc: ResumeService = Depends(get_service),
-  ) -> ResumeResponse:
-    return svc.get_resume(resume_id, user_id)
+  ) -> Response:
+    selected = parse_fields(fields, ResumeResponse)
+    records, next_cursor = svc.page_resumes(user_id, decode_cursor(cursor), page_limit(limit, cursor))
+    # 未裁剪字段时直接拼接各记录按 revision 缓存的 JSON，跳过 response_model 的逐条校验
+    dump = record_to_json if selected is None else (
+      lambda record: record_to_response(record).model_dump_json(include=selected).encode("utf-8")
+    )
+    return wrapped_response("items", records, selected, next_cursor, dump=dump)
 
   @router.get("/resumes/drafts", response_model=DraftListResponse)
   def list_drafts(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
     user_id: Optional[str] = Header(default=None, alias="x-user-id"),
     svc: ResumeService = Depends(get_service),
-  ) -> DraftListResponse:
-    drafts = svc.list_drafts(user_id)
-    return DraftListResponse(drafts=drafts)
+  ) -> Response:
+    selected = parse_fields(fields, DraftSummary)
+    drafts, next_cursor = svc.page_drafts(user_id, decode_cursor(cursor), page_limit(limit, cursor))
+    return wrapped_response("drafts", drafts, selected, next_cursor)
 
   @router.get("/resumes/latest", response_model=DraftSummary | None)
   def latest_draft(
@@ -107,6 +119,53 @@ def create_router(service: ResumeService) -> APIRouter:
     templates = svc.list_templates()
     return TemplateListResponse(templates=templates)
 
+  # 带路径参数的路由放在 /resumes/drafts、/resumes/latest 等固定路径之后，避免被其抢先匹配
+  @router.get("/resumes/{resume_id}", response_model=ResumeResponse)
+  def get_resume(
+    resume_id: str,
+    user_id: Optional[str] = Header(default=None, alias="x-user-id"),
+    svc: ResumeService = Depends(get_service),
+  ) -> ResumeResponse:
+    return svc.get_resume(resume_id, user_id)
+
+  @router.patch("/resumes/{resume_id}", response_model=ResumeResponse)
+  def update_resume(
+    resume_id: str,
+    request: ResumeUpdateRequest,
+    user_id: Optional[str] = Header(default=None, alias="x-user-id"),
+    svc: ResumeService = Depends(get_service),
+  ) -> ResumeResponse:
+    """编辑简历正文或标题；正文变化时在版本链上追加 EDIT 版本"""
+    return svc.revise_resume(resume_id, user_id, source="EDIT", raw_text=request.raw_text, title=request.title)
+
+  @router.get("/resumes/{resume_id}/versions", response_model=ResumeVersionListResponse)
+  def list_versions(
+    resume_id: str,
+    user_id: Optional[str] = Header(default=None, alias="x-user-id"),
+    svc: ResumeService = Depends(get_service),
+  ) -> ResumeVersionListResponse:
+    return svc.list_versions(resume_id, user_id)
+
+  @router.get("/resumes/{resume_id}/versions/{version}", response_model=ResumeVersionResponse)
+  def get_version(
+    resume_id: str,
+    version: int,
+    user_id: Optional[str] = Header(default=None, alias="x-user-id"),
+    svc: ResumeService = Depends(get_service),
+  ) -> ResumeVersionResponse:
+    return svc.get_version(resume_id, version, user_id)
+
+  @router.get("/resumes/{resume_id}/diff", response_model=ResumeDiffResponse)
+  def diff_versions(
+    resume_id: str,
+    from_version: int = Query(alias="from", ge=1),
+    to_version: Optional[int] = Query(default=None, alias="to", ge=1),
+    user_id: Optional[str] = Header(default=None, alias="x-user-id"),
+    svc: ResumeService = Depends(get_service),
+  ) -> ResumeDiffResponse:
+    """两个版本之间的 unified diff；to 缺省为最新版本"""
+    return svc.diff_versions(resume_id, from_version, to_version, user_id)
+
   @router.post(
     "/resumes/templates/{template_id}/instantiate",
     response_model=InstantiateTemplateResponse,
@@ -114,6 +173,7 @@ def create_router(service: ResumeService) -> APIRouter:
   async def instantiate_template(
     template_id: str,
     title: str | None = Body(default=None),
+    resume_id: str | None = Body(default=None, description="套用到已有简历；缺省时新建"),
     user_id: Optional[str] = Header(default=None, alias="x-user-id"),
     svc: ResumeService = Depends(get_service),
   ) -> InstantiateTemplateResponse:
@@ -121,6 +181,7 @@ def create_router(service: ResumeService) -> APIRouter:
       template_id=template_id,
       user_id=user_id,
       title=title,
+      resume_id=resume_id,
     )
 
   return router
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response
 from fastapi import status
 
+from ..pagination import DEFAULT_PAGE_SIZE, clamp_limit, decode_cursor, list_response, parse_fields
 from ..schemas import TaskResponse
 from ..services import TaskService
 
@@ -14,24 +15,60 @@ def create_task_router(task_service: TaskService) -> APIRouter:
     def get_service() -> TaskService:
         return task_service
 
+    # 调度器、事件中心与任务存储只在事件循环线程上访问，这里的处理函数都定义为 async，不进线程池
+    @router.get("/tasks/metrics")
+    async def job_metrics(
+        svc: TaskService = Depends(get_service),
+    ) -> dict:
+        """调度队列指标：各通道排队/运行数、累计完成/失败/取消/超时数、排队等待时间"""
+        return svc.job_metrics()
+
+    @router.post("/tasks/{task_id}/cancel", response_model=TaskResponse)
+    async def cancel_task(
+        task_id: str,
+        user_id: Optional[str] = Header(default=None, alias="x-user-id"),
+        svc: TaskService = Depends(get_service),
+    ) -> TaskResponse:
+        """取消排队中或运行中的任务"""
+        return svc.cancel_task(task_id, user_id)
+
     @router.get("/tasks/{task_id}", response_model=TaskResponse)
-    def get_task(
+    async def get_task(
         task_id: str,
+        response: Response,
+        wait: float = Query(default=0, ge=0, le=TaskService.LONG_POLL_MAX_SECONDS, description="长轮询秒数，配合 If-None-Match 使用"),
+        if_none_match: Optional[str] = Header(default=None, alias="If-None-Match"),
         user_id: Optional[str] = Header(default=None, alias="x-user-id"),
         svc: TaskService = Depends(get_service),
     ) -> TaskResponse:
-        """查询任务状态"""
-        return svc.get_task(task_id, user_id)
+        """查询任务状态
+
+        响应带 ETag；请求带 If-None-Match 且任务未变化时返回 304。
+        同时指定 wait 时请求挂起，任务一变化立即返回新状态，超时仍未变化返回 304。
+        """
+        etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")} if if_none_match else set()
+        task, changed = await svc.wait_task(task_id, user_id, etags, wait)
+        headers = {"ETag": svc.task_etag(task), "Cache-Control": "no-cache"}
+        if not changed:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+        return task
 
     @router.get("/tasks", response_model=list[TaskResponse])
-    def list_tasks(
+    async def list_tasks(
         task_type: Optional[str] = None,
         status: Optional[str] = None,
-        limit: int = 50,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        fields: Optional[str] = None,
         user_id: Optional[str] = Header(default=None, alias="x-user-id"),
         svc: TaskService = Depends(get_service),
-    ) -> list[TaskResponse]:
-        """获取任务列表"""
-        return svc.list_tasks(user_id, task_type, status, limit)
+    ) -> Response:
+        """获取任务列表（按创建时间倒序）；下一页游标在 X-Next-Cursor 响应头"""
+        selected = parse_fields(fields, TaskResponse)
+        tasks, next_cursor = svc.page_tasks(
+            user_id, task_type, status, decode_cursor(cursor), clamp_limit(limit)
+        )
+        return list_response(tasks, selected, next_cursor)
 
     return router
\ No newline at end of file
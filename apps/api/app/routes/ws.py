@@ -3,11 +3,10 @@ from __future__ import annotations
 from typing import Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
 import json
-import asyncio
 import logging
 
-from ..schemas import WSMessage
 from ..services import WebSocketService
+from ..ws_protocol import negotiate
 
 logger = logging.getLogger(__name__)
 
@@ -19,60 +18,40 @@ def create_ws_router(ws_service: WebSocketService) -> APIRouter:
     async def websocket_tasks(
         websocket: WebSocket,
         user_id: Optional[str] = Query(default=None),
-        task_id: Optional[str] = Query(default=None)
+        task_id: Optional[str] = Query(default=None),
+        protocol: Optional[str] = Query(default=None)
     ):
-        """WebSocket任务进度推送"""
-        await websocket.accept()
+        """WebSocket任务进度推送
+
+        连接后发送 {"type": "subscribe", "task_ids": [...]} 订阅任务，任务状态变化会立即推送；
+        也可通过 task_id 查询参数在连接时订阅单个任务。
+        protocol=json-delta / msgpack-delta（或对应的 WebSocket 子协议）启用增量推送。
+        """
+        offered = websocket.headers.get("sec-websocket-protocol", "")
+        codec, subprotocol = negotiate(protocol, offered.split(",") if offered else [])
+        await websocket.accept(subprotocol=subprotocol)
         
         try:
-            # 注册连接
+            # 注册连接：发送欢迎消息，指定了 task_id 时自动订阅并推送当前状态
             connection_id = await ws_service.register_connection(
-                websocket, user_id, task_id
-            )
-            
-            logger.info(f"WebSocket connected: {connection_id}, user: {user_id}, task: {task_id}")
-            
-            # 发送欢迎消息
-            welcome_msg = WSMessage(
-                type="connected",
-                data={"connection_id": connection_id, "user_id": user_id}
+                websocket, user_id, task_id, codec
             )
-            await websocket.send_text(welcome_msg.model_dump_json())
             
-            # 如果指定了task_id，发送当前状态
-            if task_id:
-                task_status = ws_service.get_task_status(task_id)
-                if task_status:
-                    status_msg = WSMessage(
-                        type="task_status",
-                        task_id=task_id,
-                        data=task_status
-                    )
-                    await websocket.send_text(status_msg.model_dump_json())
+            logger.info(f"WebSocket connected: {connection_id}, user: {user_id}, task: {task_id}, protocol: {codec.name}")
             
-            # 保持连接并处理消息
+            # 只负责接收；发送由连接管理器的发送协程完成，心跳由共享定时器入队
             while True:
+                data = await websocket.receive_text()
                 try:
-                    # 等待客户端消息或超时
-                    data = await asyncio.wait_for(
-                        websocket.receive_text(), 
-                        timeout=30.0
+                    message = json.loads(data)
+                except json.JSONDecodeError:
+                    logger.warning(f"Invalid JSON from client: {data}")
+                    continue
+                if isinstance(message, dict):
+                    await ws_service.handle_client_message(
+                        connection_id, message
                     )
                     
-                    # 处理客户端消息
-                    try:
-                        message = json.loads(data)
-                        await ws_service.handle_client_message(
-                            connection_id, message
-                        )
-                    except json.JSONDecodeError:
-                        logger.warning(f"Invalid JSON from client: {data}")
-                        
-                except asyncio.TimeoutError:
-                    # 发送心跳
-                    ping_msg = WSMessage(type="ping")
-                    await websocket.send_text(ping_msg.model_dump_json())
-                    
         except WebSocketDisconnect:
             logger.info(f"WebSocket disconnected: {connection_id}")
         except Exception as e:
@@ -45,8 +45,46 @@ class ResumeResponse(BaseModel):
   updated_at: datetime
 
 
+class ResumeUpdateRequest(BaseModel):
+  """编辑简历；未提供的字段保持不变"""
+  raw_text: Optional[str] = None
+  title: Optional[str] = None
+
+
 class ResumeListResponse(BaseModel):
   items: list[ResumeResponse]
+  next_cursor: Optional[str] = None
+
+
+class ResumeVersionSummary(BaseModel):
+  version: int
+  source: str
+  size: int
+  snapshot: bool
+  created_at: datetime
+
+
+class ResumeVersionListResponse(BaseModel):
+  resume_id: str
+  head: int
+  items: list[ResumeVersionSummary]
+
+
+class ResumeVersionResponse(BaseModel):
+  resume_id: str
+  version: int
+  source: str
+  raw_text: str
+  created_at: datetime
+
+
+class ResumeDiffResponse(BaseModel):
+  resume_id: str
+  from_version: int
+  to_version: int
+  diff: str
+  added: int
+  removed: int
 
 
 class DraftSummary(BaseModel):
@@ -59,6 +97,7 @@ class DraftSummary(BaseModel):
 
 class DraftListResponse(BaseModel):
   drafts: list[DraftSummary]
+  next_cursor: Optional[str] = None
 
 
 class ResumeTemplate(BaseModel):
@@ -95,6 +134,14 @@ class JDRequest(BaseModel):
   city: Optional[str] = None
 
 
+class JDBatchRequest(BaseModel):
+  # 每项给出 text 或 url 之一；company/title/city 未给出时使用批次级的默认值
+  items: List[JDRequest] = Field(..., min_length=1)
+  company: Optional[str] = None
+  title: Optional[str] = None
+  city: Optional[str] = None
+
+
 class JDResponse(BaseModel):
   id: str
   company: str
@@ -110,6 +157,7 @@ class JDResponse(BaseModel):
 
 class JDListResponse(BaseModel):
   items: List[JDResponse]
+  next_cursor: Optional[str] = None
 
 
 # 目标岗位Schema
@@ -155,11 +203,13 @@ class TaskStatus(str, Enum):
   RUNNING = "running"
   DONE = "done"
   ERROR = "error"
+  CANCELLED = "cancelled"
 
 
 class TaskType(str, Enum):
   OCR = "ocr"
   JD_FETCH = "jd_fetch"
+  JD_BATCH = "jd_batch"
   COMMONALITY = "commonality"
   OPTIMIZE = "optimize"
   EXPORT = "export"
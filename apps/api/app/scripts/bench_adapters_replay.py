@@ -0,0 +1,337 @@
+"""JD 适配器回放基准测试：在本地替身服务上测量各适配器与多源搜索的吞吐、延迟和解析耗时
+
+三种用法：
+    # 录制真实响应（需要网络；实习僧需要 SHIXISENG_APP_ID/SECRET，BOSS 需要 playwright）
+    python app/scripts/bench_adapters_replay.py record --fixtures fixtures/adapters --queries 后端开发:北京 数据分析:上海
+    # 回放录制的 fixture，可注入延迟与故障
+    python app/scripts/bench_adapters_replay.py run --fixtures fixtures/adapters --latency 80 --jitter 20 --error-rate 0.05
+    # 不指定 --fixtures 时生成与各源接口结构一致的合成 fixture，完全离线
+    python app/scripts/bench_adapters_replay.py run --requests 200 --concurrency 16
+
+同样的 fixture、故障参数与 --seed 每次得到同样的故障序列；BOSS 只在安装了 playwright 时参与。
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import parse_qs, urlencode
+
+import httpx
+
+# 添加父目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.adapters import (
+    AdapterTransport, BossAdapter, FaultConfig, FixtureStore, Job51Adapter, RecordingTransport, ReplayServer,
+    ShixiSengAdapter, ZhaopinAdapter,
+)
+from app.jobs import JobScheduler
+from app.services.jd_service import JDService
+from app.store import JDStore, TaskStore
+
+COMPANIES = ["字节跳动", "腾讯", "阿里巴巴", "百度", "美团", "京东", "拼多多", "小米", "华为", "网易"]
+SKILLS = ["Python", "Java", "Go", "React", "MySQL", "Redis", "Kafka", "Docker", "Kubernetes", "Spark"]
+DEFAULT_QUERIES = ["后端开发:北京", "前端开发:上海", "数据分析:深圳", "算法工程师:杭州"]
+
+BOSS_CARD = """<li class="job-card-wrapper"><a href="/job_detail/{id}.html"><span class="job-name">{title}</span></a>
+<span class="job-area">{city}·海淀区</span><h3 class="company-name">{company}</h3></li>"""
+
+
+def parse_queries(values: List[str]) -> List[Tuple[str, str]]:
+    return [tuple(value.split(":", 1)) if ":" in value else (value, "") for value in values]
+
+
+def build_adapters(transport: AdapterTransport, boss_base_url: str = None, recorder: FixtureStore = None) -> Dict[str, Any]:
+    adapters = {
+        "shixiseng": ShixiSengAdapter(
+            app_id=os.getenv("SHIXISENG_APP_ID", "bench"),
+            app_secret=os.getenv("SHIXISENG_APP_SECRET", "bench"),
+            transport=transport,
+        ),
+        "zhaopin": ZhaopinAdapter(transport),
+        "job51": Job51Adapter(transport),
+        "boss": BossAdapter(base_url=boss_base_url, recorder=recorder),
+    }
+    return adapters
+
+
+# ---- 合成 fixture ----
+
+def synthetic_description(seed: int) -> str:
+    skills = "、".join(SKILLS[(seed + k) % len(SKILLS)] for k in range(3))
+    return f"负责核心业务系统的设计与开发，熟悉{skills}，有高并发系统经验者优先，本科及以上学历（编号{seed}）"
+
+
+def synthetic_upstream(request: httpx.Request) -> httpx.Response:
+    """与各源接口结构一致的合成响应，只用于生成离线 fixture"""
+    params = {key: values[0] for key, values in parse_qs(request.url.query.decode("utf-8")).items()}
+    host, path = request.url.host, request.url.path
+    if host.endswith("zhaopin.com") and path == "/c/i/sou":
+        size = int(params.get("pageSize", 20))
+        results = [
+            {
+                "number": f"{sum(map(ord, params.get('kw', ''))) % 1000:03d}{i:04d}",
+                "jobName": params.get("kw", "职位"),
+                "companyName": COMPANIES[i % len(COMPANIES)],
+                "city": {"display": "北京"},
+                "positionDescription": synthetic_description(i),
+            }
+            for i in range(size)
+        ]
+        return httpx.Response(200, json={"code": 200, "data": {"results": results}})
+    if host.endswith("51job.com") and path == "/api/job/search_result.php":
+        size = int(params.get("pageSize", 20))
+        results = [
+            {
+                "jobId": f"{i}{len(params.get('keyword', ''))}",
+                "jobName": params.get("keyword", "职位"),
+                "companyName": COMPANIES[(i + 3) % len(COMPANIES)],
+                "workArea": "上海",
+                "jobDescription": synthetic_description(i + 100),
+                "jobHref": f"https://jobs.51job.com/shanghai/{i}.html",
+            }
+            for i in range(size)
+        ]
+        return httpx.Response(200, json={"resultList": results})
+    if host.endswith("shixiseng.com") and path == "/v1/jobs":
+        size = int(params.get("limit", 20))
+        results = [
+            {
+                "id": f"inn_{i}",
+                "job_name": params.get("job_name", "实习生"),
+                "company_name": COMPANIES[(i + 5) % len(COMPANIES)],
+                "city_name": params.get("city", "北京"),
+                "job_description": synthetic_description(i + 200),
+                "job_url": f"https://www.shixiseng.com/intern/inn_{i}",
+            }
+            for i in range(size)
+        ]
+        return httpx.Response(200, json={"code": 200, "data": {"list": results}})
+    return httpx.Response(404, json={"error": "unknown endpoint"})
+
+
+async def synthesize(queries: List[Tuple[str, str]], limit: int) -> FixtureStore:
+    store = FixtureStore()
+    transport = AdapterTransport(http_transport=RecordingTransport(store, httpx.MockTransport(synthetic_upstream)))
+    adapters = build_adapters(transport)
+    per_source = max(1, limit // len(adapters))
+    boss = adapters.pop("boss")
+    for title, city in queries:
+        for size in {limit, per_source}:
+            for adapter in adapters.values():
+                await adapter.search_jd(title=title, city=city or None, limit=size)
+        params = {"query": title}
+        if city:
+            params["city"] = boss._get_city_code(city)
+        cards = "".join(
+            BOSS_CARD.format(id=i, title=title, city=city or "北京", company=COMPANIES[i % len(COMPANIES)])
+            for i in range(limit)
+        )
+        store.add_page(
+            f"{BossAdapter.BASE_URL}/web/geek/job?{urlencode(params)}",
+            f'<html><body><ul class="job-list-box">{cards}</ul></body></html>',
+        )
+    await transport.aclose()
+    return store
+
+
+# ---- 录制 ----
+
+async def record(args: argparse.Namespace) -> None:
+    store = FixtureStore(args.fixtures).load()
+    transport = AdapterTransport(http_transport=RecordingTransport(store))
+    adapters = build_adapters(transport, recorder=store)
+    per_source = max(1, args.limit // len(adapters))
+    try:
+        for title, city in parse_queries(args.queries):
+            for name, adapter in adapters.items():
+                if not adapter.is_available():
+                    print(f"  跳过 {name}（不可用）")
+                    continue
+                for size in {args.limit, per_source}:
+                    jobs = await adapter.search_jd(title=title, city=city or None, limit=size)
+                    print(f"  {name:<10} {title}/{city or '-'} limit={size}: {len(jobs)} 条")
+                for job in jobs[:args.details]:
+                    if job.get("source_url"):
+                        await adapter.fetch_jd_by_url(job["source_url"])
+    finally:
+        await transport.aclose()
+        await adapters["boss"].close()
+    store.save()
+    print(f"已保存 {len(store)} 个 fixture 到 {args.fixtures}")
+
+
+# ---- 回放 ----
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+async def bench_adapter(
+    name: str, adapter: Any, queries: List[Tuple[str, str]], limit: int, requests: int, concurrency: int
+) -> None:
+    gate = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    jobs_total = 0
+    empty = 0
+
+    async def one(i: int) -> None:
+        nonlocal jobs_total, empty
+        title, city = queries[i % len(queries)]
+        async with gate:
+            start = time.perf_counter()
+            jobs = await adapter.search_jd(title=title, city=city or None, limit=limit)
+            latencies.append(time.perf_counter() - start)
+        jobs_total += len(jobs)
+        empty += not jobs
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    print(
+        f"  {name:<10} {requests / elapsed:>8.1f} req/s   p50 {percentile(latencies, 0.5) * 1e3:>7.1f} ms   "
+        f"p95 {percentile(latencies, 0.95) * 1e3:>7.1f} ms   {jobs_total / elapsed:>9.0f} JD/s   空结果 {empty}"
+    )
+
+
+def parse_benchmarks(adapters: Dict[str, Any]) -> Dict[str, Callable[[dict], List[dict]]]:
+    """各 HTTP 源搜索响应的解析（与适配器 search_jd 中的路径一致）"""
+    return {
+        "zhaopin.com": lambda data: [adapters["zhaopin"]._normalize_job(j) for j in data["data"]["results"]],
+        "51job.com": lambda data: [adapters["job51"]._normalize_job(j) for j in data["resultList"]],
+        "shixiseng.com": lambda data: [adapters["shixiseng"]._normalize_job(j) for j in data["data"]["list"]],
+    }
+
+
+def bench_parsing(store: FixtureStore, adapters: Dict[str, Any], rounds: int) -> None:
+    parsers = parse_benchmarks(adapters)
+    for suffix, parse in parsers.items():
+        bodies = [
+            fixture.content() for fixture in store
+            if fixture.kind == "http" and fixture.status == 200 and fixture.host.endswith(suffix)
+        ]
+        bodies = [body for body in bodies if body.lstrip().startswith(b"{")]
+        if not bodies:
+            continue
+        jobs = 0
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for body in bodies:
+                try:
+                    jobs += len(parse(json.loads(body)))
+                except (KeyError, TypeError):
+                    pass  # 详情等其他接口的响应
+        elapsed = time.perf_counter() - start
+        calls = rounds * len(bodies)
+        print(f"  {suffix:<14} {elapsed / calls * 1e6:>8.1f} µs/响应   {jobs / elapsed:>10.0f} JD/s")
+
+
+async def bench_multi_source(
+    adapters: Dict[str, Any], queries: List[Tuple[str, str]], limit: int, requests: int, budget: float
+) -> None:
+    task_store = TaskStore()
+    service = JDService(
+        JDStore(), task_store,
+        adapters["shixiseng"], adapters["zhaopin"], adapters["job51"], adapters["boss"],
+        JobScheduler(task_store),
+        search_budget=budget,
+    )
+    latencies: List[float] = []
+    results = 0
+    for i in range(requests):
+        title, city = queries[i % len(queries)]
+        start = time.perf_counter()
+        found = await service._search_multi_source(None, title, city or None, "bench", limit)
+        latencies.append(time.perf_counter() - start)
+        results += len(found)
+    sources = sum(adapter.is_available() for adapter in adapters.values())
+    print(
+        f"  {sources} 个源   p50 {percentile(latencies, 0.5) * 1e3:>7.1f} ms   p95 {percentile(latencies, 0.95) * 1e3:>7.1f} ms   "
+        f"平均 {results / requests:.1f} 条/次（去重后）"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    queries = parse_queries(args.queries)
+    if args.fixtures:
+        store = FixtureStore(args.fixtures).load()
+        source = args.fixtures
+    else:
+        store = await synthesize(queries, args.limit)
+        source = "合成"
+    faults = FaultConfig(
+        latency_ms=args.latency,
+        jitter_ms=args.jitter,
+        recorded_latency=args.recorded_latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        drop_rate=args.drop_rate,
+        seed=args.seed,
+    )
+    with ReplayServer(store, faults) as server:
+        transport = AdapterTransport(http_transport=server.router())
+        adapters = build_adapters(transport, boss_base_url=server.url)
+        print(f"fixture: {source}（{len(store)} 个）  替身服务 {server.url}")
+        print(
+            f"故障注入: 延迟 {args.latency}±{args.jitter} ms  5xx {args.error_rate:.0%}  429 {args.throttle_rate:.0%}  "
+            f"断开 {args.drop_rate:.0%}  seed {args.seed}"
+        )
+        print("结果:")
+        try:
+            print(" 单源搜索")
+            for name, adapter in adapters.items():
+                if adapter.is_available():
+                    await bench_adapter(name, adapter, queries, args.limit, args.requests, args.concurrency)
+            print(" 响应解析")
+            bench_parsing(store, adapters, args.parse_rounds)
+            print(" JDService._search_multi_source")
+            await bench_multi_source(adapters, queries, args.limit, args.multi_requests, args.budget)
+            print(f" 替身服务计数 {server.metrics()}")
+        finally:
+            await transport.aclose()
+            await adapters["boss"].close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command")
+
+    rec = sub.add_parser("record", help="录制真实响应")
+    rec.add_argument("--fixtures", required=True)
+    rec.add_argument("--queries", nargs="+", default=DEFAULT_QUERIES, help="职位:城市")
+    rec.add_argument("--limit", type=int, default=20)
+    rec.add_argument("--details", type=int, default=2, help="每个源额外录制的详情页数量")
+
+    rep = sub.add_parser("run", help="回放并测量")
+    rep.add_argument("--fixtures", help="fixture 目录；不指定时使用合成 fixture")
+    rep.add_argument("--queries", nargs="+", default=DEFAULT_QUERIES, help="职位:城市")
+    rep.add_argument("--limit", type=int, default=20)
+    rep.add_argument("--requests", type=int, default=100, help="每个源的搜索次数")
+    rep.add_argument("--concurrency", type=int, default=8)
+    rep.add_argument("--multi-requests", type=int, default=20, help="多源搜索次数")
+    rep.add_argument("--budget", type=float, default=8.0, help="多源搜索的时间预算（秒）")
+    rep.add_argument("--parse-rounds", type=int, default=50)
+    rep.add_argument("--latency", type=float, default=50, help="固定延迟（毫秒）")
+    rep.add_argument("--jitter", type=float, default=0, help="延迟抖动（毫秒）")
+    rep.add_argument("--recorded-latency", action="store_true", help="叠加录制时的源站耗时")
+    rep.add_argument("--error-rate", type=float, default=0.0)
+    rep.add_argument("--throttle-rate", type=float, default=0.0)
+    rep.add_argument("--drop-rate", type=float, default=0.0)
+    rep.add_argument("--seed", type=int, default=42)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        asyncio.run(record(args))
+    elif args.command == "run":
+        asyncio.run(run(args))
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
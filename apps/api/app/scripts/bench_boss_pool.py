@@ -0,0 +1,131 @@
+"""BossAdapter 浏览器池基准测试：本地 HTML fixture 上对比逐次新建页面与上下文池
+
+fixture 服务在本机线程中运行：搜索页包含职位卡片以及若干慢速图片/字体（每个资源延迟 --asset-delay 毫秒），
+模拟真实页面上拖慢 networkidle 的静态资源。需要安装 playwright 与 Chromium（playwright install chromium）。
+
+用法:
+    python app/scripts/bench_boss_pool.py --requests 40 --concurrency 8
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# 添加父目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.adapters import BossAdapter, BrowserPool, BrowserPoolConfig
+
+JOB_CARD = """
+<li class="job-card-wrapper">
+  <a href="/job_detail/{i}.html"><span class="job-name">后端开发工程师 {i}</span></a>
+  <span class="job-area">北京·海淀区</span>
+  <h3 class="company-name">示例科技 {i}</h3>
+  <img src="/static/logo_{i}.png">
+</li>
+"""
+
+SEARCH_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8">
+<link rel="stylesheet" href="/static/app.css">
+<style>@font-face {{ font-family: f; src: url(/static/font.woff2); }} body {{ font-family: f; }}</style>
+</head><body>
+<img src="/static/banner.jpg">
+<ul class="job-list-box">{cards}</ul>
+</body></html>
+"""
+
+
+def make_handler(jobs: int, asset_delay: float):
+    page = SEARCH_PAGE.format(cards="".join(JOB_CARD.format(i=i) for i in range(jobs))).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/static/"):
+                time.sleep(asset_delay)
+                body, content_type = b"\0" * 2048, "application/octet-stream"
+            else:
+                body, content_type = page, "text/html; charset=utf-8"
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+async def run_case(label: str, config: BrowserPoolConfig, base_url: str, requests: int, concurrency: int) -> None:
+    adapter = BossAdapter(BrowserPool(config), base_url=base_url)
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int) -> None:
+        async with gate:
+            start = time.perf_counter()
+            jobs = await adapter.search_jd(title=f"后端{i}", city="北京")
+            latencies.append(time.perf_counter() - start)
+            assert jobs, "fixture search returned no jobs"
+
+    try:
+        await adapter.search_jd(title="warmup")  # 浏览器启动不计入
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+    finally:
+        metrics = adapter.metrics()
+        await adapter.close()
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(
+        f"  {label:<28} {requests / elapsed:>7.1f} req/s   p50 {p50 * 1e3:>7.0f} ms   p95 {p95 * 1e3:>7.0f} ms   "
+        f"contexts {metrics['contexts_created']:>3}   blocked {metrics['blocked_requests']:>5}"
+    )
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.jobs, args.asset_delay / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"fixture: {base_url}  {args.jobs} 张职位卡片，静态资源延迟 {args.asset_delay} ms")
+    print("结果:")
+    try:
+        await run_case(
+            "逐次新页面 + networkidle",
+            BrowserPoolConfig(
+                contexts=args.concurrency,
+                block_resources=frozenset(),
+                wait_until="networkidle",
+                reuse_pages=False,
+            ),
+            base_url, args.requests, args.concurrency,
+        )
+        await run_case(
+            f"上下文池({args.contexts}) + 拦截",
+            BrowserPoolConfig(contexts=args.contexts),
+            base_url, args.requests, args.concurrency,
+        )
+    finally:
+        server.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--contexts", type=int, default=4)
+    parser.add_argument("--jobs", type=int, default=30)
+    parser.add_argument("--asset-delay", type=float, default=150, help="每个静态资源的延迟（毫秒）")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
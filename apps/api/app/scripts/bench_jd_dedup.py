@@ -0,0 +1,71 @@
+"""NearDuplicateIndex 基准测试：MinHash/LSH 近似去重的插入耗时与召回
+
+用法:
+    python app/scripts/bench_jd_dedup.py --jds 5000
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# 添加父目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.schemas import JDResponse, JDSource
+from app.store.jd_dedup import NearDuplicateIndex
+
+
+def make_text(rng: random.Random) -> str:
+    def phrase() -> str:
+        return "".join(chr(0x4E00 + rng.randrange(3000)) for _ in range(rng.randint(4, 12)))
+    return "，".join(phrase() for _ in range(15))
+
+
+def make_jd(jd_id: str, company: str, title: str, location: str, text: str, source: JDSource) -> JDResponse:
+    return JDResponse(
+        id=jd_id, company=company, title=title, location=location, jd_text=text,
+        source=source, created_at=datetime.utcnow(),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jds", type=int, default=5000)
+    parser.add_argument("--dup-every", type=int, default=50, help="每隔多少条生成一条转发副本")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    originals = [
+        make_jd(f"jd_{i:06d}", f"公司{i % 500}", f"岗位{i % 37}", "上海", make_text(rng), JDSource.ZHAOPIN)
+        for i in range(args.jds)
+    ]
+    # 转发副本：标题加后缀、地点写到区、正文追加一句
+    reposts = [
+        make_jd(f"dup_{i:06d}", f"{jd.company}有限公司", f"{jd.title}（急招）", "上海·浦东新区",
+                f"{jd.jd_text}，五险一金", JDSource.BOSS)
+        for i, jd in enumerate(originals[::args.dup_every])
+    ]
+
+    index = NearDuplicateIndex()
+    start = time.perf_counter()
+    for jd in originals:
+        index.add(jd)
+    elapsed = time.perf_counter() - start
+    print(f"插入 {args.jds:,} 条JD: {elapsed * 1e3:.0f} ms（{elapsed / args.jds * 1e3:.3f} ms/条）")
+
+    start = time.perf_counter()
+    found = sum(
+        1 for jd, original in zip(reposts, originals[::args.dup_every])
+        if index.add(jd) == index.cluster_of(original.id)
+    )
+    elapsed = time.perf_counter() - start
+    clusters = len({index.cluster_of(jd.id) for jd in originals})
+    print("结果:")
+    print(f"  转发副本召回        {found}/{len(reposts)}（{elapsed / len(reposts) * 1e3:.3f} ms/条）")
+    print(f"  原始JD误合并        {args.jds - clusters} 条")
+
+
+if __name__ == "__main__":
+    main()
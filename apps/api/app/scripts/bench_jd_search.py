@@ -0,0 +1,99 @@
+"""JDStore.search_jd 基准测试：倒排索引全文检索与过滤
+
+用法:
+    python app/scripts/bench_jd_search.py --jds 5000
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# 添加父目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.schemas import JDResponse, JDSource
+from app.store import JDStore
+
+COMPANIES = ["字节跳动", "腾讯", "阿里巴巴", "百度", "美团", "京东", "拼多多", "小米", "华为", "网易"]
+TITLES = ["后端开发工程师", "前端开发工程师", "数据分析师", "产品经理", "算法工程师", "测试开发工程师"]
+CITIES = ["北京", "上海", "深圳", "杭州", "成都"]
+SKILLS = [
+    "Python", "Java", "Go", "C++", "Rust", "Scala", "TypeScript", "React", "Vue", "Flutter",
+    "MySQL", "PostgreSQL", "Redis", "MongoDB", "Kafka", "Elasticsearch", "ClickHouse", "Spark", "Flink", "Hadoop",
+    "Docker", "Kubernetes", "TensorFlow", "PyTorch", "Linux", "Nginx", "gRPC", "GraphQL", "Airflow", "Hive",
+]
+DOMAINS = [
+    "电商交易", "推荐系统", "搜索广告", "支付清结算", "即时通讯", "短视频", "直播互动", "本地生活", "物流调度", "金融风控",
+    "智能客服", "游戏服务端", "云原生平台", "数据仓库", "用户增长", "内容审核", "地图导航", "供应链", "在线教育", "医疗健康",
+]
+TEMPLATES = [
+    "熟练掌握{skill}，有{domain}相关项目经验",
+    "负责{domain}核心模块的设计与开发，熟悉{skill}",
+    "有{domain}领域{years}年以上工作经验者优先",
+    "深入理解{skill}原理，能够独立排查线上问题",
+    "参与{domain}架构演进，推动{skill}落地",
+    "具备良好的沟通能力和团队协作精神",
+    "本科及以上学历，计算机相关专业",
+    "对{domain}业务有浓厚兴趣，学习能力强",
+]
+
+QUERIES = ["分布式 Python", "推荐系统 Spark", "React 前端", "数据仓库 Hive", "Kubernetes 云原生", "金融风控 Java"]
+
+
+def make_jd_text(rng: random.Random) -> str:
+    lines = []
+    for _ in range(rng.randint(6, 12)):
+        lines.append(rng.choice(TEMPLATES).format(
+            skill=rng.choice(SKILLS), domain=rng.choice(DOMAINS), years=rng.randint(1, 5),
+        ))
+    return "\n".join(lines)
+
+
+def build_store(count: int) -> JDStore:
+    rng = random.Random(42)
+    store = JDStore()
+    for i in range(count):
+        store.create_jd(JDResponse(
+            id=f"jd_{i:06d}",
+            company=rng.choice(COMPANIES),
+            title=rng.choice(TITLES),
+            location=rng.choice(CITIES),
+            jd_text=make_jd_text(rng),
+            source=JDSource.MANUAL,
+            created_at=datetime.utcnow(),
+        ), "bench-user")
+    return store
+
+
+def timed(label: str, fn, rounds: int) -> None:
+    start = time.perf_counter()
+    for i in range(rounds):
+        fn(i)
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f"  {label:<30} {elapsed * 1e6:>10.1f} µs/op")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jds", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = build_store(args.jds)
+    print(f"建索引 {args.jds:,} 条JD: {(time.perf_counter() - start) * 1e3:.0f} ms")
+
+    user = "bench-user"
+    print("结果:")
+    timed("全文检索 top-20", lambda i: store.search_jd(user, query=QUERIES[i % len(QUERIES)]), args.rounds)
+    timed("公司过滤", lambda i: store.search_jd(user, company=COMPANIES[i % len(COMPANIES)]), args.rounds)
+    timed("公司+城市过滤 + 全文检索", lambda i: store.search_jd(
+        user, company=COMPANIES[i % len(COMPANIES)], city=CITIES[i % len(CITIES)],
+        query=QUERIES[i % len(QUERIES)],
+    ), args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""JD要求聚类基准测试：规范化、TF-IDF 向量化与聚类的耗时，以及得到的共性维度
+
+--sweep 改为在人工标注的要求句上扫描阈值与英文技术词权重，
+按"两两是否同簇"统计精确率、召回率与 F1，用于选取 requirement_clusters 的默认值。
+
+用法:
+    python app/scripts/bench_requirement_clusters.py --jds 1500
+    python app/scripts/bench_requirement_clusters.py --sweep
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from itertools import combinations
+from pathlib import Path
+from typing import List, Tuple
+
+# 添加父目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.cache import Cache, LocalRedis
+from app.services.jd_aggregation_service import JDAggregationService, JDItem
+from app.services.requirement_clusters import cluster_requirements, normalize_requirement
+
+# 每个维度若干种说法，{} 处随机填入技术名、年限等
+TEMPLATES = [
+    ["本科及以上学历，{major}相关专业", "统招本科以上学历，{major}等专业优先", "{major}专业本科及以上学历"],
+    ["{years}年以上相关工作经验", "{years}年及以上{domain}开发经验", "具有{years}年以上{domain}工作经验"],
+    ["熟练掌握{lang}编程语言", "精通{lang}，有扎实的编程基础", "熟悉{lang}语言及常用框架"],
+    ["熟悉{db}等数据库", "熟练使用{db}，具备SQL调优经验", "掌握{db}数据库的设计与优化"],
+    ["具备良好的团队协作和沟通能力", "良好的沟通能力和团队合作精神", "沟通表达能力强，有团队协作意识"],
+    ["学习能力强，能快速适应新技术", "具备较强的学习能力和自驱力", "对新技术有热情，学习能力强"],
+    ["有分布式系统经验者优先", "有大型分布式系统设计经验优先", "熟悉分布式架构，有高并发系统经验"],
+    ["有{cloud}使用经验", "熟悉{cloud}等云原生技术", "了解{cloud}容器化部署"],
+]
+FILL = {
+    "major": ["计算机", "软件工程", "电子信息", "通信"],
+    "years": ["1", "2", "3", "3-5", "5"],
+    "domain": ["后端", "服务端", "互联网", "大数据"],
+    "lang": ["Python", "Java", "Go", "C++", "Python/Java"],
+    "db": ["MySQL", "MySQL、Redis", "PostgreSQL", "MongoDB", "Redis"],
+    "cloud": ["Docker", "Kubernetes", "Docker/Kubernetes", "AWS"],
+}
+# 人工标注：同一维度的不同说法；不同技术名（Docker 与 AWS、Python 与 Java）应分属不同维度
+LABELLED = {
+    "学历": ["本科及以上学历，计算机相关专业", "统招本科以上学历，软件工程等专业优先", "计算机专业本科及以上学历", "全日制本科及以上学历", "电子信息、通信相关专业本科以上学历"],
+    "工作年限": ["3年以上相关工作经验", "5年及以上后端开发经验", "具有3-5年以上互联网工作经验", "2年以上服务端开发经验", "1年以上工作经验"],
+    "Python": ["熟练掌握Python编程语言", "精通Python，有扎实的编程基础", "熟悉Python语言及常用框架", "有Python开发经验", "熟悉Python及Django/Flask框架"],
+    "Java": ["熟练掌握Java编程语言", "精通Java，熟悉JVM原理", "熟悉Java语言及Spring框架", "有Java开发经验"],
+    "Go": ["熟练掌握Go语言", "熟悉Go语言及常用框架", "有Go开发经验者优先"],
+    "MySQL": ["熟悉MySQL等数据库", "熟练使用MySQL，具备SQL调优经验", "掌握MySQL数据库的设计与优化", "有MySQL使用经验"],
+    "Redis": ["熟悉Redis等缓存技术", "熟练使用Redis", "有Redis使用经验", "掌握Redis缓存设计"],
+    "Docker": ["了解Docker容器化部署", "有Docker使用经验", "熟悉Docker等容器技术", "熟练使用Docker"],
+    "Kubernetes": ["熟悉Kubernetes等云原生技术", "有Kubernetes使用经验", "了解Kubernetes容器编排", "熟悉K8s集群运维"],
+    "AWS": ["有AWS使用经验", "熟悉AWS等公有云服务", "了解AWS云平台部署"],
+    "沟通协作": ["具备良好的团队协作和沟通能力", "良好的沟通能力和团队合作精神", "沟通表达能力强，有团队协作意识", "善于沟通，具备团队精神"],
+    "学习能力": ["学习能力强，能快速适应新技术", "具备较强的学习能力和自驱力", "对新技术有热情，学习能力强", "自学能力强"],
+    "分布式": ["有分布式系统经验者优先", "有大型分布式系统设计经验优先", "熟悉分布式架构，有高并发系统经验", "了解分布式系统原理"],
+}
+
+NOISE = ["有开源项目经验", "英语可作为工作语言", "能接受出差", "有游戏行业背景", "熟悉敏捷开发流程", "有带团队经验"]
+
+
+def rare_line(rng: random.Random) -> str:
+    """公司特有的要求（随机汉字短语），使原子要求的数量随JD数增长"""
+    return "".join(chr(0x4E00 + rng.randrange(3000)) for _ in range(rng.randint(6, 16)))
+
+
+def make_jd(i: int, rng: random.Random, service: JDAggregationService, rare: int) -> JDItem:
+    lines = []
+    for variants in rng.sample(TEMPLATES, rng.randint(4, len(TEMPLATES))):
+        line = rng.choice(variants)
+        for key, values in FILL.items():
+            line = line.replace("{" + key + "}", rng.choice(values))
+        lines.append(line)
+    lines.extend(rng.sample(NOISE, rng.randint(0, 2)))
+    lines.extend(rare_line(rng) for _ in range(rng.randint(0, rare)))
+    text = "岗位职责：\n1. 负责核心业务开发\n\n任职要求：\n" + "\n".join(f"{n}. {line}" for n, line in enumerate(lines, 1))
+    return JDItem(
+        id=f"jd_{i:05d}", company=f"公司{i % 200}", title="后端开发工程师", location="北京",
+        jd_text=text, requirements=service._extract_requirements_from_text(text),
+        source="job_board", is_target_company=(i % 10 == 0),
+    )
+
+
+def pair_scores(labels: List[str], clusters: List[List[int]]) -> Tuple[float, float, float]:
+    """两两同簇判定的精确率、召回率与 F1"""
+    assigned = {i: c for c, cluster in enumerate(clusters) for i in cluster}
+    tp = fp = fn = 0
+    for i, j in combinations(range(len(labels)), 2):
+        same, predicted = labels[i] == labels[j], assigned[i] == assigned[j]
+        tp += same and predicted
+        fp += predicted and not same
+        fn += same and not predicted
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+
+def sweep() -> None:
+    texts = [normalize_requirement(s) for sentences in LABELLED.values() for s in sentences]
+    labels = [label for label, sentences in LABELLED.items() for _ in sentences]
+    weights = [1] * len(texts)
+
+    best = None
+    print("词权重  阈值   精确率  召回率  F1     簇数")
+    for token_weight in (1, 2, 3, 4, 6, 8):
+        for threshold in (0.1, 0.15, 0.2, 0.25, 0.3, 0.35, 0.4):
+            clusters = cluster_requirements(texts, weights, threshold, token_weight=token_weight)
+            precision, recall, f1 = pair_scores(labels, clusters)
+            print(f"  {token_weight:<5} {threshold:<5.2f}  {precision:.2f}    {recall:.2f}    {f1:.2f}   {len(clusters)}")
+            if best is None or f1 > best[0]:
+                best = (f1, token_weight, threshold)
+
+    f1, token_weight, threshold = best
+    print(f"最佳: 词权重 {token_weight}，阈值 {threshold}，F1 {f1:.2f}")
+    for cluster in cluster_requirements(texts, weights, threshold, token_weight=token_weight):
+        names = sorted({labels[i] for i in cluster})
+        print(f"  {'/'.join(names)}{' (误合并)' if len(names) > 1 else ''}: {' | '.join(texts[i] for i in cluster)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jds", type=int, default=1500)
+    parser.add_argument("--rare", type=int, default=3, help="每条JD最多几条特有要求")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sweep", action="store_true", help="在人工标注集上扫描阈值与词权重")
+    args = parser.parse_args()
+    if args.sweep:
+        sweep()
+        return
+
+    rng = random.Random(42)
+    service = JDAggregationService(cache=Cache(LocalRedis()))
+    jds = [make_jd(i, rng, service, args.rare) for i in range(args.jds)]
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        analysis_id = asyncio.run(service.analyze_15_jds(jds))
+        timings.append(time.perf_counter() - start)
+    atoms = len(service._extract_atomic_requirements(jds))
+
+    print("结果:")
+    print(f"  JD 数: {args.jds:,}，要求句: {sum(len(jd.requirements) for jd in jds):,}，原子要求: {atoms:,}")
+    print(f"  分析耗时: 最快 {min(timings) * 1e3:.0f} ms，中位 {sorted(timings)[len(timings) // 2] * 1e3:.0f} ms")
+    for dim in service.get_commonalities(analysis_id):
+        print(f"  [{dim.importance:.2f}] {dim.title} — {dim.description}")
+        for sentence in dim.evidence_sentences:
+            print(f"      · {sentence}")
+
+
+if __name__ == "__main__":
+    main()
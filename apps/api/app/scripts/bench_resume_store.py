@@ -0,0 +1,103 @@
+"""ResumeStore 基准测试：对比全表扫描与按用户索引的 list_by_user / latest，以及列表 JSON 缓存
+
+用法:
+    python app/scripts/bench_resume_store.py --records 1000000 --users 10000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 添加父目录到路径
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.schemas import ResumeBlock, ResumeContacts, ResumeMetadata
+from app.store import ResumeRecord, ResumeStore, record_to_json
+from app.store.resume_store import _build_response
+
+
+def build_store(records: int, users: int) -> ResumeStore:
+    """批量灌入记录；共享不可变的子对象以降低构造开销"""
+    store = ResumeStore()
+    blocks = [ResumeBlock(type="summary", text="示例简历内容")]
+    contacts = ResumeContacts()
+    metadata = ResumeMetadata()
+    for i in range(records):
+        store.create(ResumeRecord(
+            id=f"r_{i:08x}",
+            user_id=f"u_{i % users}",
+            source="MANUAL",
+            template_key=None,
+            title=None,
+            file_name=None,
+            mime_type=None,
+            raw_text="示例简历内容",
+            parsed_blocks=blocks,
+            skills=[],
+            contacts=contacts,
+            metadata=metadata,
+        ))
+    return store
+
+
+def scan_latest(store: ResumeStore, user_id: str):
+    """旧实现：扫描全部简历后取 max(updated_at)"""
+    records = [r for r in store._resumes.values() if r.user_id == user_id]
+    return max(records, key=lambda rec: rec.updated_at) if records else None
+
+
+def timed(label: str, fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for i in range(rounds):
+        fn(i)
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f"  {label:<28} {elapsed * 1e6:>12.1f} µs/op")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=1000)
+    parser.add_argument("--scan-rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"灌入 {args.records:,} 条简历 / {args.users:,} 个用户 ...")
+    start = time.perf_counter()
+    store = build_store(args.records, args.users)
+    print(f"  耗时 {time.perf_counter() - start:.1f}s")
+
+    # 更新一部分记录，打乱 updated_at 顺序
+    for i in range(0, args.records, 7):
+        store.update(store.get(f"r_{i:08x}"))
+
+    user = lambda i: f"u_{i % args.users}"
+    print("结果:")
+    scan = timed("latest (全表扫描)", lambda i: scan_latest(store, user(i)), args.scan_rounds)
+    indexed = timed("latest (用户索引)", lambda i: store.latest(user(i)), args.rounds)
+    timed("list_by_user (用户索引)", lambda i: store.list_by_user(user(i)), args.rounds)
+    print(f"  latest 加速比: {scan / indexed:,.0f}x")
+
+    # 列表接口的序列化：每次重建响应并序列化 vs 按 revision 缓存的 JSON（先预热一轮）
+    hot = lambda i: f"u_{i % min(args.users, 100)}"
+    for i in range(min(args.users, 100)):
+        [record_to_json(r) for r in store.list_by_user(hot(i))]
+    rebuild = timed(
+        "list JSON (每次重建)",
+        lambda i: [_build_response(r).model_dump_json() for r in store.list_by_user(hot(i))],
+        args.rounds,
+    )
+    cached = timed(
+        "list JSON (缓存)",
+        lambda i: b",".join(record_to_json(r) for r in store.list_by_user(hot(i))),
+        args.rounds,
+    )
+    print(f"  list JSON 加速比: {rebuild / cached:,.1f}x")
+
+    for i in range(args.scan_rounds):
+        assert scan_latest(store, user(i)).updated_at == store.latest(user(i)).updated_at
+
+
+if __name__ == "__main__":
+    main()
@@ -4,17 +4,19 @@ import asyncio
 from datetime import datetime
 from typing import Optional, List
 from uuid import uuid4
-from fastapi import BackgroundTasks
 
 from ..schemas import (
     CommonalityRequest, 
     CommonalityResponse, 
     CommonalityItem,
+    JDResponse,
     TaskResponse,
     TaskStatus,
     TaskType
 )
-from ..store import JDStore, TaskStore
+from ..jobs import JobContext, JobScheduler, Lane
+from ..store import JDCorpus, JDStore, TaskStore
+from ..store.jd_dedup import cluster_jds, representative
 
 DEFAULT_USER_ID = "demo-user"
 
@@ -22,16 +24,24 @@ DEFAULT_USER_ID = "demo-user"
 class CommonalityService:
     """共性提炼服务"""
     
-    def __init__(self, jd_store: JDStore, task_store: TaskStore):
+    def __init__(
+        self,
+        jd_store: JDStore,
+        task_store: TaskStore,
+        scheduler: JobScheduler,
+        corpus: Optional[JDCorpus] = None
+    ):
         self.jd_store = jd_store
+        self.corpus = corpus  # 搜索结果可能来自共享语料库，不在用户JD库中
         self.task_store = task_store
+        self.scheduler = scheduler
         self._commonalities = {}  # 简单内存存储
+        scheduler.register("commonality.extract", self._extract_commonalities_job, lane=Lane.DEFAULT)
 
     async def extract_commonalities_async(
         self,
         request: CommonalityRequest,
-        user_id: Optional[str],
-        background_tasks: BackgroundTasks
+        user_id: Optional[str]
     ) -> TaskResponse:
         """异步提炼共性"""
         user = user_id or DEFAULT_USER_ID
@@ -45,57 +55,43 @@ class CommonalityService:
             status=TaskStatus.QUEUED
         )
         
-        # 添加后台任务
-        background_tasks.add_task(
-            self._extract_commonalities_background,
+        # 提交到调度队列
+        self.scheduler.submit(
+            "commonality.extract",
             task_id,
-            request,
-            user
+            user,
+            {"request": request.model_dump(mode="json")}
         )
         
         return task
 
-    async def _extract_commonalities_background(
-        self,
-        task_id: str,
-        request: CommonalityRequest,
-        user_id: str
-    ):
+    async def _extract_commonalities_job(self, ctx: JobContext, payload: dict) -> dict:
         """后台执行共性提炼"""
-        try:
-            # 更新任务状态
-            self.task_store.update_task_status(task_id, TaskStatus.RUNNING)
-            
-            # 获取JD文本
-            jd_texts = []
-            for jd_id in request.jd_ids:
-                jd = self.jd_store.get_jd(jd_id)
-                if jd:
-                    jd_texts.append(jd.jd_text)
-            
-            # 模拟LLM处理
-            await asyncio.sleep(2)  # 模拟处理时间
-            
-            # 生成共性结果
-            commonality_id = f"common_{uuid4().hex[:8]}"
-            commonality = self._generate_mock_commonality(commonality_id, jd_texts, request)
-            
-            # 保存结果
-            self._commonalities[commonality_id] = commonality
-            
-            # 更新任务结果
-            self.task_store.update_task_result(
-                task_id,
-                TaskStatus.DONE,
-                {"commonality_id": commonality_id, "commonality": commonality.model_dump()}
-            )
-            
-        except Exception as e:
-            self.task_store.update_task_result(
-                task_id,
-                TaskStatus.ERROR,
-                error=str(e)
-            )
+        request = CommonalityRequest.model_validate(payload["request"])
+        
+        # 获取JD文本；同一岗位的转发/重发只计一次
+        jds = [jd for jd in (self._get_jd(jd_id, ctx.user_id) for jd_id in request.jd_ids) if jd]
+        clusters = cluster_jds(jds)
+        jd_texts = [representative(cluster).jd_text for cluster in clusters]
+        
+        # 模拟LLM处理
+        await asyncio.sleep(2)  # 模拟处理时间
+        
+        # 生成共性结果
+        commonality_id = f"common_{uuid4().hex[:8]}"
+        commonality = self._generate_mock_commonality(commonality_id, jd_texts, request)
+        commonality.query_info["duplicates_merged"] = len(jds) - len(clusters)
+        
+        # 保存结果
+        self._commonalities[commonality_id] = commonality
+        
+        return {"commonality_id": commonality_id, "commonality": commonality.model_dump()}
+
+    def _get_jd(self, jd_id: str, user_id: str) -> Optional[JDResponse]:
+        jd = self.jd_store.get_jd(jd_id, user_id)
+        if jd is None and self.corpus is not None:
+            jd = self.corpus.get(jd_id)
+        return jd
 
     def get_commonality(self, commonality_id: str, user_id: Optional[str]) -> CommonalityResponse:
         """获取共性提炼结果"""
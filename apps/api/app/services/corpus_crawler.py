@@ -0,0 +1,116 @@
+"""JD语料库的后台增量爬取
+
+每 interval_seconds 一轮：取热度不低于 min_score、距上次爬取超过 refresh_after 的查询（热度高的在前，
+每轮最多 batch 个），逐个通过 JDService.crawl 重新搜索各源写入语料库，使热门查询在过期前就被刷新，
+用户请求始终命中语料库；随后移除长时间未再被爬到的JD。
+
+- 请求仍经过各源的节流（令牌桶、冷却），后台爬取不会绕过限流
+- 同一查询在多个 worker 之间通过共享缓存的 SET NX 占位，只有一个 worker 执行；
+  占位保留到下一次刷新时间，成功后其他 worker 不会在本周期内重复爬取，失败时立即释放
+- 每轮逐个查询顺序执行，避免后台流量挤占在线搜索
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from ..cache import Cache
+from ..store import JDCorpus
+from .jd_service import JDService
+
+logger = logging.getLogger(__name__)
+
+
+class CorpusCrawler:
+    def __init__(
+        self,
+        jd_service: JDService,
+        corpus: JDCorpus,
+        locks: Cache,
+        interval_seconds: float = 300.0,
+        batch: int = 5,
+        min_score: float = 2.0,
+        crawl_limit: int = 40,
+        retention_seconds: float = 14 * 86400,
+    ):
+        self.jd_service = jd_service
+        self.corpus = corpus
+        self.locks = locks
+        self.interval_seconds = interval_seconds
+        self.batch = batch
+        self.min_score = min_score
+        self.crawl_limit = crawl_limit
+        self.retention_seconds = retention_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._counters = {
+            "rounds": 0,
+            "crawled": 0,
+            "failed": 0,
+            "skipped_locked": 0,
+            "expired": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval_seconds > 0
+
+    @property
+    def refresh_after(self) -> float:
+        """在语料库判定过期前刷新：新鲜期减去一轮的间隔"""
+        return max(self.interval_seconds, self.corpus.fresh_seconds - self.interval_seconds)
+
+    # ---- 生命周期 ----
+
+    async def start(self) -> None:
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.corpus.flush_queries()  # 停机前写入尚未落库的访问计数
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Corpus crawl round failed: {e}")
+
+    # ---- 爬取 ----
+
+    async def run_once(self) -> int:
+        """执行一轮，返回成功刷新的查询数"""
+        self._counters["rounds"] += 1
+        refreshed = 0
+        # 先写入本进程累积的访问计数，各 worker 的热度在库中合并后再挑选查询
+        self.corpus.flush_queries()
+        for query in self.corpus.due_queries(self.min_score, self.refresh_after, self.batch):
+            lock = f"crawl:{query.key}"
+            if not await self.locks.aadd(lock, 1, ttl=max(1, int(self.refresh_after))):
+                self._counters["skipped_locked"] += 1
+                continue
+            succeeded = 0
+            try:
+                succeeded = await self.jd_service.crawl(query.title or None, query.city or None, self.crawl_limit)
+            finally:
+                if not succeeded:
+                    await self.locks.adelete(lock)
+            if succeeded:
+                refreshed += 1
+                self._counters["crawled"] += 1
+            else:
+                self._counters["failed"] += 1
+        self._counters["expired"] += self.corpus.expire(self.retention_seconds)
+        return refreshed
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            **self._counters,
+        }
@@ -3,11 +3,23 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from collections import Counter
 from typing import Optional, List, Dict, Any
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from datetime import datetime
 from uuid import uuid4
 
+from ..cache import Cache, get_cache
+from ..schemas import JDResponse
+from ..store import JDCorpus
+from .requirement_clusters import (
+    DEFAULT_THRESHOLD,
+    cluster_requirements,
+    normalize_requirement,
+    split_sentences,
+    strip_enumeration,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -49,9 +61,26 @@ class CommonalityDimension:
 class JDAggregationService:
     """JD聚合分析服务"""
     
-    def __init__(self):
+    # 共性分析结果在共享缓存中的保留时长
+    ANALYSIS_TTL_SECONDS = 7 * 24 * 3600
+    
+    def __init__(
+        self,
+        cache: Optional[Cache] = None,
+        corpus: Optional[JDCorpus] = None,
+        cluster_threshold: float = DEFAULT_THRESHOLD,
+        max_dimensions: int = 5
+    ):
         self._jd_cache = {}  # jd_id -> JDItem
-        self._commonalities_cache = {}  # analysis_id -> List[CommonalityDimension]
+        # 要求句并入共性维度所需的最低余弦相似度，以及返回的维度数上限
+        self.cluster_threshold = cluster_threshold
+        self.max_dimensions = max_dimensions
+        # 共享JD语料库：热查询直接取语料库中的JD，不再抓取
+        self._corpus = corpus
+        # analysis_id -> List[CommonalityDimension]（序列化为dict列表）
+        self._commonalities_cache = (cache or get_cache()).namespace(
+            "jd:commonalities", ttl=self.ANALYSIS_TTL_SECONDS
+        )
         
         # 大厂官网配置
         self.official_sites = {
@@ -84,6 +113,15 @@ class JDAggregationService:
         """
         logger.info(f"Fetching {limit} JDs for position: {position}, company: {company}")
         
+        if self._corpus is not None:
+            self._corpus.record_query(position, city)
+            cached = self._corpus.lookup(None, position, city, limit)
+            if cached is not None:
+                jds = [self._from_corpus(jd, company) for jd in cached]
+                for jd in jds:
+                    self._jd_cache[jd.id] = jd
+                return jds[:limit]
+        
         jds = []
         
         # 如果指定了目标公司，优先从官网抓取
@@ -107,6 +145,19 @@ class JDAggregationService:
         
         return jds[:limit]
     
+    def _from_corpus(self, jd: JDResponse, company: Optional[str]) -> JDItem:
+        """语料库中的JD转为 JDItem"""
+        return JDItem(
+            id=jd.id,
+            company=jd.company,
+            title=jd.title,
+            location=jd.location or "",
+            jd_text=jd.jd_text,
+            requirements=self._extract_requirements_from_text(jd.jd_text),
+            source="job_board",
+            is_target_company=bool(company) and company in jd.company
+        )
+    
     async def _fetch_from_official_site(
         self,
         company: str,
@@ -245,10 +296,14 @@ class JDAggregationService:
                 if line and (line[0].isdigit() or line.startswith('-') or line.startswith('•')):
                     # 这是一条要求
                     # 清理行号和标记
-                    cleaned = line.lstrip('0123456789.-•、 ')
+                    cleaned = strip_enumeration(line)
                     if cleaned:
                         requirements.append(cleaned)
         
+        # 没有要求小节（如语料库中的整段正文）时，按句切分
+        if not in_requirements:
+            requirements = split_sentences(jd_text)
+        
         return requirements
     
     async def analyze_15_jds(self, jd_list: List[JDItem]) -> str:
@@ -261,63 +316,55 @@ class JDAggregationService:
             analysis_id
         """
         # 提取原子能力点
-        atomic_requirements = await self._extract_atomic_requirements(jd_list)
+        atomic_requirements = self._extract_atomic_requirements(jd_list)
         
-        # 聚合为共性维度
-        commonalities = await self._cluster_to_commonalities(atomic_requirements, len(jd_list))
+        # 本地统计聚类为共性维度（不调用LLM）；向量化与矩阵乘在线程池中跑，不阻塞事件循环
+        loop = asyncio.get_running_loop()
+        commonalities = await loop.run_in_executor(
+            None, self._cluster_to_commonalities, atomic_requirements, jd_list
+        )
         
         # 生成分析ID
         analysis_id = f"analysis_{uuid4().hex[:8]}"
         
         # 缓存结果
-        self._commonalities_cache[analysis_id] = commonalities
+        await self._save_commonalities(analysis_id, commonalities)
         
         return analysis_id
     
-    async def _extract_atomic_requirements(
+    def _extract_atomic_requirements(
         self,
         jd_list: List[JDItem]
-    ) -> List[AtomicRequirement]:
-        """提取原子能力点
+    ) -> Dict[str, AtomicRequirement]:
+        """提取原子能力点：规范化后相同的要求句合并，频率为提到它的JD数
         
         Args:
             jd_list: JD列表
             
         Returns:
-            原子能力点列表
+            规范化文本 -> 原子能力点
         """
-        # 模拟LLM提取过程
-        await asyncio.sleep(1)
-        
-        # 统计所有要求的出现频率
-        requirement_map = {}  # requirement_text -> (category, jd_ids)
+        atomic_reqs: Dict[str, AtomicRequirement] = {}
+        normalized: Dict[str, str] = {}  # 原始句 -> 规范化文本（同一句在多条JD中重复出现）
         
         for jd in jd_list:
             for req in jd.requirements:
-                # 简化的分类逻辑（实际应该用LLM）
-                category = self._categorize_requirement(req)
-                
-                key = req.strip()
-                if key in requirement_map:
-                    requirement_map[key]['jd_sources'].append(jd.id)
-                    requirement_map[key]['frequency'] += 1
-                else:
-                    requirement_map[key] = {
-                        'text': key,
-                        'category': category,
-                        'frequency': 1,
-                        'jd_sources': [jd.id]
-                    }
-        
-        # 转换为AtomicRequirement列表
-        atomic_reqs = []
-        for req_data in requirement_map.values():
-            atomic_reqs.append(AtomicRequirement(
-                text=req_data['text'],
-                category=req_data['category'],
-                frequency=req_data['frequency'],
-                jd_sources=req_data['jd_sources']
-            ))
+                key = normalized.get(req)
+                if key is None:
+                    key = normalized[req] = normalize_requirement(req)
+                if not key:
+                    continue
+                atomic = atomic_reqs.get(key)
+                if atomic is None:
+                    atomic_reqs[key] = AtomicRequirement(
+                        text=req.strip(),
+                        category=self._categorize_requirement(req),
+                        frequency=1,
+                        jd_sources=[jd.id]
+                    )
+                elif atomic.jd_sources[-1] != jd.id:  # 按JD顺序追加，同一JD重复的句子只计一次
+                    atomic.jd_sources.append(jd.id)
+                    atomic.frequency += 1
         
         return atomic_reqs
     
@@ -336,94 +383,77 @@ class JDAggregationService:
         else:
             return '其他'
     
-    async def _cluster_to_commonalities(
+    def _cluster_to_commonalities(
         self,
-        atomic_reqs: List[AtomicRequirement],
-        total_jds: int
+        atomic_reqs: Dict[str, AtomicRequirement],
+        jd_list: List[JDItem]
     ) -> List[CommonalityDimension]:
-        """将原子能力点聚合为4-5条共性维度
+        """将原子能力点按 TF-IDF 余弦相似度聚类，取覆盖JD最多的几簇作为共性维度
+        
+        频率为簇内任一表述出现过的JD数；重要度为覆盖率，有目标公司JD时按 7:3 与目标公司JD中的覆盖率加权；
+        证据句为簇内出现最多的几种原始表述。
         
         Args:
-            atomic_reqs: 原子能力点列表
-            total_jds: 总JD数
+            atomic_reqs: 规范化文本 -> 原子能力点
+            jd_list: JD列表
             
         Returns:
-            共性维度列表
+            共性维度列表（最多 max_dimensions 条）
         """
-        # 模拟LLM聚合过程
-        await asyncio.sleep(1)
-        
-        # 按类别分组
-        category_groups = {}
-        for req in atomic_reqs:
-            if req.category not in category_groups:
-                category_groups[req.category] = []
-            category_groups[req.category].append(req)
+        total_jds = len(jd_list)
+        target_ids = {jd.id for jd in jd_list if jd.is_target_company}
+        keys = list(atomic_reqs)
+        clusters = cluster_requirements(
+            keys, [atomic_reqs[key].frequency for key in keys], self.cluster_threshold
+        )
+        
+        groups = []
+        for cluster in clusters:
+            reqs = [atomic_reqs[keys[i]] for i in cluster]
+            jd_ids = {jd_id for req in reqs for jd_id in req.jd_sources}
+            groups.append((reqs, jd_ids))
+        # 只在一条JD中出现的要求不算共性（只有一条JD时除外）
+        groups = [group for group in groups if len(group[1]) >= min(2, total_jds)]
+        groups.sort(key=lambda group: len(group[1]), reverse=True)
         
-        # 生成共性维度
         commonalities = []
-        
-        # 1. 教育背景
-        if '教育' in category_groups:
-            edu_reqs = category_groups['教育']
-            most_common = max(edu_reqs, key=lambda x: x.frequency)
-            commonalities.append(CommonalityDimension(
-                id=f"dim_{uuid4().hex[:8]}",
-                title="教育背景要求",
-                description="本科及以上学历，计算机相关专业优先",
-                importance=0.9,
-                frequency=most_common.frequency,
-                total_jds=total_jds,
-                evidence_sentences=[most_common.text]
-            ))
-        
-        # 2. 工作经验
-        if '经验' in category_groups:
-            exp_reqs = category_groups['经验']
-            most_common = max(exp_reqs, key=lambda x: x.frequency)
+        for reqs, jd_ids in groups[:self.max_dimensions]:
+            importance = len(jd_ids) / total_jds
+            if target_ids:
+                importance = 0.7 * importance + 0.3 * len(jd_ids & target_ids) / len(target_ids)
+            categories = Counter()
+            for req in reqs:
+                categories[req.category] += req.frequency
             commonalities.append(CommonalityDimension(
                 id=f"dim_{uuid4().hex[:8]}",
-                title="工作经验要求",
-                description="3-5年相关工作经验",
-                importance=0.95,
-                frequency=most_common.frequency,
-                total_jds=total_jds,
-                evidence_sentences=[req.text for req in exp_reqs[:3]]
-            ))
-        
-        # 3. 技术技能
-        if '技术技能' in category_groups:
-            skill_reqs = sorted(category_groups['技术技能'], key=lambda x: x.frequency, reverse=True)
-            top_skills = skill_reqs[:5]
-            commonalities.append(CommonalityDimension(
-                id=f"dim_{uuid4().hex[:8]}",
-                title="核心技术能力",
-                description="熟练掌握主流编程语言和技术栈",
-                importance=1.0,
-                frequency=sum(s.frequency for s in top_skills) // len(top_skills),
-                total_jds=total_jds,
-                evidence_sentences=[req.text for req in top_skills]
-            ))
-        
-        # 4. 软技能
-        if '软技能' in category_groups:
-            soft_reqs = category_groups['软技能']
-            most_common = max(soft_reqs, key=lambda x: x.frequency)
-            commonalities.append(CommonalityDimension(
-                id=f"dim_{uuid4().hex[:8]}",
-                title="综合素质要求",
-                description="具备良好的沟通协作能力和学习能力",
-                importance=0.85,
-                frequency=most_common.frequency,
+                title=reqs[0].text,
+                description=(
+                    f"{categories.most_common(1)[0][0]}：{len(jd_ids)}/{total_jds} 条JD提及，"
+                    f"{len(reqs)} 种表述"
+                ),
+                importance=round(importance, 2),
+                frequency=len(jd_ids),
                 total_jds=total_jds,
-                evidence_sentences=[req.text for req in soft_reqs[:3]]
+                evidence_sentences=[req.text for req in reqs[:3]]
             ))
         
-        return commonalities[:5]  # 最多返回5条
+        return commonalities
+    
+    async def _save_commonalities(self, analysis_id: str, commonalities: List[CommonalityDimension]) -> None:
+        await self._commonalities_cache.aset(analysis_id, [asdict(dim) for dim in commonalities])
+
+    async def _load_commonalities(self, analysis_id: str) -> List[CommonalityDimension]:
+        return [
+            CommonalityDimension(**data)
+            for data in await self._commonalities_cache.aget(analysis_id, [])
+        ]
     
     def get_commonalities(self, analysis_id: str) -> List[CommonalityDimension]:
         """获取共性维度"""
-        return self._commonalities_cache.get(analysis_id, [])
+        return [
+            CommonalityDimension(**data)
+            for data in self._commonalities_cache.get(analysis_id, [])
+        ]
     
     async def update_commonality(
         self,
@@ -441,7 +471,7 @@ class JDAggregationService:
         Returns:
             更新后的维度
         """
-        commonalities = self._commonalities_cache.get(analysis_id)
+        commonalities = await self._load_commonalities(analysis_id)
         if not commonalities:
             raise ValueError(f"Analysis {analysis_id} not found")
         
@@ -456,6 +486,7 @@ class JDAggregationService:
                 if 'importance' in updates:
                     dim.importance = updates['importance']
                 
+                await self._save_commonalities(analysis_id, commonalities)
                 return dim
         
         raise ValueError(f"Dimension {dimension_id} not found")
@@ -469,13 +500,14 @@ class JDAggregationService:
         Returns:
             锁定结果
         """
-        commonalities = self._commonalities_cache.get(analysis_id)
+        commonalities = await self._load_commonalities(analysis_id)
         if not commonalities:
             raise ValueError(f"Analysis {analysis_id} not found")
         
         # 锁定所有维度
         for dim in commonalities:
             dim.is_locked = True
+        await self._save_commonalities(analysis_id, commonalities)
         
         return {
             "success": True,
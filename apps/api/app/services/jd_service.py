@@ -2,13 +2,19 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
+from collections import Counter
 from datetime import datetime
-from typing import Optional, List
+from typing import AsyncIterator, Awaitable, Dict, Iterable, Optional, List, Tuple
 from uuid import uuid4
 
-from fastapi import HTTPException, status, BackgroundTasks
+from fastapi import HTTPException, status
 
+from ..jd_fetch_cache import JDFetchCache, canonicalize_url
+from ..jobs import JobContext, JobScheduler, Lane
+from ..pagination import CursorKey
 from ..schemas import (
+    JDBatchRequest,
     JDRequest,
     JDResponse, 
     JDListResponse,
@@ -17,18 +23,23 @@ from ..schemas import (
     TaskStatus,
     TaskType
 )
-from ..store import JDStore, TaskStore
+from ..store import JDCorpus, JDStore, TaskStore
+from ..store.jd_dedup import NearDuplicateIndex, cluster_jds, representative
 from ..adapters import (
     ShixiSengAdapter,
     ZhaopinAdapter, 
     Job51Adapter,
-    BossAdapter
+    BossAdapter,
+    PolitenessScheduler
 )
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_USER_ID = "demo-user"
 
+# 单个源的搜索结果：(源, 已保存的JD, 错误信息；成功时为 None)
+SourceOutcome = Tuple[JDSource, List[JDResponse], Optional[str]]
+
 
 class JDService:
     def __init__(
@@ -38,10 +49,32 @@ class JDService:
         shixiseng_adapter: ShixiSengAdapter,
         zhaopin_adapter: ZhaopinAdapter,
         job51_adapter: Job51Adapter,
-        boss_adapter: BossAdapter
+        boss_adapter: BossAdapter,
+        scheduler: JobScheduler,
+        search_budget: float = 8.0,
+        fetch_cache: Optional[JDFetchCache] = None,
+        politeness: Optional[PolitenessScheduler] = None,
+        corpus: Optional[JDCorpus] = None,
+        batch_max_items: int = 100,
+        batch_fetch_concurrency: int = 8
     ):
         self.jd_store = jd_store
         self.task_store = task_store
+        self.scheduler = scheduler
+        # 多源搜索的时间预算（秒），超时的源被取消，返回已到达的结果
+        self.search_budget = search_budget
+        # 按 URL 共享的详情抓取缓存，未配置时每次直接抓取
+        self.fetch_cache = fetch_cache
+        # 按源节流与健康状态（与适配器的传输层共用），冷却中的源在多源搜索中被跳过
+        self.politeness = politeness
+        # 跨用户共享的JD语料库：在线搜索结果写入其中，热查询直接由其回答
+        self.corpus = corpus
+        # 批量导入：单批条数上限与URL并发抓取数
+        self.batch_max_items = batch_max_items
+        self.batch_fetch_concurrency = max(1, batch_fetch_concurrency)
+        # JD抓取可能成批提交，放在 bulk 通道，避免挤占交互类任务
+        scheduler.register("jd.fetch", self._fetch_jd_job, lane=Lane.BULK)
+        scheduler.register("jd.batch", self._ingest_batch_job, lane=Lane.BULK)
         self.adapters = {
             JDSource.SHIXISENG: shixiseng_adapter,
             JDSource.ZHAOPIN: zhaopin_adapter,
@@ -52,8 +85,7 @@ class JDService:
     async def fetch_jd_async(
         self, 
         request: JDRequest, 
-        user_id: Optional[str],
-        background_tasks: BackgroundTasks
+        user_id: Optional[str]
     ) -> TaskResponse:
         """异步抓取JD"""
         user = user_id or DEFAULT_USER_ID
@@ -67,64 +99,225 @@ class JDService:
             status=TaskStatus.QUEUED
         )
         
-        # 添加后台任务
-        background_tasks.add_task(
-            self._fetch_jd_background,
+        # 提交到调度队列
+        self.scheduler.submit(
+            "jd.fetch",
             task_id,
-            request,
-            user
+            user,
+            {"request": request.model_dump(mode="json")}
         )
         
         return task
 
-    async def _fetch_jd_background(
-        self,
-        task_id: str,
-        request: JDRequest,
-        user_id: str
-    ):
-        """后台执行JD抓取"""
-        try:
-            # 更新任务状态
-            self.task_store.update_task_status(task_id, TaskStatus.RUNNING)
-            
-            jd_results = []
-            
-            # 如果提供了文本，直接解析
-            if request.text:
-                jd = await self._parse_jd_text(request.text, request, user_id)
+    async def _fetch_jd_job(self, ctx: JobContext, payload: dict) -> dict:
+        """后台执行JD抓取；异常由调度器记录为任务失败"""
+        request = JDRequest.model_validate(payload["request"])
+        user_id = ctx.user_id
+        jd_results = []
+        
+        # 如果提供了文本，直接解析
+        if request.text:
+            jd = await self._parse_jd_text(request.text, request, user_id)
+            jd_results.append(jd)
+        
+        # 如果提供了URL，尝试抓取
+        elif request.url:
+            jd = await self._fetch_jd_from_url(request.url, user_id)
+            if jd:
                 jd_results.append(jd)
-            
-            # 如果提供了URL，尝试抓取
-            elif request.url:
-                jd = await self._fetch_jd_from_url(request.url, user_id)
-                if jd:
-                    jd_results.append(jd)
-            
-            # 如果提供了搜索条件，多源搜索
-            elif request.company or request.title:
-                jd_results = await self._search_multi_source(
-                    request.company,
-                    request.title, 
-                    request.city,
-                    user_id
-                )
-            
-            # 更新任务结果
-            self.task_store.update_task_result(
-                task_id,
-                TaskStatus.DONE,
-                {"jd_results": [jd.model_dump() for jd in jd_results]}
+        
+        # 如果提供了搜索条件，多源搜索
+        elif request.company or request.title:
+            jd_results = await self._search_multi_source(
+                request.company,
+                request.title, 
+                request.city,
+                user_id,
+                ctx=ctx
             )
-            
-        except Exception as e:
-            logger.error(f"JD fetch failed for task {task_id}: {e}")
-            self.task_store.update_task_result(
-                task_id,
-                TaskStatus.ERROR,
-                error=str(e)
+        
+        return {"jd_results": [jd.model_dump() for jd in jd_results]}
+
+    async def ingest_batch_async(
+        self,
+        request: JDBatchRequest,
+        user_id: Optional[str]
+    ) -> TaskResponse:
+        """批量导入JD（文本与URL混合），整批在一个任务中处理"""
+        if len(request.items) > self.batch_max_items:
+            raise HTTPException(status_code=400, detail=f"单次最多导入 {self.batch_max_items} 条JD")
+        user = user_id or DEFAULT_USER_ID
+        task_id = f"jdbatch_{uuid4().hex[:8]}"
+        
+        task = self.task_store.create_task(
+            task_id=task_id,
+            task_type=TaskType.JD_BATCH,
+            user_id=user,
+            status=TaskStatus.QUEUED
+        )
+        
+        self.scheduler.submit(
+            "jd.batch",
+            task_id,
+            user,
+            {"request": request.model_dump(mode="json")}
+        )
+        
+        return task
+
+    async def _ingest_batch_job(self, ctx: JobContext, payload: dict) -> dict:
+        """批量导入：文本分块交给进程池解析，URL 有界并发抓取，逐项与用户已有JD去重后保存
+
+        每完成一项保存断点并写入阶段性结果，任务被中断后重新执行只处理剩余的项。
+        阶段性结果只含刚完成的一项（{"item", "done", "total"}），订阅者逐项收到，不重发之前的项；
+        断点只记录每项的 [status, jd_id / duplicate_of / error]，续跑时据此与JD库重建结果。
+        每项结果的 status 为 created / duplicate（duplicate_of 为已有JD的 id）/ failed。
+        """
+        request = JDBatchRequest.model_validate(payload["request"])
+        user_id = ctx.user_id
+        items = [
+            item.model_copy(update={
+                "company": item.company or request.company,
+                "title": item.title or request.title,
+                "city": item.city or request.city,
+            })
+            for item in request.items
+        ]
+        total = len(items)
+        # index -> [status, jd_id / duplicate_of / error]
+        states: Dict[int, List[str]] = {int(i): state for i, state in ctx.resume_state.get("items", {}).items()}
+        results: Dict[int, dict] = {
+            i: self._batch_item_result(i, items[i], status, ref, user_id)
+            for i, (status, ref) in states.items()
+        }
+
+        # 用户已有的JD（含中断前本批已保存的）：按 id、规范化 URL 与近似重复去重
+        existing = self.jd_store.list_by_user(user_id)
+        known_ids = {jd.id for jd in existing}
+        by_url = {canonicalize_url(jd.source_url): jd.id for jd in existing if jd.source_url}
+        index = NearDuplicateIndex()
+        for jd in existing:
+            index.add(jd)
+
+        def finish(i: int, status: str, ref: str, jd: Optional[JDResponse] = None) -> None:
+            states[i] = [status, ref]
+            result = results[i] = self._batch_item_result(i, items[i], status, ref, user_id, jd)
+            ctx.checkpoint({"items": {str(k): v for k, v in states.items()}})
+            ctx.partial_result(
+                {"item": result, "done": len(results), "total": total},
+                progress=len(results) * 100 // (total + 1),
             )
 
+        def admit(i: int, jd: JDResponse) -> None:
+            cluster = index.add(jd)
+            duplicate_of = jd.id if jd.id in known_ids else (cluster if cluster != jd.id else None)
+            if duplicate_of is not None:
+                finish(i, "duplicate", duplicate_of)
+                return
+            self.jd_store.create_jd(jd, user_id)
+            known_ids.add(jd.id)
+            if jd.source_url:
+                by_url[canonicalize_url(jd.source_url)] = jd.id
+            finish(i, "created", jd.id, jd)
+
+        text_items = [(i, item) for i, item in enumerate(items) if i not in results and item.text]
+        # 同一链接（规范化后）在本批内只抓取一次，其余项沿用第一项的结果
+        url_groups: Dict[str, List[int]] = {}
+        for i, item in enumerate(items):
+            if i not in results and not item.text and item.url:
+                url_groups.setdefault(canonicalize_url(item.url), []).append(i)
+        for i, item in enumerate(items):
+            if i not in results and not item.text and not item.url:
+                finish(i, "failed", "需要 text 或 url")
+
+        async def parse_chunk(chunk: List[Tuple[int, JDRequest]]) -> None:
+            fields = await ctx.run_cpu(parse_jd_texts, [(item.text, item.company, item.title) for _, item in chunk])
+            for (i, item), (company, title, skills) in zip(chunk, fields):
+                admit(i, self._text_jd(item.text, item, company, title, skills))
+
+        gate = asyncio.Semaphore(self.batch_fetch_concurrency)
+
+        async def fetch(key: str, indices: List[int]) -> None:
+            first, rest = indices[0], indices[1:]
+            if key in by_url:
+                rest = indices
+            else:
+                async with gate:
+                    jd = await self._fetch_url(items[first].url)
+                if jd is None:
+                    finish(first, "failed", "抓取失败")
+                else:
+                    admit(first, jd)
+            for i in rest:
+                if key in by_url:
+                    finish(i, "duplicate", by_url[key])
+                else:
+                    finish(i, *states[first])
+
+        # 文本按进程池大小分块，每块一次进程间调用
+        workers = max(1, self.scheduler.process_workers or 1)
+        size = max(1, -(-len(text_items) // workers))
+        chunks = [text_items[k:k + size] for k in range(0, len(text_items), size)]
+        await asyncio.gather(
+            *(parse_chunk(chunk) for chunk in chunks),
+            *(fetch(key, indices) for key, indices in url_groups.items()),
+        )
+
+        ordered = [results[i] for i in sorted(results)]
+        counts = Counter(result["status"] for result in ordered)
+        return {
+            "items": ordered,
+            "total": total,
+            "created": counts["created"],
+            "duplicates": counts["duplicate"],
+            "failed": counts["failed"],
+        }
+
+    _BATCH_REF_FIELDS = {"created": "jd_id", "duplicate": "duplicate_of", "failed": "error"}
+
+    def _batch_item_result(
+        self,
+        i: int,
+        item: JDRequest,
+        status: str,
+        ref: str,
+        user_id: str,
+        jd: Optional[JDResponse] = None
+    ) -> dict:
+        """由断点中的 [status, ref] 还原一项结果；新建的项从JD库补上公司与职位"""
+        result = {
+            "index": i,
+            "kind": "text" if item.text else "url" if item.url else None,
+            "url": item.url,
+            "status": status,
+            self._BATCH_REF_FIELDS[status]: ref,
+        }
+        if status == "created":
+            jd = jd or self.jd_store.get_jd(ref, user_id)
+            result["company"] = jd.company if jd else None
+            result["title"] = jd.title if jd else None
+        return result
+
+    def _text_jd(
+        self,
+        text: str,
+        request: JDRequest,
+        company: str,
+        title: str,
+        skills: List[str]
+    ) -> JDResponse:
+        return JDResponse(
+            id=f"jd_{uuid4().hex[:8]}",
+            company=company,
+            title=title,
+            location=request.city,
+            jd_text=text,
+            must_have_skills=skills[:5],  # 前5个作为必备技能
+            nice_to_have=skills[5:],      # 其余作为加分技能
+            source=JDSource.MANUAL,
+            created_at=datetime.utcnow()
+        )
+
     async def _parse_jd_text(
         self, 
         text: str, 
@@ -137,19 +330,7 @@ class JDService:
         title = request.title or self._extract_title(text)
         skills = self._extract_skills(text)
         
-        jd_id = f"jd_{uuid4().hex[:8]}"
-        
-        jd = JDResponse(
-            id=jd_id,
-            company=company,
-            title=title,
-            location=request.city,
-            jd_text=text,
-            must_have_skills=skills[:5],  # 前5个作为必备技能
-            nice_to_have=skills[5:],      # 其余作为加分技能
-            source=JDSource.MANUAL,
-            created_at=datetime.utcnow()
-        )
+        jd = self._text_jd(text, request, company, title, skills)
         
         # 保存到存储
         self.jd_store.create_jd(jd, user_id)
@@ -157,7 +338,14 @@ class JDService:
         return jd
 
     async def _fetch_jd_from_url(self, url: str, user_id: str) -> Optional[JDResponse]:
-        """从URL抓取JD"""
+        """从URL抓取JD并保存"""
+        jd = await self._fetch_url(url)
+        if jd is not None:
+            self.jd_store.create_jd(jd, user_id)
+        return jd
+
+    async def _fetch_url(self, url: str) -> Optional[JDResponse]:
+        """从URL抓取JD（不保存）"""
         # 根据URL判断来源
         source = self._detect_source_from_url(url)
         adapter = self.adapters.get(source)
@@ -167,51 +355,169 @@ class JDService:
             adapter = self.adapters[JDSource.BOSS]
         
         try:
-            jd_data = await adapter.fetch_jd_by_url(url)
+            if self.fetch_cache is not None:
+                jd_data = await self.fetch_cache.get_or_fetch(
+                    url, lambda etag, last_modified: adapter.fetch_jd_conditional(url, etag, last_modified)
+                )
+            else:
+                jd_data = await adapter.fetch_jd_by_url(url)
             if jd_data:
-                jd = JDResponse(**jd_data, source=source, created_at=datetime.utcnow())
-                self.jd_store.create_jd(jd, user_id)
-                return jd
+                return JDResponse(**jd_data, source=source, created_at=datetime.utcnow())
         except Exception as e:
             logger.error(f"Failed to fetch JD from {url}: {e}")
         
         return None
 
+    def _save_source_results(self, source: JDSource, jd_list: List[dict], user_id: Optional[str]) -> List[JDResponse]:
+        """构造源结果；给出 user_id 时保存到该用户的JD库（后台爬取不属于任何用户）"""
+        source_results = [
+            JDResponse(**jd_data, source=source, created_at=datetime.utcnow()) for jd_data in jd_list
+        ]
+        if user_id is not None:
+            with self.jd_store.batch():
+                for jd in source_results:
+                    self.jd_store.create_jd(jd, user_id)
+        return source_results
+
+    def _corpus_answer(
+        self,
+        company: Optional[str],
+        title: Optional[str],
+        city: Optional[str],
+        limit: int,
+        query: Optional[str] = None
+    ) -> Optional[List[JDResponse]]:
+        """记一次查询热度；语料库近期完整爬取过该查询时直接返回其结果，否则返回 None（需要在线搜索）"""
+        if self.corpus is None:
+            return None
+        self.corpus.record_query(title, city)
+        return self.corpus.lookup(company, title, city, limit, query=query)
+
+    def _clamp_budget(self, budget: Optional[float]) -> float:
+        """请求给出的时间预算不超过配置值"""
+        if budget is None or budget <= 0:
+            return self.search_budget
+        return min(budget, self.search_budget)
+
+    async def _iter_sources(
+        self,
+        company: Optional[str],
+        title: Optional[str],
+        city: Optional[str],
+        user_id: Optional[str],
+        limit: int,
+        budget: float,
+        skip: Iterable[JDSource] = ()
+    ) -> AsyncIterator[SourceOutcome]:
+        """并行搜索各源，按完成先后产出 (源, 结果, 错误)
+
+        成功的结果保存到 user_id 的JD库（为 None 时不保存）并写入语料库；
+        不限公司、未跳过任何源且至少一个源成功时，迭代完毕后把该 (职位, 城市) 记为已爬取。
+
+        每个源的调用都带上剩余预算，预算用完仍未返回的源以 "timeout" 产出，处于限流冷却期的源以 "cooling_down" 产出。
+        配置了节流时，同一源上参数相同的并发搜索合并为一次（其他请求仍在等待时不会被某个调用方的超时取消）；
+        未合并的搜索在超时或调用方提前停止迭代时被取消，取消会传到适配器内部的 HTTP 请求 / 页面操作。
+        """
+        per_source = max(1, limit // len(self.adapters))
+        skip = set(skip)
+        crawled: List[str] = []
+        succeeded = 0
+        pending: Dict[asyncio.Task, JDSource] = {}
+        cooling: List[JDSource] = []
+        for source, adapter in self.adapters.items():
+            if source in skip or not adapter.is_available():
+                continue
+            pacer = self.politeness.source(source.value) if self.politeness is not None else None
+            if pacer is not None and not pacer.available():
+                cooling.append(source)
+                continue
+
+            def search(adapter=adapter) -> Awaitable[List[dict]]:
+                return adapter.search_jd(company=company, title=title, city=city, limit=per_source)
+
+            if pacer is not None:
+                call = pacer.coalesce(("search", company, title, city, per_source), search)
+            else:
+                call = search()
+            pending[asyncio.create_task(asyncio.wait_for(call, budget))] = source
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + budget
+        try:
+            for source in cooling:
+                yield source, [], "cooling_down"
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, _ = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    source = pending.pop(task)
+                    try:
+                        jd_list = task.result()
+                    except asyncio.TimeoutError:
+                        logger.warning(f"Search for {source} exceeded the {budget:g}s budget")
+                        yield source, [], "timeout"
+                        continue
+                    except Exception as e:
+                        logger.error(f"Search failed for {source}: {e}")
+                        yield source, [], str(e) or type(e).__name__
+                        continue
+                    source_results = self._save_source_results(source, jd_list, user_id)
+                    succeeded += 1
+                    if self.corpus is not None:
+                        crawled.extend(self.corpus.upsert_many(source_results))
+                    yield source, source_results, None
+            for source in list(pending.values()):
+                logger.warning(f"Search for {source} exceeded the {budget:g}s budget")
+                yield source, [], "timeout"
+            if self.corpus is not None and succeeded and not company and not skip:
+                self.corpus.mark_crawled(title, city, crawled, limit)
+        finally:
+            for task in pending:
+                task.cancel()
+
     async def _search_multi_source(
         self,
         company: Optional[str],
         title: Optional[str], 
         city: Optional[str],
         user_id: str,
-        limit: int = 20
+        limit: int = 20,
+        ctx: Optional[JobContext] = None,
+        budget: Optional[float] = None
     ) -> List[JDResponse]:
-        """多源搜索JD"""
+        """多源搜索JD，按完成先后收集结果，预算用完时返回已到达的部分
+
+        语料库中的热查询直接返回，不访问招聘网站。
+        在任务中执行时每完成一个源保存断点并写入阶段性结果（订阅者立即收到），
+        任务被中断后重新执行只搜索剩余的源。
+        """
+        finished: Dict[str, List[dict]] = dict(ctx.resume_state.get("sources", {})) if ctx else {}
+        if not finished:
+            cached = self._corpus_answer(company, title, city, limit)
+            if cached is not None:
+                return cached
+
         results = []
-        
-        # 并行搜索多个源
-        tasks = []
-        for source, adapter in self.adapters.items():
-            if adapter.is_available():
-                task = asyncio.create_task(
-                    adapter.search_jd(
-                        company=company,
-                        title=title,
-                        city=city,
-                        limit=limit // len(self.adapters)
-                    )
+        for source, jd_list in finished.items():
+            results.extend(JDResponse.model_validate(jd) for jd in jd_list)
+        total = len(self.adapters)
+
+        async for source, source_results, error in self._iter_sources(
+            company, title, city, user_id, limit, self._clamp_budget(budget), skip=finished
+        ):
+            if error is not None:
+                continue
+            results.extend(source_results)
+            if ctx is not None:
+                finished[source] = [jd.model_dump(mode="json") for jd in source_results]
+                ctx.checkpoint({"sources": finished})
+                partial = self._deduplicate_jds(results)[:limit]
+                ctx.partial_result(
+                    {"jd_results": [jd.model_dump(mode="json") for jd in partial], "sources": list(finished)},
+                    progress=len(finished) * 100 // (total + 1),
                 )
-                tasks.append((source, task))
-        
-        # 等待所有搜索完成
-        for source, task in tasks:
-            try:
-                jd_list = await task
-                for jd_data in jd_list:
-                    jd = JDResponse(**jd_data, source=source, created_at=datetime.utcnow())
-                    self.jd_store.create_jd(jd, user_id)
-                    results.append(jd)
-            except Exception as e:
-                logger.error(f"Search failed for {source}: {e}")
         
         # 去重和排序
         results = self._deduplicate_jds(results)
@@ -223,7 +529,9 @@ class JDService:
         title: Optional[str] = None,
         city: Optional[str] = None,
         limit: int = 20,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        query: Optional[str] = None,
+        budget: Optional[float] = None
     ) -> JDListResponse:
         """搜索JD接口"""
         user = user_id or DEFAULT_USER_ID
@@ -234,26 +542,114 @@ class JDService:
             company=company,
             title=title,
             city=city,
-            limit=limit
+            limit=limit,
+            query=query
         )
         
-        # 如果本地结果不足，触发在线搜索
+        # 如果本地结果不足，从语料库或在线搜索补充
         if len(local_results) < limit:
             online_results = await self._search_multi_source(
-                company, title, city, user, limit - len(local_results)
+                company, title or query, city, user, limit - len(local_results), budget=budget
             )
-            local_results.extend(online_results)
+            seen = {jd.id for jd in local_results}
+            local_results.extend(jd for jd in online_results if jd.id not in seen)
         
         return JDListResponse(items=local_results[:limit])
 
+    async def stream_search_jd(
+        self,
+        company: Optional[str] = None,
+        title: Optional[str] = None,
+        city: Optional[str] = None,
+        limit: int = 20,
+        user_id: Optional[str] = None,
+        query: Optional[str] = None,
+        budget: Optional[float] = None
+    ) -> AsyncIterator[Tuple[str, dict]]:
+        """流式搜索：先产出本地结果，再按完成先后产出各源结果，最后产出去重后的汇总
+
+        语料库能回答的热查询不访问招聘网站，以一个 corpus 事件代替各源事件。
+        产出 (事件名, 数据)：local / corpus / source / source_error / done。
+        """
+        user = user_id or DEFAULT_USER_ID
+        started = time.perf_counter()
+
+        def elapsed_ms() -> int:
+            return int((time.perf_counter() - started) * 1000)
+
+        results = self.jd_store.search_jd(
+            user_id=user, company=company, title=title, city=city, limit=limit, query=query
+        )
+        yield "local", {"items": [jd.model_dump(mode="json") for jd in results], "elapsed_ms": elapsed_ms()}
+
+        failed: Dict[str, str] = {}
+        cached = None
+        if len(results) < limit:
+            cached = self._corpus_answer(company, title or query, city, limit - len(results), query=query)
+        if cached is not None:
+            results.extend(cached)
+            yield "corpus", {"items": [jd.model_dump(mode="json") for jd in cached], "elapsed_ms": elapsed_ms()}
+        elif len(results) < limit:
+            async for source, source_results, error in self._iter_sources(
+                company, title or query, city, user, limit - len(results), self._clamp_budget(budget)
+            ):
+                if error is not None:
+                    failed[source.value] = error
+                    yield "source_error", {"source": source.value, "error": error, "elapsed_ms": elapsed_ms()}
+                    continue
+                results.extend(source_results)
+                yield "source", {
+                    "source": source.value,
+                    "items": [jd.model_dump(mode="json") for jd in source_results],
+                    "elapsed_ms": elapsed_ms(),
+                }
+
+        items = self._deduplicate_jds(results)[:limit]
+        yield "done", {
+            "items": [jd.model_dump(mode="json") for jd in items],
+            "failed": failed,
+            "elapsed_ms": elapsed_ms(),
+        }
+
+    async def crawl(self, title: Optional[str], city: Optional[str], limit: int) -> int:
+        """后台爬取一个查询写入语料库（不保存到任何用户），返回成功的源数量"""
+        succeeded = 0
+        async for _, _, error in self._iter_sources(None, title, city, None, limit, self.search_budget):
+            if error is None:
+                succeeded += 1
+        return succeeded
+
+    def source_health(self) -> Dict[str, dict]:
+        """各源的真实可用性：已配置（is_available）且不在限流冷却期，附节流状态与计数"""
+        health = {}
+        for source, adapter in self.adapters.items():
+            configured = adapter.is_available()
+            entry = {"configured": configured, "available": configured}
+            if self.politeness is not None:
+                pacer = self.politeness.source(source.value)
+                entry["available"] = configured and pacer.available()
+                entry.update(pacer.metrics())
+            health[source.value] = entry
+        return health
+
     def list_jd(self, user_id: Optional[str]) -> List[JDResponse]:
         """获取用户的JD列表"""
         user = user_id or DEFAULT_USER_ID
         return self.jd_store.list_by_user(user)
 
+    def page_jd(
+        self, user_id: Optional[str], after: Optional[CursorKey], limit: Optional[int]
+    ) -> Tuple[List[JDResponse], Optional[str]]:
+        """按创建时间升序分页；limit 为 None 时返回全部"""
+        user = user_id or DEFAULT_USER_ID
+        return self.jd_store.list_page(user, after, limit)
+
     def get_jd(self, jd_id: str, user_id: Optional[str]) -> JDResponse:
         """获取单个JD"""
-        jd = self.jd_store.get_jd(jd_id)
+        jd = self.jd_store.get_jd(jd_id, user_id or DEFAULT_USER_ID)
+        if not jd and self.corpus is not None:
+            # 由语料库回答的搜索结果不在用户JD库中
+            jd = self.corpus.get(jd_id)
         if not jd:
             raise HTTPException(status_code=404, detail="JD不存在")
         
@@ -276,7 +672,8 @@ class JDService:
         else:
             return JDSource.BOSS  # 默认使用通用适配器
 
-    def _extract_company(self, text: str) -> str:
+    @staticmethod
+    def _extract_company(text: str) -> str:
         """从文本中提取公司名"""
         # 简单的公司名提取逻辑
         lines = text.split('\n')
@@ -285,7 +682,8 @@ class JDService:
                 return line.strip()
         return "未知公司"
 
-    def _extract_title(self, text: str) -> str:
+    @staticmethod
+    def _extract_title(text: str) -> str:
         """从文本中提取职位名"""
         # 简单的职位提取逻辑
         lines = text.split('\n')
@@ -294,7 +692,8 @@ class JDService:
                 return line.strip()
         return "未知职位"
 
-    def _extract_skills(self, text: str) -> List[str]:
+    @staticmethod
+    def _extract_skills(text: str) -> List[str]:
         """从文本中提取技能"""
         # 技能词典
         skill_keywords = [
@@ -313,15 +712,17 @@ class JDService:
         return found_skills
 
     def _deduplicate_jds(self, jds: List[JDResponse]) -> List[JDResponse]:
-        """JD去重"""
-        seen = set()
-        unique_jds = []
-        
-        for jd in jds:
-            # 使用公司+职位+地点作为去重key
-            key = f"{jd.company}_{jd.title}_{jd.location or ''}"
-            if key not in seen:
-                seen.add(key)
-                unique_jds.append(jd)
-        
-        return unique_jds
\ No newline at end of file
+        """JD去重：近似重复（跨源转发、重发）归为一簇，每簇保留正文最完整的一条"""
+        return [representative(cluster) for cluster in cluster_jds(jds)]
+
+
+def parse_jd_texts(items: List[Tuple[str, Optional[str], Optional[str]]]) -> List[Tuple[str, str, List[str]]]:
+    """批量解析JD文本 (text, company, title) -> (company, title, skills)；模块级函数，可交给进程池执行"""
+    return [
+        (
+            company or JDService._extract_company(text),
+            title or JDService._extract_title(text),
+            JDService._extract_skills(text),
+        )
+        for text, company, title in items
+    ]
@@ -4,9 +4,11 @@ from __future__ import annotations
 import asyncio
 import logging
 from typing import Optional, List
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from datetime import datetime
 
+from ..cache import Cache, get_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,8 +41,14 @@ class JobSuggestion:
 class JobRecommendationService:
     """岗位推荐服务"""
     
-    def __init__(self):
-        self._analysis_cache = {}
+    # 简历分析结果在共享缓存中的保留时长
+    ANALYSIS_TTL_SECONDS = 24 * 3600
+    
+    def __init__(self, cache: Optional[Cache] = None):
+        # resume_id -> ResumeAnalysis（序列化为dict）
+        self._analysis_cache = (cache or get_cache()).namespace(
+            "resume:analysis", ttl=self.ANALYSIS_TTL_SECONDS
+        )
         
     async def analyze_resume_background(self, resume_id: str, resume_text: str) -> ResumeAnalysis:
         """分析用户简历背景
@@ -53,8 +61,9 @@ class JobRecommendationService:
             ResumeAnalysis
         """
         # 检查缓存
-        if resume_id in self._analysis_cache:
-            return self._analysis_cache[resume_id]
+        cached = await self._analysis_cache.aget(resume_id)
+        if cached is not None:
+            return ResumeAnalysis(**cached)
         
         # 模拟LLM分析过程
         await asyncio.sleep(1)
@@ -63,7 +72,7 @@ class JobRecommendationService:
         analysis = self._mock_analyze_resume(resume_text)
         
         # 缓存结果
-        self._analysis_cache[resume_id] = analysis
+        await self._analysis_cache.aset(resume_id, asdict(analysis))
         
         return analysis
     
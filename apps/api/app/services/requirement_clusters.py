@@ -0,0 +1,238 @@
+"""JD要求的本地统计聚类
+
+把各条JD中提取的要求句聚为共性维度，不调用 LLM：
+- 规范化：全角转半角、小写、去掉行首编号，标点与套话换成单个空格；规范化后相同的句子合并为一个原子要求
+- 向量化：英文技术词（Docker、AWS、C++ 等）整词作为特征并加权，其余中文片段取字符 2/3-gram，
+  做 TF-IDF（次线性词频），行向量 L2 归一化，SciPy 稀疏矩阵存储。
+  技术名只有几个字母，按字符 n-gram 它们在句向量里的份量远小于"使用经验""容器化部署"这类通用说法，
+  "了解Docker容器化部署"与"有AWS使用经验"会因此并成一个维度；
+  两条都写了技术词却没有一个相同时（Python 与 Java、Docker 与 AWS）视为不同要求，相似度记 0
+- 聚类：按出现的JD数从多到少依次处理，与已有簇代表的余弦相似度达到阈值则并入最相似的簇，
+  否则自成一簇并成为代表（领导者聚类，避免连通分量把一串两两相近的句子链成一簇）；
+  每次取 block 个原子与全部代表做一次稀疏矩阵乘，块内新出现的代表再互相比较。
+  随后对各簇的加权质心再做一轮，合并同一要求的不同说法
+
+簇的代表即出现JD数最多的表述；频率、重要度与证据句由调用方从簇成员统计。
+默认阈值按 scripts/bench_requirement_clusters.py --sweep 的人工标注集选取（两两同簇的 F1 最高）。
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+# 行首编号与列表标记：1. 1、 (1) （1） - • · * 等
+_ENUMERATION = re.compile(r"^\s*(?:[(\[（【]?\d{1,2}[)\]）】.、](?!\d)|[-•·*●▪])\s*")
+# 比较时视为分隔的空白与标点（保留 + # . 以区分 C++、C#、Node.js）
+_PUNCTUATION = re.compile(r"[\s,，。;；:：、!！?？()（）\[\]【】{}<>《》\"'“”‘’/\\|~`]+")
+# 几乎每条要求都有、不区分要求内容的套话
+_FILLERS = re.compile(
+    r"熟练掌握|熟练使用|熟练|精通|熟悉|掌握|了解|具备|具有|拥有|良好的?|较强的?|优秀的?|能够|"
+    r"者优先|优先|及以上|以上|等相关|相关|等"
+)
+
+# 英文技术词：字母开头，可带数字与 + # .（k8s、c++、c#、node.js）；数字仍走字符 n-gram，"3年"与"5年"不必分开
+_LATIN_TOKEN = re.compile(r"[a-z][a-z0-9+#.]*")
+
+NGRAM_SIZES = (2, 3)
+# 英文技术词特征相对单个字符 n-gram 的词频倍数
+TOKEN_WEIGHT = 6
+# 并入簇所需的最低余弦相似度
+DEFAULT_THRESHOLD = 0.15
+
+
+def strip_enumeration(line: str) -> str:
+    """去掉行首编号与列表标记（不动"3-5年"这类以数字开头的正文）"""
+    return _ENUMERATION.sub("", line).strip()
+
+
+def normalize_requirement(text: str) -> str:
+    """要求句的规范形式，规范化后相同的句子视为同一要求
+
+    标点与套话换成空格而不是直接删掉，免得"MySQL，具备SQL"粘成一个词"mysqlsql"
+    """
+    text = strip_enumeration(unicodedata.normalize("NFKC", text).lower())
+    return " ".join(_FILLERS.sub(" ", _PUNCTUATION.sub(" ", text)).split())
+
+
+def char_ngrams(text: str, sizes: Sequence[int] = NGRAM_SIZES) -> Dict[str, int]:
+    """字符 n-gram 计数；比最短 n 还短的文本整体作为一个特征"""
+    counts: Dict[str, int] = {}
+    if len(text) < min(sizes):
+        if text:
+            counts[text] = 1
+        return counts
+    for size in sizes:
+        for start in range(len(text) - size + 1):
+            gram = text[start:start + size]
+            counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+def requirement_features(text: str, token_weight: int = TOKEN_WEIGHT) -> Dict[str, int]:
+    """规范化要求句的特征计数：英文技术词整词（计 token_weight 次），其余片段各取字符 n-gram"""
+    counts: Dict[str, int] = {}
+    for token in _LATIN_TOKEN.findall(text):
+        key = "w:" + token
+        counts[key] = counts.get(key, 0) + token_weight
+    for part in _LATIN_TOKEN.sub(" ", text).split():
+        for gram, count in char_ngrams(part).items():
+            counts[gram] = counts.get(gram, 0) + count
+    return counts
+
+
+def tfidf_matrix(texts: Sequence[str], token_weight: int = TOKEN_WEIGHT) -> sparse.csr_matrix:
+    """规范化文本的 TF-IDF 矩阵（特征见 requirement_features；行 L2 归一化，行向量点积即余弦相似度）"""
+    return _vectorize(texts, token_weight)[0]
+
+
+def _vectorize(
+    texts: Sequence[str], token_weight: int
+) -> Tuple[sparse.csr_matrix, sparse.csr_matrix]:
+    """TF-IDF 矩阵，以及各行出现了哪些英文技术词的 0/1 矩阵"""
+    vocabulary: Dict[str, int] = {}
+    indptr = [0]
+    indices: List[int] = []
+    counts: List[int] = []
+    for text in texts:
+        for gram, count in requirement_features(text, token_weight).items():
+            indices.append(vocabulary.setdefault(gram, len(vocabulary)))
+            counts.append(count)
+        indptr.append(len(indices))
+
+    columns = np.asarray(indices, dtype=np.int32)
+    tf = 1.0 + np.log(np.asarray(counts, dtype=np.float32))
+    df = np.bincount(columns, minlength=len(vocabulary))
+    idf = np.log((1.0 + len(texts)) / (1.0 + df)).astype(np.float32) + 1.0
+    matrix = sparse.csr_matrix(
+        (tf * idf[columns], columns, np.asarray(indptr, dtype=np.int64)),
+        shape=(len(texts), len(vocabulary)),
+    )
+    token_columns = [column for gram, column in vocabulary.items() if gram.startswith("w:")]
+    return _normalize_rows(matrix), _indicator(matrix[:, token_columns])
+
+
+def _indicator(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    return sparse.csr_matrix((matrix > 0).astype(np.float32))
+
+
+def _mask_token_conflicts(
+    similarities: np.ndarray, row_tokens: sparse.csr_matrix, column_tokens: sparse.csr_matrix
+) -> np.ndarray:
+    """两边都有英文技术词但没有相同的，相似度置 0"""
+    shared = (row_tokens @ column_tokens.T).toarray() > 0
+    conflict = (row_tokens.getnnz(axis=1) > 0)[:, None] & (column_tokens.getnnz(axis=1) > 0)[None, :] & ~shared
+    similarities[conflict] = 0.0
+    return similarities
+
+
+def _normalize_rows(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix)
+
+
+def _leader_pass(
+    matrix: sparse.csr_matrix,
+    tokens: sparse.csr_matrix,
+    weights: Sequence[float],
+    threshold: float,
+    block: int,
+) -> List[List[int]]:
+    """领导者聚类：按权重降序，与最相似的代表达到阈值则并入，否则成为新代表；每簇首个为代表"""
+    order = sorted(range(matrix.shape[0]), key=lambda i: (-weights[i], i))
+    leaders: List[int] = []
+    leader_rows = sparse.csr_matrix((0, matrix.shape[1]), dtype=matrix.dtype)
+    leader_tokens = sparse.csr_matrix((0, tokens.shape[1]), dtype=tokens.dtype)
+    members: Dict[int, List[int]] = {}
+    for start in range(0, len(order), block):
+        batch = order[start:start + block]
+        rows, row_tokens = matrix[batch], tokens[batch]
+        if leaders:
+            similarities = _mask_token_conflicts((rows @ leader_rows.T).toarray(), row_tokens, leader_tokens)
+            best = similarities.argmax(axis=1)
+            best_similarity = similarities[np.arange(len(batch)), best]
+        else:
+            best = np.zeros(len(batch), dtype=np.int64)
+            best_similarity = np.zeros(len(batch))
+        inner = _mask_token_conflicts((rows @ rows.T).toarray(), row_tokens, row_tokens)
+
+        new_leaders: List[int] = []  # 本块内新出现的代表（块内下标）
+        for k, item in enumerate(batch):
+            similarity, leader = (best_similarity[k], leaders[best[k]]) if leaders else (0.0, -1)
+            if new_leaders:
+                local = int(np.argmax(inner[k, new_leaders]))
+                if inner[k, new_leaders[local]] > similarity:
+                    similarity, leader = inner[k, new_leaders[local]], batch[new_leaders[local]]
+            if similarity >= threshold:
+                members[leader].append(item)
+            else:
+                new_leaders.append(k)
+                members[item] = [item]
+
+        if new_leaders:
+            leaders.extend(batch[k] for k in new_leaders)
+            leader_rows = sparse.vstack([leader_rows, rows[new_leaders]], format="csr")
+            leader_tokens = sparse.vstack([leader_tokens, row_tokens[new_leaders]], format="csr")
+    return list(members.values())
+
+
+def cluster_requirements(
+    texts: Sequence[str],
+    weights: Sequence[int],
+    threshold: float = DEFAULT_THRESHOLD,
+    block: int = 256,
+    token_weight: int = TOKEN_WEIGHT,
+) -> List[List[int]]:
+    """按余弦相似度聚类规范化后的要求句
+
+    先对原子要求做一轮领导者聚类，再对各簇的加权质心做一轮：
+    同一要求的不同说法往往只与部分说法字面相近，质心汇集了簇内全部用词，第二轮把这些簇合并。
+
+    Args:
+        texts: 规范化后的原子要求（互不相同）
+        weights: 每个原子要求出现的JD数，决定处理顺序与簇代表
+        threshold: 并入簇所需的最低余弦相似度
+        block: 每次与代表做矩阵乘的条数
+        token_weight: 英文技术词特征的词频倍数
+
+    Returns:
+        簇列表，每簇为原子下标，首个为代表（权重最大的表述）；簇按总权重降序
+    """
+    if not texts:
+        return []
+    matrix, tokens = _vectorize(texts, token_weight)
+    clusters = _leader_pass(matrix, tokens, weights, threshold, block)
+
+    # 质心 = 簇内行向量按权重求和后归一化；簇的技术词 = 成员技术词的并集
+    assignment = sparse.csr_matrix(
+        (
+            np.asarray([weights[i] for cluster in clusters for i in cluster], dtype=np.float32),
+            np.asarray([i for cluster in clusters for i in cluster], dtype=np.int32),
+            np.cumsum([0] + [len(cluster) for cluster in clusters]),
+        ),
+        shape=(len(clusters), len(texts)),
+    )
+    cluster_weights = [sum(weights[i] for i in cluster) for cluster in clusters]
+    merged = [
+        sorted((i for c in group for i in clusters[c]), key=lambda i: (-weights[i], i))
+        for group in _leader_pass(
+            _normalize_rows(assignment @ matrix), _indicator(assignment @ tokens), cluster_weights, threshold, block
+        )
+    ]
+    merged.sort(key=lambda cluster: -sum(weights[i] for i in cluster))
+    return merged
+
+
+def split_sentences(text: str, min_length: int = 4, max_length: int = 80) -> List[str]:
+    """把没有"任职要求"等小节标题的JD正文切成候选要求句"""
+    sentences: List[str] = []
+    for part in re.split(r"[\n。；;！!？?]+", text):
+        part = strip_enumeration(part)
+        if min_length <= len(part) <= max_length:
+            sentences.append(part)
+    return sentences
+
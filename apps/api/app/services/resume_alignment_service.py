@@ -8,6 +8,8 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from uuid import uuid4
 
+from ..store.version_store import ResumeVersionStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -43,13 +45,39 @@ class ResumeDraft:
     sections: Dict[str, str]  # 各个章节的内容
     changes_from_previous: Optional[List[str]]  # 与上一版本的变化
     created_at: datetime = field(default_factory=datetime.utcnow)
-    
+
+
+# 章节序列化：每个章节以 "§章节名\t字符数\n" 开头，后接原文，便于按行做增量存储且可精确还原
+_SECTION_MARK = "§"
+
+
+def _encode_sections(sections: Dict[str, str]) -> str:
+    return "".join(
+        f"{_SECTION_MARK}{name}\t{len(content)}\n{content}\n"
+        for name, content in sections.items()
+    )
+
+
+def _decode_sections(text: str) -> Dict[str, str]:
+    sections: Dict[str, str] = {}
+    pos = 0
+    while pos < len(text):
+        header_end = text.index("\n", pos)
+        name, length = text[pos + 1:header_end].rsplit("\t", 1)
+        start = header_end + 1
+        end = start + int(length)
+        sections[name] = text[start:end]
+        pos = end + 1
+    return sections
+
 
 class ResumeAlignmentService:
     """简历对齐服务"""
     
     def __init__(self):
-        self._drafts = {}  # draft_id -> ResumeDraft
+        # 草稿内容存放在版本链上（首版草稿ID为链ID），同一草稿的后续版本只保存增量
+        self._versions = ResumeVersionStore()
+        self._drafts = {}  # draft_id -> (链ID, 链上版本号)
         self._gap_analyses = {}  # analysis_id -> List[GapAnalysisItem]
         self._suggestions = {}  # suggestion_set_id -> List[ImprovementSuggestion]
         
@@ -94,7 +122,7 @@ class ResumeAlignmentService:
             changes_from_previous=None
         )
         
-        self._drafts[draft_id] = draft
+        self._save_draft(draft, chain_id=draft_id)
         
         return draft
     
@@ -374,9 +402,48 @@ class ResumeAlignmentService:
         
         return quantified
     
+    def _save_draft(self, draft: ResumeDraft, chain_id: str) -> None:
+        entry = self._versions.commit(
+            chain_id,
+            _encode_sections(draft.sections),
+            source="DRAFT",
+            meta={
+                "id": draft.id,
+                "version": draft.version,
+                "resume_id": draft.resume_id,
+                "changes": draft.changes_from_previous,
+            },
+        )
+        draft.created_at = entry.created_at
+        self._drafts[draft.id] = (chain_id, entry.version)
+
     def get_draft(self, draft_id: str) -> Optional[ResumeDraft]:
-        """获取草稿"""
-        return self._drafts.get(draft_id)
+        """获取草稿（从版本链重建）"""
+        location = self._drafts.get(draft_id)
+        if location is None:
+            return None
+        found = self._versions.get(*location)
+        if found is None:
+            return None
+        entry, text = found
+        sections = _decode_sections(text)
+        return ResumeDraft(
+            id=draft_id,
+            version=entry.meta["version"],
+            resume_id=entry.meta["resume_id"],
+            content=self._sections_to_markdown(sections),
+            sections=sections,
+            changes_from_previous=entry.meta["changes"],
+            created_at=entry.created_at,
+        )
+
+    def diff_drafts(self, from_draft_id: str, to_draft_id: str) -> Optional[Dict[str, Any]]:
+        """同一草稿链上两个版本之间的差异"""
+        old = self._drafts.get(from_draft_id)
+        new = self._drafts.get(to_draft_id)
+        if old is None or new is None or old[0] != new[0]:
+            return None
+        return self._versions.diff(old[0], old[1], new[1])
     
     async def create_new_version(
         self,
@@ -392,7 +459,7 @@ class ResumeAlignmentService:
         Returns:
             新版本草稿
         """
-        previous = self._drafts.get(previous_draft_id)
+        previous = self.get_draft(previous_draft_id)
         if not previous:
             raise ValueError(f"Draft {previous_draft_id} not found")
         
@@ -415,7 +482,7 @@ class ResumeAlignmentService:
             changes_from_previous=changes
         )
         
-        self._drafts[new_draft.id] = new_draft
+        self._save_draft(new_draft, chain_id=self._drafts[previous_draft_id][0])
         
         return new_draft
 
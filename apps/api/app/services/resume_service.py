@@ -15,8 +15,13 @@ from ..schemas import (
   InstantiateTemplateResponse,
   ResumeMetadata,
   ResumeResponse,
+  ResumeDiffResponse,
   ResumeTemplate,
+  ResumeVersionListResponse,
+  ResumeVersionResponse,
+  ResumeVersionSummary,
 )
+from ..pagination import CursorKey
 from ..store import ResumeRecord, ResumeStore, record_to_response
 
 logger = logging.getLogger(__name__)
@@ -121,40 +126,135 @@ class ResumeService:
     saved = self.store.create(record)
     return record_to_response(saved)
 
+  def revise_resume(
+    self,
+    resume_id: str,
+    user_id: Optional[str],
+    *,
+    source: str,
+    raw_text: Optional[str] = None,
+    title: Optional[str] = None,
+    template_key: Optional[str] = None,
+  ) -> ResumeResponse:
+    """修改已有简历并经 ResumeStore.update 落库；source 记录在版本链上（EDIT / OPTIMIZE / TEMPLATE）
+
+    正文变化时按规则重新解析段落、技能与联系方式，此前 LLM 解析的结构化结果随之作废。
+    """
+    record = self._owned_record(resume_id, user_id)
+    metadata_updates: dict = {}
+    if raw_text is not None:
+      parsed = parser.parse_resume(raw_text)
+      record.raw_text = parsed.normalized
+      record.parsed_blocks = parsed.blocks
+      record.skills = parsed.skills
+      record.contacts = parsed.contacts
+      record.structured_sections = None
+      record.confidence_score = None
+      record.parsing_method = "rule-based"
+      metadata_updates["language"] = parsed.language
+    if title is not None:
+      record.title = title
+      metadata_updates["title"] = title
+    if template_key is not None:
+      record.template_key = template_key
+      metadata_updates["templateKey"] = template_key
+    if metadata_updates:
+      record.metadata = record.metadata.model_copy(update=metadata_updates)
+    return record_to_response(self.store.update(record, source=source))
+
   def list_resumes(self, user_id: Optional[str]) -> list[ResumeResponse]:
     user = user_id or DEFAULT_USER_ID
     return [record_to_response(rec) for rec in self.store.list_by_user(user)]
 
+  def page_resumes(
+    self, user_id: Optional[str], after: Optional[CursorKey], limit: Optional[int]
+  ) -> tuple[list[ResumeRecord], Optional[str]]:
+    """按 updated_at 升序分页，返回 (记录, 下一页游标)；序列化由调用方决定"""
+    user = user_id or DEFAULT_USER_ID
+    return self.store.page_by_user(user, after, limit)
+
   def get_resume(self, resume_id: str, user_id: Optional[str]) -> ResumeResponse:
+    return record_to_response(self._owned_record(resume_id, user_id))
+
+  def _owned_record(self, resume_id: str, user_id: Optional[str]) -> ResumeRecord:
     record = self.store.get(resume_id)
     if not record:
       raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="简历不存在")
     if user_id and record.user_id != user_id:
       raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="无权访问该简历")
-    return record_to_response(record)
+    return record
+
+  def list_versions(self, resume_id: str, user_id: Optional[str]) -> ResumeVersionListResponse:
+    self._owned_record(resume_id, user_id)
+    entries = self.store.versions.list_versions(resume_id)
+    return ResumeVersionListResponse(
+      resume_id=resume_id,
+      head=entries[-1].version if entries else 0,
+      items=[
+        ResumeVersionSummary(
+          version=entry.version,
+          source=entry.source,
+          size=entry.size,
+          snapshot=entry.is_snapshot,
+          created_at=entry.created_at,
+        )
+        for entry in entries
+      ],
+    )
+
+  def get_version(self, resume_id: str, version: int, user_id: Optional[str]) -> ResumeVersionResponse:
+    self._owned_record(resume_id, user_id)
+    found = self.store.versions.get(resume_id, version)
+    if found is None:
+      raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="版本不存在")
+    entry, text = found
+    return ResumeVersionResponse(
+      resume_id=resume_id,
+      version=entry.version,
+      source=entry.source,
+      raw_text=text,
+      created_at=entry.created_at,
+    )
+
+  def diff_versions(
+    self, resume_id: str, from_version: int, to_version: Optional[int], user_id: Optional[str]
+  ) -> ResumeDiffResponse:
+    """to_version 缺省为链头"""
+    self._owned_record(resume_id, user_id)
+    versions = self.store.versions
+    if to_version is None:
+      head = versions.head(resume_id)
+      to_version = head[0].version if head else 0
+    result = versions.diff(resume_id, from_version, to_version)
+    if result is None:
+      raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="版本不存在")
+    return ResumeDiffResponse(resume_id=resume_id, from_version=from_version, to_version=to_version, **result)
 
   def list_drafts(self, user_id: Optional[str]) -> list[DraftSummary]:
     user = user_id or DEFAULT_USER_ID
     drafts: list[DraftSummary] = []
-    for record in self.store.list_by_user(user):
-      summary = parser.summarize_block(record.parsed_blocks[:1]) or record.raw_text[:140]
-      drafts.append(
-        DraftSummary(
-          versionId=record.id,
-          journeyId="demo-journey-001",
-          type="ORIGINAL" if record.source == "UPLOAD" else "DRAFT_V1",
-          summary=summary,
-          updatedAt=record.updated_at,
-        )
-      )
-    drafts.sort(key=lambda d: d.updatedAt, reverse=True)
+    # list_by_user 已按 updated_at 升序，倒序遍历即可，无需再排序
+    for record in reversed(self.store.list_by_user(user)):
+      drafts.append(record.memo("draft", self._draft_summary))
     return drafts
 
+  def page_drafts(
+    self, user_id: Optional[str], after: Optional[CursorKey], limit: Optional[int]
+  ) -> tuple[list[DraftSummary], Optional[str]]:
+    """按 updated_at 倒序分页的草稿列表"""
+    user = user_id or DEFAULT_USER_ID
+    records, next_cursor = self.store.page_by_user(user, after, limit, descending=True)
+    return [record.memo("draft", self._draft_summary) for record in records], next_cursor
+
   def latest_draft(self, user_id: Optional[str]) -> DraftSummary | None:
     user = user_id or DEFAULT_USER_ID
     record = self.store.latest(user)
     if not record:
       return None
+    return record.memo("draft", self._draft_summary)
+
+  @staticmethod
+  def _draft_summary(record: ResumeRecord) -> DraftSummary:
     summary = parser.summarize_block(record.parsed_blocks[:1]) or record.raw_text[:140]
     return DraftSummary(
       versionId=record.id,
@@ -173,11 +273,23 @@ class ResumeService:
     template_id: str,
     user_id: Optional[str],
     title: Optional[str],
+    resume_id: Optional[str] = None,
   ) -> InstantiateTemplateResponse:
+    """用模板新建简历；指定 resume_id 时改为把模板套用到已有简历上（在其版本链上追加 TEMPLATE 版本）"""
     template = self.templates.get(template_id)
     if not template:
       raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="模板不存在")
 
+    if resume_id is not None:
+      return self.revise_resume(  # type: ignore[return-value]
+        resume_id,
+        user_id,
+        source="TEMPLATE",
+        raw_text=template.markdown,
+        title=title,
+        template_key=template.id,
+      )
+
     user = user_id or DEFAULT_USER_ID
     parsed = parser.parse_resume(template.markdown)
 
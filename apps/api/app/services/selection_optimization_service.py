@@ -4,10 +4,12 @@ from __future__ import annotations
 import asyncio
 import logging
 from typing import Optional, List, Dict
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from datetime import datetime
 from uuid import uuid4
 
+from ..cache import Cache, get_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -35,8 +37,14 @@ class OptimizationResult:
 class SelectionOptimizationService:
     """选区优化服务"""
     
-    def __init__(self):
-        self._optimization_cache = {}  # optimization_id -> OptimizationResult
+    # 优化结果在共享缓存中的保留时长
+    RESULT_TTL_SECONDS = 24 * 3600
+    
+    def __init__(self, cache: Optional[Cache] = None):
+        # optimization_id -> OptimizationResult（序列化为dict）
+        self._optimization_cache = (cache or get_cache()).namespace(
+            "selection:optimization", ttl=self.RESULT_TTL_SECONDS
+        )
         
     async def optimize_selection(
         self,
@@ -82,7 +90,9 @@ class SelectionOptimizationService:
             created_at=datetime.utcnow()
         )
         
-        self._optimization_cache[optimization_id] = result
+        data = asdict(result)
+        data["created_at"] = result.created_at.isoformat()
+        await self._optimization_cache.aset(optimization_id, data)
         
         return optimization_id
     
@@ -372,9 +382,14 @@ class SelectionOptimizationService:
         else:
             return "请根据实际情况选择合适的版本"
     
-    def get_optimization_result(self, optimization_id: str) -> Optional[OptimizationResult]:
+    async def get_optimization_result(self, optimization_id: str) -> Optional[OptimizationResult]:
         """获取优化结果"""
-        return self._optimization_cache.get(optimization_id)
+        data = await self._optimization_cache.aget(optimization_id)
+        if data is None:
+            return None
+        data["versions"] = [OptimizationVersion(**version) for version in data["versions"]]
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        return OptimizationResult(**data)
     
     async def validate_factuality(
         self,
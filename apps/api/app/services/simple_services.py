@@ -3,75 +3,117 @@
 from __future__ import annotations
 
 import asyncio
+from bisect import insort
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Callable, Optional, List, Dict, Any, Set, Tuple
 from uuid import uuid4
-from fastapi import BackgroundTasks, HTTPException
-
+from fastapi import HTTPException
+
+from ..cache import Cache, get_cache
+from ..connections import ConnectionManager
+from ..events import TaskEvent, TaskEventHub
+from ..ws_protocol import DEFAULT_CODEC, Codec
+from ..jobs import JobContext, JobScheduler, Lane
+from ..pagination import CursorKey, encode_cursor, page_from_sorted
 from ..schemas import *
 from ..store import ResumeStore, TaskStore
+from ..store.task_store import TERMINAL_STATUSES
 
 
 class OptimizeService:
     """简历优化服务"""
     
-    def __init__(self, resume_store: ResumeStore, task_store: TaskStore):
-        self.resume_store = resume_store
+    # 优化预览在共享缓存中的保留时长
+    PREVIEW_TTL_SECONDS = 24 * 3600
+    
+    def __init__(
+        self, resume_service, task_store: TaskStore, scheduler: JobScheduler,
+        cache: Optional[Cache] = None
+    ):
+        self.resume_service = resume_service
         self.task_store = task_store
-        self._previews = {}
+        self.scheduler = scheduler
+        # preview_id -> {"resume_id", "user_id", "preview"}；放在共享缓存里，任意 worker 都能读到
+        self._previews = (cache or get_cache()).namespace(
+            "optimize:preview", ttl=self.PREVIEW_TTL_SECONDS
+        )
         self._study_plans = {}
         self._interview_qas = {}
+        # 用户在编辑器中等待结果，走 interactive 通道
+        scheduler.register("optimize.preview", self._optimize_preview_job, lane=Lane.INTERACTIVE)
+        scheduler.register("optimize.study_plan", self._study_plan_job, lane=Lane.INTERACTIVE)
+        scheduler.register("optimize.interview_qa", self._interview_qa_job, lane=Lane.INTERACTIVE)
 
     async def optimize_preview_async(
         self, resume_id: str, request: OptimizePreviewRequest, 
-        user_id: Optional[str], background_tasks: BackgroundTasks
+        user_id: Optional[str]
     ) -> TaskResponse:
         task_id = f"optimize_{uuid4().hex[:8]}"
-        task = self.task_store.create_task(task_id, TaskType.OPTIMIZE, user_id or "demo-user")
+        user = user_id or "demo-user"
+        task = self.task_store.create_task(task_id, TaskType.OPTIMIZE, user)
         
-        background_tasks.add_task(self._mock_optimize_background, task_id, resume_id, request)
+        self.scheduler.submit(
+            "optimize.preview", task_id, user,
+            {"resume_id": resume_id, "request": request.model_dump(mode="json")}
+        )
         return task
 
-    async def _mock_optimize_background(self, task_id: str, resume_id: str, request: OptimizePreviewRequest):
+    async def _optimize_preview_job(self, ctx: JobContext, payload: dict) -> dict:
         await asyncio.sleep(1)
         preview_id = f"preview_{uuid4().hex[:8]}"
         
-        self._previews[preview_id] = OptimizePreviewResponse(
+        preview = OptimizePreviewResponse(
             id=preview_id,
             original_text="原始简历内容...",
             optimized_text="优化后的简历内容，突出了关键技能和量化成果...",
             suggestions=[{"type": "skill", "text": "添加Python技能"}],
             changes=[{"section": "experience", "type": "enhance", "content": "量化工作成果"}]
         )
+        # 预览绑定到生成它的简历和用户，读取和应用时都要核对
+        await self._previews.aset(preview_id, {
+            "resume_id": payload["resume_id"],
+            "user_id": ctx.user_id,
+            "preview": preview.model_dump(mode="json"),
+        })
         
-        self.task_store.update_task_result(task_id, TaskStatus.DONE, {"preview_id": preview_id})
-
-    def get_optimize_preview(self, preview_id: str, user_id: Optional[str]) -> OptimizePreviewResponse:
-        preview = self._previews.get(preview_id)
-        if not preview:
+        return {"preview_id": preview_id}
+
+    async def get_optimize_preview(
+        self, preview_id: str, user_id: Optional[str], resume_id: Optional[str] = None
+    ) -> OptimizePreviewResponse:
+        entry = await self._previews.aget(preview_id)
+        # 不属于该用户或该简历的预览一律按不存在处理，不泄露其存在性
+        if (
+            not entry
+            or entry["user_id"] != (user_id or "demo-user")
+            or (resume_id is not None and entry["resume_id"] != resume_id)
+        ):
             raise HTTPException(status_code=404, detail="预览不存在")
-        return preview
+        return OptimizePreviewResponse(**entry["preview"])
 
     async def optimize_apply(self, resume_id: str, request: OptimizeApplyRequest, user_id: Optional[str]) -> ResumeResponse:
-        # 简化实现：返回原简历
-        resume = self.resume_store.get(resume_id)
-        if not resume:
-            raise HTTPException(status_code=404, detail="简历不存在")
-        
-        from ..store.resume_store import record_to_response
-        return record_to_response(resume)
+        """应用优化预览
+
+        目前预览内容仍是占位文本，不能写回简历：这里只核对预览归属并返回当前简历，
+        不生成新版本，selected_changes 也暂不处理。预览产出真实内容后再按所选改动
+        写入 OPTIMIZE 版本。
+        """
+        await self.get_optimize_preview(request.preview_id, user_id, resume_id)
+        return self.resume_service.get_resume(resume_id, user_id)
 
     async def generate_study_plan_async(
         self, resume_id: str, commonality_id: Optional[str], 
-        user_id: Optional[str], background_tasks: BackgroundTasks
+        user_id: Optional[str]
     ) -> TaskResponse:
         task_id = f"study_{uuid4().hex[:8]}"
-        task = self.task_store.create_task(task_id, TaskType.OPTIMIZE, user_id or "demo-user")
+        user = user_id or "demo-user"
+        task = self.task_store.create_task(task_id, TaskType.OPTIMIZE, user)
         
-        background_tasks.add_task(self._mock_study_plan_background, task_id, resume_id)
+        self.scheduler.submit("optimize.study_plan", task_id, user, {"resume_id": resume_id})
         return task
 
-    async def _mock_study_plan_background(self, task_id: str, resume_id: str):
+    async def _study_plan_job(self, ctx: JobContext, payload: dict) -> dict:
+        resume_id = payload["resume_id"]
         await asyncio.sleep(1)
         plan_id = f"study_{uuid4().hex[:8]}"
         
@@ -95,7 +137,7 @@ class OptimizeService:
             created_at=datetime.utcnow()
         )
         
-        self.task_store.update_task_result(task_id, TaskStatus.DONE, {"plan_id": plan_id})
+        return {"plan_id": plan_id}
 
     def get_study_plan(self, plan_id: str, user_id: Optional[str]) -> StudyPlanResponse:
         plan = self._study_plans.get(plan_id)
@@ -105,15 +147,17 @@ class OptimizeService:
 
     async def generate_interview_qa_async(
         self, resume_id: str, commonality_id: Optional[str],
-        user_id: Optional[str], background_tasks: BackgroundTasks
+        user_id: Optional[str]
     ) -> TaskResponse:
         task_id = f"qa_{uuid4().hex[:8]}"
-        task = self.task_store.create_task(task_id, TaskType.OPTIMIZE, user_id or "demo-user")
+        user = user_id or "demo-user"
+        task = self.task_store.create_task(task_id, TaskType.OPTIMIZE, user)
         
-        background_tasks.add_task(self._mock_interview_qa_background, task_id, resume_id)
+        self.scheduler.submit("optimize.interview_qa", task_id, user, {"resume_id": resume_id})
         return task
 
-    async def _mock_interview_qa_background(self, task_id: str, resume_id: str):
+    async def _interview_qa_job(self, ctx: JobContext, payload: dict) -> dict:
+        resume_id = payload["resume_id"]
         await asyncio.sleep(1)
         qa_id = f"qa_{uuid4().hex[:8]}"
         
@@ -137,7 +181,7 @@ class OptimizeService:
             created_at=datetime.utcnow()
         )
         
-        self.task_store.update_task_result(task_id, TaskStatus.DONE, {"qa_id": qa_id})
+        return {"qa_id": qa_id}
 
     def get_interview_qa(self, qa_id: str, user_id: Optional[str]) -> InterviewQAResponse:
         qa = self._interview_qas.get(qa_id)
@@ -149,25 +193,32 @@ class OptimizeService:
 class ExportService:
     """导出服务"""
     
-    def __init__(self, resume_store: ResumeStore, task_store: TaskStore):
+    def __init__(self, resume_store: ResumeStore, task_store: TaskStore, scheduler: JobScheduler):
         self.resume_store = resume_store
         self.task_store = task_store
+        self.scheduler = scheduler
         self._exports = {}
+        # user -> [(created_at, export_id)]；(user, resume_id) -> 同上。均按创建时间升序，供分页二分定位
+        self._user_exports: Dict[str, List[CursorKey]] = {}
+        self._resume_exports: Dict[Tuple[str, str], List[CursorKey]] = {}
+        scheduler.register("export.render", self._export_job, lane=Lane.INTERACTIVE)
 
     async def export_async(
-        self, request: ExportRequest, user_id: Optional[str], background_tasks: BackgroundTasks
+        self, request: ExportRequest, user_id: Optional[str]
     ) -> TaskResponse:
         task_id = f"export_{uuid4().hex[:8]}"
-        task = self.task_store.create_task(task_id, TaskType.EXPORT, user_id or "demo-user")
+        user = user_id or "demo-user"
+        task = self.task_store.create_task(task_id, TaskType.EXPORT, user)
         
-        background_tasks.add_task(self._mock_export_background, task_id, request)
+        self.scheduler.submit("export.render", task_id, user, {"request": request.model_dump(mode="json")})
         return task
 
-    async def _mock_export_background(self, task_id: str, request: ExportRequest):
+    async def _export_job(self, ctx: JobContext, payload: dict) -> dict:
+        request = ExportRequest.model_validate(payload["request"])
         await asyncio.sleep(2)  # 模拟导出时间
         export_id = f"export_{uuid4().hex[:8]}"
         
-        self._exports[export_id] = ExportResponse(
+        export = self._exports[export_id] = ExportResponse(
             id=export_id,
             resume_id=request.resume_id,
             format=request.format,
@@ -175,8 +226,11 @@ class ExportService:
             file_size=1024000,
             created_at=datetime.utcnow()
         )
+        key = (export.created_at, export.id)
+        insort(self._user_exports.setdefault(ctx.user_id, []), key)
+        insort(self._resume_exports.setdefault((ctx.user_id, export.resume_id), []), key)
         
-        self.task_store.update_task_result(task_id, TaskStatus.DONE, {"export_id": export_id})
+        return {"export_id": export_id}
 
     def get_export(self, export_id: str, user_id: Optional[str]) -> ExportResponse:
         export = self._exports.get(export_id)
@@ -184,11 +238,22 @@ class ExportService:
             raise HTTPException(status_code=404, detail="导出记录不存在")
         return export
 
-    def list_exports(self, user_id: Optional[str], resume_id: Optional[str]) -> List[ExportResponse]:
-        exports = list(self._exports.values())
+    def _export_keys(self, user_id: Optional[str], resume_id: Optional[str]) -> List[CursorKey]:
+        user = user_id or "demo-user"
         if resume_id:
-            exports = [e for e in exports if e.resume_id == resume_id]
-        return exports
+            return self._resume_exports.get((user, resume_id), [])
+        return self._user_exports.get(user, [])
+
+    def list_exports(self, user_id: Optional[str], resume_id: Optional[str]) -> List[ExportResponse]:
+        return [self._exports[export_id] for _, export_id in self._export_keys(user_id, resume_id)]
+
+    def page_exports(
+        self, user_id: Optional[str], resume_id: Optional[str],
+        after: Optional[CursorKey], limit: Optional[int]
+    ) -> Tuple[List[ExportResponse], Optional[str]]:
+        """按创建时间升序分页，在用户（或用户+简历）的有序索引上二分定位游标"""
+        keys, next_cursor = page_from_sorted(self._export_keys(user_id, resume_id), lambda key: key, after, limit)
+        return [self._exports[export_id] for _, export_id in keys], next_cursor
 
 
 class UploadService:
@@ -232,9 +297,69 @@ class UploadService:
 
 class TaskService:
     """任务服务"""
+
+    # 长轮询最长挂起时间
+    LONG_POLL_MAX_SECONDS = 30
+    # 挂起期间定期重读任务，覆盖由其他 worker 更新、本进程收不到事件的情况
+    LONG_POLL_RECHECK_SECONDS = 1.0
     
-    def __init__(self, task_store: TaskStore):
+    def __init__(self, task_store: TaskStore, scheduler: JobScheduler, events: TaskEventHub):
         self.task_store = task_store
+        self.scheduler = scheduler
+        self.events = events
+        self.parked = 0  # 当前挂起的长轮询请求数
+
+    @staticmethod
+    def task_etag(task: TaskResponse) -> str:
+        """任务的 ETag；任何状态、进度或结果变化都会更新 updated_at"""
+        return f'"{task.id}-{int(task.updated_at.timestamp() * 1_000_000):x}"'
+
+    async def wait_task(
+        self, task_id: str, user_id: Optional[str], etags: Set[str], wait: float
+    ) -> Tuple[TaskResponse, bool]:
+        """返回 (任务, 是否与客户端持有的版本不同)
+
+        客户端的 ETag 仍是最新且 wait > 0 时挂起，直到任务变化或超时；已结束的任务不会再变化，直接返回。
+        """
+        task = self.get_task(task_id, user_id)
+        if self.task_etag(task) not in etags:
+            return task, True
+        if wait <= 0 or task.status in TERMINAL_STATUSES:
+            return task, False
+
+        changed = asyncio.Event()
+        subscriber = lambda event: changed.set()
+        self.events.subscribe(task_id, subscriber)
+        self.parked += 1
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + min(wait, self.LONG_POLL_MAX_SECONDS)
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return task, False
+                try:
+                    await asyncio.wait_for(changed.wait(), min(remaining, self.LONG_POLL_RECHECK_SECONDS))
+                except asyncio.TimeoutError:
+                    pass
+                changed.clear()
+                task = self.get_task(task_id, user_id)
+                if self.task_etag(task) not in etags:
+                    return task, True
+        finally:
+            self.parked -= 1
+            self.events.unsubscribe(task_id, subscriber)
+
+    def cancel_task(self, task_id: str, user_id: Optional[str]) -> TaskResponse:
+        task = self.task_store.get_task(task_id)
+        if not task:
+            raise HTTPException(status_code=404, detail="任务不存在")
+        if not self.scheduler.cancel(task_id):
+            raise HTTPException(status_code=409, detail="任务已结束或不在调度队列中")
+        return self.task_store.get_task(task_id)
+
+    def job_metrics(self) -> Dict[str, Any]:
+        return {**self.scheduler.metrics(), "long_poll_parked": self.parked}
 
     def get_task(self, task_id: str, user_id: Optional[str]) -> TaskResponse:
         task = self.task_store.get_task(task_id)
@@ -250,30 +375,123 @@ class TaskService:
             user_id or "demo-user", task_type, status, limit
         )
 
+    def page_tasks(
+        self, user_id: Optional[str], task_type: Optional[str],
+        status: Optional[str], before: Optional[CursorKey], limit: int
+    ) -> Tuple[List[TaskResponse], Optional[str]]:
+        """按创建时间倒序分页，游标直接在 TaskStore 的有序索引上二分定位"""
+        tasks = self.task_store.list_by_user(
+            user_id or "demo-user", task_type, status, limit + 1, before=before
+        )
+        if len(tasks) <= limit:
+            return tasks, None
+        tasks = tasks[:limit]
+        return tasks, encode_cursor((tasks[-1].created_at, tasks[-1].id))
+
 
 class WebSocketService:
-    """WebSocket服务"""
-    
-    def __init__(self, task_store: TaskStore):
-        self.task_store = task_store
-        self.connections = {}
+    """WebSocket服务：连接通过 subscribe/unsubscribe 消息订阅多个任务，任务变化由事件中心实时推送
 
-    async def register_connection(self, websocket, user_id: Optional[str], task_id: Optional[str]) -> str:
+    客户端消息：
+    - {"type": "subscribe", "task_ids": [...]}    订阅并立即收到各任务的当前状态
+    - {"type": "unsubscribe", "task_ids": [...]}  取消订阅
+    - {"type": "ping"}                            服务端回复 pong
+    任务结束（done/error/cancelled）后推送最终状态并自动取消订阅。
+    连接时可协商增量协议（见 ws_protocol），之后的状态推送只包含变化的字段。
+    连接、发件队列与心跳由 ConnectionManager 管理。
+    """
+
+    # 单个连接最多同时订阅的任务数
+    MAX_SUBSCRIPTIONS = 200
+
+    def __init__(self, task_store: TaskStore, events: TaskEventHub, manager: ConnectionManager):
+        self.task_store = task_store
+        self.events = events
+        self.manager = manager
+        # connection_id -> 事件中心回调（同一连接的所有订阅共用）
+        self._subscribers: Dict[str, Callable[[TaskEvent], None]] = {}
+
+    async def register_connection(
+        self, websocket, user_id: Optional[str], task_id: Optional[str], codec: Codec = DEFAULT_CODEC
+    ) -> str:
         connection_id = uuid4().hex[:8]
-        self.connections[connection_id] = {
-            "websocket": websocket,
-            "user_id": user_id,
-            "task_id": task_id
-        }
+        connection = self.manager.register(connection_id, websocket, user_id, codec)
+        self._subscribers[connection_id] = lambda event: self.manager.send(connection, event)
+        self.manager.send(connection, WSMessage(
+            type="connected",
+            data={"connection_id": connection_id, "user_id": user_id, "protocol": codec.name}
+        ))
+        if task_id:
+            self.subscribe(connection_id, [task_id])
         return connection_id
 
     async def unregister_connection(self, connection_id: str):
-        self.connections.pop(connection_id, None)
+        connection = self.manager.unregister(connection_id)
+        subscriber = self._subscribers.pop(connection_id, None)
+        if connection is not None and subscriber is not None:
+            self.events.unsubscribe_all(connection.task_ids, subscriber)
+
+    def send(self, connection_id: str, message: WSMessage) -> None:
+        connection = self.manager.connections.get(connection_id)
+        if connection is not None:
+            self.manager.send(connection, message)
 
     def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
         task = self.task_store.get_task(task_id)
         return task.model_dump() if task else None
 
+    def subscribe(self, connection_id: str, task_ids: List[str]) -> Dict[str, List[str]]:
+        """订阅任务并推送当前状态；已结束的任务只推送状态，不保留订阅"""
+        connection = self.manager.connections[connection_id]
+        subscriber = self._subscribers[connection_id]
+        subscribed, missing = [], []
+        for task_id in task_ids:
+            task = self.task_store.get_task(task_id)
+            if task is None:
+                missing.append(task_id)
+                continue
+            final = task.status in TERMINAL_STATUSES
+            if not final and task_id not in connection.task_ids:
+                if len(connection.task_ids) >= self.MAX_SUBSCRIPTIONS:
+                    missing.append(task_id)
+                    continue
+                connection.task_ids.add(task_id)
+                self.events.subscribe(task_id, subscriber)
+            # 发送前就快照：事件的推送文本延迟序列化，期间任务对象仍可能被原地更新
+            self.manager.send(connection, TaskEvent(task.model_copy(), final=final))
+            subscribed.append(task_id)
+        return {"task_ids": subscribed, "missing": missing}
+
+    def unsubscribe(self, connection_id: str, task_ids: List[str]) -> List[str]:
+        connection = self.manager.connections[connection_id]
+        removed = [task_id for task_id in task_ids if task_id in connection.task_ids]
+        connection.task_ids.difference_update(removed)
+        self.events.unsubscribe_all(removed, self._subscribers[connection_id])
+        for task_id in task_ids:
+            connection.forget(task_id)
+        return removed
+
     async def handle_client_message(self, connection_id: str, message: Dict[str, Any]):
-        # 处理客户端消息
-        pass
\ No newline at end of file
+        if connection_id not in self.manager.connections:
+            return
+        message_type = message.get("type")
+        task_ids = message.get("task_ids")
+        if not isinstance(task_ids, list):
+            task_ids = [message["task_id"]] if message.get("task_id") else []
+        task_ids = [str(task_id) for task_id in task_ids]
+
+        if message_type == "subscribe":
+            self.send(connection_id, WSMessage(type="subscribed", data=self.subscribe(connection_id, task_ids)))
+        elif message_type == "unsubscribe":
+            removed = self.unsubscribe(connection_id, task_ids)
+            self.send(connection_id, WSMessage(type="unsubscribed", data={"task_ids": removed}))
+        elif message_type == "ping":
+            self.send(connection_id, WSMessage(type="pong"))
+        else:
+            self.send(connection_id, WSMessage(type="error", data={"message": f"未知消息类型: {message_type}"}))
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self.manager.metrics(),
+            "events": self.events.metrics(),
+        }
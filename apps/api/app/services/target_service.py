@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from uuid import uuid4
 
+from ..pagination import CursorKey, page_from_sorted
 from ..schemas import TargetRequest, TargetResponse
 from ..store import TaskStore
 
@@ -41,4 +42,11 @@ class TargetService:
     def list_targets(self, user_id: Optional[str]) -> List[TargetResponse]:
         """获取目标岗位列表"""
         user = user_id or DEFAULT_USER_ID
-        return self._targets.get(user, [])
\ No newline at end of file
+        return self._targets.get(user, [])
+
+    def page_targets(
+        self, user_id: Optional[str], after: Optional[CursorKey], limit: Optional[int]
+    ) -> Tuple[List[TargetResponse], Optional[str]]:
+        """按创建时间升序分页；limit 为 None 时返回全部"""
+        user = user_id or DEFAULT_USER_ID
+        return page_from_sorted(self._targets.get(user, []), lambda t: (t.created_at, t.id), after, limit)
@@ -1,11 +1,20 @@
-from .resume_store import ResumeStore, ResumeRecord, record_to_response
+from .resume_store import ResumeStore, ResumeRecord, record_to_json, record_to_response
 from .jd_store import JDStore
+from .jd_corpus import JDCorpus
 from .task_store import TaskStore
+from .version_store import ResumeVersionStore
+from .backends import StorageBackend, SQLiteBackend, create_backend
 
 __all__ = [
     "ResumeStore",
     "ResumeRecord", 
     "record_to_response",
+    "record_to_json",
     "JDStore",
-    "TaskStore"
+    "JDCorpus",
+    "TaskStore",
+    "StorageBackend",
+    "SQLiteBackend",
+    "create_backend",
+    "ResumeVersionStore",
 ]
\ No newline at end of file
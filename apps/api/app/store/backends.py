@@ -0,0 +1,325 @@
+"""持久化存储后端
+
+存储层（ResumeStore / JDStore / TaskStore）把内存字典当作读穿缓存，
+所有写入同步落到后端；后端为 None 时退化为纯内存模式。
+其他 worker 的写入经 ChangeFeed 按表增量读取，只更新缓存中对应的记录。
+"""
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+TABLES = ("resumes", "jds", "tasks", "task_results", "resume_versions", "jd_corpus", "corpus_queries")
+
+# 增量同步时向前多读的时长，容忍 worker 之间的时钟偏差与同一时刻的并发提交
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+@dataclass(slots=True)
+class StoredRow:
+    """后端中的一行；payload 为记录的 JSON 序列化结果"""
+    id: str
+    user_id: str
+    payload: str
+    created_at: str
+    updated_at: str
+    kind: Optional[str] = None
+    status: Optional[str] = None
+    parent_id: Optional[str] = None  # 所属的上级记录（如版本所属的简历），与归属用户分开存放
+
+
+class StorageBackend(ABC):
+    """存储后端接口"""
+
+    @abstractmethod
+    def put(self, table: str, row: StoredRow) -> None:
+        """插入或覆盖一行"""
+
+    @abstractmethod
+    def put_many(self, table: str, rows: Sequence[StoredRow]) -> None:
+        """批量插入或覆盖"""
+
+    @abstractmethod
+    def get(self, table: str, row_id: str) -> Optional[StoredRow]:
+        """按ID读取"""
+
+    @abstractmethod
+    def list_by_user(self, table: str, user_id: str) -> List[StoredRow]:
+        """读取用户的全部行，按 updated_at 升序"""
+
+    @abstractmethod
+    def list_by_parent(self, table: str, parent_id: str) -> List[StoredRow]:
+        """读取上级记录下的全部行，按 updated_at 升序"""
+
+    @abstractmethod
+    def list_updated_since(self, table: str, user_id: str, since: str) -> List[StoredRow]:
+        """读取用户 updated_at 晚于 since 的行，按 updated_at 升序；用于增量同步"""
+
+    @abstractmethod
+    def list_changed_since(self, table: str, since: str) -> List[StoredRow]:
+        """读取全表 updated_at 晚于 since 的行，按 updated_at 升序；用于跨用户的增量同步"""
+
+    @abstractmethod
+    def delete(self, table: str, row_ids: Sequence[str]) -> None:
+        """删除行"""
+
+    @abstractmethod
+    def purge(self, table: str, statuses: Sequence[str], before: str) -> List[str]:
+        """删除 status 属于 statuses 且 updated_at 不晚于 before 的行，返回被删除的ID"""
+
+    @abstractmethod
+    def data_version(self) -> int:
+        """其他进程提交写入后该值会变化，用于失效本地缓存"""
+
+    @abstractmethod
+    def batch(self):
+        """上下文管理器：块内的写入合并为一个事务提交"""
+
+    @abstractmethod
+    def close(self) -> None:
+        """关闭后端"""
+
+
+class SQLiteBackend(StorageBackend):
+    """SQLite 后端（WAL 模式）
+
+    WAL 允许同一台机器上的多个 uvicorn worker 并发读、串行写；
+    SQL 语句均为带占位符的常量字符串，由 sqlite3 的语句缓存复用预编译结果。
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            kind TEXT,
+            status TEXT,
+            parent_id TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            payload TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_{table}_user_updated ON {table} (user_id, updated_at);
+        CREATE INDEX IF NOT EXISTS idx_{table}_user_status ON {table} (user_id, status);
+        CREATE INDEX IF NOT EXISTS idx_{table}_status ON {table} (status, updated_at);
+        CREATE INDEX IF NOT EXISTS idx_{table}_parent_updated ON {table} (parent_id, updated_at);
+        CREATE INDEX IF NOT EXISTS idx_{table}_updated ON {table} (updated_at);
+    """
+
+    # 与 StoredRow 字段顺序一致
+    _COLUMNS = "id, user_id, payload, created_at, updated_at, kind, status, parent_id"
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._conn = sqlite3.connect(
+            path,
+            check_same_thread=False,
+            isolation_level=None,  # 手动管理事务
+            cached_statements=256,
+        )
+        self._conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("PRAGMA temp_store = MEMORY")
+        with self._lock:
+            for table in TABLES:
+                self._conn.executescript(self._SCHEMA.format(table=table))
+
+    @staticmethod
+    def _check_table(table: str) -> str:
+        if table not in TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        return table
+
+    def _write(self, sql: str, params) -> None:
+        with self._lock:
+            if self._batch_depth:
+                self._conn.executemany(sql, params)
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(sql, params)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def put(self, table: str, row: StoredRow) -> None:
+        self.put_many(table, [row])
+
+    def put_many(self, table: str, rows: Sequence[StoredRow]) -> None:
+        if not rows:
+            return
+        sql = (
+            f"INSERT OR REPLACE INTO {self._check_table(table)} "
+            "(id, user_id, kind, status, parent_id, created_at, updated_at, payload) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+        )
+        self._write(sql, [
+            (r.id, r.user_id, r.kind, r.status, r.parent_id, r.created_at, r.updated_at, r.payload)
+            for r in rows
+        ])
+
+    def get(self, table: str, row_id: str) -> Optional[StoredRow]:
+        sql = (
+            f"SELECT {self._COLUMNS} "
+            f"FROM {self._check_table(table)} WHERE id = ?"
+        )
+        with self._lock:
+            row = self._conn.execute(sql, (row_id,)).fetchone()
+        return StoredRow(*row) if row else None
+
+    def list_by_user(self, table: str, user_id: str) -> List[StoredRow]:
+        sql = (
+            f"SELECT {self._COLUMNS} "
+            f"FROM {self._check_table(table)} WHERE user_id = ? ORDER BY updated_at"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, (user_id,)).fetchall()
+        return [StoredRow(*row) for row in rows]
+
+    def list_by_parent(self, table: str, parent_id: str) -> List[StoredRow]:
+        sql = (
+            f"SELECT {self._COLUMNS} "
+            f"FROM {self._check_table(table)} WHERE parent_id = ? ORDER BY updated_at"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, (parent_id,)).fetchall()
+        return [StoredRow(*row) for row in rows]
+
+    def list_updated_since(self, table: str, user_id: str, since: str) -> List[StoredRow]:
+        sql = (
+            f"SELECT {self._COLUMNS} "
+            f"FROM {self._check_table(table)} WHERE user_id = ? AND updated_at > ? ORDER BY updated_at"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, (user_id, since)).fetchall()
+        return [StoredRow(*row) for row in rows]
+
+    def list_changed_since(self, table: str, since: str) -> List[StoredRow]:
+        sql = (
+            f"SELECT {self._COLUMNS} "
+            f"FROM {self._check_table(table)} WHERE updated_at > ? ORDER BY updated_at"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, (since,)).fetchall()
+        return [StoredRow(*row) for row in rows]
+
+    def delete(self, table: str, row_ids: Sequence[str]) -> None:
+        if not row_ids:
+            return
+        sql = f"DELETE FROM {self._check_table(table)} WHERE id = ?"
+        self._write(sql, [(row_id,) for row_id in row_ids])
+
+    def purge(self, table: str, statuses: Sequence[str], before: str) -> List[str]:
+        if not statuses:
+            return []
+        table = self._check_table(table)
+        placeholders = ", ".join("?" * len(statuses))
+        params = (*statuses, before)
+        with self._lock, self.batch():
+            row_ids = [row[0] for row in self._conn.execute(
+                f"SELECT id FROM {table} WHERE status IN ({placeholders}) AND updated_at <= ?", params
+            )]
+            self._conn.execute(
+                f"DELETE FROM {table} WHERE status IN ({placeholders}) AND updated_at <= ?", params
+            )
+        return row_ids
+
+    def data_version(self) -> int:
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        with self._lock:
+            outermost = self._batch_depth == 0
+            if outermost:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._batch_depth += 1
+            try:
+                yield
+            except Exception:
+                self._batch_depth -= 1
+                if outermost:
+                    self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._batch_depth -= 1
+                if outermost:
+                    self._conn.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ChangeFeed:
+    """按表增量读取其他 worker 的写入
+
+    data_version 变化时，对每张表只读取 updated_at 晚于该表同步点（减去 SYNC_OVERLAP）的行；
+    同步点从创建时刻开始，此前的数据由存储层首次访问时从后端加载。
+    读到的行也包含本进程自己的写入，应用时需要幂等。后端的删除不会出现在结果中。
+    """
+
+    def __init__(self, backend: StorageBackend, *tables: str):
+        self._backend = backend
+        self._seen_version = backend.data_version()
+        now = datetime.utcnow().isoformat(timespec="microseconds")
+        self._watermarks: Dict[str, str] = {table: now for table in tables}
+
+    def poll(self) -> Optional[Dict[str, List[StoredRow]]]:
+        """没有其他连接提交过写入时返回 None，否则返回 表 -> 变化的行"""
+        version = self._backend.data_version()
+        if version == self._seen_version:
+            return None
+        self._seen_version = version
+        changes: Dict[str, List[StoredRow]] = {}
+        for table, watermark in self._watermarks.items():
+            since = (datetime.fromisoformat(watermark) - SYNC_OVERLAP).isoformat(timespec="microseconds")
+            rows = self._backend.list_changed_since(table, since)
+            if rows and rows[-1].updated_at > watermark:
+                self._watermarks[table] = rows[-1].updated_at
+            changes[table] = rows
+        return changes
+
+
+@contextmanager
+def write_batch(backend: Optional[StorageBackend]) -> Iterator[None]:
+    """后端可选时的批量写入辅助"""
+    if backend is None:
+        yield
+        return
+    with backend.batch():
+        yield
+
+
+def create_backend(database_url: Optional[str]) -> Optional[StorageBackend]:
+    """根据 DATABASE_URL 创建后端；未配置或不支持时返回 None（纯内存）
+
+    支持 sqlite:///relative/path.db、sqlite:////absolute/path.db 与 sqlite:///:memory:
+    """
+    if not database_url:
+        return None
+
+    prefix = "sqlite:///"
+    if not database_url.startswith(prefix):
+        logger.warning(f"Unsupported DATABASE_URL scheme, falling back to in-memory stores: {database_url.split(':', 1)[0]}")
+        return None
+
+    path = database_url[len(prefix):] or ":memory:"
+    logger.info(f"Using SQLite storage backend: {path}")
+    return SQLiteBackend(path)
@@ -0,0 +1,500 @@
+"""共享JD语料库：跨用户、持久化、去重
+
+在线搜索与后台爬取得到的JD都写入语料库（jd_corpus 表，不属于任何用户），
+热门的 (职位, 城市) 查询直接由语料库在本地回答，只有冷查询才访问招聘网站：
+
+- 去重：NearDuplicateIndex 把转发、重发的同一岗位归为一簇，每簇只保留正文最完整的一条（代表）；
+  被取代的代表与过期的JD写为墓碑行（status 为 merged / expired），其他 worker 增量同步时据此移除
+- 检索：代表JD进入 JDSearchIndex（与用户JD库相同的 BM25 倒排）；MinHash 签名随行保存，加载时不重新计算
+- 查询热度：corpus_queries 表记录每个查询的热度（按 half_life 指数衰减的访问次数）、最近一次爬取时间、
+  爬取时的数量上限与结果 id；fresh_seconds 内爬取过且数量够用的查询视为“热”，直接从语料库回答。
+  每次搜索的访问计数先累积在内存中，每 flush_seconds 在一个事务内与库中的值合并写入：
+  搜索请求不写库，多个 worker 的计数相加而不是互相覆盖
+- 同步：data_version 变化时只读取 updated_at 晚于上次同步点的行（留出时钟偏差余量），不整体重建
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..schemas import JDResponse
+from .backends import StorageBackend, StoredRow, write_batch
+from .jd_dedup import NearDuplicateIndex, content_fingerprint
+from .jd_index import JDSearchIndex
+
+logger = logging.getLogger(__name__)
+
+CORPUS_TABLE = "jd_corpus"
+QUERY_TABLE = "corpus_queries"
+# 语料库的行不属于任何用户，user_id 列固定为该值
+CORPUS_OWNER = "__corpus__"
+
+ACTIVE = "active"
+MERGED = "merged"
+EXPIRED = "expired"
+
+# 增量同步时向前多读的时长，容忍 worker 之间的时钟偏差与同一时刻的并发提交
+_SYNC_OVERLAP = timedelta(seconds=5)
+# 墓碑保留时长，超过后在全量加载时物理删除
+_TOMBSTONE_SECONDS = 86400
+
+
+def _now_iso() -> str:
+    return datetime.utcnow().isoformat(timespec="microseconds")
+
+
+def _norm(value: Optional[str]) -> str:
+    return " ".join((value or "").split()).lower()
+
+
+def query_key(title: Optional[str], city: Optional[str]) -> str:
+    return f"{_norm(title)}\x1f{_norm(city)}"
+
+
+@dataclass(slots=True)
+class CorpusQuery:
+    """一个 (职位, 城市) 查询的热度与爬取记录"""
+    title: str
+    city: str
+    score: float = 0.0  # 衰减后的访问次数
+    last_requested: float = 0.0
+    last_crawled: float = 0.0
+    crawl_limit: int = 0  # 最近一次爬取时的数量上限
+    jd_ids: List[str] = field(default_factory=list)  # 最近一次爬取得到的代表JD
+
+    @property
+    def key(self) -> str:
+        return query_key(self.title, self.city)
+
+    def decayed_score(self, now: float, half_life: float) -> float:
+        if not self.last_requested:
+            return self.score
+        return _decay(self.score, now - self.last_requested, half_life)
+
+
+def _decay(score: float, elapsed: float, half_life: float) -> float:
+    if half_life <= 0 or elapsed <= 0:
+        return score
+    return score * 0.5 ** (elapsed / half_life)
+
+
+class JDCorpus:
+    """进程内的语料库视图；后端为 None 时只在内存中"""
+
+    def __init__(
+        self,
+        backend: Optional[StorageBackend] = None,
+        fresh_seconds: float = 6 * 3600,
+        half_life_seconds: float = 86400,
+        dedup_threshold: float = 0.6,
+        flush_seconds: float = 30.0,
+    ):
+        self._backend = backend
+        self.fresh_seconds = fresh_seconds
+        self.half_life_seconds = half_life_seconds
+        self.flush_seconds = flush_seconds
+        # 尚未写入后端的访问计数：key -> (衰减到 last_requested 时的计数, last_requested, title, city)
+        self._pending: Dict[str, Tuple[float, float, str, str]] = {}
+        self._last_flush = time.time()
+        self._dedup_threshold = dedup_threshold
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "added": 0,
+            "updated": 0,
+            "merged": 0,
+            "duplicates": 0,
+            "expired": 0,
+            "synced_rows": 0,
+        }
+        self._reset()
+        self._seen_version = backend.data_version() if backend else 0
+
+    def _reset(self) -> None:
+        self._jds: Dict[str, JDResponse] = {}  # 代表JD
+        self._seen_at: Dict[str, str] = {}  # jd_id -> 行的 updated_at（最近一次被爬到的时间）
+        self._index = JDSearchIndex()
+        self._dedup = NearDuplicateIndex(self._dedup_threshold)
+        self._cluster_rep: Dict[str, str] = {}  # 簇 id -> 代表JD id
+        self._merged_into: Dict[str, str] = {}  # 被取代的代表 -> 取代它的JD
+        self._queries: Dict[str, CorpusQuery] = {}
+        self._loaded = False
+        self._watermark = ""  # 已同步到的 updated_at
+
+    def __len__(self) -> int:
+        self._sync()
+        return len(self._jds)
+
+    # ---- 加载与同步 ----
+
+    def _sync(self) -> None:
+        if self._backend is None:
+            return
+        if not self._loaded:
+            self._load()
+            return
+        version = self._backend.data_version()
+        if version == self._seen_version:
+            return
+        self._seen_version = version
+        since = ""
+        if self._watermark:
+            since = (datetime.fromisoformat(self._watermark) - _SYNC_OVERLAP).isoformat(timespec="microseconds")
+        for row in self._backend.list_updated_since(QUERY_TABLE, CORPUS_OWNER, since):
+            self._apply_query_row(row)
+        for row in self._backend.list_updated_since(CORPUS_TABLE, CORPUS_OWNER, since):
+            self._apply_row(row)
+
+    def _load(self) -> None:
+        self._seen_version = self._backend.data_version()
+        tombstones = []
+        cutoff = (datetime.utcnow() - timedelta(seconds=_TOMBSTONE_SECONDS)).isoformat(timespec="microseconds")
+        for row in self._backend.list_by_user(CORPUS_TABLE, CORPUS_OWNER):
+            self._apply_row(row)
+            if row.status != ACTIVE and row.updated_at < cutoff:
+                tombstones.append(row.id)
+        for row in self._backend.list_by_user(QUERY_TABLE, CORPUS_OWNER):
+            self._apply_query_row(row)
+        if tombstones:
+            self._backend.delete(CORPUS_TABLE, tombstones)
+        self._loaded = True
+        logger.info(f"JD corpus loaded: {len(self._jds)} JDs, {len(self._queries)} queries")
+
+    def _advance(self, updated_at: str) -> None:
+        if updated_at > self._watermark:
+            self._watermark = updated_at
+
+    def _apply_row(self, row: StoredRow) -> None:
+        """应用一行（本进程或其他 worker 写入的）；同一版本重复应用没有影响"""
+        self._advance(row.updated_at)
+        if self._seen_at.get(row.id) == row.updated_at:
+            return
+        self._counters["synced_rows"] += 1
+        data = json.loads(row.payload)
+        if row.status != ACTIVE:
+            self._drop(row.id, cluster=row.status == EXPIRED)
+            if data.get("merged_into"):
+                self._merged_into[row.id] = data["merged_into"]
+            return
+        jd = JDResponse.model_validate(data["jd"])
+        if self._content_changed(jd):
+            self._drop(jd.id)
+        cluster = self._dedup.add(jd, data.get("signature"))
+        current = self._cluster_rep.get(cluster)
+        if current is None or current not in self._jds:
+            self._cluster_rep[cluster] = jd.id
+        self._store(jd, row.updated_at)
+
+    def _apply_query_row(self, row: StoredRow) -> None:
+        self._advance(row.updated_at)
+        query = CorpusQuery(**json.loads(row.payload))
+        self._queries[query.key] = query
+
+    # ---- 内存结构 ----
+
+    def _store(self, jd: JDResponse, seen_at: str) -> None:
+        self._jds[jd.id] = jd
+        self._seen_at[jd.id] = seen_at
+        self._index.add(jd)
+
+    def _drop(self, jd_id: str, cluster: bool = False) -> None:
+        """移出代表集合、检索索引与去重索引；cluster=True（JD下线）时连同簇内不是代表的成员一起移除"""
+        if self._jds.pop(jd_id, None) is not None:
+            self._index.remove(jd_id)
+        self._seen_at.pop(jd_id, None)
+        root = self._dedup.cluster_of(jd_id)
+        if root is None:
+            return
+        if self._cluster_rep.get(root) == jd_id:
+            del self._cluster_rep[root]
+        members = self._dedup.members(root) if cluster else [jd_id]
+        for member in members:
+            if member == jd_id or member not in self._jds:
+                self._dedup.remove(member)
+
+    def _content_changed(self, jd: JDResponse) -> bool:
+        """已在去重索引中的JD内容是否变了（旧签名与簇归属随之作废）"""
+        known = self._dedup.fingerprint_of(jd.id)
+        return known is not None and known != content_fingerprint(jd)
+
+    def _row(self, jd_id: str, status: str, payload: Dict[str, Any], now: str, kind: Optional[str] = None) -> StoredRow:
+        return StoredRow(
+            id=jd_id,
+            user_id=CORPUS_OWNER,
+            payload=json.dumps(payload, ensure_ascii=False),
+            created_at=now,
+            updated_at=now,
+            kind=kind,
+            status=status,
+        )
+
+    def _active_row(self, jd: JDResponse, now: str) -> StoredRow:
+        signature = self._dedup.signature_of(jd.id)
+        payload = {
+            "jd": jd.model_dump(mode="json"),
+            "signature": list(signature) if signature is not None else None,
+        }
+        return self._row(jd.id, ACTIVE, payload, now, kind=jd.source.value)
+
+    # ---- 写入 ----
+
+    def upsert_many(self, jds: Iterable[JDResponse]) -> List[str]:
+        """写入一批JD，返回每条JD在语料库中的代表 id（与输入一一对应）
+
+        已有的JD刷新内容与“最近被爬到”的时间；近似重复的JD并入已有簇，正文更完整时取代原代表。
+        """
+        self._sync()
+        now = _now_iso()
+        rows: List[StoredRow] = []
+        result = []
+        for jd in jds:
+            rep_id = self._upsert(jd, now, rows)
+            result.append(rep_id)
+        if self._backend is not None and rows:
+            with write_batch(self._backend):
+                self._backend.put_many(CORPUS_TABLE, rows)
+        for row in rows:
+            self._advance(row.updated_at)
+        return result
+
+    def _upsert(self, jd: JDResponse, now: str, rows: List[StoredRow]) -> str:
+        if jd.id in self._jds:
+            self._counters["updated"] += 1
+            if not self._content_changed(jd):
+                self._store(jd, now)
+                rows.append(self._active_row(jd, now))
+                return jd.id
+            # 内容变了：移出原簇后按新内容重新归簇，可能成为其他簇的重复
+            self._drop(jd.id)
+            rep_id = self._place(jd, now, rows)
+            if rep_id != jd.id:
+                rows.append(self._row(jd.id, MERGED, {"merged_into": rep_id}, now))
+            return rep_id
+        if jd.id in self._merged_into:
+            rep_id = self._resolve(jd.id)
+            if rep_id is not None:
+                self._counters["duplicates"] += 1
+                self._touch(rep_id, now, rows)
+                return rep_id
+            del self._merged_into[jd.id]  # 所在簇的代表已过期，重新作为新JD加入
+        return self._place(jd, now, rows)
+
+    def _place(self, jd: JDResponse, now: str, rows: List[StoredRow]) -> str:
+        """新JD归簇：成为新簇或取代更短的代表时写入活跃行，否则记为已有代表的重复"""
+        cluster = self._dedup.add(jd)
+        current_id = self._cluster_rep.get(cluster)
+        current = self._jds.get(current_id) if current_id else None
+        if current is None:
+            self._counters["added"] += 1
+        elif len(jd.jd_text or "") > len(current.jd_text or ""):
+            # 正文更完整的一条取代原代表，原代表写为墓碑
+            self._counters["merged"] += 1
+            self._drop(current.id)
+            self._merged_into[current.id] = jd.id
+            rows.append(self._row(current.id, MERGED, {"merged_into": jd.id}, now))
+        else:
+            self._counters["duplicates"] += 1
+            self._merged_into[jd.id] = current.id
+            self._touch(current.id, now, rows)
+            return current.id
+        self._cluster_rep[cluster] = jd.id
+        self._store(jd, now)
+        rows.append(self._active_row(jd, now))
+        return jd.id
+
+    def _touch(self, jd_id: str, now: str, rows: List[StoredRow]) -> None:
+        """簇内的转发仍在招，代表随之视为刚被爬到"""
+        self._seen_at[jd_id] = now
+        rows.append(self._active_row(self._jds[jd_id], now))
+
+    def expire(self, max_age_seconds: float) -> int:
+        """移除超过 max_age_seconds 未被再次爬到的JD（多半已下线），返回移除数量"""
+        self._sync()
+        if max_age_seconds <= 0:
+            return 0
+        cutoff = (datetime.utcnow() - timedelta(seconds=max_age_seconds)).isoformat(timespec="microseconds")
+        stale = [jd_id for jd_id, seen_at in self._seen_at.items() if seen_at < cutoff]
+        if not stale:
+            return 0
+        now = _now_iso()
+        rows = [self._row(jd_id, EXPIRED, {}, now) for jd_id in stale]
+        for jd_id in stale:
+            self._drop(jd_id, cluster=True)
+        if self._backend is not None:
+            self._backend.put_many(CORPUS_TABLE, rows)
+        self._advance(now)
+        self._counters["expired"] += len(stale)
+        return len(stale)
+
+    # ---- 查询热度 ----
+
+    def _update_query(self, title: str, city: str, update: Callable[[CorpusQuery], None]) -> CorpusQuery:
+        """在一个事务内读取库中的查询、修改并写回，其他 worker 的并发修改不会被覆盖"""
+        key = query_key(title, city)
+        if self._backend is None:
+            query = self._queries.get(key) or CorpusQuery(title=title, city=city)
+            update(query)
+            self._queries[key] = query
+            return query
+        now = _now_iso()
+        with self._backend.batch():
+            row = self._backend.get(QUERY_TABLE, key)
+            query = CorpusQuery(**json.loads(row.payload)) if row else CorpusQuery(title=title, city=city)
+            update(query)
+            self._backend.put(QUERY_TABLE, self._row(key, ACTIVE, asdict(query), now))
+        self._advance(now)
+        self._queries[key] = query
+        return query
+
+    def record_query(self, title: Optional[str], city: Optional[str]) -> CorpusQuery:
+        """记一次访问，热度按 half_life 衰减后加一；只更新内存，按 flush_seconds 批量写入后端"""
+        self._sync()
+        key = query_key(title, city)
+        query = self._queries.get(key) or CorpusQuery(title=_norm(title), city=_norm(city))
+        now = time.time()
+        query.score = query.decayed_score(now, self.half_life_seconds) + 1
+        query.last_requested = now
+        self._queries[key] = query
+
+        pending, since, _, _ = self._pending.get(key, (0.0, now, query.title, query.city))
+        self._pending[key] = (
+            _decay(pending, now - since, self.half_life_seconds) + 1, now, query.title, query.city
+        )
+        if now - self._last_flush >= self.flush_seconds:
+            self.flush_queries()
+        return query
+
+    def flush_queries(self) -> int:
+        """把累积的访问计数合并写入后端，返回写入的查询数"""
+        self._last_flush = time.time()
+        pending, self._pending = self._pending, {}
+        if self._backend is None or not pending:
+            return 0
+
+        def merge(score: float, requested: float) -> Callable[[CorpusQuery], None]:
+            def update(query: CorpusQuery) -> None:
+                # 两边的计数都衰减到较晚的访问时间后相加
+                latest = max(query.last_requested, requested)
+                query.score = (
+                    query.decayed_score(latest, self.half_life_seconds)
+                    + _decay(score, latest - requested, self.half_life_seconds)
+                )
+                query.last_requested = latest
+            return update
+
+        with self._backend.batch():
+            for score, requested, title, city in pending.values():
+                self._update_query(title, city, merge(score, requested))
+        return len(pending)
+
+    def mark_crawled(self, title: Optional[str], city: Optional[str], jd_ids: List[str], limit: int) -> None:
+        """记录一次完整的爬取：之后 fresh_seconds 内、数量不超过 limit 的同一查询由语料库回答"""
+        self._sync()
+
+        def update(query: CorpusQuery) -> None:
+            query.last_crawled = time.time()
+            query.crawl_limit = limit
+            query.jd_ids = list(dict.fromkeys(jd_ids))
+
+        self._update_query(_norm(title), _norm(city), update)
+
+    def due_queries(self, min_score: float, refresh_after: float, limit: int) -> List[CorpusQuery]:
+        """需要后台刷新的热门查询：热度不低于 min_score 且距上次爬取超过 refresh_after，热度高的在前"""
+        self._sync()
+        now = time.time()
+        due = [
+            (query.decayed_score(now, self.half_life_seconds), query)
+            for query in self._queries.values()
+            if now - query.last_crawled >= refresh_after
+        ]
+        due = [(score, query) for score, query in due if score >= min_score]
+        due.sort(key=lambda item: item[0], reverse=True)
+        return [query for _, query in due[:limit]]
+
+    # ---- 读取 ----
+
+    def _resolve(self, jd_id: str) -> Optional[str]:
+        """沿取代链找到当前的代表"""
+        for _ in range(16):
+            if jd_id in self._jds:
+                return jd_id
+            jd_id = self._merged_into.get(jd_id)
+            if jd_id is None:
+                return None
+        return None
+
+    def get(self, jd_id: str) -> Optional[JDResponse]:
+        self._sync()
+        resolved = self._resolve(jd_id)
+        return self._jds[resolved] if resolved else None
+
+    def is_fresh(self, title: Optional[str], city: Optional[str], limit: int) -> bool:
+        if self.fresh_seconds <= 0:
+            return False
+        self._sync()
+        query = self._queries.get(query_key(title, city))
+        return (
+            query is not None
+            and query.crawl_limit >= limit
+            and time.time() - query.last_crawled < self.fresh_seconds
+        )
+
+    def lookup(
+        self,
+        company: Optional[str],
+        title: Optional[str],
+        city: Optional[str],
+        limit: int,
+        query: Optional[str] = None,
+    ) -> Optional[List[JDResponse]]:
+        """热查询从语料库回答（先是最近一次爬取的结果，再用全文检索补足）；冷查询返回 None"""
+        if not self.is_fresh(title, city, limit):
+            self._counters["misses"] += 1
+            return None
+        self._counters["hits"] += 1
+        crawled = self._queries[query_key(title, city)]
+        company_filter = _norm(company)
+        results: Dict[str, JDResponse] = {}
+        for jd_id in crawled.jd_ids:
+            resolved = self._resolve(jd_id)
+            if resolved is None or resolved in results:
+                continue
+            jd = self._jds[resolved]
+            if company_filter and company_filter not in jd.company.lower():
+                continue
+            results[resolved] = jd
+            if len(results) >= limit:
+                return list(results.values())
+        for jd in self._index.search(query=query, company=company, title=title, city=city, limit=limit):
+            results.setdefault(jd.id, jd)
+            if len(results) >= limit:
+                break
+        return list(results.values())
+
+    def search(
+        self,
+        company: Optional[str] = None,
+        title: Optional[str] = None,
+        city: Optional[str] = None,
+        limit: int = 20,
+        query: Optional[str] = None,
+    ) -> List[JDResponse]:
+        """不论冷热，直接在语料库中检索"""
+        self._sync()
+        return self._index.search(query=query, company=company, title=title, city=city, limit=limit)
+
+    def metrics(self) -> Dict[str, Any]:
+        self._sync()
+        return {
+            "jds": len(self._jds),
+            "queries": len(self._queries),
+            "pending_queries": len(self._pending),
+            "fresh_queries": sum(
+                1 for query in self._queries.values() if time.time() - query.last_crawled < self.fresh_seconds
+            ),
+            **self._counters,
+        }
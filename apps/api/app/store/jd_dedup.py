@@ -0,0 +1,259 @@
+"""JD 近似去重：内容指纹 + MinHash/LSH
+
+- content_fingerprint：规范化后的公司、职位、城市与正文的 SHA-1 前缀，跨进程稳定，完全相同的 JD 直接归为一组
+- MinHash：职位名、城市与正文切词（见 jd_index.tokenize，正文再取相邻两词的 shingle）后的特征集合，
+  64 个独立哈希的最小值估计 Jaccard 相似度；哈希由 SHAKE-128 扩展得到，不受 PYTHONHASHSEED 影响
+- LSH：签名分成 16 个 band，任一 band 完全相同即为候选，插入与查询只比较候选而不是全部已有 JD
+- 候选还需公司名兼容（去掉“有限公司”等后缀后相同或互相包含），避免不同公司的同名岗位被合并
+
+转发、重发的同一岗位（标题多了“急招”、地点写到区一级等）归为同一簇，
+搜索结果每簇只保留一条，共性提炼每簇只计一次。
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+import struct
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from ..schemas import JDResponse
+from .jd_index import tokenize
+
+_MAX_HASH = (1 << 64) - 1
+
+_COMPANY_SUFFIXES = ("股份有限公司", "有限责任公司", "有限公司", "集团", "公司")
+_PUNCT_RE = re.compile(r"[\s()（）\[\]【】·,，.。\-_/|]+")
+_LOCATION_SPLIT_RE = re.compile(r"[·\-/\s,，]+")
+
+
+def normalize_company(company: Optional[str]) -> str:
+    name = _PUNCT_RE.sub("", (company or "").lower())
+    for suffix in _COMPANY_SUFFIXES:
+        if name.endswith(suffix) and len(name) > len(suffix):
+            name = name[: -len(suffix)]
+            break
+    return name
+
+
+def _city(location: Optional[str]) -> str:
+    """地点只取第一段（城市），“北京·海淀区”与“北京”视为相同"""
+    parts = _LOCATION_SPLIT_RE.split((location or "").strip())
+    return parts[0].lower() if parts else ""
+
+
+def content_fingerprint(jd: JDResponse) -> str:
+    """完全重复判定用的稳定指纹"""
+    text = " ".join((jd.jd_text or "").split())
+    raw = "\x1f".join((normalize_company(jd.company), " ".join(jd.title.split()).lower(), _city(jd.location), text))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def features(jd: JDResponse) -> Set[str]:
+    """MinHash 的特征集合：职位名词元、城市、正文相邻两词的 shingle（正文为空时只用前两者）"""
+    result = {f"t:{tok}" for tok in tokenize(jd.title)}
+    city = _city(jd.location)
+    if city:
+        result.add(f"l:{city}")
+    body = tokenize(jd.jd_text)
+    if len(body) > 1:
+        result.update(f"b:{a} {b}" for a, b in zip(body, body[1:]))
+    elif body:
+        result.add(f"b:{body[0]}")
+    return result
+
+
+class MinHasher:
+    """每个特征用 SHAKE-128 一次产出 num_perm 个 64 位哈希，按列取最小值；同样的参数在任何进程中得到同样的签名"""
+
+    def __init__(self, num_perm: int = 64, seed: bytes = b"jd:"):
+        self.num_perm = num_perm
+        self._seed = seed
+        self._struct = struct.Struct(f"<{num_perm}Q")
+
+    def signature(self, tokens: Iterable[str]) -> Tuple[int, ...]:
+        seed, size, unpack = self._seed, self._struct.size, self._struct.unpack
+        rows = [unpack(hashlib.shake_128(seed + token.encode("utf-8")).digest(size)) for token in tokens]
+        if not rows:
+            return (_MAX_HASH,) * self.num_perm
+        return tuple(map(min, zip(*rows)))
+
+    @staticmethod
+    def similarity(left: Sequence[int], right: Sequence[int]) -> float:
+        """签名相同位置相等的比例，即 Jaccard 相似度的估计"""
+        return sum(1 for x, y in zip(left, right) if x == y) / len(left)
+
+
+class NearDuplicateIndex:
+    """增量 LSH 索引；add() 时把 JD 并入与其近似的簇，remove() 把 JD 移出索引
+
+    每个成员直接指向簇根，簇 id 即簇根（簇中第一个加入的 JD 的 id）。簇根被移除而簇内仍有成员时，
+    它作为不可匹配的占位根保留，簇 id 不变；簇内最后一个成员移除后一并删除。
+    """
+
+    def __init__(self, threshold: float = 0.6, num_perm: int = 64, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        self._buckets: List[Dict[Tuple[int, ...], List[str]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[str, Tuple[int, ...]] = {}
+        self._companies: Dict[str, str] = {}
+        self._fingerprints: Dict[str, str] = {}  # 指纹 -> 持有签名的 JD 的 id
+        self._fingerprint_of: Dict[str, str] = {}  # JD id -> 指纹，即索引中的全部成员
+        self._parent: Dict[str, str] = {}  # 成员（及占位根） -> 簇根
+        self._members: Dict[str, Set[str]] = {}  # 簇根 -> 成员
+
+    def __len__(self) -> int:
+        return len(self._fingerprint_of)
+
+    def _find(self, jd_id: str) -> str:
+        return self._parent[jd_id]
+
+    def _union(self, left: str, right: str) -> None:
+        left_root, right_root = self._find(left), self._find(right)
+        if left_root == right_root:
+            return
+        # 先加入的 JD 作为簇根，簇 id 保持稳定；并入的簇成员改为直接指向新根
+        moved = self._members.pop(right_root)
+        for member in moved:
+            self._parent[member] = left_root
+        self._members[left_root] |= moved
+        if right_root not in moved:
+            del self._parent[right_root]  # 被并入的占位根不再需要
+
+    @staticmethod
+    def _companies_match(left: str, right: str) -> bool:
+        if not left or not right:
+            return left == right
+        return left == right or left in right or right in left
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> Iterable[Tuple[int, Tuple[int, ...]]]:
+        rows = self.rows
+        for band in range(self.bands):
+            yield band, signature[band * rows:(band + 1) * rows]
+
+    def candidates(self, jd: JDResponse) -> Set[str]:
+        """与 jd 近似的已有 JD（不含 jd 本身）"""
+        return self._match(jd.id, self.hasher.signature(features(jd)), normalize_company(jd.company))
+
+    def _match(self, jd_id: str, signature: Tuple[int, ...], company: str) -> Set[str]:
+        seen: Set[str] = set()
+        matches: Set[str] = set()
+        for band, key in self._band_keys(signature):
+            for other in self._buckets[band].get(key, ()):
+                if other == jd_id or other in seen:
+                    continue
+                seen.add(other)
+                if not self._companies_match(company, self._companies[other]):
+                    continue
+                if MinHasher.similarity(signature, self._signatures[other]) >= self.threshold:
+                    matches.add(other)
+        return matches
+
+    def add(self, jd: JDResponse, signature: Optional[Sequence[int]] = None) -> str:
+        """加入索引，返回所在簇的 id（簇中第一个加入的 JD 的 id）
+
+        signature 为之前由 signature_of 取得的签名（如从持久化记录恢复），给出时不再重新计算。
+        """
+        fingerprint = content_fingerprint(jd)
+        known = self._fingerprint_of.get(jd.id)
+        if known == fingerprint:
+            return self._find(jd.id)
+        if known is not None:
+            self.remove(jd.id)  # 内容变了，旧签名作废，按新内容重新归簇
+        if jd.id in self._members:
+            self._members[jd.id].add(jd.id)  # 重新加入自己作为占位根的簇
+        else:
+            self._parent[jd.id] = jd.id
+            self._members[jd.id] = {jd.id}
+        self._fingerprint_of[jd.id] = fingerprint
+        exact = self._fingerprints.get(fingerprint)
+        if exact is not None:
+            # 完全相同：不必计算签名，也不进入桶（与簇内已有成员共享候选）
+            self._union(exact, jd.id)
+            return self._find(jd.id)
+        self._fingerprints[fingerprint] = jd.id
+
+        if signature is None or len(signature) != self.hasher.num_perm:
+            signature = self.hasher.signature(features(jd))
+        signature = tuple(signature)
+        company = normalize_company(jd.company)
+        for other in self._match(jd.id, signature, company):
+            self._union(other, jd.id)
+        self._signatures[jd.id] = signature
+        self._companies[jd.id] = company
+        for band, key in self._band_keys(signature):
+            self._buckets[band].setdefault(key, []).append(jd.id)
+        return self._find(jd.id)
+
+    def remove(self, jd_id: str) -> None:
+        """移出索引：签名、LSH 桶、指纹与簇成员关系；簇内其他成员的簇 id 不变"""
+        fingerprint = self._fingerprint_of.pop(jd_id, None)
+        if fingerprint is None:
+            return
+        root = self._find(jd_id)
+        members = self._members[root]
+        members.discard(jd_id)
+
+        signature = self._signatures.pop(jd_id, None)
+        company = self._companies.pop(jd_id, None)
+        if self._fingerprints.get(fingerprint) == jd_id:
+            # 完全相同的成员没有自己的签名；内容相同签名也相同，由其中一个接替
+            twin = next((m for m in members if self._fingerprint_of[m] == fingerprint), None)
+            if twin is None:
+                del self._fingerprints[fingerprint]
+            else:
+                self._fingerprints[fingerprint] = twin
+                self._signatures[twin] = signature
+                self._companies[twin] = company
+        if signature is not None:
+            replacement = self._fingerprints.get(fingerprint)
+            for band, key in self._band_keys(signature):
+                bucket = self._buckets[band][key]
+                bucket.remove(jd_id)
+                if replacement is not None:
+                    bucket.append(replacement)
+                elif not bucket:
+                    del self._buckets[band][key]
+
+        if not members:
+            del self._members[root]
+            del self._parent[root]
+        if jd_id != root:
+            del self._parent[jd_id]
+
+    def cluster_of(self, jd_id: str) -> Optional[str]:
+        return self._find(jd_id) if jd_id in self._fingerprint_of else None
+
+    def members(self, cluster_id: str) -> List[str]:
+        """簇内当前的成员（不含已移除的占位根）"""
+        return list(self._members.get(cluster_id, ()))
+
+    def fingerprint_of(self, jd_id: str) -> Optional[str]:
+        return self._fingerprint_of.get(jd_id)
+
+    def signature_of(self, jd_id: str) -> Optional[Tuple[int, ...]]:
+        """已计算的签名；经指纹直接归簇的 JD 没有签名"""
+        return self._signatures.get(jd_id)
+
+
+def cluster_jds(jds: Iterable[JDResponse], threshold: float = 0.6) -> List[List[JDResponse]]:
+    """按近似重复分簇，簇按首个成员出现的顺序排列，簇内保持原顺序"""
+    index = NearDuplicateIndex(threshold)
+    unique: List[JDResponse] = []
+    for jd in jds:
+        if index.cluster_of(jd.id) is not None:
+            continue  # 同一 id 重复出现
+        index.add(jd)
+        unique.append(jd)
+    grouped: Dict[str, List[JDResponse]] = {}
+    for jd in unique:
+        grouped.setdefault(index.cluster_of(jd.id), []).append(jd)
+    return list(grouped.values())
+
+
+def representative(cluster: Sequence[JDResponse]) -> JDResponse:
+    """簇的代表：正文最完整的一条，长度相同时取先出现的"""
+    return max(cluster, key=lambda jd: len(jd.jd_text or ""))
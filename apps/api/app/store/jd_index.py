@@ -0,0 +1,263 @@
+"""JD全文倒排索引
+
+中文按相邻二字切分（bigram），英文/数字按单词切分并转小写；
+对 title / company / location / jd_text 四个字段加权后做 BM25 排序。
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..schemas import JDResponse
+
+# 字段权重（BM25F 简化版：加权词频与加权文档长度）
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "company": 2.0,
+    "location": 1.5,
+    "jd_text": 1.0,
+}
+
+_TOKEN_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+|[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+_CJK_START = "\u3400"
+
+
+def _is_cjk(run: str) -> bool:
+    return run[0] >= _CJK_START
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """切词：中文 bigram（单字成词时保留单字），英文单词小写"""
+    if not text:
+        return []
+    tokens: List[str] = []
+    for run in _TOKEN_RE.findall(text.lower()):
+        if _is_cjk(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def _filter_bigrams(text: str) -> Set[str]:
+    """子串匹配的必要条件：过滤词中的中文 bigram 必然出现在命中文档中"""
+    return {tok for tok in tokenize(text) if len(tok) == 2 and _is_cjk(tok)}
+
+
+class JDSearchIndex:
+    """单个用户的JD倒排索引，随 create_jd 增量更新"""
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self) -> None:
+        self._docs: Dict[str, JDResponse] = {}  # 按插入顺序
+        self._postings: Dict[str, Dict[str, float]] = {}  # term -> doc_id -> 加权词频
+        self._doc_len: Dict[str, float] = {}
+        self._total_len = 0.0
+        # 过滤字段的 bigram 倒排：field -> term -> doc_ids
+        self._field_postings: Dict[str, Dict[str, Set[str]]] = {
+            "company": {}, "title": {}, "location": {},
+        }
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        # term -> (doc_id -> BM25 分量, 按分量降序的 [(score, doc_id)])；文档集合变化时整体失效
+        self._score_cache: Dict[str, Tuple[Dict[str, float], List[Tuple[float, str]]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, jd: JDResponse) -> None:
+        if jd.id in self._docs:
+            self.remove(jd.id)
+
+        weighted: Dict[str, float] = {}
+        length = 0.0
+        for field, weight in FIELD_WEIGHTS.items():
+            tokens = tokenize(getattr(jd, field))
+            length += weight * len(tokens)
+            for tok in tokens:
+                weighted[tok] = weighted.get(tok, 0.0) + weight
+            if field in self._field_postings:
+                postings = self._field_postings[field]
+                for tok in set(tokens):
+                    postings.setdefault(tok, set()).add(jd.id)
+
+        for tok, tf in weighted.items():
+            self._postings.setdefault(tok, {})[jd.id] = tf
+        self._docs[jd.id] = jd
+        self._doc_terms[jd.id] = weighted
+        self._doc_len[jd.id] = length
+        self._total_len += length
+        self._score_cache.clear()
+
+    def remove(self, jd_id: str) -> None:
+        jd = self._docs.pop(jd_id, None)
+        if jd is None:
+            return
+        for tok in self._doc_terms.pop(jd_id):
+            docs = self._postings[tok]
+            docs.pop(jd_id, None)
+            if not docs:
+                del self._postings[tok]
+        for field, postings in self._field_postings.items():
+            for tok in set(tokenize(getattr(jd, field))):
+                docs = postings.get(tok)
+                if docs is not None:
+                    docs.discard(jd_id)
+                    if not docs:
+                        del postings[tok]
+        self._total_len -= self._doc_len.pop(jd_id)
+        self._score_cache.clear()
+
+    def _filter_candidates(self, field: str, value: str) -> Optional[Set[str]]:
+        """用 bigram 倒排缩小候选集；无可用 bigram 时返回 None 表示不裁剪"""
+        bigrams = _filter_bigrams(value)
+        if not bigrams:
+            return None
+        postings = self._field_postings[field]
+        sets = sorted((postings.get(tok, set()) for tok in bigrams), key=len)
+        result = set(sets[0])
+        for docs in sets[1:]:
+            result &= docs
+            if not result:
+                break
+        return result
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        company: Optional[str] = None,
+        title: Optional[str] = None,
+        city: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[JDResponse]:
+        """有 query 时按 BM25 排序；否则按插入顺序返回满足过滤条件的JD
+
+        company/title/city 保持原有的大小写不敏感子串语义。
+        """
+        filters = [
+            (field, value.lower())
+            for field, value in (("company", company), ("title", title), ("location", city))
+            if value
+        ]
+
+        candidates: Optional[Set[str]] = None
+        for field, value in filters:
+            narrowed = self._filter_candidates(field, value)
+            if narrowed is None:
+                continue
+            candidates = narrowed if candidates is None else candidates & narrowed
+            if not candidates:
+                return []
+
+        def matches(jd: JDResponse) -> bool:
+            return all(value in (getattr(jd, field) or "").lower() for field, value in filters)
+
+        terms = set(tokenize(query))
+        if not terms:
+            pool: Iterable[str] = self._docs if candidates is None else (
+                doc_id for doc_id in self._docs if doc_id in candidates
+            )
+            results = []
+            for doc_id in pool:
+                jd = self._docs[doc_id]
+                if matches(jd):
+                    results.append(jd)
+                    if len(results) >= limit:
+                        break
+            return results
+
+        accept = matches if filters else None
+        return [self._docs[doc_id] for doc_id in self._top_k(terms, candidates, accept, limit)]
+
+    def _term_scores(self, term: str) -> Tuple[Dict[str, float], List[Tuple[float, str]]]:
+        """某个词对各文档的 BM25 分量；按需计算并缓存到下一次写入"""
+        cached = self._score_cache.get(term)
+        if cached is not None:
+            return cached
+        docs = self._postings.get(term)
+        if not docs:
+            return {}, []
+        n_docs = len(self._docs)
+        avg_len = self._total_len / n_docs or 1.0
+        idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+        k1, b = self.K1, self.B
+        doc_len = self._doc_len
+        by_doc = {
+            doc_id: idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_len[doc_id] / avg_len))
+            for doc_id, tf in docs.items()
+        }
+        ordered = sorted(((score, doc_id) for doc_id, score in by_doc.items()), reverse=True)
+        self._score_cache[term] = (by_doc, ordered)
+        return by_doc, ordered
+
+    def _top_k(
+        self,
+        terms: Set[str],
+        candidates: Optional[Set[str]],
+        accept: Optional[Callable[[JDResponse], bool]],
+        k: int,
+    ) -> List[str]:
+        """BM25 top-k（MaxScore 剪枝）"""
+        if k <= 0:
+            return []
+        maps: List[Dict[str, float]] = []
+        lists: List[List[Tuple[float, str]]] = []
+        for term in terms:
+            by_doc, ordered = self._term_scores(term)
+            if ordered:
+                maps.append(by_doc)
+                lists.append(ordered)
+        if not lists:
+            return []
+
+        def admissible(doc_id: str) -> bool:
+            if candidates is not None and doc_id not in candidates:
+                return False
+            return accept is None or accept(self._docs[doc_id])
+
+        heap: List[Tuple[float, str]] = []
+
+        getters = [m.get for m in maps]
+
+        def offer(doc_id: str) -> None:
+            total = 0.0
+            for get in getters:
+                total += get(doc_id, 0.0)
+            if len(heap) < k:
+                heapq.heappush(heap, (total, doc_id))
+            elif total > heap[0][0]:
+                heapq.heapreplace(heap, (total, doc_id))
+
+        total_postings = sum(len(ordered) for ordered in lists)
+        if candidates is not None and len(candidates) * 4 < total_postings:
+            # 过滤后候选集很小，直接逐个打分
+            for doc_id in candidates:
+                if any(doc_id in m for m in maps) and admissible(doc_id):
+                    offer(doc_id)
+        else:
+            # 按上界（最大分量）降序逐词处理；未处理词的上界之和不超过当前第 k 名时，
+            # 未见过的文档不可能进入 top-k，提前结束
+            order = sorted(range(len(lists)), key=lambda i: lists[i][0][0], reverse=True)
+            remaining = sum(lists[i][0][0] for i in order)
+            seen: Set[str] = set()
+            filtered = candidates is not None or accept is not None
+            for i in order:
+                remaining -= lists[i][0][0]
+                for score, doc_id in lists[i]:
+                    if len(heap) >= k and heap[0][0] >= score + remaining:
+                        break
+                    if doc_id in seen:
+                        continue
+                    seen.add(doc_id)
+                    if not filtered or admissible(doc_id):
+                        offer(doc_id)
+                if len(heap) >= k and heap[0][0] >= remaining:
+                    break
+
+        return [doc_id for _, doc_id in sorted(heap, reverse=True)]
@@ -1,37 +1,148 @@
 from __future__ import annotations
 
+from bisect import insort
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 from uuid import uuid4
 
+from ..pagination import page_from_sorted
 from ..schemas import JDResponse
+from .backends import ChangeFeed, StorageBackend, StoredRow, write_batch
+from .jd_index import JDSearchIndex
+
+TABLE = "jds"
+
+
+def row_id(user_id: str, jd_id: str) -> str:
+    """后端行ID：适配器给出的JD ID（zp_123、sxs_xxx）在各源内稳定，
+    不同用户保存同一职位时ID相同，因此按用户分别存储"""
+    return f"{user_id}:{jd_id}"
 
 
 class JDStore:
-    """JD存储层"""
-    
-    def __init__(self):
-        self._jds: Dict[str, JDResponse] = {}
-        self._user_jds: Dict[str, List[str]] = {}  # user_id -> jd_ids
+    """JD存储层；JD按 (user_id, jd_id) 存储，同一职位被多个用户保存时各自一份"""
+
+    def __init__(self, backend: Optional[StorageBackend] = None):
+        self._jds: Dict[str, Dict[str, JDResponse]] = {}  # user_id -> jd_id -> JD
+        self._user_jds: Dict[str, List[str]] = {}  # user_id -> jd_ids（按 (created_at, id) 有序）
+        self._indexes: Dict[str, JDSearchIndex] = {}  # user_id -> 全文索引
+        self._backend = backend
+        self._loaded_users: Set[str] = set()
+        self._changes = ChangeFeed(backend, TABLE) if backend else None
+
+    def _sync(self) -> None:
+        """增量应用其他 worker 写入的JD；未加载的用户只更新已缓存的单条JD"""
+        if self._changes is None:
+            return
+        changes = self._changes.poll()
+        if not changes:
+            return
+        for row in changes[TABLE]:
+            jds = self._jds.get(row.user_id)
+            loaded = row.user_id in self._loaded_users
+            if not loaded and (jds is None or row.id[len(row.user_id) + 1:] not in jds):
+                continue
+            jd = JDResponse.model_validate_json(row.payload)
+            if jds.get(jd.id) == jd:
+                continue  # 本进程自己的写入，或已应用过
+            if loaded:
+                self._put_local(jd, row.user_id)
+            else:
+                jds[jd.id] = jd
+
+    def _ensure_user(self, user_id: str) -> None:
+        """首次访问用户时从后端加载其JD"""
+        if self._backend is None or user_id in self._loaded_users:
+            return
+        jds = self._jds.setdefault(user_id, {})
+        for row in self._backend.list_by_user(TABLE, user_id):
+            jd = JDResponse.model_validate_json(row.payload)
+            jds[jd.id] = jd
+        index = self._indexes[user_id] = JDSearchIndex()
+        for jd in jds.values():
+            index.add(jd)
+        jd_ids = sorted(jds, key=lambda jd_id: self._sort_key(user_id, jd_id))
+        if jd_ids:
+            self._user_jds[user_id] = jd_ids
+        self._loaded_users.add(user_id)
+
+    @staticmethod
+    def _to_row(jd: JDResponse, user_id: str) -> StoredRow:
+        # updated_at 取写入时间，覆盖旧JD时其他 worker 的增量同步才能读到
+        return StoredRow(
+            id=row_id(user_id, jd.id),
+            user_id=user_id,
+            payload=jd.model_dump_json(),
+            created_at=jd.created_at.isoformat(timespec="microseconds"),
+            updated_at=datetime.utcnow().isoformat(timespec="microseconds"),
+            kind=jd.source.value,
+        )
 
     def create_jd(self, jd: JDResponse, user_id: str) -> JDResponse:
-        """创建JD记录"""
-        self._jds[jd.id] = jd
-        
-        if user_id not in self._user_jds:
-            self._user_jds[user_id] = []
-        self._user_jds[user_id].append(jd.id)
-        
+        """创建JD记录；用户已有同ID的JD时覆盖"""
+        self._sync()
+        self._ensure_user(user_id)
+        self._put_local(jd, user_id)
+
+        if self._backend is not None:
+            self._backend.put(TABLE, self._to_row(jd, user_id))
+
         return jd
 
-    def get_jd(self, jd_id: str) -> Optional[JDResponse]:
-        """获取JD"""
-        return self._jds.get(jd_id)
+    def _put_local(self, jd: JDResponse, user_id: str) -> None:
+        """写入内存字典、有序列表与全文索引"""
+        jds = self._jds.setdefault(user_id, {})
+        jd_ids = self._user_jds.setdefault(user_id, [])
+        index = self._indexes.setdefault(user_id, JDSearchIndex())
+        if jd.id in jds:
+            jd_ids.remove(jd.id)
+            index.remove(jd.id)
+        jds[jd.id] = jd
+
+        # 保持按 (created_at, id) 有序，供游标分页二分定位；通常就是追加到末尾
+        insort(jd_ids, jd.id, key=lambda jd_id: self._sort_key(user_id, jd_id))
+        index.add(jd)
+
+    def batch(self):
+        """批量写入：块内的 create_jd 合并为一个事务（块内不要 await）"""
+        return write_batch(self._backend)
+
+    def get_jd(self, jd_id: str, user_id: str) -> Optional[JDResponse]:
+        """获取用户的JD"""
+        self._sync()
+        jds = self._jds.setdefault(user_id, {})
+        jd = jds.get(jd_id)
+        if jd is None and self._backend is not None and user_id not in self._loaded_users:
+            row = self._backend.get(TABLE, row_id(user_id, jd_id))
+            if row is not None:
+                jd = jds[jd_id] = JDResponse.model_validate_json(row.payload)
+        return jd
+
+    def _sort_key(self, user_id: str, jd_id: str) -> Tuple[datetime, str]:
+        return self._jds[user_id][jd_id].created_at, jd_id
 
     def list_by_user(self, user_id: str) -> List[JDResponse]:
         """获取用户的JD列表"""
+        self._sync()
+        self._ensure_user(user_id)
+        jds = self._jds.get(user_id, {})
+        return [jds[jd_id] for jd_id in self._user_jds.get(user_id, [])]
+
+    def list_page(
+        self,
+        user_id: str,
+        after: Optional[Tuple[datetime, str]],
+        limit: Optional[int]
+    ) -> Tuple[List[JDResponse], Optional[str]]:
+        """按创建时间升序分页，返回 (本页, 下一页游标)；limit 为 None 时返回游标之后的全部"""
+        self._sync()
+        self._ensure_user(user_id)
+        jds = self._jds.get(user_id, {})
         jd_ids = self._user_jds.get(user_id, [])
-        return [self._jds[jd_id] for jd_id in jd_ids if jd_id in self._jds]
+        page_ids, next_cursor = page_from_sorted(
+            jd_ids, lambda jd_id: self._sort_key(user_id, jd_id), after, limit
+        )
+        return [jds[jd_id] for jd_id in page_ids], next_cursor
 
     def search_jd(
         self,
@@ -39,28 +150,20 @@ class JDStore:
         company: Optional[str] = None,
         title: Optional[str] = None,
         city: Optional[str] = None,
-        limit: int = 20
+        limit: int = 20,
+        query: Optional[str] = None
     ) -> List[JDResponse]:
-        """搜索JD"""
-        jds = self.list_by_user(user_id)
-        
-        # 简单的过滤逻辑
-        filtered_jds = []
-        for jd in jds:
-            match = True
-            
-            if company and company.lower() not in jd.company.lower():
-                match = False
-            if title and title.lower() not in jd.title.lower():
-                match = False
-            if city and city.lower() not in (jd.location or "").lower():
-                match = False
-                
-            if match:
-                filtered_jds.append(jd)
-        
-        return filtered_jds[:limit]
+        """搜索JD
+
+        company/title/city 为子串过滤；query 为全文检索（标题、公司、地点、正文），按 BM25 排序。
+        """
+        self._sync()
+        self._ensure_user(user_id)
+        index = self._indexes.get(user_id)
+        if index is None:
+            return []
+        return index.search(query=query, company=company, title=title, city=city, limit=limit)
 
     def generate_id(self) -> str:
         """生成JD ID"""
-        return f"jd_{uuid4().hex[:8]}"
\ No newline at end of file
+        return f"jd_{uuid4().hex[:8]}"
@@ -1,68 +1,334 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import json
+import sys
+from bisect import bisect_left, insort
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from uuid import uuid4
 
+from ..pagination import page_from_sorted
 from ..schemas import ResumeBlock, ResumeContacts, ResumeMetadata, ResumeResponse
+from .backends import ChangeFeed, StorageBackend, StoredRow, write_batch
+from .version_store import ResumeVersionStore
+
+TABLE = "resumes"
+
+# 用户索引中的排序键 (updated_at, resume_id)，与分页游标同构
+IndexKey = Tuple[datetime, str]
+
+
+def _pack_blocks(raw_text: str, blocks: Iterable[Tuple[str, str]]) -> Tuple[str, Tuple[Tuple[str, int, int], ...]]:
+  """把各段落文本压缩进一块缓冲区：缓冲区以 raw_text 开头，段落只记录 (type, start, end)
+
+  解析出的段落通常是 raw_text 的子串，直接引用其偏移；找不到的段落追加到缓冲区末尾。
+  """
+  extra: List[str] = []
+  spans: List[Tuple[str, int, int]] = []
+  size = len(raw_text)
+  cursor = 0
+  for block_type, text in blocks:
+    pos = raw_text.find(text, cursor)
+    if pos < 0:
+      pos = raw_text.find(text)
+    if pos < 0:
+      pos = size
+      extra.append(text)
+      size += len(text)
+    else:
+      cursor = pos + len(text)
+    spans.append((sys.intern(block_type), pos, pos + len(text)))
+  buffer = raw_text + "".join(extra) if extra else raw_text
+  return buffer, tuple(spans)
 
 
-@dataclass(slots=True)
 class ResumeRecord:
-  id: str
-  user_id: str
-  source: str
-  template_key: Optional[str]
-  title: Optional[str]
-  file_name: Optional[str]
-  mime_type: Optional[str]
-  raw_text: str
-  parsed_blocks: List[ResumeBlock]
-  skills: List[str]
-  contacts: ResumeContacts
-  metadata: ResumeMetadata
-  # LLM解析增强字段
-  structured_sections: Optional[Dict[str, Any]] = None
-  confidence_score: Optional[float] = None
-  parsing_method: Optional[str] = "rule-based"
-  created_at: datetime = field(default_factory=datetime.utcnow)
-  updated_at: datetime = field(default_factory=datetime.utcnow)
+  """简历记录的紧凑表示
+
+  - raw_text 与各段落文本共用一个字符串缓冲区，段落类型经过 intern
+  - parsed_blocks 按需物化；响应对象与序列化后的 JSON 按修订号 revision 缓存，
+    未变化的记录在列表接口中不再重复构造和校验。revision 由 ResumeStore.update 递增，
+    不依赖时钟，同一微秒内的两次更新或时钟回拨也不会命中旧缓存
+  """
+
+  __slots__ = (
+    "id", "user_id", "source", "template_key", "title", "file_name", "mime_type",
+    "skills", "contacts", "metadata",
+    "structured_sections", "confidence_score", "parsing_method",
+    "created_at", "updated_at",
+    "revision", "_text", "_raw_len", "_spans", "_memo", "_memo_revision",
+  )
+
+  def __init__(
+    self,
+    id: str,
+    user_id: str,
+    source: str,
+    template_key: Optional[str],
+    title: Optional[str],
+    file_name: Optional[str],
+    mime_type: Optional[str],
+    raw_text: str,
+    parsed_blocks: List[ResumeBlock],
+    skills: List[str],
+    contacts: ResumeContacts,
+    metadata: ResumeMetadata,
+    # LLM解析增强字段
+    structured_sections: Optional[Dict[str, Any]] = None,
+    confidence_score: Optional[float] = None,
+    parsing_method: Optional[str] = "rule-based",
+    created_at: Optional[datetime] = None,
+    updated_at: Optional[datetime] = None,
+  ) -> None:
+    self.id = id
+    self.user_id = sys.intern(user_id)
+    self.source = sys.intern(source)
+    self.template_key = template_key
+    self.title = title
+    self.file_name = file_name
+    self.mime_type = mime_type
+    self.skills = skills
+    self.contacts = contacts
+    self.metadata = metadata
+    self.structured_sections = structured_sections
+    self.confidence_score = confidence_score
+    self.parsing_method = sys.intern(parsing_method) if parsing_method else parsing_method
+    self.created_at = created_at or datetime.utcnow()
+    self.updated_at = updated_at or datetime.utcnow()
+    self.revision = 0
+    self._memo: Optional[Dict[str, Any]] = None
+    self._memo_revision = 0
+    self._set_text(raw_text, ((block.type, block.text) for block in parsed_blocks))
+
+  def _set_text(self, raw_text: str, blocks: Iterable[Tuple[str, str]]) -> None:
+    self._text, self._spans = _pack_blocks(raw_text, blocks)
+    self._raw_len = len(raw_text)
+    self._memo = None
+
+  @property
+  def raw_text(self) -> str:
+    # 缓冲区没有追加段落时切片返回同一个对象，不产生拷贝
+    return self._text[:self._raw_len]
+
+  @raw_text.setter
+  def raw_text(self, value: str) -> None:
+    self._set_text(value, list(self.iter_blocks()))
+
+  @property
+  def parsed_blocks(self) -> List[ResumeBlock]:
+    """按需物化段落；返回的是新列表，修改后需重新赋值"""
+    return [ResumeBlock.model_construct(type=block_type, text=text) for block_type, text in self.iter_blocks()]
+
+  @parsed_blocks.setter
+  def parsed_blocks(self, blocks: List[ResumeBlock]) -> None:
+    self._set_text(self.raw_text, [(block.type, block.text) for block in blocks])
+
+  def iter_blocks(self) -> Iterator[Tuple[str, str]]:
+    """遍历 (type, text)，不构造 ResumeBlock"""
+    text = self._text
+    for block_type, start, end in self._spans:
+      yield block_type, text[start:end]
+
+  def memo(self, key: str, factory: Callable[["ResumeRecord"], Any]) -> Any:
+    """按 revision 缓存派生值（响应对象、JSON、摘要等）；经 ResumeStore.update 更新后自动失效"""
+    if self._memo is None or self._memo_revision != self.revision:
+      self._memo = {}
+      self._memo_revision = self.revision
+    value = self._memo.get(key)
+    if value is None:
+      value = self._memo[key] = factory(self)
+    return value
+
+  def __repr__(self) -> str:
+    return (
+      f"ResumeRecord(id={self.id!r}, user_id={self.user_id!r}, source={self.source!r}, "
+      f"revision={self.revision}, updated_at={self.updated_at!r})"
+    )
+
+
+def record_to_row(record: ResumeRecord) -> StoredRow:
+  payload = {
+    "id": record.id,
+    "user_id": record.user_id,
+    "source": record.source,
+    "template_key": record.template_key,
+    "title": record.title,
+    "file_name": record.file_name,
+    "mime_type": record.mime_type,
+    "raw_text": record.raw_text,
+    "parsed_blocks": [{"type": block_type, "text": text} for block_type, text in record.iter_blocks()],
+    "skills": record.skills,
+    "contacts": record.contacts.model_dump(),
+    "metadata": record.metadata.model_dump(),
+    "structured_sections": record.structured_sections,
+    "confidence_score": record.confidence_score,
+    "parsing_method": record.parsing_method,
+  }
+  return StoredRow(
+    id=record.id,
+    user_id=record.user_id,
+    payload=json.dumps(payload, ensure_ascii=False, default=str),
+    created_at=record.created_at.isoformat(timespec="microseconds"),
+    updated_at=record.updated_at.isoformat(timespec="microseconds"),
+    kind=record.source,
+  )
+
+
+def row_to_record(row: StoredRow) -> ResumeRecord:
+  payload = json.loads(row.payload)
+  # 落库的数据已经过校验，直接构造，不再重复校验
+  payload["parsed_blocks"] = [ResumeBlock.model_construct(**b) for b in payload["parsed_blocks"]]
+  payload["contacts"] = ResumeContacts.model_validate(payload["contacts"])
+  payload["metadata"] = ResumeMetadata.model_validate(payload["metadata"])
+  return ResumeRecord(
+    **payload,
+    created_at=datetime.fromisoformat(row.created_at),
+    updated_at=datetime.fromisoformat(row.updated_at),
+  )
 
 
 class ResumeStore:
-  def __init__(self) -> None:
+  """简历存储；配置了后端时内存字典为读穿缓存，写入同步落库"""
+
+  def __init__(self, backend: Optional[StorageBackend] = None) -> None:
     self._resumes: Dict[str, ResumeRecord] = {}
+    # user_id -> [(updated_at, resume_id)]，升序排列（末尾即最新），分页时按游标二分定位
+    self._user_resumes: Dict[str, List[IndexKey]] = {}
+    # resume_id -> (user_id, 索引键)，更新时据此找到旧位置
+    self._index_keys: Dict[str, Tuple[str, IndexKey]] = {}
+    self._backend = backend
+    self._loaded_users: Set[str] = set()
+    self._changes = ChangeFeed(backend, TABLE) if backend else None
+    # 每份简历的 raw_text 版本链（快照 + 行级增量）
+    self.versions = ResumeVersionStore(backend)
+
+  def _sync(self) -> None:
+    """增量应用其他 worker 写入的简历；未加载的用户与未缓存的记录跳过，访问时再从后端读取"""
+    if self._changes is None:
+      return
+    changes = self._changes.poll()
+    if not changes:
+      return
+    for row in changes[TABLE]:
+      cached = self._resumes.get(row.id)
+      loaded = row.user_id in self._loaded_users
+      if cached is None and not loaded:
+        continue
+      if cached is not None and cached.updated_at.isoformat(timespec="microseconds") == row.updated_at:
+        continue  # 本进程自己的写入，或已应用过
+      record = self._resumes[row.id] = row_to_record(row)
+      if cached is not None:
+        record.revision = cached.revision + 1
+      if loaded:
+        self._reindex(record)
+
+  def _ensure_user(self, user_id: str) -> None:
+    """首次访问用户时从后端加载其索引"""
+    if self._backend is None or user_id in self._loaded_users:
+      return
+    keys: List[IndexKey] = []
+    for row in self._backend.list_by_user(TABLE, user_id):
+      record = self._resumes.get(row.id)
+      if record is None:
+        record = self._resumes[row.id] = row_to_record(row)
+      key = (record.updated_at, record.id)
+      keys.append(key)
+      self._index_keys[record.id] = (user_id, key)
+    if keys:
+      keys.sort()
+      self._user_resumes[user_id] = keys
+    self._loaded_users.add(user_id)
 
   def create(self, record: ResumeRecord) -> ResumeRecord:
+    self._sync()
+    self._ensure_user(record.user_id)
     record.created_at = datetime.utcnow()
     record.updated_at = record.created_at
     self._resumes[record.id] = record
+    self._reindex(record)
+    with write_batch(self._backend):
+      if self._backend is not None:
+        self._backend.put(TABLE, record_to_row(record))
+      self.versions.commit(record.id, record.raw_text, source=record.source, user_id=record.user_id)
     return record
 
-  def update(self, record: ResumeRecord) -> ResumeRecord:
+  def update(self, record: ResumeRecord, source: str = "EDIT") -> ResumeRecord:
+    """覆盖记录；raw_text 有变化时在版本链上追加一个版本，source 标记变更来源"""
+    self._sync()
+    self._ensure_user(record.user_id)
+    previous = self._resumes.get(record.id)
     record.updated_at = datetime.utcnow()
+    # 调用方可能就地修改了缓存中的同一个对象，修订号递增使派生缓存失效
+    record.revision = (previous.revision if previous is not None else record.revision) + 1
     self._resumes[record.id] = record
+    self._reindex(record)
+    with write_batch(self._backend):
+      if self._backend is not None:
+        self._backend.put(TABLE, record_to_row(record))
+      self.versions.commit(record.id, record.raw_text, source=source, user_id=record.user_id)
     return record
 
+  def _reindex(self, record: ResumeRecord) -> None:
+    """写入后把记录移到新的 (updated_at, id) 位置；updated_at 通常是当前时间，插入点即末尾"""
+    old = self._index_keys.get(record.id)
+    if old is not None:
+      old_user, old_key = old
+      keys = self._user_resumes.get(old_user, [])
+      pos = bisect_left(keys, old_key)
+      if pos < len(keys) and keys[pos] == old_key:
+        del keys[pos]
+      if not keys:
+        self._user_resumes.pop(old_user, None)
+    key = (record.updated_at, record.id)
+    insort(self._user_resumes.setdefault(record.user_id, []), key)
+    self._index_keys[record.id] = (record.user_id, key)
+
   def generate_id(self) -> str:
     return f"r_{uuid4().hex[:8]}"
 
   def list_by_user(self, user_id: str) -> List[ResumeRecord]:
-    return [resume for resume in self._resumes.values() if resume.user_id == user_id]
+    """按 updated_at 升序返回用户的简历，O(k)"""
+    self._sync()
+    self._ensure_user(user_id)
+    return [self._resumes[resume_id] for _, resume_id in self._user_resumes.get(user_id, ())]
+
+  def page_by_user(
+    self,
+    user_id: str,
+    after: Optional[IndexKey],
+    limit: Optional[int],
+    descending: bool = False,
+  ) -> Tuple[List[ResumeRecord], Optional[str]]:
+    """按 (updated_at, id) 分页，在用户的有序索引上二分定位游标，只物化本页记录"""
+    self._sync()
+    self._ensure_user(user_id)
+    keys, next_cursor = page_from_sorted(
+      self._user_resumes.get(user_id, []), lambda key: key, after, limit, descending=descending
+    )
+    return [self._resumes[resume_id] for _, resume_id in keys], next_cursor
 
   def get(self, resume_id: str) -> Optional[ResumeRecord]:
-    return self._resumes.get(resume_id)
+    self._sync()
+    record = self._resumes.get(resume_id)
+    if record is None and self._backend is not None:
+      row = self._backend.get(TABLE, resume_id)
+      if row is not None:
+        record = self._resumes[resume_id] = row_to_record(row)
+    return record
 
   def latest(self, user_id: str) -> Optional[ResumeRecord]:
-    records = self.list_by_user(user_id)
-    if not records:
+    """O(1) 取用户最近更新的简历"""
+    self._sync()
+    self._ensure_user(user_id)
+    keys = self._user_resumes.get(user_id)
+    if not keys:
       return None
-    return max(records, key=lambda rec: rec.updated_at)
+    return self._resumes[keys[-1][1]]
 
 
-def record_to_response(record: ResumeRecord) -> ResumeResponse:
-  return ResumeResponse(
+def _build_response(record: ResumeRecord) -> ResumeResponse:
+  # 记录中的字段在写入时已校验过，model_construct 跳过重复校验
+  return ResumeResponse.model_construct(
     id=record.id,
     raw_text=record.raw_text,
     parsed_blocks=record.parsed_blocks,
@@ -71,4 +337,14 @@ def record_to_response(record: ResumeRecord) -> ResumeResponse:
     metadata=record.metadata,
     created_at=record.created_at,
     updated_at=record.updated_at,
-  )
\ No newline at end of file
+  )
+
+
+def record_to_response(record: ResumeRecord) -> ResumeResponse:
+  """返回记录的响应对象；同一 revision 下复用同一个实例，调用方不要修改"""
+  return record.memo("response", _build_response)
+
+
+def record_to_json(record: ResumeRecord) -> bytes:
+  """返回记录序列化后的 JSON，按 revision 缓存"""
+  return record.memo("json", lambda rec: record_to_response(rec).model_dump_json().encode("utf-8"))
@@ -1,18 +1,234 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+import heapq
+import json
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, List, Optional, Any, Set, Tuple
 from uuid import uuid4
 
+from ..events import TaskEvent, TaskEventHub
 from ..schemas import TaskResponse, TaskStatus, TaskType
+from .backends import ChangeFeed, StorageBackend, StoredRow, write_batch
+
+TABLE = "tasks"
+RESULT_TABLE = "task_results"
+
+# 进入这些状态后任务不再变化，可以按 TTL 回收
+TERMINAL_STATUSES = frozenset({TaskStatus.DONE, TaskStatus.ERROR, TaskStatus.CANCELLED})
+
+# (created_at, task_id)，同一桶内按创建时间升序
+_IndexEntry = Tuple[datetime, str]
 
 
 class TaskStore:
-    """任务存储层"""
-    
-    def __init__(self):
+    """任务存储层
+
+    - 已结束的任务超过 ttl_seconds 后回收；总数超过 max_entries 时从最早结束的任务开始回收。
+      回收只释放内存，被回收的任务仍可从后端读回；后端的行由单独的 TTL 清理按 updated_at 删除
+    - 按 (user, type, status) 维护有序索引，过滤列表无需全量排序
+    - 配置了后端时，超过 offload_bytes 的 result 只保存在后端，内存中只留任务元数据
+    - 配置了 events 时，状态与结果变化发布到事件中心，推送给订阅了该任务的连接
+    """
+
+    # 两次 TTL 清扫之间的最小间隔
+    SWEEP_INTERVAL = timedelta(seconds=30)
+    # 两次后端 TTL 清理之间的最小间隔
+    PURGE_INTERVAL = timedelta(minutes=10)
+
+    def __init__(
+        self,
+        backend: Optional[StorageBackend] = None,
+        ttl_seconds: int = 86400,
+        max_entries: int = 10000,
+        offload_bytes: int = 64 * 1024,
+        events: Optional[TaskEventHub] = None,
+    ):
         self._tasks: Dict[str, TaskResponse] = {}
-        self._user_tasks: Dict[str, List[str]] = {}  # user_id -> task_ids
+        self._task_users: Dict[str, str] = {}  # task_id -> user_id
+        # user_id -> (type, status) -> [(created_at, task_id)]
+        self._index: Dict[str, Dict[Tuple[TaskType, TaskStatus], List[_IndexEntry]]] = {}
+        # task_id -> 结束时间，按结束顺序排列
+        self._completed: OrderedDict[str, datetime] = OrderedDict()
+        self._result_sizes: Dict[str, int] = {}  # 内存中 result 的近似字节数
+        self._offloaded: Set[str] = set()  # result 只保存在后端的任务
+
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_entries = max_entries
+        self.offload_bytes = offload_bytes if backend is not None else 0
+        self._last_sweep = datetime.utcnow()
+        self._last_purge = datetime.min
+        self._evicted = 0
+        self._purged = 0
+
+        self._backend = backend
+        self._events = events
+        self._loaded_users: Set[str] = set()
+        self._changes = ChangeFeed(backend, TABLE, RESULT_TABLE) if backend else None
+
+    # ---- 缓存与后端 ----
+
+    def _sync(self) -> None:
+        """增量应用其他 worker 写入的任务；未加载的用户跳过，访问时再从后端读取"""
+        if self._changes is None:
+            return
+        changes = self._changes.poll()
+        if not changes:
+            return
+        # 转存结果与任务行在同一事务内写入
+        offloaded = {row.id for row in changes[RESULT_TABLE]}
+        for row in changes[TABLE]:
+            cached = self._tasks.get(row.id)
+            if cached is None and row.user_id not in self._loaded_users:
+                continue
+            if cached is not None and cached.updated_at.isoformat(timespec="microseconds") == row.updated_at:
+                continue  # 本进程自己的写入，或已应用过
+            task = TaskResponse.model_validate_json(row.payload)
+            if cached is not None:
+                self._unindex(cached, row.user_id)
+                self._completed.pop(row.id, None)
+            self._add(task, row.user_id)
+            if task.result is not None:
+                self._offloaded.discard(row.id)
+                self._result_sizes[row.id] = len(row.payload)
+            elif row.id in offloaded:
+                self._offloaded.add(row.id)
+                self._result_sizes.pop(row.id, None)
+
+    def _ensure_user(self, user_id: str) -> None:
+        """首次访问用户时从后端加载其任务"""
+        if self._backend is None or user_id in self._loaded_users:
+            return
+        offloaded = {row.id for row in self._backend.list_by_user(RESULT_TABLE, user_id)}
+        for row in self._backend.list_by_user(TABLE, user_id):
+            if row.id in self._tasks:
+                continue
+            task = TaskResponse.model_validate_json(row.payload)
+            self._add(task, user_id)
+            if row.id in offloaded:
+                self._offloaded.add(row.id)
+            elif task.result is not None:
+                self._result_sizes[row.id] = len(row.payload)
+        self._loaded_users.add(user_id)
+
+    def _persist(self, task: TaskResponse) -> None:
+        if self._backend is None:
+            return
+        self._backend.put(TABLE, StoredRow(
+            id=task.id,
+            user_id=self._task_users.get(task.id, ""),
+            payload=task.model_dump_json(),
+            created_at=task.created_at.isoformat(timespec="microseconds"),
+            updated_at=task.updated_at.isoformat(timespec="microseconds"),
+            kind=task.type.value,
+            status=task.status.value,
+        ))
+
+    def _materialize(self, task: TaskResponse) -> TaskResponse:
+        """result 已转存到后端的任务，读取时返回带完整 result 的副本"""
+        if task.id not in self._offloaded:
+            return task
+        row = self._backend.get(RESULT_TABLE, task.id)
+        result = json.loads(row.payload) if row else None
+        return task.model_copy(update={"result": result})
+
+    # ---- 索引维护 ----
+
+    def _add(self, task: TaskResponse, user_id: str) -> None:
+        self._tasks[task.id] = task
+        self._task_users[task.id] = user_id
+        bucket = self._index.setdefault(user_id, {}).setdefault((task.type, task.status), [])
+        insort(bucket, (task.created_at, task.id))
+        if task.status in TERMINAL_STATUSES:
+            self._completed[task.id] = task.updated_at
+
+    def _unindex(self, task: TaskResponse, user_id: str) -> None:
+        buckets = self._index.get(user_id)
+        if not buckets:
+            return
+        key = (task.type, task.status)
+        bucket = buckets.get(key)
+        if not bucket:
+            return
+        entry = (task.created_at, task.id)
+        pos = bisect_left(bucket, entry)
+        if pos < len(bucket) and bucket[pos] == entry:
+            del bucket[pos]
+        if not bucket:
+            del buckets[key]
+            if not buckets:
+                del self._index[user_id]
+
+    def _set_status(self, task: TaskResponse, status: TaskStatus) -> None:
+        """修改状态并把任务移动到新的索引桶"""
+        user_id = self._task_users.get(task.id, "")
+        if task.status != status:
+            self._unindex(task, user_id)
+            task.status = status
+            insort(
+                self._index.setdefault(user_id, {}).setdefault((task.type, status), []),
+                (task.created_at, task.id),
+            )
+        task.updated_at = datetime.utcnow()
+        if status in TERMINAL_STATUSES:
+            self._completed[task.id] = task.updated_at
+            self._completed.move_to_end(task.id)
+        else:
+            self._completed.pop(task.id, None)
+
+    # ---- 回收 ----
+
+    def _evict(self, task_ids: List[str]) -> None:
+        """只从内存中移除；后端的行保留到 TTL 清理"""
+        for task_id in task_ids:
+            task = self._tasks.pop(task_id, None)
+            user_id = self._task_users.pop(task_id, "")
+            if task is not None:
+                self._unindex(task, user_id)
+            self._completed.pop(task_id, None)
+            self._result_sizes.pop(task_id, None)
+            self._offloaded.discard(task_id)
+        self._evicted += len(task_ids)
+
+    def _purge(self, now: datetime, force: bool = False) -> None:
+        """删除后端中结束超过 TTL 的任务及其转存结果"""
+        if self._backend is None or (not force and now - self._last_purge < self.PURGE_INTERVAL):
+            return
+        self._last_purge = now
+        deadline = (now - self.ttl).isoformat(timespec="microseconds")
+        with write_batch(self._backend):
+            task_ids = self._backend.purge(TABLE, [status.value for status in TERMINAL_STATUSES], deadline)
+            self._backend.delete(RESULT_TABLE, task_ids)
+        self._purged += len(task_ids)
+
+    def _sweep(self, force: bool = False) -> None:
+        """回收过期的已结束任务；超出容量时按结束顺序继续回收"""
+        now = datetime.utcnow()
+        if not force and now - self._last_sweep < self.SWEEP_INTERVAL and len(self._tasks) <= self.max_entries:
+            return
+        self._last_sweep = now
+        self._purge(now)
+
+        expired = []
+        deadline = now - self.ttl
+        overflow = len(self._tasks) - self.max_entries
+        for task_id, finished_at in self._completed.items():
+            if finished_at <= deadline or len(expired) < overflow:
+                expired.append(task_id)
+            else:
+                break
+        if expired:
+            self._evict(expired)
+
+    def _publish(self, task: TaskResponse) -> None:
+        if self._events is None or not self._events.wants(task.id):
+            return
+        # 发布快照而非缓存中的对象，之后的原地修改不会影响尚未发送的事件
+        self._events.publish(TaskEvent(task.model_copy(), final=task.status in TERMINAL_STATUSES))
+
+    # ---- 公共接口 ----
 
     def create_task(
         self,
@@ -22,25 +238,42 @@ class TaskStore:
         status: TaskStatus = TaskStatus.QUEUED
     ) -> TaskResponse:
         """创建任务"""
+        self._sync()
+        self._ensure_user(user_id)
+        self._sweep()
+        now = datetime.utcnow()
         task = TaskResponse(
             id=task_id,
             type=task_type,
             status=status,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
+            created_at=now,
+            updated_at=now
         )
-        
-        self._tasks[task_id] = task
-        
-        if user_id not in self._user_tasks:
-            self._user_tasks[user_id] = []
-        self._user_tasks[user_id].append(task_id)
-        
+
+        self._add(task, user_id)
+        self._persist(task)
+        return task
+
+    def _get_cached(self, task_id: str) -> Optional[TaskResponse]:
+        self._sync()
+        task = self._tasks.get(task_id)
+        if task is None and self._backend is not None:
+            row = self._backend.get(TABLE, task_id)
+            if row is not None:
+                self._ensure_user(row.user_id)
+                task = self._tasks.get(task_id)
+            if row is not None and task is None:
+                # 已从内存回收但尚未被 TTL 清理的任务，单独读回
+                task = TaskResponse.model_validate_json(row.payload)
+                self._add(task, row.user_id)
+                if task.result is None and self._backend.get(RESULT_TABLE, task_id) is not None:
+                    self._offloaded.add(task_id)
         return task
 
     def get_task(self, task_id: str) -> Optional[TaskResponse]:
         """获取任务"""
-        return self._tasks.get(task_id)
+        task = self._get_cached(task_id)
+        return self._materialize(task) if task is not None else None
 
     def update_task_status(
         self,
@@ -49,16 +282,17 @@ class TaskStore:
         progress: Optional[int] = None
     ) -> Optional[TaskResponse]:
         """更新任务状态"""
-        task = self._tasks.get(task_id)
+        task = self._get_cached(task_id)
         if not task:
             return None
-            
-        task.status = status
-        task.updated_at = datetime.utcnow()
-        
+
+        self._set_status(task, status)
+
         if progress is not None:
             task.progress = progress
-            
+
+        self._persist(task)
+        self._publish(task)
         return task
 
     def update_task_result(
@@ -68,25 +302,61 @@ class TaskStore:
         result: Optional[Dict[str, Any]] = None,
         error: Optional[str] = None,
         cost: Optional[float] = None,
-        latency_ms: Optional[int] = None
+        latency_ms: Optional[int] = None,
+        progress: Optional[int] = None
     ) -> Optional[TaskResponse]:
         """更新任务结果"""
-        task = self._tasks.get(task_id)
+        task = self._get_cached(task_id)
         if not task:
             return None
-            
-        task.status = status
-        task.updated_at = datetime.utcnow()
-        
-        if result is not None:
-            task.result = result
+
+        self._set_status(task, status)
+
+        if progress is not None:
+            task.progress = progress
+
         if error is not None:
             task.error = error
         if cost is not None:
             task.cost = cost
         if latency_ms is not None:
             task.latency_ms = latency_ms
-            
+
+        if result is None:
+            self._persist(task)
+            self._publish(task)
+            self._sweep()
+            return task
+
+        encoded = json.dumps(result, ensure_ascii=False, default=str)
+        if self.offload_bytes and len(encoded) > self.offload_bytes:
+            # 大结果只写后端，内存中不保留
+            user_id = self._task_users.get(task_id, "")
+            task.result = None
+            self._result_sizes.pop(task_id, None)
+            self._offloaded.add(task_id)
+            with write_batch(self._backend):
+                self._backend.put(RESULT_TABLE, StoredRow(
+                    id=task_id,
+                    user_id=user_id,
+                    payload=encoded,
+                    created_at=task.created_at.isoformat(timespec="microseconds"),
+                    updated_at=task.updated_at.isoformat(timespec="microseconds"),
+                ))
+                self._persist(task)
+            full = task.model_copy(update={"result": result})
+            self._publish(full)
+            self._sweep()
+            return full
+
+        task.result = result
+        self._result_sizes[task_id] = len(encoded)
+        if task_id in self._offloaded:
+            self._offloaded.discard(task_id)
+            self._backend.delete(RESULT_TABLE, [task_id])
+        self._persist(task)
+        self._publish(task)
+        self._sweep()
         return task
 
     def list_by_user(
@@ -94,23 +364,52 @@ class TaskStore:
         user_id: str,
         task_type: Optional[str] = None,
         status: Optional[str] = None,
-        limit: int = 50
+        limit: int = 50,
+        before: Optional[_IndexEntry] = None
     ) -> List[TaskResponse]:
-        """获取用户的任务列表"""
-        task_ids = self._user_tasks.get(user_id, [])
-        tasks = [self._tasks[task_id] for task_id in task_ids if task_id in self._tasks]
-        
-        # 过滤
-        if task_type:
-            tasks = [t for t in tasks if t.type == task_type]
-        if status:
-            tasks = [t for t in tasks if t.status == status]
-        
-        # 按创建时间倒序
-        tasks.sort(key=lambda t: t.created_at, reverse=True)
-        
-        return tasks[:limit]
+        """获取用户的任务列表（按创建时间倒序）
+
+        before 为分页游标 (created_at, task_id)，只返回排在它之后（更早）的任务。
+        """
+        self._sync()
+        self._ensure_user(user_id)
+        try:
+            type_filter = TaskType(task_type) if task_type else None
+            status_filter = TaskStatus(status) if status else None
+        except ValueError:
+            return []
+
+        buckets = [
+            bucket
+            for (bucket_type, bucket_status), bucket in self._index.get(user_id, {}).items()
+            if (type_filter is None or bucket_type == type_filter)
+            and (status_filter is None or bucket_status == status_filter)
+        ]
+        # 各桶已按创建时间排序，二分定位游标后多路归并，只取前 limit 条
+        def descending(bucket: List[_IndexEntry]):
+            end = bisect_left(bucket, before) if before is not None else len(bucket)
+            return (bucket[i] for i in range(end - 1, -1, -1))
+
+        merged = heapq.merge(*(descending(bucket) for bucket in buckets), reverse=True)
+        return [self._materialize(self._tasks[task_id]) for _, task_id in islice(merged, max(limit, 0))]
+
+    def stats(self) -> Dict[str, Any]:
+        """内存占用统计"""
+        by_status: Dict[str, int] = {}
+        for task in self._tasks.values():
+            by_status[task.status.value] = by_status.get(task.status.value, 0) + 1
+        return {
+            "tasks": len(self._tasks),
+            "users": len(self._index),
+            "by_status": by_status,
+            "result_bytes": sum(self._result_sizes.values()),
+            "offloaded_results": len(self._offloaded),
+            "evicted_total": self._evicted,
+            "purged_total": self._purged,
+            "max_entries": self.max_entries,
+            "ttl_seconds": int(self.ttl.total_seconds()),
+        }
 
     def generate_id(self, prefix: str = "task") -> str:
         """生成任务ID"""
-        return f"{prefix}_{uuid4().hex[:8]}"
\ No newline at end of file
+        return f"{prefix}_{uuid4().hex[:8]}"
@@ -0,0 +1,277 @@
+"""简历版本链
+
+每份简历（或草稿）对应一条版本链：链头保存完整文本，历史版本按行存储相对上一版本的增量，
+并周期性地保存完整快照，重建任意版本最多只需回放一个快照之后的若干增量。
+
+快照时机：距上一快照的增量条数达到 max_chain，或累计增量大小超过当前文本大小。
+因此小幅修改的 50 个版本通常只有一个快照，总体积约等于一份全文。
+"""
+from __future__ import annotations
+
+import difflib
+import json
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from .backends import ChangeFeed, StorageBackend, StoredRow
+
+TABLE = "resume_versions"
+
+# 增量操作：(start, end) 表示复制上一版本的第 start..end 行；str 表示插入的新文本
+DeltaOp = Union[Tuple[int, int], str]
+
+
+@dataclass(slots=True)
+class VersionEntry:
+    version: int
+    created_at: datetime
+    source: str
+    size: int  # 文本字符数
+    snapshot: Optional[str] = None  # 快照版本保存全文
+    delta: Optional[Tuple[DeltaOp, ...]] = None  # 非快照版本保存相对上一版本的增量
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def is_snapshot(self) -> bool:
+        return self.snapshot is not None
+
+    @property
+    def stored_size(self) -> int:
+        """实际占用的字符数（近似）"""
+        if self.snapshot is not None:
+            return len(self.snapshot)
+        return sum(len(op) if isinstance(op, str) else 2 for op in self.delta or ())
+
+
+@dataclass(slots=True)
+class VersionChain:
+    entries: List[VersionEntry] = field(default_factory=list)
+    head_text: str = ""  # 通常与 ResumeRecord.raw_text 是同一个字符串对象，不额外占用内存
+    delta_since_snapshot: int = 0  # 上一快照之后累计的增量大小
+
+
+def _split(text: str) -> List[str]:
+    return text.splitlines(keepends=True)
+
+
+def make_delta(old_lines: List[str], new_lines: List[str]) -> Tuple[DeltaOp, ...]:
+    """按行计算增量；相邻的插入合并为一个字符串"""
+    ops: List[DeltaOp] = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append((i1, i2))
+        elif tag in ("replace", "insert"):
+            ops.append("".join(new_lines[j1:j2]))
+    return tuple(ops)
+
+
+def apply_delta(old_lines: List[str], delta: Tuple[DeltaOp, ...]) -> List[str]:
+    lines: List[str] = []
+    for op in delta:
+        if isinstance(op, str):
+            lines.extend(_split(op))
+        else:
+            lines.extend(old_lines[op[0]:op[1]])
+    return lines
+
+
+def _entry_to_payload(entry: VersionEntry) -> str:
+    return json.dumps({
+        "version": entry.version,
+        "source": entry.source,
+        "size": entry.size,
+        "snapshot": entry.snapshot,
+        "delta": [list(op) if isinstance(op, tuple) else op for op in entry.delta] if entry.delta is not None else None,
+        "meta": entry.meta,
+    }, ensure_ascii=False)
+
+
+def _entry_from_row(row: StoredRow) -> VersionEntry:
+    payload = json.loads(row.payload)
+    delta = payload.get("delta")
+    return VersionEntry(
+        version=payload["version"],
+        created_at=datetime.fromisoformat(row.created_at),
+        source=payload["source"],
+        size=payload["size"],
+        snapshot=payload.get("snapshot"),
+        delta=tuple(tuple(op) if isinstance(op, list) else op for op in delta) if delta is not None else None,
+        meta=payload.get("meta") or {},
+    )
+
+
+class ResumeVersionStore:
+    """按 key（简历ID或草稿链ID）维护版本链；版本号从 1 开始"""
+
+    def __init__(self, backend: Optional[StorageBackend] = None, max_chain: int = 50):
+        self._chains: Dict[str, VersionChain] = {}
+        self.max_chain = max_chain
+        self._backend = backend
+        self._loaded: Set[str] = set()
+        self._changes = ChangeFeed(backend, TABLE) if backend else None
+
+    # ---- 后端 ----
+
+    def _sync(self) -> None:
+        """其他 worker 给某条链追加了版本时，只丢弃这条链的缓存，下次访问时重新加载"""
+        if self._changes is None:
+            return
+        changes = self._changes.poll()
+        if not changes:
+            return
+        for row in changes[TABLE]:
+            key = row.parent_id
+            chain = self._chains.get(key)
+            if chain is not None and int(row.id.rsplit("#", 1)[1]) <= len(chain.entries):
+                continue  # 已在缓存中（版本写入后不再变化）
+            self._chains.pop(key, None)
+            self._loaded.discard(key)
+
+    def _chain(self, key: str) -> Optional[VersionChain]:
+        self._sync()
+        chain = self._chains.get(key)
+        if chain is not None or self._backend is None or key in self._loaded:
+            return chain
+        self._loaded.add(key)
+        rows = self._backend.list_by_parent(TABLE, key)
+        if not rows:
+            return None
+        entries = sorted((_entry_from_row(row) for row in rows), key=lambda e: e.version)
+        chain = VersionChain(entries=entries)
+        chain.head_text = "".join(self._reconstruct(chain, len(entries)))
+        for entry in reversed(entries):
+            if entry.is_snapshot:
+                break
+            chain.delta_since_snapshot += entry.stored_size
+        self._chains[key] = chain
+        return chain
+
+    # ---- 写入 ----
+
+    def commit(
+        self,
+        key: str,
+        text: str,
+        source: str = "EDIT",
+        meta: Optional[Dict[str, Any]] = None,
+        user_id: str = "",
+    ) -> VersionEntry:
+        """追加一个版本；与链头文本相同时不产生新版本，直接返回链头
+
+        key 写入 parent_id 列，user_id 为链的归属用户。
+        """
+        chain = self._chain(key)
+        if chain is None:
+            chain = self._chains[key] = VersionChain()
+        elif chain.entries and text == chain.head_text and not meta:
+            return chain.entries[-1]
+
+        new_lines = _split(text)
+        entry = VersionEntry(
+            version=len(chain.entries) + 1,
+            created_at=datetime.utcnow(),
+            source=sys.intern(source),
+            size=len(text),
+            meta=meta or {},
+        )
+        chain_length = 0
+        for previous in reversed(chain.entries):
+            if previous.is_snapshot:
+                break
+            chain_length += 1
+
+        if not chain.entries or chain_length + 1 >= self.max_chain:
+            entry.snapshot = text
+        else:
+            entry.delta = make_delta(_split(chain.head_text), new_lines)
+            if chain.delta_since_snapshot + entry.stored_size > len(text):
+                # 累计增量已经比全文大，改存快照以限制重建成本
+                entry.delta = None
+                entry.snapshot = text
+
+        if entry.is_snapshot:
+            chain.delta_since_snapshot = 0
+        else:
+            chain.delta_since_snapshot += entry.stored_size
+        chain.entries.append(entry)
+        chain.head_text = text
+
+        if self._backend is not None:
+            self._backend.put(TABLE, StoredRow(
+                id=f"{key}#{entry.version}",
+                user_id=user_id,
+                parent_id=key,
+                payload=_entry_to_payload(entry),
+                created_at=entry.created_at.isoformat(timespec="microseconds"),
+                updated_at=entry.created_at.isoformat(timespec="microseconds"),
+                kind=entry.source,
+            ))
+        return entry
+
+    # ---- 读取 ----
+
+    @staticmethod
+    def _reconstruct(chain: VersionChain, version: int) -> List[str]:
+        base = version - 1
+        while not chain.entries[base].is_snapshot:
+            base -= 1
+        lines = _split(chain.entries[base].snapshot)
+        for entry in chain.entries[base + 1:version]:
+            lines = apply_delta(lines, entry.delta)
+        return lines
+
+    def head(self, key: str) -> Optional[Tuple[VersionEntry, str]]:
+        """O(1) 返回链头版本及其全文"""
+        chain = self._chain(key)
+        if not chain or not chain.entries:
+            return None
+        return chain.entries[-1], chain.head_text
+
+    def get(self, key: str, version: int) -> Optional[Tuple[VersionEntry, str]]:
+        """重建指定版本；最多回放 max_chain - 1 个增量"""
+        chain = self._chain(key)
+        if not chain or not 1 <= version <= len(chain.entries):
+            return None
+        entry = chain.entries[version - 1]
+        if version == len(chain.entries):
+            return entry, chain.head_text
+        return entry, "".join(self._reconstruct(chain, version))
+
+    def list_versions(self, key: str) -> List[VersionEntry]:
+        chain = self._chain(key)
+        return list(chain.entries) if chain else []
+
+    def diff(self, key: str, from_version: int, to_version: int, context: int = 3) -> Optional[Dict[str, Any]]:
+        """两个版本之间的 unified diff 及增删行数"""
+        old = self.get(key, from_version)
+        new = self.get(key, to_version)
+        if old is None or new is None:
+            return None
+        old_lines, new_lines = _split(old[1]), _split(new[1])
+        diff_lines = list(difflib.unified_diff(
+            old_lines, new_lines,
+            fromfile=f"v{from_version}", tofile=f"v{to_version}",
+            n=context,
+        ))
+        added = sum(1 for line in diff_lines if line.startswith("+") and not line.startswith("+++"))
+        removed = sum(1 for line in diff_lines if line.startswith("-") and not line.startswith("---"))
+        return {
+            "diff": "".join(line if line.endswith("\n") else line + "\n" for line in diff_lines),
+            "added": added,
+            "removed": removed,
+        }
+
+    def stats(self, key: str) -> Dict[str, int]:
+        """版本数与存储开销（字符数）"""
+        chain = self._chain(key)
+        if not chain:
+            return {"versions": 0, "snapshots": 0, "stored_chars": 0, "head_chars": 0}
+        return {
+            "versions": len(chain.entries),
+            "snapshots": sum(1 for entry in chain.entries if entry.is_snapshot),
+            "stored_chars": sum(entry.stored_size for entry in chain.entries),
+            "head_chars": len(chain.head_text),
+        }
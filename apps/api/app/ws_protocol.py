@@ -0,0 +1,122 @@
+"""/ws/tasks 的推送协议协商
+
+- json（默认）：每次推送完整的 TaskResponse（WSMessage JSON 文本）
+- json-delta：每个订阅第一条推送完整状态（task_status），之后只推送与上次发出内容不同的字段（task_delta），
+  进度更新通常只有 progress 与 updated_at。result 按键比较：只在末尾追加的列表放进 result_append
+  （只带新增的项），其余变化的键放进 result_set；result 不是 dict 或删除了键时整体放进 result
+- msgpack-delta：同 json-delta，但以 msgpack 二进制帧发送
+
+协商方式：查询参数 ?protocol=json-delta，或 WebSocket 子协议（Sec-WebSocket-Protocol）
+tasks.json-delta.v1 / tasks.msgpack-delta.v1，服务端回应选中的子协议。
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import msgpack
+
+Frame = Union[str, bytes]
+
+JSON = "json"
+JSON_DELTA = "json-delta"
+MSGPACK_DELTA = "msgpack-delta"
+
+_SUBPROTOCOL_PREFIX = "tasks."
+_SUBPROTOCOL_SUFFIX = ".v1"
+
+
+class Codec:
+    """帧编码方式；delta=True 时任务状态按订阅做增量"""
+
+    __slots__ = ("name", "binary", "delta")
+
+    def __init__(self, name: str, binary: bool, delta: bool):
+        self.name = name
+        self.binary = binary
+        self.delta = delta
+
+    def encode(self, message: Dict[str, Any]) -> Frame:
+        if self.binary:
+            return msgpack.packb(message, use_bin_type=True)
+        return json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+
+    @property
+    def subprotocol(self) -> str:
+        return f"{_SUBPROTOCOL_PREFIX}{self.name}{_SUBPROTOCOL_SUFFIX}"
+
+
+CODECS: Dict[str, Codec] = {
+    JSON: Codec(JSON, binary=False, delta=False),
+    JSON_DELTA: Codec(JSON_DELTA, binary=False, delta=True),
+    MSGPACK_DELTA: Codec(MSGPACK_DELTA, binary=True, delta=True),
+}
+
+DEFAULT_CODEC = CODECS[JSON]
+
+
+def _from_subprotocol(value: str) -> Optional[str]:
+    value = value.strip()
+    if value.startswith(_SUBPROTOCOL_PREFIX) and value.endswith(_SUBPROTOCOL_SUFFIX):
+        return value[len(_SUBPROTOCOL_PREFIX):-len(_SUBPROTOCOL_SUFFIX)]
+    return None
+
+
+def negotiate(requested: Optional[str], offered_subprotocols: List[str]) -> Tuple[Codec, Optional[str]]:
+    """返回 (选中的编码, 需要回应的子协议)
+
+    查询参数优先。子协议按客户端给出的顺序选第一个可用的；都不认识时使用默认 json 且不回应子协议。
+    """
+    if requested:
+        return CODECS.get(requested, DEFAULT_CODEC), None
+    for offered in offered_subprotocols:
+        name = _from_subprotocol(offered)
+        if name in CODECS:
+            return CODECS[name], offered.strip()
+    return DEFAULT_CODEC, None
+
+
+def task_delta(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Dict[str, Any]:
+    """current 中与 previous 不同的字段；previous 为 None 时返回全部字段
+
+    部分结果通常是逐步变长的列表，result 单独按 _result_patch 计算，不重发已发出的项。
+    """
+    if previous is None:
+        return current
+    changes = {
+        key: value for key, value in current.items()
+        if key != "result" and previous.get(key) != value
+    }
+    old, new = previous.get("result"), current.get("result")
+    if old != new:
+        patch = _result_patch(old, new)
+        if patch is None:
+            changes["result"] = new
+        else:
+            changes.update(patch)
+    return changes
+
+
+def _result_patch(old: Any, new: Any) -> Optional[Dict[str, Any]]:
+    """两次 result 都是 dict 且没有删除键时，返回 result_append / result_set；否则返回 None"""
+    if not isinstance(old, dict) or not isinstance(new, dict) or old.keys() - new.keys():
+        return None
+    appended: Dict[str, Any] = {}
+    replaced: Dict[str, Any] = {}
+    for key, value in new.items():
+        before = old.get(key)
+        if before == value:
+            continue
+        if (
+            isinstance(before, list) and isinstance(value, list)
+            and len(value) > len(before) and value[:len(before)] == before
+        ):
+            appended[key] = value[len(before):]
+        else:
+            replaced[key] = value
+    patch: Dict[str, Any] = {}
+    if appended:
+        patch["result_append"] = appended
+    if replaced:
+        patch["result_set"] = replaced
+    return patch
@@ -0,0 +1,5 @@
+"""测试公共配置：把 apps/api 加入导入路径，与 app/scripts 下的脚本一致"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,44 @@
+"""对话会话：并发请求的消息原子追加，不会互相覆盖"""
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from app.cache import Cache, LocalRedis
+from app.routes import chat
+
+
+class EchoLLM:
+    async def chat(self, messages, **kwargs):
+        await asyncio.sleep(0.01)
+        return f"回复：{messages[-1]['content']}"
+
+
+def test_concurrent_messages_are_all_kept_and_trimmed(monkeypatch):
+    monkeypatch.setattr(chat, "get_llm_service", lambda: EchoLLM())
+    app = FastAPI()
+    app.include_router(chat.create_chat_router(Cache(LocalRedis())), prefix="/chat")
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def send(text):
+                response = await client.post("/chat/message", json={"message": text, "session_id": "s1"})
+                return response.json()
+
+            await send("第一条")
+            await asyncio.gather(*(send(f"并发{i}") for i in range(3)))
+            history = (await client.post("/chat/history", json={"session_id": "s1"})).json()["messages"]
+            assert len(history) == 8
+            assert {m["content"] for m in history if m["role"] == "user"} == {"第一条", "并发0", "并发1", "并发2"}
+
+            for i in range(10):
+                last = await send(f"后续{i}")
+            assert last["history_length"] == chat.MAX_HISTORY_MESSAGES
+            sessions = (await client.get("/chat/sessions")).json()["sessions"]
+            assert sessions == [{"session_id": "s1", "message_count": 20, "last_message": "回复：后续9"}]
+
+            await client.post("/chat/reset", json={"session_id": "s1"})
+            assert (await client.get("/chat/sessions")).json()["sessions"] == []
+
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+"""创建任务接口的幂等键与请求体去重"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Response
+
+from app.cache import Cache, LocalRedis
+from app.idempotency import REPLAYED_HEADER, TaskDeduplicator
+from app.schemas import TaskStatus, TaskType
+from app.store import TaskStore
+
+
+class Creator:
+    """记录调用次数的 create 回调；delay 模拟创建任务期间的 await"""
+
+    def __init__(self, store: TaskStore, delay: float = 0.0):
+        self.store = store
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.store.create_task(self.store.generate_id(), TaskType.OPTIMIZE, "u1")
+
+
+@pytest.fixture
+def dedup():
+    return TaskDeduplicator(Cache(LocalRedis()).namespace("idem"), TaskStore())
+
+
+def test_same_key_replays_the_original_task(dedup):
+    async def main():
+        create = Creator(dedup.task_store)
+        first = await dedup.run("optimize", "u1", {"a": 1}, "k1", create)
+        response = Response()
+        second = await dedup.run("optimize", "u1", {"a": 1}, "k1", create, response)
+        assert second.id == first.id
+        assert create.calls == 1
+        assert response.headers[REPLAYED_HEADER] == "true"
+
+        # 同一个 key 在另一个用户或另一个接口下互不影响
+        other = await dedup.run("optimize", "u2", {"a": 1}, "k1", create)
+        assert other.id != first.id
+
+    asyncio.run(main())
+
+
+def test_same_key_with_different_body_is_rejected(dedup):
+    async def main():
+        create = Creator(dedup.task_store)
+        await dedup.run("optimize", "u1", {"a": 1}, "k1", create)
+        with pytest.raises(HTTPException) as error:
+            await dedup.run("optimize", "u1", {"a": 2}, "k1", create)
+        assert error.value.status_code == 422
+        with pytest.raises(HTTPException) as error:
+            await dedup.run("optimize", "u1", {"a": 1}, "x" * 300, create)
+        assert error.value.status_code == 400
+
+    asyncio.run(main())
+
+
+def test_identical_body_without_key_is_deduplicated_until_it_fails(dedup):
+    async def main():
+        create = Creator(dedup.task_store)
+        first = await dedup.run("export", "u1", {"format": "pdf", "id": "r1"}, None, create)
+        again = await dedup.run("export", "u1", {"id": "r1", "format": "pdf"}, None, create)
+        assert again.id == first.id
+
+        dedup.task_store.update_task_result(first.id, TaskStatus.ERROR, error="失败")
+        retried = await dedup.run("export", "u1", {"format": "pdf", "id": "r1"}, None, create)
+        assert retried.id != first.id
+        assert create.calls == 2
+
+    asyncio.run(main())
+
+
+def test_concurrent_double_submit_creates_one_task(dedup):
+    async def main():
+        create = Creator(dedup.task_store, delay=0.1)
+        tasks = await asyncio.gather(*(
+            dedup.run("export", "u1", {"id": "r1"}, None, create) for _ in range(5)
+        ))
+        assert {task.id for task in tasks} == {tasks[0].id}
+        assert create.calls == 1
+        assert dedup.metrics()["replayed"] == 4
+
+    asyncio.run(main())
+
+
+def test_failed_create_releases_the_placeholder(dedup):
+    async def main():
+        async def broken():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await dedup.run("export", "u1", {"id": "r1"}, "k1", broken)
+        create = Creator(dedup.task_store)
+        task = await dedup.run("export", "u1", {"id": "r1"}, "k1", create)
+        assert create.calls == 1
+        assert dedup.task_store.get_task(task.id) is not None
+
+    asyncio.run(main())
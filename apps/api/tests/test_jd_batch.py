@@ -0,0 +1,136 @@
+"""批量导入JD（/jd/batch 的后台任务）：逐项去重、断点续跑与阶段性结果"""
+import asyncio
+import time
+from datetime import datetime
+
+from app.adapters import (
+    AdapterTransport,
+    BossAdapter,
+    Job51Adapter,
+    ShixiSengAdapter,
+    TransportConfig,
+    ZhaopinAdapter,
+)
+from app.events import TaskEventHub
+from app.jobs.journal import JobJournal
+from app.jobs.scheduler import JobScheduler
+from app.schemas import JDBatchRequest, JDResponse, JDSource, TaskStatus, TaskType
+from app.services.jd_service import JDService
+from app.store import JDStore, SQLiteBackend, TaskStore
+
+TEXT_A = "字节跳动 招聘 后端开发工程师，负责推荐系统服务开发，要求熟悉 Python、MySQL 与 Redis，三年以上经验。"
+TEXT_B = "美团 招聘 数据分析师，负责经营数据分析，要求熟练使用 SQL 与 Excel，有电商行业经验优先。"
+URL = "https://jobs.zhaopin.com/CC123456789J40000000000.htm"
+
+
+def build_service(tmp_path, monkeypatch, fetched):
+    backend = SQLiteBackend(str(tmp_path / "app.db"))
+    events = TaskEventHub()
+    task_store = TaskStore(backend, events=events)
+    scheduler = JobScheduler(task_store, workers=2, journal=JobJournal(str(tmp_path / "app.jobs.db")))
+    transport = AdapterTransport(TransportConfig())
+    zhaopin = ZhaopinAdapter(transport)
+
+    async def fetch_jd_by_url(url):
+        fetched.append(url)
+        await asyncio.sleep(0.01)
+        return {
+            "id": "zp_123456789", "company": "京东", "title": "Go 开发工程师", "location": "北京",
+            "jd_text": "负责交易系统开发，熟悉 Go 与 Kubernetes。", "source_url": URL,
+        }
+
+    monkeypatch.setattr(zhaopin, "fetch_jd_by_url", fetch_jd_by_url)
+    service = JDService(
+        JDStore(backend), task_store,
+        ShixiSengAdapter(app_id="test", app_secret="test", transport=transport),
+        zhaopin, Job51Adapter(transport), BossAdapter(),
+        scheduler,
+    )
+    return service, scheduler, events
+
+
+async def wait_done(task_store: TaskStore, task_id: str, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        task = task_store.get_task(task_id)
+        if task.status in (TaskStatus.DONE, TaskStatus.ERROR):
+            return task
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"batch task {task_id} did not finish")
+
+
+def test_batch_deduplicates_items_and_streams_partial_results(tmp_path, monkeypatch):
+    async def main():
+        fetched = []
+        service, scheduler, events = build_service(tmp_path, monkeypatch, fetched)
+        partials = []
+        await scheduler.start()
+        try:
+            task = await service.ingest_batch_async(JDBatchRequest(items=[
+                {"text": TEXT_A},
+                {"text": TEXT_A + "\n"},  # 与第一项近似重复
+                {"url": URL + "?ka=search_list"},
+                {"url": URL},  # 规范化后同一链接，只抓取一次
+                {},
+            ], city="北京"), "u1")
+            events.subscribe(task.id, lambda event: event.task.result and partials.append(
+                (event.task.status, event.task.result)
+            ))
+            done = await wait_done(service.task_store, task.id)
+        finally:
+            await scheduler.stop()
+
+        result = done.result
+        assert [item["status"] for item in result["items"]] == ["created", "duplicate", "created", "duplicate", "failed"]
+        assert result["items"][1]["duplicate_of"] == result["items"][0]["jd_id"]
+        assert result["items"][3]["duplicate_of"] == result["items"][2]["jd_id"] == "zp_123456789"
+        assert (result["created"], result["duplicates"], result["failed"]) == (2, 2, 1)
+        assert fetched == [URL + "?ka=search_list"]
+        assert len(service.jd_store.list_by_user("u1")) == 2
+        # 订阅者逐项收到阶段性结果（每条只含刚完成的一项），最后一条是最终结果
+        running = [partial for status, partial in partials if status == TaskStatus.RUNNING]
+        assert [partial["done"] for partial in running] == [1, 2, 3, 4, 5]
+        assert all(set(partial) == {"item", "done", "total"} for partial in running)
+        assert sorted(partial["item"]["index"] for partial in running) == [0, 1, 2, 3, 4]
+        assert partials[-1][0] == TaskStatus.DONE and len(partials[-1][1]["items"]) == 5
+
+    asyncio.run(main())
+
+
+def test_interrupted_batch_resumes_from_checkpoint(tmp_path, monkeypatch):
+    async def main():
+        fetched = []
+        service, scheduler, _ = build_service(tmp_path, monkeypatch, fetched)
+        saved = JDResponse(
+            id="jd_saved", company="字节跳动", title="后端开发工程师", location="北京", jd_text=TEXT_A,
+            source=JDSource.MANUAL, created_at=datetime.utcnow(),
+        )
+        request = JDBatchRequest(items=[{"text": TEXT_A}, {"text": TEXT_B}, {"url": URL}])
+
+        # 崩溃前的执行者：第一项已保存并写入断点，之后租约过期
+        service.jd_store.create_jd(saved, "u1")
+        service.task_store.create_task("jdbatch_1", TaskType.JD_BATCH, "u1", status=TaskStatus.RUNNING)
+        dead = JobJournal(str(tmp_path / "app.jobs.db"))
+        dead.enqueue("jdbatch_1", "jd.batch", "u1", 2, None, {"request": request.model_dump(mode="json")})
+        dead.claim("jdbatch_1", "dead-owner", lease_seconds=0.01)
+        first = {"index": 0, "kind": "text", "url": None, "status": "created", "jd_id": "jd_saved",
+                 "company": "字节跳动", "title": "后端开发工程师"}
+        # 断点只记录状态与 JD id，公司与职位续跑时从JD库补上
+        dead.checkpoint("jdbatch_1", "dead-owner", {"items": {"0": ["created", "jd_saved"]}})
+        await asyncio.sleep(0.05)
+
+        await scheduler.start()
+        try:
+            done = await wait_done(service.task_store, "jdbatch_1")
+        finally:
+            await scheduler.stop()
+
+        items = done.result["items"]
+        assert items[0] == first  # 断点中的项不重新解析
+        assert [item["status"] for item in items] == ["created", "created", "created"]
+        assert fetched == [URL]
+        jds = service.jd_store.list_by_user("u1")
+        assert len(jds) == 3
+        assert sum(jd.jd_text == TEXT_A for jd in jds) == 1
+
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+"""共享JD语料库：近似去重、代表替换、跨 worker 增量同步与查询热度合并"""
+from datetime import datetime
+
+import pytest
+
+from app.schemas import JDResponse, JDSource
+from app.store import JDCorpus, SQLiteBackend
+from app.store.jd_dedup import NearDuplicateIndex, cluster_jds, representative
+
+BODY = (
+    "岗位职责：负责推荐系统后端服务的设计与开发，参与高并发接口的性能优化与稳定性建设。"
+    "任职要求：本科及以上学历，三年以上 Python 或 Go 开发经验，熟悉 MySQL、Redis 与 Kafka，"
+    "了解 Kubernetes 容器化部署，具备良好的沟通能力与团队协作意识。"
+)
+
+
+def make_jd(jd_id: str, company: str = "字节跳动", title: str = "后端开发工程师",
+            location: str = "北京", text: str = BODY) -> JDResponse:
+    return JDResponse(
+        id=jd_id, company=company, title=title, location=location, jd_text=text,
+        source=JDSource.BOSS, created_at=datetime.utcnow(),
+    )
+
+
+def test_reposts_cluster_but_other_companies_do_not():
+    original = make_jd("a")
+    repost = make_jd("b", company="字节跳动有限公司", title="急招 后端开发工程师", location="北京·海淀区",
+                     text=BODY + "福利待遇：六险一金。")
+    other_company = make_jd("c", company="美团")
+    different_role = make_jd("d", title="数据分析师", text="负责经营数据分析与报表搭建，熟练使用 SQL 与 Excel，有电商行业经验。")
+
+    clusters = cluster_jds([original, repost, other_company, different_role])
+    assert [[jd.id for jd in cluster] for cluster in clusters] == [["a", "b"], ["c"], ["d"]]
+    assert representative(clusters[0]).id == "b"
+
+
+def test_longer_duplicate_replaces_the_representative():
+    corpus = JDCorpus()
+    assert corpus.upsert_many([make_jd("a")]) == ["a"]
+    # 更短的转发并入原代表
+    assert corpus.upsert_many([make_jd("short", text=BODY[:-6])]) == ["a"]
+    # 更完整的一条取代原代表，旧 id 沿取代链解析到新代表
+    assert corpus.upsert_many([make_jd("long", text=BODY + "福利待遇：六险一金，弹性工作。")]) == ["long"]
+    assert len(corpus) == 1
+    assert corpus.get("a").id == "long"
+    assert corpus.get("short").id == "long"
+    assert [jd.id for jd in corpus.search(query="推荐系统")] == ["long"]
+
+
+@pytest.fixture
+def workers(tmp_path):
+    path = str(tmp_path / "app.db")
+    backends = [SQLiteBackend(path), SQLiteBackend(path)]
+    yield [JDCorpus(backend) for backend in backends]
+    for backend in backends:
+        backend.close()
+
+
+def test_merge_and_expiry_propagate_to_other_workers(workers):
+    a, b = workers
+    a.upsert_many([make_jd("a"), make_jd("other", company="美团")])
+    assert len(b) == 2
+
+    a.upsert_many([make_jd("long", text=BODY + "福利待遇：六险一金，弹性工作。")])
+    assert len(b) == 2
+    assert b.get("a").id == "long"
+    assert {jd.id for jd in b.search(query="推荐系统")} == {"long", "other"}
+
+    # B 再次爬到旧 id 时记为重复，不会复活被取代的代表
+    assert b.upsert_many([make_jd("a")]) == ["long"]
+    assert len(a) == 2
+
+    a._seen_at["other"] = "2000-01-01T00:00:00.000000"
+    assert a.expire(60) == 1
+    assert b.get("other") is None
+    assert len(b) == 1
+
+
+def test_query_popularity_from_workers_adds_up(workers):
+    a, b = workers
+    for _ in range(2):
+        a.record_query("后端开发", "北京")
+    for _ in range(3):
+        b.record_query(" 后端开发 ", "北京")
+    assert a.flush_queries() == 1
+    assert b.flush_queries() == 1
+
+    fresh = JDCorpus(a._backend, half_life_seconds=86400)
+    [query] = fresh.due_queries(min_score=0, refresh_after=0, limit=10)
+    assert query.score == pytest.approx(5, abs=0.01)
+
+
+def test_crawled_query_is_answered_from_the_corpus(workers):
+    a, b = workers
+    ids = a.upsert_many([make_jd("a"), make_jd("other", company="美团")])
+    assert b.lookup(None, "后端开发工程师", "北京", limit=2) is None
+
+    a.mark_crawled("后端开发工程师", "北京", ids, limit=2)
+    assert [jd.id for jd in b.lookup(None, "后端开发工程师", "北京", limit=2)] == ["a", "other"]
+    assert [jd.id for jd in b.lookup("美团", "后端开发工程师", "北京", limit=2)] == ["other"]
+    # 要的数量超过上次爬取的上限时仍需在线抓取
+    assert b.lookup(None, "后端开发工程师", "北京", limit=5) is None
+
+
+def test_removed_jds_leave_no_trace_in_the_dedup_index():
+    index = NearDuplicateIndex()
+    repost = make_jd("b", company="字节跳动有限公司", title="急招 后端开发工程师", text=BODY + "福利待遇：六险一金。")
+    assert index.add(make_jd("a")) == index.add(make_jd("a2")) == index.add(repost) == "a"
+
+    # 去掉簇根后簇 id 不变；完全相同的成员接替签名，新的转发仍能匹配到簇
+    index.remove("a")
+    assert index.cluster_of("a") is None
+    assert index.cluster_of("b") == "a"
+    assert index.add(make_jd("c", text=BODY + "福利待遇：六险一金，弹性工作。")) == "a"
+    assert index.signature_of("a2") is not None
+
+    for jd_id in ("a2", "b", "c"):
+        index.remove(jd_id)
+    assert len(index) == 0
+    assert not index._parent and not index._members and not index._signatures and not index._fingerprints
+    assert all(not buckets for buckets in index._buckets)
+
+
+def test_changed_text_moves_jd_to_its_new_cluster():
+    other_role = "负责经营数据分析与报表搭建，熟练使用 SQL 与 Excel，有电商行业经验。"
+    index = NearDuplicateIndex()
+    index.add(make_jd("a"))
+    index.add(make_jd("d", title="数据分析师", text=other_role))
+    assert index.add(make_jd("a", title="数据分析师", text=other_role)) == "d"
+
+    corpus = JDCorpus()
+    corpus.upsert_many([make_jd("a"), make_jd("other", title="数据分析师", text=other_role)])
+    # 代表换成另一个岗位的正文后成为该岗位的重复，不再出现在旧正文的检索结果里
+    assert corpus.upsert_many([make_jd("a", title="数据分析师", text=other_role)]) == ["other"]
+    assert corpus.search(query="推荐系统") == []
+    assert corpus.get("a").id == "other"
+
+    corpus._seen_at["other"] = "2000-01-01T00:00:00.000000"
+    assert corpus.expire(60) == 1
+    assert len(corpus._dedup) == 0
@@ -0,0 +1,109 @@
+"""JD 详情抓取缓存：URL 规范化、同一 URL 的并发合并与过期后的条件请求"""
+import asyncio
+
+from app.adapters import FetchResult
+from app.cache import Cache, LocalRedis
+from app.jd_fetch_cache import JDFetchCache, canonicalize_url
+
+URL = "https://www.zhipin.com/job_detail/abc.html"
+
+
+class Fetcher:
+    """记录调用与收到的校验器；gate 未放行前抓取一直挂起"""
+
+    def __init__(self, results=None):
+        self.calls = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.results = list(results or [])
+
+    async def __call__(self, etag, last_modified):
+        self.calls.append((etag, last_modified))
+        await self.gate.wait()
+        if self.results:
+            return self.results.pop(0)
+        return FetchResult(jd={"title": "后端开发"}, etag='"v1"')
+
+
+def make_cache(**kwargs) -> JDFetchCache:
+    return JDFetchCache(Cache(LocalRedis()).namespace("jd:fetch"), **kwargs)
+
+
+def test_canonical_url_ignores_tracking_params_and_order():
+    assert canonicalize_url("HTTPS://WWW.zhipin.com:443/job_detail/abc.html/?b=2&a=1&ka=search#top") == \
+        canonicalize_url("https://www.zhipin.com/job_detail/abc.html?a=1&b=2&utm_source=x")
+
+
+def test_concurrent_requests_for_one_url_fetch_once():
+    async def main():
+        cache, fetch = make_cache(), Fetcher()
+        fetch.gate.clear()
+        callers = [asyncio.create_task(cache.get_or_fetch(URL + f"?ka=s{i}", fetch)) for i in range(5)]
+        await asyncio.sleep(0.05)
+        fetch.gate.set()
+        results = await asyncio.gather(*callers)
+        assert results == [{"title": "后端开发"}] * 5
+        assert len(fetch.calls) == 1
+        assert cache.metrics()["coalesced"] == 4
+
+        assert await cache.get_or_fetch(URL, fetch) == {"title": "后端开发"}
+        assert len(fetch.calls) == 1
+        assert cache.metrics()["hits"] == 1
+
+    asyncio.run(main())
+
+
+def test_cancelling_the_first_caller_does_not_cancel_the_shared_fetch():
+    async def main():
+        cache, fetch = make_cache(), Fetcher()
+        fetch.gate.clear()
+        first = asyncio.create_task(cache.get_or_fetch(URL, fetch))
+        await asyncio.sleep(0.02)
+        second = asyncio.create_task(cache.get_or_fetch(URL, fetch))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        fetch.gate.set()
+        assert await second == {"title": "后端开发"}
+        assert first.cancelled()
+        assert len(fetch.calls) == 1
+        assert cache.metrics()["inflight"] == 0
+
+    asyncio.run(main())
+
+
+def test_failed_fetch_is_not_cached():
+    async def main():
+        cache = make_cache()
+        fetch = Fetcher([FetchResult(jd=None)])
+        assert await cache.get_or_fetch(URL, fetch) is None
+        assert await cache.get_or_fetch(URL, fetch) == {"title": "后端开发"}
+        assert len(fetch.calls) == 2
+
+    asyncio.run(main())
+
+
+def test_stale_entry_is_served_and_revalidated_with_validators():
+    async def main():
+        cache = make_cache(fresh_seconds=1)
+        fetch = Fetcher([
+            FetchResult(jd={"title": "后端开发"}, etag='"v1"'),
+            FetchResult(not_modified=True),
+        ])
+        await cache.get_or_fetch(URL, fetch)
+        key = cache._key(URL)
+        entry = await cache.cache.aget(key)
+        await cache.cache.aset(key, {**entry, "fetched_at": entry["fetched_at"] - 10})
+
+        assert await cache.get_or_fetch(URL, fetch) == {"title": "后端开发"}  # 先返回旧值
+        for _ in range(50):
+            if cache.metrics()["not_modified"]:
+                break
+            await asyncio.sleep(0.01)
+        assert fetch.calls[1] == ('"v1"', None)
+        assert cache.metrics()["stale_hits"] == 1
+        assert cache.metrics()["not_modified"] == 1
+        assert await cache.get_or_fetch(URL, fetch) == {"title": "后端开发"}
+        assert cache.metrics()["hits"] == 1
+        assert len(fetch.calls) == 2
+
+    asyncio.run(main())
@@ -0,0 +1,128 @@
+"""JD全文检索：MaxScore 剪枝的 top-k 与逐篇打分的 BM25 结果一致，过滤保持子串语义"""
+import math
+import random
+from datetime import datetime
+
+import pytest
+
+from app.schemas import JDResponse, JDSource
+from app.store.jd_index import FIELD_WEIGHTS, JDSearchIndex, tokenize
+
+COMPANIES = ["字节跳动", "腾讯", "阿里巴巴", "美团", "京东"]
+TITLES = ["后端开发工程师", "前端开发工程师", "数据分析师", "算法工程师"]
+CITIES = ["北京", "上海", "深圳", "杭州"]
+SKILLS = ["Python", "Java", "Go", "C++", "Redis", "Kafka", "Spark", "Kubernetes", "React", "Hive"]
+DOMAINS = ["推荐系统", "电商交易", "金融风控", "数据仓库", "云原生平台", "搜索广告"]
+QUERIES = ["推荐系统 Python", "Kubernetes 云原生", "React 前端", "数据仓库 Hive", "C++", "风控", "不存在的词"]
+
+
+def make_jds(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    jds = []
+    for i in range(count):
+        lines = [
+            f"负责{rng.choice(DOMAINS)}模块开发，熟悉{rng.choice(SKILLS)}与{rng.choice(SKILLS)}"
+            for _ in range(rng.randint(1, 6))
+        ]
+        jds.append(JDResponse(
+            id=f"jd_{i:04d}", company=rng.choice(COMPANIES), title=rng.choice(TITLES),
+            location=rng.choice(CITIES), jd_text="\n".join(lines),
+            source=JDSource.MANUAL, created_at=datetime.utcnow(),
+        ))
+    return jds
+
+
+def reference_scores(jds, query):
+    """逐篇计算 BM25F（与索引相同的字段权重、k1、b），不使用倒排与剪枝"""
+    docs = {}
+    for jd in jds:
+        tf, length = {}, 0.0
+        for field, weight in FIELD_WEIGHTS.items():
+            tokens = tokenize(getattr(jd, field))
+            length += weight * len(tokens)
+            for tok in tokens:
+                tf[tok] = tf.get(tok, 0.0) + weight
+        docs[jd.id] = (tf, length)
+    avg_len = sum(length for _, length in docs.values()) / len(docs)
+    k1, b = JDSearchIndex.K1, JDSearchIndex.B
+    scores = {}
+    for term in set(tokenize(query)):
+        df = sum(1 for tf, _ in docs.values() if term in tf)
+        if not df:
+            continue
+        idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+        for doc_id, (tf, length) in docs.items():
+            if term in tf:
+                f = tf[term]
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * f * (k1 + 1) / (f + k1 * (1 - b + b * length / avg_len))
+    return scores
+
+
+def assert_same_ranking(results, scores, eligible, limit):
+    expected = sorted((scores[doc_id] for doc_id in eligible if doc_id in scores), reverse=True)[:limit]
+    got = [scores[jd.id] for jd in results]
+    assert got == pytest.approx(expected)
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    jds = make_jds(400)
+    index = JDSearchIndex()
+    for jd in jds:
+        index.add(jd)
+    return jds, index
+
+
+@pytest.mark.parametrize("query", QUERIES)
+@pytest.mark.parametrize("limit", [1, 5, 20])
+def test_top_k_matches_exhaustive_bm25(corpus, query, limit):
+    jds, index = corpus
+    scores = reference_scores(jds, query)
+    assert_same_ranking(index.search(query=query, limit=limit), scores, [jd.id for jd in jds], limit)
+
+
+@pytest.mark.parametrize("filters", [
+    {"company": "腾讯"},
+    {"title": "后端"},
+    {"city": "北京", "title": "工程师"},
+    {"company": "阿里"},  # 子串
+    {"title": "go"},  # 无中文 bigram，不能用倒排裁剪
+])
+def test_filtered_top_k_matches_exhaustive_bm25(corpus, filters):
+    jds, index = corpus
+    fields = {"company": "company", "title": "title", "city": "location"}
+
+    def matches(jd):
+        return all(value.lower() in (getattr(jd, fields[name]) or "").lower() for name, value in filters.items())
+
+    for query in QUERIES:
+        scores = reference_scores(jds, query)
+        results = index.search(query=query, limit=10, **filters)
+        assert all(matches(jd) for jd in results)
+        assert_same_ranking(results, scores, [jd.id for jd in jds if matches(jd)], 10)
+
+    # 没有 query 时按插入顺序返回满足过滤条件的JD
+    assert [jd.id for jd in index.search(limit=15, **filters)] == [jd.id for jd in jds if matches(jd)][:15]
+
+
+def test_ranking_stays_consistent_after_updates_and_removals():
+    jds = make_jds(200, seed=11)
+    index = JDSearchIndex()
+    for jd in jds:
+        index.add(jd)
+    rng = random.Random(3)
+    removed = set(rng.sample([jd.id for jd in jds], 50))
+    for doc_id in removed:
+        index.remove(doc_id)
+    current = [jd for jd in jds if jd.id not in removed]
+    # 覆盖写入：同一 id 的新内容替换旧内容
+    replaced = current[0].model_copy(update={"jd_text": "负责推荐系统与 Kubernetes 云原生平台建设"})
+    index.add(replaced)
+    current[0] = replaced
+
+    assert len(index) == len(current)
+    for query in QUERIES:
+        scores = reference_scores(current, query)
+        results = index.search(query=query, limit=10)
+        assert not removed & {jd.id for jd in results}
+        assert_same_ranking(results, scores, [jd.id for jd in current], 10)
@@ -0,0 +1,153 @@
+"""持久化任务队列：崩溃后的接管、断点续跑、跨 worker 取消与租约保护"""
+import asyncio
+import time
+
+import pytest
+
+from app.jobs import journal as jr
+from app.jobs.journal import JobJournal
+from app.jobs.scheduler import JobScheduler
+from app.schemas import TaskStatus, TaskType
+from app.store import SQLiteBackend, TaskStore
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "app.db"), str(tmp_path / "app.jobs.db")
+
+
+def open_worker(paths, **kwargs):
+    store_path, journal_path = paths
+    journal = JobJournal(journal_path)
+    return JobScheduler(TaskStore(SQLiteBackend(store_path)), workers=2, journal=journal, **kwargs), journal
+
+
+async def wait_for_status(store: TaskStore, task_id: str, status: TaskStatus, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        task = store.get_task(task_id)
+        if task is not None and task.status == status:
+            return task
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"task {task_id} did not reach {status}: {store.get_task(task_id)}")
+
+
+def test_running_job_of_a_crashed_worker_resumes_from_checkpoint(paths):
+    async def main():
+        # 崩溃的 worker：认领后保存了断点，租约随即过期，再也不会续约
+        dead = JobJournal(paths[1])
+        dead.enqueue("t1", "count", "u1", 1, None, {"total": 5})
+        assert dead.claim("t1", "dead-owner", lease_seconds=0.01) is not None
+        assert dead.checkpoint("t1", "dead-owner", {"done": 3})
+        await asyncio.sleep(0.05)
+
+        scheduler, journal = open_worker(paths)
+        scheduler.task_store.create_task("t1", TaskType.OCR, "u1", status=TaskStatus.RUNNING)
+        seen = {}
+
+        async def count(ctx, payload):
+            seen.update(attempt=ctx.attempt, resume=ctx.resume_state)
+            return {"counted": list(range(ctx.resume_state.get("done", 0), payload["total"]))}
+
+        scheduler.register("count", count)
+        await scheduler.start()
+        try:
+            task = await wait_for_status(scheduler.task_store, "t1", TaskStatus.DONE)
+        finally:
+            await scheduler.stop()
+        assert seen == {"attempt": 2, "resume": {"done": 3}}
+        assert task.result == {"counted": [3, 4]}
+        assert journal.get("t1").status == jr.DONE
+
+    asyncio.run(main())
+
+
+def test_queued_jobs_left_by_a_previous_process_run_on_start(paths):
+    async def main():
+        JobJournal(paths[1]).enqueue("t2", "echo", "u1", 1, None, {"value": 7})
+        scheduler, _ = open_worker(paths)
+        scheduler.task_store.create_task("t2", TaskType.OCR, "u1")
+
+        async def echo(ctx, payload):
+            return payload
+
+        scheduler.register("echo", echo)
+        await scheduler.start()
+        try:
+            task = await wait_for_status(scheduler.task_store, "t2", TaskStatus.DONE)
+        finally:
+            await scheduler.stop()
+        assert task.result == {"value": 7}
+        assert scheduler.metrics()["recovered"] == 1
+
+    asyncio.run(main())
+
+
+def test_cancel_reaches_the_worker_holding_the_lease(paths):
+    async def main():
+        a, _ = open_worker(paths, lease_seconds=0.3)
+        b, _ = open_worker(paths, lease_seconds=0.3)
+        started = asyncio.Event()
+
+        async def wait_forever(ctx, payload):
+            started.set()
+            await asyncio.Event().wait()
+
+        a.register("wait", wait_forever)
+        b.register("wait", wait_forever)
+        await a.start()
+        try:
+            a.task_store.create_task("t3", TaskType.OCR, "u1")
+            a.submit("wait", "t3", "u1")
+            await asyncio.wait_for(started.wait(), 5)
+
+            # 任务在 A 上运行，B 只能经 jobs 表请求取消
+            assert b.cancel("t3")
+            await wait_for_status(b.task_store, "t3", TaskStatus.CANCELLED)
+            assert a.journal.get("t3").status == jr.CANCELLED
+        finally:
+            await a.stop()
+
+    asyncio.run(main())
+
+
+def test_stale_executor_cannot_finish_a_job_taken_over_by_another(paths):
+    journal = JobJournal(paths[1])
+    journal.enqueue("t4", "echo", "u1", 1, None, {})
+    assert journal.claim("t4", "old", lease_seconds=0.01) is not None
+    time.sleep(0.05)
+    entry = journal.claim("t4", "new", lease_seconds=30)
+    assert entry.attempts == 2
+    assert not journal.finish("t4", "old", jr.DONE)
+    assert not journal.checkpoint("t4", "old", {"x": 1})
+    assert journal.finish("t4", "new", jr.DONE)
+    assert journal.claim("t4", "third", lease_seconds=30) is None
+
+
+def test_job_is_abandoned_after_max_attempts(paths):
+    async def main():
+        journal = JobJournal(paths[1])
+        journal.enqueue("t5", "echo", "u1", 1, None, {})
+        for owner in ("w1", "w2"):
+            assert journal.claim("t5", owner, lease_seconds=0.01) is not None
+            await asyncio.sleep(0.05)
+
+        scheduler, _ = open_worker(paths, max_attempts=2)
+        scheduler.task_store.create_task("t5", TaskType.OCR, "u1", status=TaskStatus.RUNNING)
+        ran = []
+
+        async def echo(ctx, payload):
+            ran.append(ctx.attempt)
+            return payload
+
+        scheduler.register("echo", echo)
+        await scheduler.start()
+        try:
+            task = await wait_for_status(scheduler.task_store, "t5", TaskStatus.ERROR)
+        finally:
+            await scheduler.stop()
+        assert ran == []
+        assert "2次" in task.error
+        assert journal.get("t5").status == jr.FAILED
+
+    asyncio.run(main())
@@ -0,0 +1,42 @@
+"""源节流：哪些响应算限流信号、哪些计入 AIMD 的加速"""
+import httpx
+
+from app.adapters import PolitenessConfig, SourcePacer
+from app.adapters.politeness import BLOCKED, FORBIDDEN
+
+URL = "https://fe-api.zhaopin.com/c/i/sou"
+
+
+def respond(status: int, text: str = "{}", content_type: str = "application/json") -> httpx.Response:
+    return httpx.Response(status, headers={"content-type": content_type}, text=text, request=httpx.Request("GET", URL))
+
+
+def make_pacer() -> SourcePacer:
+    pacer = SourcePacer("zhaopin", PolitenessConfig(rate=2.0, cooldown=1.0))
+    pacer.bucket.rate = 1.0
+    return pacer
+
+
+def test_forbidden_and_block_pages_are_throttle_signals():
+    pacer = make_pacer()
+    pacer.observe(respond(403))
+    assert pacer.last_signal == FORBIDDEN
+    assert pacer.rate == 0.5
+
+    pacer = make_pacer()
+    pacer.observe(respond(200, "<html><body>请完成安全验证后继续访问</body></html>", "text/html; charset=utf-8"))
+    assert pacer.last_signal == BLOCKED
+    assert not pacer.available()
+
+
+def test_other_client_errors_do_not_speed_up():
+    pacer = make_pacer()
+    pacer.observe(respond(404))
+    pacer.observe(respond(400))
+    assert pacer.rate == 1.0
+    assert pacer.available()
+    assert pacer.metrics()["client_errors"] == 2
+    assert pacer.metrics()["successes"] == 0
+
+    pacer.observe(respond(200))
+    assert round(pacer.rate, 3) == 1.1
@@ -0,0 +1,196 @@
+"""SQLite 后端：多个 worker（各自一个连接）共用同一个库时的读穿缓存与失效"""
+from datetime import datetime, timedelta
+
+from app.schemas import JDResponse, JDSource, ResumeContacts, ResumeMetadata, TaskStatus, TaskType
+from app.store import JDStore, ResumeRecord, ResumeStore, SQLiteBackend, TaskStore
+
+
+def make_record(store: ResumeStore, user_id: str = "u1", title: str = "简历") -> ResumeRecord:
+    return ResumeRecord(
+        id=store.generate_id(),
+        user_id=user_id,
+        source="UPLOAD",
+        template_key=None,
+        title=title,
+        file_name=None,
+        mime_type=None,
+        raw_text="张三\n五年后端开发经验",
+        parsed_blocks=[],
+        skills=["Python"],
+        contacts=ResumeContacts(name="张三"),
+        metadata=ResumeMetadata(),
+    )
+
+
+def open_worker(path):
+    backend = SQLiteBackend(str(path))
+    return backend, ResumeStore(backend), TaskStore(backend)
+
+
+def test_resume_written_by_one_worker_is_visible_to_another(tmp_path):
+    path = tmp_path / "app.db"
+    a_backend, a, _ = open_worker(path)
+    b_backend, b, _ = open_worker(path)
+    try:
+        assert b.list_by_user("u1") == []  # B 先加载并缓存了空索引
+
+        record = a.create(make_record(a))
+        assert [r.id for r in b.list_by_user("u1")] == [record.id]
+        assert b.get(record.id).raw_text == record.raw_text
+
+        record.title = "改过的标题"
+        a.update(record)
+        assert b.get(record.id).title == "改过的标题"
+        assert b.latest("u1").id == record.id
+    finally:
+        a_backend.close()
+        b_backend.close()
+
+
+def test_own_writes_do_not_drop_the_local_cache(tmp_path):
+    backend, store, _ = open_worker(tmp_path / "app.db")
+    try:
+        record = store.create(make_record(store))
+        assert store.get(record.id) is record
+    finally:
+        backend.close()
+
+
+def test_resume_index_survives_reopen(tmp_path):
+    path = tmp_path / "app.db"
+    backend, store, _ = open_worker(path)
+    first = store.create(make_record(store, title="第一份"))
+    second = store.create(make_record(store, title="第二份"))
+    store.update(first)
+    backend.close()
+
+    backend, store, _ = open_worker(path)
+    try:
+        assert [r.id for r in store.list_by_user("u1")] == [second.id, first.id]
+        page, cursor = store.page_by_user("u1", None, 1, descending=True)
+        assert [r.id for r in page] == [first.id]
+        assert cursor is not None
+    finally:
+        backend.close()
+
+
+def test_same_jd_id_is_stored_per_user(tmp_path):
+    path = tmp_path / "app.db"
+    a_backend, b_backend = SQLiteBackend(str(path)), SQLiteBackend(str(path))
+    a, b = JDStore(a_backend), JDStore(b_backend)
+    try:
+        # 适配器给出的ID在源内稳定，两个用户保存同一职位时ID相同
+        for user_id, title in (("u1", "后端开发"), ("u2", "后端开发（复制）")):
+            a.create_jd(JDResponse(
+                id="zp_123", company="某公司", title=title, jd_text="负责后端开发",
+                source=JDSource.ZHAOPIN, created_at=datetime.utcnow(),
+            ), user_id)
+        assert b.get_jd("zp_123", "u1").title == "后端开发"
+        assert b.get_jd("zp_123", "u2").title == "后端开发（复制）"
+        assert [jd.title for jd in b.list_by_user("u1")] == ["后端开发"]
+    finally:
+        a_backend.close()
+        b_backend.close()
+
+
+def test_task_status_change_is_visible_to_another_worker(tmp_path):
+    path = tmp_path / "app.db"
+    a_backend, _, a = open_worker(path)
+    b_backend, _, b = open_worker(path)
+    try:
+        task = a.create_task(a.generate_id(), TaskType.OCR, "u1")
+        assert b.get_task(task.id).status == TaskStatus.QUEUED
+
+        a.update_task_status(task.id, TaskStatus.RUNNING, progress=40)
+        seen = b.get_task(task.id)
+        assert seen.status == TaskStatus.RUNNING
+        assert seen.progress == 40
+    finally:
+        a_backend.close()
+        b_backend.close()
+
+
+def test_other_worker_writes_only_touch_changed_records(tmp_path):
+    path = tmp_path / "app.db"
+    a_backend, a, a_tasks = open_worker(path)
+    b_backend, b, _ = open_worker(path)
+    try:
+        first = a.create(make_record(a, title="第一份"))
+        second = a.create(make_record(a, title="第二份"))
+        cached = b.get(first.id)
+        assert [r.id for r in b.list_by_user("u1")] == [first.id, second.id]
+
+        # 其他表的写入不影响简历缓存
+        a_tasks.create_task(a_tasks.generate_id(), TaskType.OCR, "u1")
+        assert b.get(first.id) is cached
+
+        # 只替换被修改的那份简历，并移到索引末尾
+        second.title = "第二份（改）"
+        a.update(second)
+        assert b.get(first.id) is cached
+        assert [r.title for r in b.list_by_user("u1")] == ["第一份", "第二份（改）"]
+        first.raw_text = "张三\n六年后端开发经验"
+        a.update(first)
+        assert b.latest("u1").raw_text == first.raw_text
+        assert [v.version for v in b.versions.list_versions(first.id)] == [1, 2]
+    finally:
+        a_backend.close()
+        b_backend.close()
+
+
+def test_overwritten_jd_is_reindexed_on_other_worker(tmp_path):
+    path = tmp_path / "app.db"
+    a_backend, b_backend = SQLiteBackend(str(path)), SQLiteBackend(str(path))
+    a, b = JDStore(a_backend), JDStore(b_backend)
+    try:
+        jd = JDResponse(
+            id="zp_1", company="某公司", title="后端开发", jd_text="负责后端开发",
+            source=JDSource.ZHAOPIN, created_at=datetime.utcnow(),
+        )
+        a.create_jd(jd, "u1")
+        assert [j.title for j in b.search_jd("u1", query="后端")] == ["后端开发"]
+
+        a.create_jd(jd.model_copy(update={"title": "数据工程师", "jd_text": "负责数仓建设"}), "u1")
+        assert b.search_jd("u1", query="后端") == []
+        assert [j.title for j in b.search_jd("u1", query="数仓")] == ["数据工程师"]
+        assert len(b.list_by_user("u1")) == 1
+    finally:
+        a_backend.close()
+        b_backend.close()
+
+
+def test_offloaded_result_written_by_other_worker(tmp_path):
+    path = tmp_path / "app.db"
+    a_backend, b_backend = SQLiteBackend(str(path)), SQLiteBackend(str(path))
+    a, b = TaskStore(a_backend, offload_bytes=16), TaskStore(b_backend, offload_bytes=16)
+    try:
+        task = a.create_task(a.generate_id(), TaskType.OCR, "u1")
+        assert b.list_by_user("u1")[0].status == TaskStatus.QUEUED
+
+        a.update_task_result(task.id, TaskStatus.DONE, result={"text": "x" * 100})
+        [seen] = b.list_by_user("u1")
+        assert seen.status == TaskStatus.DONE
+        assert seen.result == {"text": "x" * 100}
+        assert b.list_by_user("u1", status="QUEUED") == []
+    finally:
+        a_backend.close()
+        b_backend.close()
+
+
+def test_eviction_keeps_rows_until_ttl_purge(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "app.db"))
+    store = TaskStore(backend, ttl_seconds=60, max_entries=1)
+    try:
+        first = store.create_task(store.generate_id(), TaskType.OCR, "u1")
+        store.update_task_result(first.id, TaskStatus.DONE, result={"ok": True})
+        store.create_task(store.generate_id(), TaskType.OCR, "u1")
+        store._sweep(force=True)
+        assert first.id not in store._tasks  # 超出容量，只从内存回收
+        assert store.get_task(first.id).result == {"ok": True}
+
+        # 结束超过 TTL 后由清理任务删除后端的行
+        store._purge(datetime.utcnow() + timedelta(seconds=120), force=True)
+        assert backend.get("tasks", first.id) is None
+        assert store.stats()["purged_total"] == 1
+    finally:
+        backend.close()
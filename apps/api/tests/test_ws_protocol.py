@@ -0,0 +1,25 @@
+"""/ws/tasks 增量协议：部分结果只推送新增的项"""
+from app.ws_protocol import CODECS, MSGPACK_DELTA, negotiate, task_delta
+
+
+def test_growing_result_list_sends_only_new_items():
+    previous = {"status": "running", "progress": 20, "result": {"items": [{"i": 0}], "done": 1}}
+    current = {"status": "running", "progress": 40, "result": {"items": [{"i": 0}, {"i": 1}], "done": 2}}
+    assert task_delta(previous, current) == {
+        "progress": 40,
+        "result_append": {"items": [{"i": 1}]},
+        "result_set": {"done": 2},
+    }
+
+
+def test_rewritten_or_removed_result_is_sent_whole():
+    previous = {"result": {"items": [1, 2], "extra": True}}
+    assert task_delta(previous, {"result": {"items": [2, 1], "extra": True}}) == {"result_set": {"items": [2, 1]}}
+    assert task_delta(previous, {"result": {"items": [1, 2]}}) == {"result": {"items": [1, 2]}}
+    assert task_delta({"result": None}, {"result": {"a": 1}}) == {"result": {"a": 1}}
+
+
+def test_msgpack_delta_is_always_available():
+    assert negotiate(MSGPACK_DELTA, [])[0] is CODECS[MSGPACK_DELTA]
+    codec, subprotocol = negotiate(None, ["tasks.msgpack-delta.v1"])
+    assert codec.binary and subprotocol == "tasks.msgpack-delta.v1"
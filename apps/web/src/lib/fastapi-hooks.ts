@@ -55,7 +55,7 @@ export async function parseJD(input: { url?: string; text?: string }): Promise<J
         
         if (taskData.status === 'done' && taskData.result?.jd_results?.length > 0) {
           resolve(taskData.result.jd_results[0]);
-        } else if (taskData.status === 'error') {
+        } else if (taskData.status === 'error' || taskData.status === 'cancelled') {
           reject(new Error(taskData.error || 'JD解析失败'));
         } else {
           // 继续轮询
@@ -101,7 +101,7 @@ export async function runPipeline(resume_id: string, jd_id: string): Promise<Tas
           
           const optimizeTask = await optimizeResponse.json();
           resolve(optimizeTask);
-        } else if (taskData.status === 'error') {
+        } else if (taskData.status === 'error' || taskData.status === 'cancelled') {
           reject(new Error(taskData.error || '流水线执行失败'));
         } else {
           setTimeout(pollCommonality, 1000);
@@ -148,7 +148,7 @@ export async function getStudyPlan(resume_id: string): Promise<any> {
             headers: getHeaders()
           });
           resolve(await planResponse.json());
-        } else if (taskData.status === 'error') {
+        } else if (taskData.status === 'error' || taskData.status === 'cancelled') {
           reject(new Error(taskData.error || '学习计划生成失败'));
         } else {
           setTimeout(pollTask, 1000);
@@ -185,7 +185,7 @@ export async function getInterviewQA(resume_id: string): Promise<any> {
             headers: getHeaders()
           });
           resolve(await qaResponse.json());
-        } else if (taskData.status === 'error') {
+        } else if (taskData.status === 'error' || taskData.status === 'cancelled') {
           reject(new Error(taskData.error || '面试问答生成失败'));
         } else {
           setTimeout(pollTask, 1000);
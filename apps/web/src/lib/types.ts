@@ -75,7 +75,7 @@ export type Output = z.infer<typeof OutputSchema>;
 
 export const TaskSchema = z.object({
   id: z.string(),
-  status: z.enum(["queued", "running", "done", "error"]),
+  status: z.enum(["queued", "running", "done", "error", "cancelled"]),
   cost: z.number().nullable().optional(),
   latency_ms: z.number().nullable().optional(),
   output: OutputSchema.optional(),